@@ -426,6 +426,13 @@ function renderAuditStages(status = {}) {
   }).join('');
 }
 
+function formatEta(seconds) {
+  const s = Math.max(0, Math.round(seconds));
+  if (s >= 3600) return `${Math.floor(s / 3600)}h${String(Math.floor((s % 3600) / 60)).padStart(2, '0')}m`;
+  if (s >= 60) return `${Math.floor(s / 60)}m${String(s % 60).padStart(2, '0')}s`;
+  return `${s}s`;
+}
+
 function renderAuditProgress(status = {}) {
   const wrap = document.getElementById('auditProgressWrap');
   const phaseLabel = document.getElementById('auditProgressPhaseLabel');
@@ -473,7 +480,17 @@ function renderAuditProgress(status = {}) {
   percentLabel.textContent = `${boundedPercent.toFixed(1)}%`;
   
   if (hasNumbers) {
-    urlText.textContent = `URLs Processed: ${current.toLocaleString()} of ${total.toLocaleString()}`;
+    let text = `URLs Processed: ${current.toLocaleString()} of ${total.toLocaleString()}`;
+    // rate_per_sec / eta_seconds are moving averages reported by the stage (null until known)
+    const rate = Number(progress?.rate_per_sec);
+    const eta = progress?.eta_seconds;
+    if (Number.isFinite(rate) && rate > 0) {
+      text += ` · ${rate.toFixed(1)}/s`;
+    }
+    if (eta != null && Number.isFinite(Number(eta)) && current < total) {
+      text += ` · ~${formatEta(Number(eta))} left`;
+    }
+    urlText.textContent = text;
   } else {
     urlText.textContent = 'Processing...';
   }
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import codecs
 import json
+import math
 import re
+import subprocess
+import sys
+import time
 from collections import defaultdict
+from html.parser import HTMLParser
 from pathlib import Path
+from typing import Iterable
 
 import requests
 import urllib3
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -19,18 +25,25 @@ from audit_common import (
     AUDIT_DIR,
     CITIZENS_IMAGES_SCHEMA,
     CITIZENS_URLS_PATH,
-    allowed_image_extension,
-    is_allowed_audit_hostname,
-    is_tracking_or_analytics_url,
+    RecordWriter,
+    RowValidator,
+    UrlClassifier,
     compress_citizens_images,
     ensure_dirs,
+    json_dumps,
     normalize_url,
     read_url_list,
     read_url_list_from_source,
     safe_join,
-    validate_stage_output,
+    validate_url_domain,
     write_json,
 )
+from crawl_queue import DEFAULT_LEASE_SECONDS, CrawlQueue, default_worker_id
+from stage_data import StageData
+from stage_metrics import StageMetrics
+from stage_profiling import profile_checkpoint, profile_stage
+from stage_progress import ProgressTracker
+from stage_tracing import finish_trace, start_trace, trace_span
 
 HEADERS = {
     "User-Agent": (
@@ -46,10 +59,28 @@ HEADERS = {
 }
 
 
-def build_http_session() -> requests.Session:
+class TracedRetry(Retry):
+    """Retry whose backoff waits appear as "retry" spans in stage traces."""
+
+    def sleep(self, response=None) -> None:
+        with trace_span("retry", "backoff", attempt=len(self.history)):
+            super().sleep(response)
+
+
+def retry_count(resp: requests.Response) -> int:
+    """Attempts urllib3 retried before this response (they never reach session hooks)."""
+    retries = getattr(resp.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def build_http_session(metrics: StageMetrics | None = None) -> requests.Session:
     session = requests.Session()
     session.headers.update(HEADERS)
-    retry = Retry(
+    if metrics is not None:
+        # Called once per response, redirect hops included; the adapter retries
+        # internally, so the attempts before a response come from its retry history
+        session.hooks["response"].append(lambda resp, *args, **kwargs: metrics.request(count=1 + retry_count(resp)))
+    retry = TracedRetry(
         total=3,
         connect=3,
         read=3,
@@ -65,9 +96,25 @@ def build_http_session() -> requests.Session:
 
 CHECKPOINT_PATH = AUDIT_DIR / "citizens_crawl_checkpoint.json"
 CHECKPOINT_VERSION = 1
+QUEUE_PATH = AUDIT_DIR / "citizens_crawl_queue.sqlite"
+REDIRECT_MAP_PATH = AUDIT_DIR / "citizens_redirect_map.json"
 SAVE_EVERY_PAGES = 20
-PROGRESS_PREFIX = "AUDIT_PROGRESS "
+# Queue workers re-read the shared totals this often (URLs or seconds, whichever
+# comes first); in between, their own completions are added to the last totals
+QUEUE_TOTALS_EVERY_URLS = 50
+QUEUE_TOTALS_EVERY_SECONDS = 5.0
 VERBOSE = False  # Set via --verbose flag
+CSS_URL_RE = re.compile(r"url\((['\"]?)(.*?)\1\)", flags=re.IGNORECASE)
+CSS_IMPORT_RE = re.compile(r"@import\s+(?:url\(\s*)?(['\"]?)([^'\")\s;]+)\1", flags=re.IGNORECASE)
+CSS_FONT_FACE_RE = re.compile(r"@font-face\s*{[^}]*}", flags=re.IGNORECASE)
+CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", flags=re.IGNORECASE)
+MAX_IMPORT_DEPTH = 4
+# A stylesheet that failed to load (or imports one that did) is retried after this long
+STYLESHEET_RETRY_SECONDS = 60.0
+MAX_PAGE_BYTES = 5 * 1024 * 1024  # Override with --max-page-bytes
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_progress = ProgressTracker("01_crawl_citizens_images.py")
 
 
 def emit_progress(
@@ -77,6 +124,8 @@ def emit_progress(
     resumed: bool,
     images_discovered: int = 0,
     images_pending: int = 0,
+    errors: int = 0,
+    bytes_downloaded: int = 0,
 ) -> None:
     percent = round((current / total) * 100, 2) if total > 0 else 0
     payload = {
@@ -88,13 +137,25 @@ def emit_progress(
         "resumed": resumed,
         "images_discovered": images_discovered,
         "images_pending": images_pending,
+        # Running totals for monitoring (pages that failed, page bytes read)
+        "errors": errors,
+        "bytes_downloaded": bytes_downloaded,
         # Clearer aliases for popup rendering
         "urls_completed": current,
         "urls_total": total,
         "images_detected": images_discovered,
         "images_remaining": images_pending,
     }
-    print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _progress.emit(payload)
+
+
+def page_totals(page_rows: Iterable[dict]) -> tuple[int, int]:
+    """(pages that failed, page body bytes read) for progress reporting."""
+    errors = bytes_read = 0
+    for row in page_rows:
+        errors += row.get("status") == "error"
+        bytes_read += row.get("body_bytes") or 0
+    return errors, bytes_read
 
 
 def load_checkpoint() -> tuple[set[str], list[dict], list[dict]]:
@@ -118,16 +179,17 @@ def load_checkpoint() -> tuple[set[str], list[dict], list[dict]]:
 
 
 def save_checkpoint(total_urls: int, processed_urls: set[str], page_rows: list[dict], image_rows: list[dict]) -> None:
-    write_json(
-        CHECKPOINT_PATH,
-        {
-            "version": CHECKPOINT_VERSION,
-            "total_urls": total_urls,
-            "processed_urls": sorted(processed_urls),
-            "page_rows": page_rows,
-            "image_rows": image_rows,
-        },
-    )
+    with trace_span("write", "checkpoint"):
+        write_json(
+            CHECKPOINT_PATH,
+            {
+                "version": CHECKPOINT_VERSION,
+                "total_urls": total_urls,
+                "processed_urls": sorted(processed_urls),
+                "page_rows": page_rows,
+                "image_rows": image_rows,
+            },
+        )
 
 
 def materialize_image_rows(image_key_set: set[tuple[str, str, str]]) -> list[dict]:
@@ -141,86 +203,510 @@ def materialize_image_rows(image_key_set: set[tuple[str, str, str]]) -> list[dic
     ]
 
 
-def parse_images_from_html(page_url: str, html: str) -> set[str]:
-    soup = BeautifulSoup(html, "html.parser")
+# Verbose log labels per classifier verdict
+VERDICT_LABELS = {
+    "data_uri": "⊘ Skipped (data URI)",
+    "tracking": "⊘ Skipped (tracking)",
+    "hostname": "⊘ Skipped (hostname not allowed)",
+    "extension": "✗ Rejected (extension)",
+    "invalid": "✗ Rejected (invalid URL)",
+}
+
+URL_CLASSIFIER = UrlClassifier()
+
+
+def split_srcset(srcset: str) -> list[str]:
+    return [part.strip().split(" ")[0] for part in srcset.split(",")]
+
+
+class ImageCandidateParser(HTMLParser):
+    """
+    Incremental extractor for image references and stylesheet links.
+
+    Chunks can be fed while the page is still downloading.  Tags are handled
+    by the stdlib tokenizer (the same one BeautifulSoup's "html.parser" uses)
+    and CSS url()/@import references are scanned from the raw text with a
+    small carry-over window so matches spanning chunk boundaries are kept.
+    """
+
+    CSS_CARRY_CHARS = 2048
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tag_candidates: list[tuple[str, str]] = []
+        self.stylesheet_hrefs: list[str] = []
+        self.img_count = 0
+        self._css_urls: dict[int, str] = {}
+        self._css_imports: dict[int, str] = {}
+        self._css_tail = ""
+        self._css_offset = 0  # absolute position of _css_tail[0]
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag not in ("img", "source", "link"):
+            return
+        attr = {name: value or "" for name, value in attrs}
+        if tag == "img":
+            self.img_count += 1
+            # Check multiple attributes (modern sites use lazy loading)
+            src = (
+                attr.get("src") or 
+                attr.get("data-src") or 
+                attr.get("data-lazy-src") or 
+                attr.get("data-original") or
+                attr.get("data-srcset") or
+                attr.get("data-lazy") or
+                attr.get("data-raw")
+            )
+            if src:
+                self.tag_candidates.append(("img", src))
+            srcset = attr.get("srcset") or attr.get("data-srcset")
+            if srcset:
+                self.tag_candidates.extend(("srcset", c) for c in split_srcset(srcset))
+        elif tag == "source":
+            # <picture> <source> elements
+            srcset = attr.get("srcset") or attr.get("data-srcset")
+            if srcset:
+                self.tag_candidates.extend(("picture", c) for c in split_srcset(srcset))
+        elif "stylesheet" in attr.get("rel", "").lower().split() and attr.get("href"):
+            self.stylesheet_hrefs.append(attr["href"])
+
+    def feed(self, data: str) -> None:
+        self._scan_css(data)
+        super().feed(data)
+
+    def close(self) -> None:
+        self._scan_css("", final=True)
+        super().close()
+
+    def _scan_css(self, data: str, final: bool = False) -> None:
+        text = self._css_tail + data
+        # Matches ending near the chunk edge may be cut short (e.g. "@import url"
+        # before the target arrives); leave them for the next chunk.
+        safe_end = len(text) if final else len(text) - self.CSS_CARRY_CHARS
+        keep_from = max(safe_end, 0)
+        for pattern, found in ((CSS_URL_RE, self._css_urls), (CSS_IMPORT_RE, self._css_imports)):
+            for match in pattern.finditer(text):
+                if match.end() <= safe_end:
+                    found.setdefault(self._css_offset + match.start(), match.group(2))
+                else:
+                    keep_from = min(keep_from, match.start())
+        self._css_tail = text[keep_from:]
+        self._css_offset += keep_from
+
+    def candidates(self) -> list[tuple[str, str]]:
+        """Return (source, raw_candidate) pairs for every image reference seen so far."""
+        # @import targets are stylesheets, handled by StylesheetCache
+        imports = set(self._css_imports.values())
+        css = [("CSS", c) for _, c in sorted(self._css_urls.items()) if c not in imports]
+        return self.tag_candidates + css
+
+    def stylesheet_links(self, page_url: str) -> list[str]:
+        """Return resolved URLs of stylesheets linked or @imported by the page."""
+        links: list[str] = []
+        for href in self.stylesheet_hrefs + [t for _, t in sorted(self._css_imports.items())]:
+            resolved = safe_join(page_url, href)
+            if resolved and resolved not in links:
+                links.append(resolved)
+        return links
+
+
+def declared_charset(content_type: str | None) -> str | None:
+    match = CHARSET_RE.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def page_encoding(resp: requests.Response, first_chunk: bytes) -> str:
+    """Pick the body encoding up front: header charset, then <meta charset>, then UTF-8.
+
+    Never falls back to requests' charset detection, which has to see the
+    whole body.
+    """
+    for candidate in (
+        declared_charset(resp.headers.get("Content-Type")),
+        declared_charset(first_chunk[:4096].decode("ascii", errors="ignore")),
+    ):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return "utf-8"
+
+
+def read_capped_text(resp: requests.Response, max_bytes: int) -> tuple[str, int]:
+    """Read a (streamed) response body up to max_bytes and decode it like a page. Returns (text, bytes_read)."""
+    body = bytearray()
+    for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+        body += chunk
+        if max_bytes and len(body) >= max_bytes:
+            del body[max_bytes:]
+            break
+    return bytes(body).decode(page_encoding(resp, bytes(body)), errors="replace"), len(body)
+
+
+def stream_page_body(resp: requests.Response, parser: HTMLParser, max_bytes: int) -> tuple[int, bool]:
+    """Decode the body incrementally into parser. Returns (bytes_read, truncated)."""
+    decoder = None
+    bytes_read = 0
+    truncated = False
+    for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+        if not chunk:
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(page_encoding(resp, chunk))(errors="replace")
+        if max_bytes and bytes_read + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - bytes_read]
+            truncated = True
+        bytes_read += len(chunk)
+        with trace_span("parse", "html"):
+            parser.feed(decoder.decode(chunk))
+        if truncated:
+            break
+    with trace_span("parse", "html"):
+        if decoder is not None:
+            parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    return bytes_read, truncated
+
+
+class StylesheetCache:
+    """
+    Site-wide cache of image URLs referenced by external stylesheets.
+
+    Every stylesheet (including @import chains) is fetched and parsed at most
+    once per crawl; pages linking it reuse the cached image set.  Only
+    stylesheets on whitelisted domains are fetched, and @font-face blocks are
+    skipped so web fonts are not mistaken for images.  Failed fetches (and
+    stylesheets whose @import chain hit one) are only cached for
+    STYLESHEET_RETRY_SECONDS, so a transient error does not hide images for
+    the rest of the crawl.
+    """
+
+    def __init__(self, session: requests.Session, timeout: int):
+        self.session = session
+        self.timeout = timeout
+        # url -> (images, expires_at); successes never expire
+        self._images: dict[str, tuple[frozenset[str], float]] = {}
+        self.stats = {"fetched": 0, "hits": 0, "errors": 0, "bytes": 0}
+
+    def images_for(self, stylesheet_urls: list[str]) -> set[str]:
+        images: set[str] = set()
+        for url in stylesheet_urls:
+            images.update(self._load(url, depth=0, chain=())[0])
+        return images
+
+    def _load(self, url: str, depth: int, chain: tuple[str, ...]) -> tuple[frozenset[str], bool]:
+        """Images of the stylesheet and its imports, and whether all of them loaded."""
+        cached = self._images.get(url)
+        if cached is not None and time.monotonic() < cached[1]:
+            self.stats["hits"] += 1
+            return cached[0], cached[1] == math.inf
+        if url in chain or depth > MAX_IMPORT_DEPTH or not validate_url_domain(url):
+            return frozenset(), True
+
+        failed = False
+        try:
+            with trace_span("fetch", "stylesheet", url=url):
+                resp = self.session.get(url, timeout=self.timeout, verify=False, stream=True)
+                self.stats["fetched"] += 1
+                with resp:
+                    if not resp.ok:
+                        self.stats["errors"] += 1
+                        failed = True
+                        css = ""
+                    else:
+                        css, nbytes = read_capped_text(resp, MAX_PAGE_BYTES)
+                        self.stats["bytes"] += nbytes
+        except Exception as err:
+            self.stats["errors"] += 1
+            if VERBOSE:
+                print(f"    ✗ Stylesheet fetch failed: {url} ({err})")
+            failed = True
+            css = ""
+
+        with trace_span("parse", "stylesheet"):
+            css = CSS_FONT_FACE_RE.sub("", css)
+            imports = [target for _, target in CSS_IMPORT_RE.findall(css)]
+            # url() inside a stylesheet is relative to the stylesheet, not the page
+            images = URL_CLASSIFIER.accept_many(url, (c for _, c in CSS_URL_RE.findall(css) if c not in imports))
+        for target in imports:
+            imported = safe_join(url, target)
+            if imported:
+                imported_images, complete = self._load(imported, depth + 1, chain + (url,))
+                images.update(imported_images)
+                failed = failed or not complete
+
+        result = frozenset(images)
+        self._images[url] = (result, time.monotonic() + STYLESHEET_RETRY_SECONDS if failed else math.inf)
+        if VERBOSE:
+            print(f"    ✓ Stylesheet {url}: {len(result)} images")
+        return result, not failed
+
+
+def images_from_parser(
+    page_url: str, parser: ImageCandidateParser, stylesheets: StylesheetCache | None = None
+) -> set[str]:
+    candidates = parser.candidates()
+    stylesheet_images = stylesheets.images_for(parser.stylesheet_links(page_url)) if stylesheets else set()
+
+    if not VERBOSE:
+        return URL_CLASSIFIER.accept_many(page_url, (c for _, c in candidates)) | stylesheet_images
+
+    print(f"  DEBUG: Found {parser.img_count} <img> tags on {page_url}")
+    print(f"  DEBUG: Found {sum(1 for source, _ in candidates if source == 'CSS')} CSS url() references")
     images: set[str] = set()
-    img_tags = soup.find_all("img")
-    
-    if VERBOSE:
-        print(f"  DEBUG: Found {len(img_tags)} <img> tags on {page_url}")
-
-    for img in img_tags:
-        # Check multiple attributes (modern sites use lazy loading)
-        src = (
-            img.get("src") or 
-            img.get("data-src") or 
-            img.get("data-lazy-src") or 
-            img.get("data-original") or
-            img.get("data-srcset") or
-            img.get("data-lazy") or
-            img.get("data-raw")
-        )
-        if src and not src.startswith("data:"):  # Skip data URIs
-            resolved = safe_join(page_url, src)
-            if resolved and is_tracking_or_analytics_url(resolved):
-                if VERBOSE:
-                    print(f"    ⊘ Skipped (tracking): {resolved}")
-            elif resolved and not is_allowed_audit_hostname(resolved):
-                if VERBOSE:
-                    print(f"    ⊘ Skipped (hostname not allowed): {resolved}")
-            elif resolved and allowed_image_extension(resolved):
-                images.add(resolved)
-                if VERBOSE:
-                    print(f"    ✓ Accepted: {resolved}")
-            elif resolved and VERBOSE:
-                print(f"    ✗ Rejected (extension): {resolved}")
-        elif src and VERBOSE and src.startswith("data:"):
-            print(f"    ⊘ Skipped (data URI): {src[:50]}...")
-
-        srcset = img.get("srcset") or img.get("data-srcset")
-        if srcset:
-            for part in srcset.split(","):
-                candidate = part.strip().split(" ")[0]
-                if candidate and not candidate.startswith("data:"):
-                    resolved = safe_join(page_url, candidate)
-                    if resolved and not is_tracking_or_analytics_url(resolved) and is_allowed_audit_hostname(resolved) and allowed_image_extension(resolved):
-                        images.add(resolved)
-                        if VERBOSE:
-                            print(f"    ✓ Accepted (srcset): {resolved}")
-    
-    # Check <picture> <source> elements
-    for source in soup.find_all("source"):
-        srcset = source.get("srcset") or source.get("data-srcset")
-        if srcset:
-            for part in srcset.split(","):
-                candidate = part.strip().split(" ")[0]
-                if candidate and not candidate.startswith("data:"):
-                    resolved = safe_join(page_url, candidate)
-                    if resolved and not is_tracking_or_analytics_url(resolved) and is_allowed_audit_hostname(resolved) and allowed_image_extension(resolved):
-                        images.add(resolved)
-                        if VERBOSE:
-                            print(f"    ✓ Accepted (picture): {resolved}")
-
-    # Also check for background images in style attributes and CSS
-    style_urls = re.findall(r"url\((['\"]?)(.*?)\1\)", html, flags=re.IGNORECASE)
-    if VERBOSE and style_urls:
-        print(f"  DEBUG: Found {len(style_urls)} CSS url() references")
-    for _, candidate in style_urls:
-        if candidate and not candidate.startswith("data:"):
-            resolved = safe_join(page_url, candidate)
-            if resolved and not is_tracking_or_analytics_url(resolved) and is_allowed_audit_hostname(resolved) and allowed_image_extension(resolved):
-                images.add(resolved)
-                if VERBOSE:
-                    print(f"    ✓ Accepted (CSS): {resolved}")
-    
-    if VERBOSE:
-        print(f"  DEBUG: Total unique images found: {len(images)}")
+    for source, candidate in candidates:
+        resolved, verdict = URL_CLASSIFIER.classify(page_url, candidate)
+        if verdict == UrlClassifier.ACCEPTED:
+            images.add(resolved)
+            label = "✓ Accepted" if source == "img" else f"✓ Accepted ({source})"
+            print(f"    {label}: {resolved}")
+        elif verdict in VERDICT_LABELS:
+            print(f"    {VERDICT_LABELS[verdict]}: {resolved or candidate[:50]}")
+    images |= stylesheet_images
+    print(f"  DEBUG: Total unique images found: {len(images)} ({len(stylesheet_images)} from stylesheets)")
+    print(f"  DEBUG: Classifier cache {URL_CLASSIFIER.cache_info()}")
 
     return images
 
 
-def crawl(urls: list[str], timeout: int, resume: bool) -> tuple[list[dict], list[dict], bool]:
-    session = build_http_session()
+def parse_images_from_html(
+    page_url: str, html: str, stylesheets: StylesheetCache | None = None
+) -> set[str]:
+    parser = ImageCandidateParser()
+    parser.feed(html)
+    parser.close()
+    return images_from_parser(page_url, parser, stylesheets)
+
+
+def new_page_row(url: str) -> dict:
+    return {
+        "url": url,
+        "status": "ok",
+        "http_status": None,
+        "final_url": None,
+        "redirect_count": 0,
+        "redirect_hops": [],
+        "error": None,
+        "image_count": 0,
+        "dedupe": None,
+        "body_bytes": None,
+        "truncated": False,
+    }
+
+
+def redirect_hops_from_history(url: str, history: list[requests.Response]) -> list[dict]:
+    hops = []
+    previous_url = url
+    for hop in history:
+        hop_from = normalize_url(previous_url)
+        hop_response_url = normalize_url(hop.url)
+        location = hop.headers.get("Location")
+        hop_to = normalize_url(safe_join(hop_response_url, location)) if location else hop_response_url
+        hops.append(
+            {
+                "status_code": hop.status_code,
+                "from_url": hop_from,
+                "response_url": hop_response_url,
+                "location": location,
+                "to_url": hop_to,
+            }
+        )
+        previous_url = hop_to
+    return hops
+
+
+def load_redirect_map() -> dict[str, dict]:
+    if not REDIRECT_MAP_PATH.exists():
+        return {}
+    try:
+        raw = json.loads(REDIRECT_MAP_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def save_redirect_map(page_rows: list[dict]) -> None:
+    """Merge this crawl's successful redirects into the persisted redirect map."""
+    redirect_map = load_redirect_map()
+    for row in page_rows:
+        if row.get("status") != "ok" or not row.get("final_url"):
+            continue
+        url = normalize_url(row["url"])
+        if row.get("redirect_count"):
+            redirect_map[url] = {
+                "final_url": row["final_url"],
+                "http_status": row.get("http_status"),
+                "redirect_hops": row.get("redirect_hops", []),
+            }
+        else:
+            redirect_map.pop(url, None)
+    write_json(REDIRECT_MAP_PATH, redirect_map)
+
+
+class RedirectDeduper:
+    """
+    Reuse the image set of an already-parsed final page for URLs that redirect to it.
+
+    Lookups come from the persisted redirect map of earlier runs. By default a
+    HEAD request confirms the URL still lands on the same final page before
+    its image set is reused; with trust_map=True the stored hops are reused
+    without any request. A full GET whose final URL was already parsed also
+    skips the parse.
+    """
+
+    def __init__(self, redirect_map: dict[str, dict], trust_map: bool = False):
+        self.redirect_map = redirect_map
+        self.trust_map = trust_map
+        self.parsed: dict[str, list[str]] = {}
+        self.stats = {"head_confirmed": 0, "map_reused": 0, "final_url_reused": 0, "head_mismatch": 0}
+
+    def seed(self, page_rows: list[dict], image_rows: list[dict]) -> None:
+        """Rebuild the parsed-page cache from checkpointed rows."""
+        images_by_final: dict[str, set[str]] = defaultdict(set)
+        for row in image_rows:
+            images_by_final[row["resolved_page_url"]].add(row["image_url"])
+        for row in page_rows:
+            final_url = row.get("final_url")
+            if row.get("status") == "ok" and final_url:
+                self.parsed[final_url] = sorted(images_by_final.get(final_url, ()))
+
+    def images_for(self, final_url: str) -> list[str] | None:
+        return self.parsed.get(final_url)
+
+    def remember(self, final_url: str, images: list[str]) -> None:
+        self.parsed[final_url] = images
+
+    def try_reuse(self, session: requests.Session, url: str, timeout: int) -> tuple[dict, list[str]] | None:
+        known = self.redirect_map.get(normalize_url(url))
+        if not known or known.get("final_url") not in self.parsed:
+            return None
+        final_url = known["final_url"]
+
+        row = new_page_row(url)
+        if self.trust_map:
+            hops = known.get("redirect_hops", [])
+            row["http_status"] = known.get("http_status")
+            row["dedupe"] = "redirect_map"
+            self.stats["map_reused"] += 1
+        else:
+            try:
+                resp = session.head(
+                    url,
+                    headers={"Referer": "https://www.citizensbank.com/"},
+                    timeout=timeout,
+                    allow_redirects=True,
+                    verify=False,
+                )
+            except Exception:
+                return None
+            if not resp.ok or normalize_url(resp.url) != final_url:
+                self.stats["head_mismatch"] += 1
+                return None
+            hops = redirect_hops_from_history(url, resp.history)
+            row["http_status"] = resp.status_code
+            row["dedupe"] = "head"
+            self.stats["head_confirmed"] += 1
+
+        images = self.parsed[final_url]
+        row["final_url"] = final_url
+        row["redirect_hops"] = hops
+        row["redirect_count"] = len(hops)
+        row["image_count"] = len(images)
+        return row, images
+
+
+def crawl_page(
+    session: requests.Session,
+    url: str,
+    timeout: int,
+    stylesheets: StylesheetCache | None = None,
+    redirects: RedirectDeduper | None = None,
+    max_page_bytes: int = MAX_PAGE_BYTES,
+) -> tuple[dict, list[str]]:
+    """Fetch one page and return its page row plus the sorted image URLs found on it.
+
+    The body is streamed into the incremental parser and capped at
+    max_page_bytes (0 = unlimited); capped pages are flagged "truncated".
+    """
+    if redirects:
+        reused = redirects.try_reuse(session, url, timeout)
+        if reused:
+            return reused
+
+    row = new_page_row(url)
+    images: list[str] = []
+    try:
+        request_headers = {"Referer": "https://www.citizensbank.com/"}
+        resp = session.get(
+            url, 
+            headers=request_headers, 
+            timeout=timeout, 
+            allow_redirects=True,
+            verify=False,  # Disable SSL verification to avoid 443 errors
+            stream=True,
+        )
+        with resp:
+            row["http_status"] = resp.status_code
+            row["final_url"] = normalize_url(resp.url)
+
+            hops = redirect_hops_from_history(url, resp.history)
+            row["redirect_hops"] = hops
+            row["redirect_count"] = len(hops)
+
+            if not resp.ok:
+                row["status"] = "error"
+                row["error"] = f"HTTP_{resp.status_code}"
+            else:
+                final_url = normalize_url(resp.url)
+                cached = redirects.images_for(final_url) if redirects else None
+                if cached is not None:
+                    # Body not needed: the final page was already parsed
+                    images = cached
+                    row["dedupe"] = "final_url"
+                    redirects.stats["final_url_reused"] += 1
+                else:
+                    parser = ImageCandidateParser()
+                    row["body_bytes"], row["truncated"] = stream_page_body(resp, parser, max_page_bytes)
+                    images = sorted(images_from_parser(final_url, parser, stylesheets))
+                    if redirects:
+                        redirects.remember(final_url, images)
+                row["image_count"] = len(images)
+    except Exception as err:
+        row["status"] = "error"
+        row["error"] = str(err)
+        images = []
+
+    return row, images
+
+
+def record_cache_stats(
+    metrics: StageMetrics, stylesheet_cache: StylesheetCache | None, redirects: RedirectDeduper, pages_crawled: int
+) -> None:
+    """Add a crawl's stylesheet cache counts and bytes and its page reuse (redirect dedupe) counts to metrics."""
+    if stylesheet_cache:
+        metrics.cache("stylesheets", True, stylesheet_cache.stats["hits"])
+        metrics.cache("stylesheets", False, stylesheet_cache.stats["fetched"])
+        metrics.add_bytes(stylesheet_cache.stats["bytes"])
+    stats = redirects.stats
+    reused = stats["head_confirmed"] + stats["map_reused"] + stats["final_url_reused"]
+    metrics.cache("pages", True, reused)
+    metrics.cache("pages", False, pages_crawled - reused)
+
+
+def crawl(
+    urls: list[str],
+    timeout: int,
+    resume: bool,
+    stylesheets: bool = True,
+    trust_redirect_map: bool = False,
+    max_page_bytes: int = MAX_PAGE_BYTES,
+    metrics: StageMetrics | None = None,
+) -> tuple[list[dict], list[dict], bool]:
+    metrics = metrics if metrics is not None else StageMetrics(Path(__file__).name)
+    session = build_http_session(metrics)
+    stylesheet_cache = StylesheetCache(session, timeout) if stylesheets else None
+    redirects = RedirectDeduper(load_redirect_map(), trust_map=trust_redirect_map)
     resumed = False
     if resume:
         processed_urls, page_rows, image_rows = load_checkpoint()
@@ -236,6 +722,9 @@ def crawl(urls: list[str], timeout: int, resume: bool) -> tuple[list[dict], list
         if x.get("page_url") and x.get("resolved_page_url") and x.get("image_url")
     }
 
+    redirects.seed(page_rows, image_rows)
+    errors, bytes_downloaded = page_totals(page_by_url.values())
+
     emit_progress(
         current=len(processed_urls),
         total=total_urls,
@@ -243,74 +732,30 @@ def crawl(urls: list[str], timeout: int, resume: bool) -> tuple[list[dict], list
         resumed=resumed,
         images_discovered=len(image_key_set),
         images_pending=max(0, len(image_key_set)),
+        errors=errors,
+        bytes_downloaded=bytes_downloaded,
     )
 
     dirty_since_save = 0
+    crawled = 0
     for idx, url in enumerate(urls, start=1):
         normalized_url = normalize_url(url)
         if normalized_url in processed_urls:
             continue
 
-        row = {
-            "url": url,
-            "status": "ok",
-            "http_status": None,
-            "final_url": None,
-            "redirect_count": 0,
-            "redirect_hops": [],
-            "error": None,
-            "image_count": 0,
-        }
-        try:
-            request_headers = {"Referer": "https://www.citizensbank.com/"}
-            resp = session.get(
-                url, 
-                headers=request_headers, 
-                timeout=timeout, 
-                allow_redirects=True,
-                verify=False  # Disable SSL verification to avoid 443 errors
-            )
-            # Set encoding explicitly for consistent text parsing
-            resp.encoding = resp.encoding or "utf-8"
-            row["http_status"] = resp.status_code
-            row["final_url"] = normalize_url(resp.url)
-
-            hops = []
-            previous_url = url
-            for hop in resp.history:
-                hop_from = normalize_url(previous_url)
-                hop_response_url = normalize_url(hop.url)
-                location = hop.headers.get("Location")
-                hop_to = normalize_url(safe_join(hop_response_url, location)) if location else hop_response_url
-                hops.append(
-                    {
-                        "status_code": hop.status_code,
-                        "from_url": hop_from,
-                        "response_url": hop_response_url,
-                        "location": location,
-                        "to_url": hop_to,
-                    }
-                )
-                previous_url = hop_to
-
-            row["redirect_hops"] = hops
-            row["redirect_count"] = len(hops)
-
-            if not resp.ok:
-                row["status"] = "error"
-                row["error"] = f"HTTP_{resp.status_code}"
-            else:
-                final_url = normalize_url(resp.url)
-                images = sorted(parse_images_from_html(final_url, resp.text))
-                row["image_count"] = len(images)
-                for image_url in images:
-                    image_key_set.add((url, final_url, image_url))
-        except Exception as err:
-            row["status"] = "error"
-            row["error"] = str(err)
+        # The page span includes its body download; html parse spans nest inside it
+        with trace_span("fetch", "page", url=url):
+            row, images = crawl_page(session, url, timeout, stylesheet_cache, redirects, max_page_bytes)
+        for image_url in images:
+            image_key_set.add((url, row["final_url"], image_url))
 
         page_by_url[normalized_url] = row
         processed_urls.add(normalized_url)
+        crawled += 1
+        errors += row["status"] == "error"
+        bytes_downloaded += row["body_bytes"] or 0
+        metrics.add_bytes(row["body_bytes"] or 0)
+        _progress.record(url, row["status"] == "error", row["body_bytes"] or 0)
 
         page_rows = list(page_by_url.values())
 
@@ -325,6 +770,8 @@ def crawl(urls: list[str], timeout: int, resume: bool) -> tuple[list[dict], list
             resumed=resumed,
             images_discovered=images_discovered,
             images_pending=images_pending,
+            errors=errors,
+            bytes_downloaded=bytes_downloaded,
         )
 
         if dirty_since_save >= SAVE_EVERY_PAGES:
@@ -342,71 +789,173 @@ def crawl(urls: list[str], timeout: int, resume: bool) -> tuple[list[dict], list
     page_rows = list(page_by_url.values())
     image_rows = materialize_image_rows(image_key_set)
 
+    if stylesheet_cache:
+        print(f"[Stylesheets] {stylesheet_cache.stats}")
+    print(f"[Redirects] {redirects.stats}")
+    record_cache_stats(metrics, stylesheet_cache, redirects, crawled)
+
     save_checkpoint(total_urls=total_urls, processed_urls=processed_urls, page_rows=page_rows, image_rows=image_rows)
     return page_rows, image_rows, resumed
 
 
-def main() -> None:
-    global VERBOSE
-    parser = argparse.ArgumentParser(description="Crawl citizensbank URLs and extract served image URLs")
-    parser.add_argument("--urls", type=Path, default=None, help="Path to URL list file (local) - only used with --legacy")
-    parser.add_argument("--legacy", action="store_true", help="Use legacy file lookup instead of config (requires --urls)")
-    parser.add_argument("--timeout", type=int, default=20)
-    parser.add_argument("--no-resume", dest="resume", action="store_false", help="Ignore checkpoint and start stage 01 from scratch")
-    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging for debugging")
-    parser.set_defaults(resume=True)
-    args = parser.parse_args()
-    VERBOSE = args.verbose
+def run_queue_worker(
+    queue_path: Path,
+    timeout: int,
+    batch_size: int,
+    lease_seconds: int,
+    stylesheets: bool = True,
+    trust_redirect_map: bool = False,
+    max_page_bytes: int = MAX_PAGE_BYTES,
+    metrics: StageMetrics | None = None,
+) -> int:
+    """Claim URL batches from the shared queue until it is drained. Returns pages crawled."""
+    metrics = metrics if metrics is not None else StageMetrics(Path(__file__).name)
+    session = build_http_session(metrics)
+    stylesheet_cache = StylesheetCache(session, timeout) if stylesheets else None
+    # Each worker dedupes within its own batches; the map is only written by the merge step.
+    redirects = RedirectDeduper(load_redirect_map(), trust_map=trust_redirect_map)
+    worker_id = default_worker_id()
+    crawled = 0
+    # This worker's own totals
+    errors = bytes_downloaded = 0
+    with CrawlQueue(queue_path, lease_seconds=lease_seconds) as queue:
+        print(f"[Queue] Worker {worker_id} attached to {queue_path}")
+        # Queue-wide totals as last read, plus this worker's pages and images since
+        counts = queue.counts()
+        images_total = queue.image_count()
+        since_pages = since_images = 0
+        counts_read_at = time.monotonic()
+        try:
+            while True:
+                batch = queue.claim(worker_id, batch_size)
+                if not batch:
+                    if queue.is_drained():
+                        break
+                    # Other workers hold the remaining leases; wait for them to
+                    # finish or for their leases to expire.
+                    time.sleep(min(5, lease_seconds))
+                    continue
 
-    ensure_dirs()
-    
-    # Default: Use config-based loader (works with citizensbank_urls.txt)
-    # Legacy: Use old file lookup
-    if args.legacy:
-        urls_path = args.urls or CITIZENS_URLS_PATH
-        urls = read_url_list(urls_path)
-    else:
-        print("[Config] Using data source from audit_common configuration...")
-        urls = read_url_list_from_source("citizens_urls")
-    
-    if not urls:
-        raise SystemExit("No URLs found to crawl")
+                for url in batch:
+                    with trace_span("fetch", "page", url=url):
+                        row, images = crawl_page(session, url, timeout, stylesheet_cache, redirects, max_page_bytes)
+                    queue.complete(worker_id, url, row, images)
+                    queue.renew(worker_id)
+                    crawled += 1
+                    errors += row["status"] == "error"
+                    bytes_downloaded += row["body_bytes"] or 0
+                    metrics.add_bytes(row["body_bytes"] or 0)
+                    _progress.record(url, row["status"] == "error", row["body_bytes"] or 0)
+
+                    since_pages += 1
+                    since_images += len(images)
+                    if since_pages >= QUEUE_TOTALS_EVERY_URLS or time.monotonic() - counts_read_at >= QUEUE_TOTALS_EVERY_SECONDS:
+                        counts = queue.counts()
+                        images_total = queue.image_count()
+                        since_pages = since_images = 0
+                        counts_read_at = time.monotonic()
+                    done = min(counts["done"] + since_pages, counts["total"])
+                    emit_progress(
+                        current=done,
+                        total=counts["total"],
+                        message=f"Crawled {done}/{counts['total']} pages (queue)",
+                        resumed=False,
+                        images_discovered=images_total + since_images,
+                        images_pending=max(counts["pending"] + counts["leased"] - since_pages, 0),
+                        errors=errors,
+                        bytes_downloaded=bytes_downloaded,
+                    )
+        finally:
+            queue.release(worker_id)
+    print(f"[Queue] Worker {worker_id} finished ({crawled} pages)")
+    record_cache_stats(metrics, stylesheet_cache, redirects, crawled)
+    return crawled
+
+
+def merge_queue_results(queue_path: Path) -> tuple[list[dict], list[dict]]:
+    """Collect committed worker results into the standard page and image rows."""
+    page_rows: list[dict] = []
+    image_key_set: set[tuple[str, str, str]] = set()
+    with CrawlQueue(queue_path) as queue:
+        for url, row, images in queue.iter_results():
+            if row is None:
+                row = new_page_row(url)
+                row["status"] = "error"
+                row["error"] = "QUEUE_NOT_COMPLETED"
+            page_rows.append(row)
+            for image_url in images:
+                image_key_set.add((url, row["final_url"], image_url))
+    return page_rows, materialize_image_rows(image_key_set)
 
-    page_rows, image_rows, resumed = crawl(urls, timeout=args.timeout, resume=args.resume)
 
+def spawn_queue_workers(args: argparse.Namespace) -> None:
+    """Start N local worker processes against the queue and wait for them."""
+    command = [
+        sys.executable,
+        "-u",
+        str(Path(__file__).resolve()),
+        "--queue-mode", "work",
+        "--queue-path", str(args.queue_path),
+        "--timeout", str(args.timeout),
+        "--batch-size", str(args.batch_size),
+        "--lease-seconds", str(args.lease_seconds),
+        "--max-page-bytes", str(args.max_page_bytes),
+    ]
+    if not args.stylesheets:
+        command.append("--no-stylesheets")
+    if args.trust_redirect_map:
+        command.append("--trust-redirect-map")
+    procs = [subprocess.Popen(command) for _ in range(args.workers)]
+    failed = sum(1 for proc in procs if proc.wait() != 0)
+    if failed:
+        print(f"[Queue] {failed}/{len(procs)} worker(s) exited with errors; their leases will be re-claimed")
+
+
+def write_crawl_outputs(page_rows: list[dict], image_rows: list[dict], resumed: bool, data: StageData | None = None) -> None:
+    data = data if data is not None else StageData()
     page_out = AUDIT_DIR / "citizens_pages.json"
     image_out = AUDIT_DIR / "citizens_images.json"
-    write_json(page_out, page_rows)
-    write_json(image_out, image_rows)
+    with trace_span("write", page_out.name), RecordWriter(page_out) as writer:
+        writer.write_many(page_rows)
+    image_validator = RowValidator(CITIZENS_IMAGES_SCHEMA, "citizens_images_index")
+    with trace_span("write", image_out.name), RecordWriter(image_out, validator=image_validator) as writer:
+        writer.write_many(image_rows)
+    save_redirect_map(page_rows)
 
     image_to_pages: dict[str, set[str]] = defaultdict(set)
     for row in image_rows:
         image_to_pages[row["image_url"]].add(row["page_url"])
 
-    # Build uncompressed index
-    images_index = [
-        {"image_url": image_url, "page_count": len(pages), "page_urls": sorted(pages)}
-        for image_url, pages in sorted(image_to_pages.items())
-    ]
+    # Uncompressed index entries are generated one at a time into the compressor
+    uncompressed_size = 0
+
+    def iter_images_index():
+        nonlocal uncompressed_size
+        for image_url, pages in sorted(image_to_pages.items()):
+            entry = {"image_url": image_url, "page_count": len(pages), "page_urls": sorted(pages)}
+            uncompressed_size += len(json_dumps(entry)) + 1
+            yield entry
     
     # Compress and save
-    compressed_index = compress_citizens_images(images_index)
-    write_json(AUDIT_DIR / "citizens_images_index.json", compressed_index)
+    compressed_index = compress_citizens_images(iter_images_index())
+    # Columnar integer arrays are written compact; indenting puts one id per line
+    with trace_span("write", "citizens_images_index.json"):
+        data.put(AUDIT_DIR / "citizens_images_index.json", compressed_index, indent=None)
     
     # Calculate storage savings
-    import sys
-    uncompressed_size = sys.getsizeof(str(images_index))
-    compressed_size = sys.getsizeof(str(compressed_index))
+    compressed_size = len(json_dumps(compressed_index))
     savings_pct = ((uncompressed_size - compressed_size) / uncompressed_size * 100) if uncompressed_size > 0 else 0
     
-    print(f"✓ Compressed images index: {len(images_index)} images")
-    print(f"  Estimated savings: {savings_pct:.1f}% (in-memory size)")
-    print(f"  Unique domains: {len(compressed_index['metadata']['domains'])}")
-    print(f"  Path prefixes: {sum(len(v) for v in compressed_index['metadata']['path_prefixes'].values())}")
+    print(f"✓ Compressed images index: {len(image_to_pages)} images (format {compressed_index['version']})")
+    print(f"  Estimated savings: {savings_pct:.1f}% (serialized size)")
+    print(f"  Unique domains: {compressed_index['metadata']['domains']}")
+    print(f"  Path prefixes: {compressed_index['metadata']['path_prefixes']}")
+    print(f"  Unique URLs: {compressed_index['metadata']['urls']}")
 
     if CHECKPOINT_PATH.exists():
         CHECKPOINT_PATH.unlink(missing_ok=True)
 
+    errors, bytes_downloaded = page_totals(page_rows)
     emit_progress(
         current=len(page_rows),
         total=len(page_rows),
@@ -414,12 +963,15 @@ def main() -> None:
         resumed=resumed,
         images_discovered=len(image_rows),
         images_pending=0,
+        errors=errors,
+        bytes_downloaded=bytes_downloaded,
     )
 
     print(json.dumps({
         "pages_total": len(page_rows),
         "pages_ok": sum(1 for x in page_rows if x["status"] == "ok"),
         "pages_error": sum(1 for x in page_rows if x["status"] != "ok"),
+        "pages_truncated": sum(1 for x in page_rows if x.get("truncated")),
         "image_refs": len(image_rows),
         "unique_images": len(image_to_pages),
         "resumed": resumed,
@@ -429,8 +981,136 @@ def main() -> None:
         "image_output": str(image_out),
     }, indent=2))
 
-    # Validate output
-    validate_stage_output(image_out, CITIZENS_IMAGES_SCHEMA, "citizens_images_index")
+    # Validate output (rows were checked as they were written)
+    image_validator.report(image_out.name)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Crawl citizensbank URLs and extract served image URLs")
+    parser.add_argument("--urls", type=Path, default=None, help="Path to URL list file (local) - only used with --legacy")
+    parser.add_argument("--legacy", action="store_true", help="Use legacy file lookup instead of config (requires --urls)")
+    parser.add_argument("--timeout", type=int, default=20)
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="Ignore checkpoint and start stage 01 from scratch")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging for debugging")
+    parser.add_argument(
+        "--queue-mode",
+        choices=["init", "work", "merge", "all"],
+        default=None,
+        help=(
+            "Distributed crawl via a shared SQLite work queue: 'init' enqueues URLs, 'work' claims and crawls "
+            "batches, 'merge' writes the standard outputs, 'all' does init + --workers local workers + merge"
+        ),
+    )
+    parser.add_argument("--queue-path", type=Path, default=QUEUE_PATH, help="SQLite queue file (may live on a shared directory)")
+    parser.add_argument("--workers", type=int, default=4, help="Local worker processes for --queue-mode all")
+    parser.add_argument("--batch-size", type=int, default=10, help="URLs claimed per queue lease")
+    parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS, help="Lease duration before unfinished URLs are re-claimed")
+    parser.add_argument("--no-stylesheets", dest="stylesheets", action="store_false", help="Do not fetch linked stylesheets for CSS background images")
+    parser.add_argument(
+        "--trust-redirect-map",
+        action="store_true",
+        help="Reuse image sets for known redirects without a confirming HEAD request",
+    )
+    parser.add_argument(
+        "--max-page-bytes",
+        type=int,
+        default=MAX_PAGE_BYTES,
+        help="Stop reading a page body after this many bytes (0 = no limit); capped pages are flagged 'truncated'",
+    )
+    parser.set_defaults(resume=True)
+    return parser
+
+
+def run(argv: list[str] | None = None, data: StageData | None = None) -> StageData:
+    """Run stage 01; the compact images index is kept in data for stage 03."""
+    global VERBOSE
+    args = build_parser().parse_args(argv)
+    data = data if data is not None else StageData()
+    _progress.reset()
+    VERBOSE = args.verbose
+    # Reported as the AUDIT_METRICS line when the stage finishes
+    metrics = StageMetrics(Path(__file__).name)
+    # Span timeline for chrome://tracing / Perfetto when AUDIT_TRACE is set
+    start_trace(Path(__file__).name)
+
+    ensure_dirs()
+
+    if args.queue_mode == "work":
+        run_queue_worker(
+            args.queue_path,
+            args.timeout,
+            args.batch_size,
+            args.lease_seconds,
+            args.stylesheets,
+            args.trust_redirect_map,
+            args.max_page_bytes,
+            metrics,
+        )
+        metrics.emit()
+        finish_trace(Path(__file__).name)
+        return data
+    
+    if args.queue_mode != "merge":
+        # Default: Use config-based loader (works with citizensbank_urls.txt)
+        # Legacy: Use old file lookup
+        if args.legacy:
+            urls_path = args.urls or CITIZENS_URLS_PATH
+            urls = read_url_list(urls_path)
+        else:
+            print("[Config] Using data source from audit_common configuration...")
+            urls = read_url_list_from_source("citizens_urls")
+        
+        if not urls:
+            raise SystemExit("No URLs found to crawl")
+
+    if args.queue_mode is None:
+        page_rows, image_rows, resumed = crawl(
+            urls,
+            timeout=args.timeout,
+            resume=args.resume,
+            stylesheets=args.stylesheets,
+            trust_redirect_map=args.trust_redirect_map,
+            max_page_bytes=args.max_page_bytes,
+            metrics=metrics,
+        )
+        profile_checkpoint("crawled")
+        write_crawl_outputs(page_rows, image_rows, resumed, data)
+        metrics.emit()
+        finish_trace(Path(__file__).name)
+        return data
+
+    if args.queue_mode in ("init", "all"):
+        if not args.resume and args.queue_path.exists():
+            args.queue_path.unlink()
+        with CrawlQueue(args.queue_path, lease_seconds=args.lease_seconds) as queue:
+            added = queue.enqueue(urls)
+            counts = queue.counts()
+        print(f"[Queue] Enqueued {added} new URL(s); {counts['done']}/{counts['total']} already done")
+        if args.queue_mode == "init":
+            metrics.emit()
+            finish_trace(Path(__file__).name)
+            return data
+        spawn_queue_workers(args)
+
+    page_rows, image_rows = merge_queue_results(args.queue_path)
+    profile_checkpoint("crawled")
+    write_crawl_outputs(page_rows, image_rows, resumed=False, data=data)
+    # Like the checkpoint, a fully merged queue is removed so the next (resumed)
+    # run crawls afresh; a queue with claimable URLs left is kept for more workers
+    with CrawlQueue(args.queue_path) as queue:
+        drained = queue.is_drained()
+    if drained:
+        args.queue_path.unlink(missing_ok=True)
+    # The workers reported their own requests; this line adds their CPU and RSS
+    metrics.emit()
+    finish_trace(Path(__file__).name)
+    return data
+
+
+def main() -> None:
+    # AUDIT_PROFILE=cpu|mem (set by the orchestrators' --profile) profiles the run
+    with profile_stage(Path(__file__).name):
+        run()
 
 
 if __name__ == "__main__":
@@ -2,13 +2,13 @@ from __future__ import annotations
 
 import argparse
 import json
+from collections import Counter
 from io import BytesIO
 from pathlib import Path
+from typing import Iterator
 
-import imagehash
 import requests
 import urllib3
-from PIL import Image
 
 # Disable SSL warnings for verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -16,20 +16,23 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 from audit_common import (
     AUDIT_DIR,
     DAM_FINGERPRINTS_SCHEMA,
+    JsonItemReader,
     ensure_dirs,
     latest_dam_export,
-    load_json,
-    load_json_from_source,
     normalize_url,
     sha256_bytes,
-    validate_stage_output,
-    write_json,
+    source_path,
 )
+from stage_data import StageData
+from stage_metrics import StageMetrics
+from stage_profiling import profile_checkpoint, profile_stage
+from stage_progress import ProgressTracker
+from stage_tracing import finish_trace, start_trace, trace_span
 
-PROGRESS_PREFIX = "AUDIT_PROGRESS "
+_progress = ProgressTracker("02_build_dam_fingerprints.py")
 
 
-def emit_progress(current: int, total: int, message: str) -> None:
+def emit_progress(current: int, total: int, message: str, errors: int = 0, bytes_downloaded: int = 0) -> None:
     """Emit structured progress for extension UI"""
     percent = round((current / total) * 100, 2) if total > 0 else 0
     payload = {
@@ -38,35 +41,53 @@ def emit_progress(current: int, total: int, message: str) -> None:
         "total": total,
         "percent": percent,
         "message": message,
+        # Running totals for monitoring (failed previews, preview bytes downloaded)
+        "errors": errors,
+        "bytes_downloaded": bytes_downloaded,
         # Aliases for popup rendering
         "assets_processed": current,
         "assets_total": total,
     }
-    print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _progress.emit(payload)
 
 
 def image_phash(data: bytes) -> str | None:
+    # Imported on first use so --help and early exits skip PIL/NumPy/SciPy
+    import imagehash
+    from PIL import Image
+
     try:
         with Image.open(BytesIO(data)) as image:
-            return str(imagehash.phash(image))
+            with trace_span("decode"):
+                image.load()
+            with trace_span("hash", "phash"):
+                return str(imagehash.phash(image))
     except Exception:
         return None
 
 
-def build_fingerprints(assets_data: list | dict, timeout: int) -> list[dict]:
-    """Build fingerprints from DAM assets data.
+def iter_fingerprints(
+    assets_data: list | dict | JsonItemReader, timeout: int, metrics: StageMetrics | None = None
+) -> Iterator[dict]:
+    """Yield fingerprint rows for DAM assets data one at a time.
     
     Args:
-        assets_data: Either a list of assets or dict with 'assets' key
+        assets_data: A list of assets, a dict with 'assets' key, or a
+            JsonItemReader streaming the catalog (total is estimated as it reads)
         timeout: HTTP request timeout in seconds
+        metrics: Counts preview requests and bytes (optional)
     """
-    assets = assets_data.get("assets", []) if isinstance(assets_data, dict) else assets_data
-    total_assets = len(assets)
-    
-    print(f"Building fingerprints for {total_assets:,} DAM assets...")
-    emit_progress(0, total_assets, "Starting DAM fingerprinting")
+    if isinstance(assets_data, JsonItemReader):
+        assets = assets_data
+        total_of = assets_data.estimated_total
+        print(f"Building fingerprints for DAM assets streamed from {assets_data.path.name}...")
+    else:
+        assets = assets_data.get("assets", []) if isinstance(assets_data, dict) else assets_data
+        total_of = assets.__len__
+        print(f"Building fingerprints for {len(assets):,} DAM assets...")
+    emit_progress(0, total_of(), "Starting DAM fingerprinting")
 
-    rows: list[dict] = []
+    idx = errors = bytes_downloaded = 0
     for idx, asset in enumerate(assets, start=1):
         item_id = str(asset.get("itemId") or "").strip().lower()
         if not item_id:
@@ -89,11 +110,18 @@ def build_fingerprints(assets_data: list | dict, timeout: int) -> list[dict]:
         }
 
         if preview_url:
+            nbytes = 0
             try:
-                resp = requests.get(preview_url, timeout=timeout, verify=False)
+                with trace_span("fetch", url=preview_url):
+                    resp = requests.get(preview_url, timeout=timeout, verify=False)
+                nbytes = len(resp.content)
+                if metrics is not None:
+                    metrics.request(nbytes)
                 if resp.ok:
                     data = resp.content
-                    row["sha256"] = sha256_bytes(data)
+                    bytes_downloaded += len(data)
+                    with trace_span("hash", "sha256"):
+                        row["sha256"] = sha256_bytes(data)
                     row["phash"] = image_phash(data)
                     row["fingerprint_status"] = "ok" if row["sha256"] else "error"
                 else:
@@ -102,54 +130,86 @@ def build_fingerprints(assets_data: list | dict, timeout: int) -> list[dict]:
             except Exception as err:
                 row["fingerprint_status"] = "error"
                 row["fingerprint_error"] = str(err)
+            _progress.record(preview_url, row["fingerprint_status"] == "error", nbytes)
 
-        rows.append(row)
+        errors += row["fingerprint_status"] == "error"
+        yield row
         
         # Emit progress every 50 assets (more frequent than 250)
         if idx % 50 == 0:
-            emit_progress(idx, total_assets, f"Fingerprinted {idx:,}/{total_assets:,} DAM assets")
+            total_assets = total_of()
+            emit_progress(idx, total_assets, f"Fingerprinted {idx:,}/{total_assets:,} DAM assets", errors, bytes_downloaded)
 
     # Final progress
-    emit_progress(total_assets, total_assets, "DAM fingerprinting complete")
-    return rows
+    emit_progress(idx, idx, "DAM fingerprinting complete", errors, bytes_downloaded)
 
 
-def main() -> None:
+def build_fingerprints(assets_data: list | dict, timeout: int) -> list[dict]:
+    """Build fingerprints from DAM assets data (see iter_fingerprints)."""
+    return list(iter_fingerprints(assets_data, timeout))
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Build DAM image fingerprints from exported DAM assets JSON")
     parser.add_argument("--dam-json", type=Path, default=None, help="Path to DAM export JSON (local file)")
     parser.add_argument("--legacy", action="store_true", help="Use legacy file lookup instead of config (requires --dam-json or aprimo_dam_assets_master_*.json)")
     parser.add_argument("--timeout", type=int, default=20)
-    args = parser.parse_args()
+    return parser
+
+
+def run(argv: list[str] | None = None, data: StageData | None = None) -> StageData:
+    """Run stage 02; fingerprint rows are kept in data for stage 04."""
+    args = build_parser().parse_args(argv)
+    data = data if data is not None else StageData()
+    _progress.reset()
+    # Reported as the AUDIT_METRICS line when the stage finishes
+    metrics = StageMetrics(Path(__file__).name)
+    # Span timeline for chrome://tracing / Perfetto when AUDIT_TRACE is set
+    start_trace(Path(__file__).name)
 
     ensure_dirs()
     
     # Default: Use config-based loader (works with dam_assets.json from Phase 1)
     # Legacy: Use old file lookup for aprimo_dam_assets_master_*.json
+    # Assets are streamed from the catalog, so fingerprinting starts at once
     if args.legacy:
         dam_json = args.dam_json or latest_dam_export()
-        assets_data = load_json(dam_json)
+        assets_data = JsonItemReader(dam_json)
         dam_source = str(dam_json)
     else:
         print("[Config] Using data source from audit_common configuration...")
-        assets_data = load_json_from_source("dam_assets")
+        assets_data = JsonItemReader(source_path("dam_assets"))
         dam_source = "config: dam_assets.json"
     
-    rows = build_fingerprints(assets_data, timeout=args.timeout)
-
     output = AUDIT_DIR / "dam_fingerprints.json"
-    write_json(output, rows)
+    status_counts: Counter[str] = Counter()
+    with data.writer(output, DAM_FINGERPRINTS_SCHEMA) as writer:
+        for row in iter_fingerprints(assets_data, timeout=args.timeout, metrics=metrics):
+            with trace_span("write"):
+                writer.write(row)
+            status_counts[row["fingerprint_status"]] += 1
+    profile_checkpoint("fingerprinted")
 
     print(json.dumps({
         "dam_source": dam_source,
-        "rows": len(rows),
-        "ok": sum(1 for r in rows if r["fingerprint_status"] == "ok"),
-        "missing_preview": sum(1 for r in rows if r["fingerprint_status"] == "missing_preview"),
-        "errors": sum(1 for r in rows if r["fingerprint_status"] == "error"),
-        "output": str(output),
+        "rows": writer.count,
+        "ok": status_counts["ok"],
+        "missing_preview": status_counts["missing_preview"],
+        "errors": status_counts["error"],
+        "output": str(writer.path),
     }, indent=2))
 
-    # Validate output
-    validate_stage_output(output, DAM_FINGERPRINTS_SCHEMA, "dam_fingerprints")
+    # Rows were validated as they were written
+    writer.validator.report(writer.path.name)
+    metrics.emit()
+    finish_trace(Path(__file__).name)
+    return data
+
+
+def main() -> None:
+    # AUDIT_PROFILE=cpu|mem (set by the orchestrators' --profile) profiles the run
+    with profile_stage(Path(__file__).name):
+        run()
 
 
 if __name__ == "__main__":
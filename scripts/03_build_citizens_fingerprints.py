@@ -4,12 +4,11 @@ import argparse
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
+from itertools import islice
 from pathlib import Path
 
-import imagehash
 import requests
 import urllib3
-from PIL import Image
 
 # Disable SSL warnings for verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -17,22 +16,26 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 from audit_common import (
     AUDIT_DIR,
     CITIZENS_FINGERPRINTS_SCHEMA,
-    decompress_citizens_images,
+    citizens_image_count,
     ensure_dirs,
-    load_json,
+    iter_citizens_images,
     normalize_url,
     sha256_bytes,
-    validate_stage_output,
-    write_json,
 )
+from stage_data import StageData
+from stage_metrics import StageMetrics
+from stage_profiling import profile_checkpoint, profile_stage
+from stage_progress import ProgressTracker
+from stage_tracing import finish_trace, start_trace, trace_span
 
 # Number of parallel workers for fingerprinting
 # Adjust based on CPU cores and network bandwidth
 MAX_WORKERS = 8
-PROGRESS_PREFIX = "AUDIT_PROGRESS "
 
+_progress = ProgressTracker("03_build_citizens_fingerprints.py")
 
-def emit_progress(current: int, total: int, message: str) -> None:
+
+def emit_progress(current: int, total: int, message: str, errors: int = 0) -> None:
     """Emit structured progress for extension UI"""
     percent = round((current / total) * 100, 2) if total > 0 else 0
     payload = {
@@ -41,22 +44,31 @@ def emit_progress(current: int, total: int, message: str) -> None:
         "total": total,
         "percent": percent,
         "message": message,
+        # Running total for monitoring (images that failed to fingerprint)
+        "errors": errors,
         # Aliases for popup rendering
         "images_processed": current,
         "images_total": total,
     }
-    print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _progress.emit(payload)
 
 
 def image_phash(data: bytes) -> str | None:
+    # Imported on first use so --help and early exits skip PIL/NumPy/SciPy
+    import imagehash
+    from PIL import Image
+
     try:
         with Image.open(BytesIO(data)) as image:
-            return str(imagehash.phash(image))
+            with trace_span("decode"):
+                image.load()
+            with trace_span("hash", "phash"):
+                return str(imagehash.phash(image))
     except Exception:
         return None
 
 
-def process_single_image(entry: dict, timeout: int) -> dict:
+def process_single_image(entry: dict, timeout: int, metrics: StageMetrics | None = None) -> dict:
     """Process a single image - downloads and generates fingerprints.
     
     This function is designed to be run in parallel via ThreadPoolExecutor.
@@ -84,11 +96,17 @@ def process_single_image(entry: dict, timeout: int) -> dict:
         "fingerprint_error": None,
     }
 
+    nbytes = 0
     try:
-        resp = requests.get(image_url, timeout=timeout, verify=False)
+        with trace_span("fetch", url=image_url):
+            resp = requests.get(image_url, timeout=timeout, verify=False)
+        nbytes = len(resp.content)
+        if metrics is not None:
+            metrics.request(nbytes)
         if resp.ok:
             data = resp.content
-            row["sha256"] = sha256_bytes(data)
+            with trace_span("hash", "sha256"):
+                row["sha256"] = sha256_bytes(data)
             row["phash"] = image_phash(data)
             if row["sha256"] is None:
                 row["fingerprint_status"] = "error"
@@ -100,28 +118,34 @@ def process_single_image(entry: dict, timeout: int) -> dict:
         row["fingerprint_status"] = "error"
         row["fingerprint_error"] = str(err)
 
+    _progress.record(image_url, row["fingerprint_status"] == "error", nbytes)
     return row
 
 
-def process_images_in_chunks(image_index, timeout, workers, chunk_size=1000):
+def process_images_in_chunks(image_index, timeout, workers, chunk_size=1000, total_images=None, metrics=None):
     """
     Process images in chunks to reduce memory usage.
     
     Instead of loading all fingerprints in memory, process in batches
-    and yield results incrementally.
+    and yield results incrementally.  image_index may be any iterable
+    (e.g. iter_citizens_images); only one chunk of entries is held at a time.
     """
-    total_images = len(image_index)
+    if total_images is None:
+        total_images = len(image_index)
+    entries = iter(image_index)
     
     for chunk_start in range(0, total_images, chunk_size):
-        chunk_end = min(chunk_start + chunk_size, total_images)
-        chunk = image_index[chunk_start:chunk_end]
+        chunk = list(islice(entries, chunk_size))
+        if not chunk:
+            break
+        chunk_end = chunk_start + len(chunk)
         
         print(f"Processing chunk {chunk_start:,}-{chunk_end:,} of {total_images:,}...")
         
         # Process this chunk in parallel
         with ThreadPoolExecutor(max_workers=workers) as executor:
             futures = {
-                executor.submit(process_single_image, entry, timeout): entry
+                executor.submit(process_single_image, entry, timeout, metrics): entry
                 for entry in chunk
             }
             
@@ -137,60 +161,82 @@ def process_images_in_chunks(image_index, timeout, workers, chunk_size=1000):
                         "fingerprint_status": "error",
                         "fingerprint_error": str(exc)
                     }
+        profile_checkpoint("chunk")
 
 
-def main() -> None:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Build fingerprints for Citizens-served images")
     parser.add_argument("--images-json", type=Path, default=AUDIT_DIR / "citizens_images_index.json")
     parser.add_argument("--timeout", type=int, default=20)
     parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Number of parallel workers")
     parser.add_argument("--chunk-size", type=int, default=1000, help="Process images in chunks (reduces memory)")
-    args = parser.parse_args()
+    return parser
+
+
+def run(argv: list[str] | None = None, data: StageData | None = None) -> StageData:
+    """Run stage 03; the images index may come from stage 01 in data."""
+    args = build_parser().parse_args(argv)
+    data = data if data is not None else StageData()
+    _progress.reset()
+    # Reported as the AUDIT_METRICS line when the stage finishes
+    metrics = StageMetrics(Path(__file__).name)
+    # Span timeline for chrome://tracing / Perfetto when AUDIT_TRACE is set
+    start_trace(Path(__file__).name)
 
     ensure_dirs()
     
-    # Load and decompress index
+    # Load the compact index; entries are decompressed lazily chunk by chunk
     print("Loading citizens images index...")
-    compressed_data = load_json(args.images_json)
-    image_index = decompress_citizens_images(compressed_data)
-    total_images = len(image_index)
+    with trace_span("parse", args.images_json.name):
+        compressed_data = data.load(args.images_json)
+    profile_checkpoint("index_loaded")
+    total_images = citizens_image_count(compressed_data)
     
-    print(f"✓ Loaded {total_images:,} images (decompressed)")
+    print(f"✓ Loaded {total_images:,} images")
     print(f"Processing with {args.workers} parallel workers in chunks of {args.chunk_size}...")
     
     emit_progress(0, total_images, "Starting Citizens image fingerprinting")
 
-    rows: list[dict] = []
+    output = AUDIT_DIR / "citizens_fingerprints.json"
+    ok_rows = 0
     completed = 0
     
-    # Process images in chunks to reduce memory usage
-    for row in process_images_in_chunks(image_index, args.timeout, args.workers, args.chunk_size):
-        rows.append(row)
-        completed += 1
-        
-        # Progress reporting every 50 images (more frequent for UI responsiveness)
-        if completed % 50 == 0:
-            emit_progress(completed, total_images, f"Fingerprinted {completed:,}/{total_images:,} Citizens images")
+    # Rows are written as they complete; only the current chunk is in memory
+    with data.writer(output, CITIZENS_FINGERPRINTS_SCHEMA) as writer:
+        image_index = iter_citizens_images(compressed_data)
+        for row in process_images_in_chunks(
+            image_index, args.timeout, args.workers, args.chunk_size, total_images, metrics
+        ):
+            with trace_span("write"):
+                writer.write(row)
+            ok_rows += row["fingerprint_status"] == "ok"
+            completed += 1
+            
+            # Progress reporting every 50 images (more frequent for UI responsiveness)
+            if completed % 50 == 0:
+                emit_progress(completed, total_images, f"Fingerprinted {completed:,}/{total_images:,} Citizens images", completed - ok_rows)
     
     # Final progress
-    emit_progress(total_images, total_images, "Citizens image fingerprinting complete")
-    
-    # Clear image_index from memory (no longer needed)
-    del image_index
-    del compressed_data
-
-    output = AUDIT_DIR / "citizens_fingerprints.json"
-    write_json(output, rows)
+    emit_progress(total_images, total_images, "Citizens image fingerprinting complete", completed - ok_rows)
 
     print(json.dumps({
-        "rows": len(rows),
-        "ok": sum(1 for r in rows if r["fingerprint_status"] == "ok"),
-        "errors": sum(1 for r in rows if r["fingerprint_status"] == "error"),
-        "output": str(output),
+        "rows": writer.count,
+        "ok": ok_rows,
+        "errors": writer.count - ok_rows,
+        "output": str(writer.path),
     }, indent=2))
 
-    # Validate output
-    validate_stage_output(output, CITIZENS_FINGERPRINTS_SCHEMA, "citizens_fingerprints")
+    # Rows were validated as they were written
+    writer.validator.report(writer.path.name)
+    metrics.emit()
+    finish_trace(Path(__file__).name)
+    return data
+
+
+def main() -> None:
+    # AUDIT_PROFILE=cpu|mem (set by the orchestrators' --profile) profiles the run
+    with profile_stage(Path(__file__).name):
+        run()
 
 
 if __name__ == "__main__":
@@ -3,14 +3,27 @@ from __future__ import annotations
 import argparse
 import json
 import re
-from collections import defaultdict
+from collections import Counter, defaultdict
 from pathlib import Path
 
-import imagehash
+from audit_common import AUDIT_DIR, ensure_dirs, resolve_stage_input
+from audit_store import hamming_distance, open_audit_store
+from stage_data import StageData
+from stage_metrics import StageMetrics
+from stage_profiling import profile_checkpoint, profile_stage
+from stage_progress import ProgressTracker
+from stage_tracing import finish_trace, start_trace, trace_span
 
-from audit_common import AUDIT_DIR, ensure_dirs, load_json, write_json
+_progress = ProgressTracker("04_match_assets.py")
 
-PROGRESS_PREFIX = "AUDIT_PROGRESS "
+# Columns read from the fingerprint outputs (columnar storage reads only these).
+# Citizens rows are carried into the match results, so keep everything stage 03 writes.
+CITIZENS_COLUMNS = [
+    "image_url", "page_count", "page_urls", "sha256", "phash", "fingerprint_status", "fingerprint_error",
+]
+DAM_COLUMNS = ["item_id", "file_name", "preview_url", "sha256", "phash", "fingerprint_status"]
+# Match fields kept per phash for the Citizens duplicate summary
+DUPE_FIELDS = ("image_url", "dam_item_id", "page_count", "url_contains_asset_id")
 
 
 def emit_progress(current: int, total: int, message: str) -> None:
@@ -26,7 +39,7 @@ def emit_progress(current: int, total: int, message: str) -> None:
         "images_matched": current,
         "images_total": total,
     }
-    print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _progress.emit(payload)
 
 
 def extract_asset_id_from_url(url: str) -> str | None:
@@ -57,139 +70,189 @@ def extract_asset_id_from_url(url: str) -> str | None:
 
 
 def phash_distance(a: str | None, b: str | None) -> int | None:
-    if not a or not b:
-        return None
-    try:
-        return imagehash.hex_to_hash(a) - imagehash.hex_to_hash(b)
-    except Exception:
+    # Same bit count as ImageHash subtraction, without importing imagehash/NumPy
+    if not a or not b or len(a) != len(b):
         return None
+    return hamming_distance(a, b)
 
 
-def main() -> None:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Match Citizens images to DAM assets")
     parser.add_argument("--citizens", type=Path, default=AUDIT_DIR / "citizens_fingerprints.json")
     parser.add_argument("--dam", type=Path, default=AUDIT_DIR / "dam_fingerprints.json")
     parser.add_argument("--phash-threshold", type=int, default=8)
-    args = parser.parse_args()
+    return parser
+
+
+def run(argv: list[str] | None = None, data: StageData | None = None) -> StageData:
+    """Run stage 04; fingerprints may come from stages 02/03 in data."""
+    args = build_parser().parse_args(argv)
+    data = data if data is not None else StageData()
+    _progress.reset()
+    # Reported as the AUDIT_METRICS line when the stage finishes
+    metrics = StageMetrics(Path(__file__).name)
+    # Span timeline for chrome://tracing / Perfetto when AUDIT_TRACE is set
+    start_trace(Path(__file__).name)
 
     ensure_dirs()
-    citizens_rows = load_json(args.citizens)
-    dam_rows = load_json(args.dam)
+    with trace_span("parse", args.dam.name):
+        dam_rows = data.read_rows(args.dam, columns=DAM_COLUMNS)
+    profile_checkpoint("dam_loaded")
+    dam_ok_rows = [x for x in dam_rows if x.get("fingerprint_status") == "ok"]
 
-    # Index DAM by SHA256 for exact matching
+    # With the SQLite audit store, exact/URL lookups and duplicate groups use
+    # its indexes instead of in-memory dicts.
+    store = open_audit_store()
     dam_by_sha: dict[str, list[dict]] = defaultdict(list)
-    dam_ok_rows = [x for x in dam_rows if x.get("fingerprint_status") == "ok"]
-    for row in dam_ok_rows:
-        sha = row.get("sha256")
-        if sha:
-            dam_by_sha[sha].append(row)
-    
-    # Index DAM by item_id for URL-based matching
     dam_by_item_id: dict[str, dict] = {}
-    for row in dam_ok_rows:
-        item_id = row.get("item_id")
-        if item_id:
-            dam_by_item_id[str(item_id)] = row
+    if store is not None:
+        # Rows held in data were mirrored into the store as stage 02 wrote them
+        if args.dam not in data and not store.is_current("dam_fingerprints", resolve_stage_input(args.dam)):
+            # Stage 02 ran without the store (or its output changed since)
+            store.replace_table("dam_fingerprints", data.iter_rows(args.dam))
+
+        def dam_exact_candidates(sha: str) -> list[dict]:
+            return store.by_sha256("dam_fingerprints", sha, status="ok")
+
+        def dam_for_item_id(item_id: str) -> dict | None:
+            rows = store.by_item_id("dam_fingerprints", item_id, status="ok")
+            return rows[-1] if rows else None
+    else:
+        # Index DAM by SHA256 for exact matching
+        for row in dam_ok_rows:
+            sha = row.get("sha256")
+            if sha:
+                dam_by_sha[sha].append(row)
+        
+        # Index DAM by item_id for URL-based matching
+        for row in dam_ok_rows:
+            item_id = row.get("item_id")
+            if item_id:
+                dam_by_item_id[str(item_id)] = row
+
+        def dam_exact_candidates(sha: str) -> list[dict]:
+            return dam_by_sha.get(sha, [])
+
+        def dam_for_item_id(item_id: str) -> dict | None:
+            return dam_by_item_id.get(item_id)
 
-    matches: list[dict] = []
-    unmatched: list[dict] = []
+    # Match rows stream straight to disk; only what the duplicate and
+    # governance summaries need is kept in memory.
+    match_counts: Counter[str] = Counter()
+    citizens_dupes_by_phash: dict[str, list[dict]] = defaultdict(list)
     
-    total_citizens = len(citizens_rows)
+    total_citizens = data.count(args.citizens)
     print(f"Matching {total_citizens:,} Citizens images against {len(dam_rows):,} DAM assets...")
     emit_progress(0, total_citizens, "Starting asset matching")
 
-    for idx, row in enumerate(citizens_rows, start=1):
-        if row.get("fingerprint_status") != "ok":
-            unmatched.append({
-                **row,
-                "match_status": "unmatched_error",
-                "match_reason": row.get("fingerprint_error") or "citizens_fingerprint_error",
-                "url_contains_asset_id": False,
-            })
-            if idx % 100 == 0:
-                emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
-            continue
+    with data.writer(AUDIT_DIR / "match_results.json") as matches_writer, \
+            data.writer(AUDIT_DIR / "unmatched_results.json") as unmatched_writer:
 
-        image_url = row.get("image_url", "")
-        sha = row.get("sha256")
-        phash = row.get("phash")
+        def record_match(match: dict) -> None:
+            matches_writer.write(match)
+            match_counts[match["match_status"]] += 1
+            match_counts["direct_dam_url"] += bool(match.get("url_contains_asset_id"))
+            if store is None and match.get("phash"):
+                citizens_dupes_by_phash[match["phash"]].append({k: match.get(k) for k in DUPE_FIELDS})
+
+        for idx, row in enumerate(data.iter_rows(args.citizens, columns=CITIZENS_COLUMNS), start=1):
+            if row.get("fingerprint_status") != "ok":
+                unmatched_writer.write({
+                    **row,
+                    "match_status": "unmatched_error",
+                    "match_reason": row.get("fingerprint_error") or "citizens_fingerprint_error",
+                    "url_contains_asset_id": False,
+                })
+                if idx % 100 == 0:
+                    emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
+                continue
+
+            image_url = row.get("image_url", "")
+            sha = row.get("sha256")
+            phash = row.get("phash")
         
-        # Step 1: Check if URL contains Aprimo asset ID (direct DAM usage)
-        asset_id_from_url = extract_asset_id_from_url(image_url)
-        url_match_found = False
+            # Step 1: Check if URL contains Aprimo asset ID (direct DAM usage)
+            asset_id_from_url = extract_asset_id_from_url(image_url)
+            url_match_found = False
+            dam_record = dam_for_item_id(asset_id_from_url) if asset_id_from_url else None
         
-        if asset_id_from_url and asset_id_from_url in dam_by_item_id:
-            dam_record = dam_by_item_id[asset_id_from_url]
-            matches.append({
-                **row,
-                "match_status": "match_url_direct",
-                "dam_item_id": dam_record.get("item_id"),
-                "dam_preview_url": dam_record.get("preview_url"),
-                "dam_file_name": dam_record.get("file_name"),
-                "phash_distance": 0,
-                "url_contains_asset_id": True,
-                "match_method": "url_asset_id",
-            })
-            url_match_found = True
-            if idx % 100 == 0:
-                emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
-            continue
-
-        # Step 2: Try exact SHA256 match (perfect pixel match)
-        exact_candidates = dam_by_sha.get(sha, []) if sha else []
-        if exact_candidates:
-            for candidate in exact_candidates:
-                matches.append({
+            if dam_record is not None:
+                record_match({
                     **row,
-                    "match_status": "match_exact",
-                    "dam_item_id": candidate.get("item_id"),
-                    "dam_preview_url": candidate.get("preview_url"),
-                    "dam_file_name": candidate.get("file_name"),
+                    "match_status": "match_url_direct",
+                    "dam_item_id": dam_record.get("item_id"),
+                    "dam_preview_url": dam_record.get("preview_url"),
+                    "dam_file_name": dam_record.get("file_name"),
                     "phash_distance": 0,
-                    "url_contains_asset_id": bool(asset_id_from_url),
-                    "match_method": "sha256_exact",
+                    "url_contains_asset_id": True,
+                    "match_method": "url_asset_id",
                 })
-            if idx % 100 == 0:
-                emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
-            continue
+                url_match_found = True
+                if idx % 100 == 0:
+                    emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
+                continue
 
-        # Step 3: Try perceptual hash (phash) matching for similar images
-        best = None
-        best_dist = None
-        for candidate in dam_ok_rows:
-            dist = phash_distance(phash, candidate.get("phash"))
-            if dist is None:
+            # Step 2: Try exact SHA256 match (perfect pixel match)
+            exact_candidates = dam_exact_candidates(sha) if sha else []
+            if exact_candidates:
+                for candidate in exact_candidates:
+                    record_match({
+                        **row,
+                        "match_status": "match_exact",
+                        "dam_item_id": candidate.get("item_id"),
+                        "dam_preview_url": candidate.get("preview_url"),
+                        "dam_file_name": candidate.get("file_name"),
+                        "phash_distance": 0,
+                        "url_contains_asset_id": bool(asset_id_from_url),
+                        "match_method": "sha256_exact",
+                    })
+                if idx % 100 == 0:
+                    emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
                 continue
-            if best_dist is None or dist < best_dist:
-                best_dist = dist
-                best = candidate
-
-        if best is not None and best_dist is not None and best_dist <= args.phash_threshold:
-            matches.append({
-                **row,
-                "match_status": "match_phash",
-                "dam_item_id": best.get("item_id"),
-                "dam_preview_url": best.get("preview_url"),
-                "dam_file_name": best.get("file_name"),
-                "phash_distance": best_dist,
-                "url_contains_asset_id": bool(asset_id_from_url),
-                "match_method": "phash_similar",
-            })
-        else:
-            unmatched.append({
-                **row,
-                "match_status": "unmatched",
-                "match_reason": "no_dam_match",
-                "best_phash_distance": best_dist,
-                "url_contains_asset_id": bool(asset_id_from_url),
-            })
+
+            # Step 3: Try perceptual hash (phash) matching for similar images
+            best = None
+            best_dist = None
+            with trace_span("hash", "phash scan"):
+                for candidate in dam_ok_rows:
+                    dist = phash_distance(phash, candidate.get("phash"))
+                    if dist is None:
+                        continue
+                    if best_dist is None or dist < best_dist:
+                        best_dist = dist
+                        best = candidate
+
+            if best is not None and best_dist is not None and best_dist <= args.phash_threshold:
+                record_match({
+                    **row,
+                    "match_status": "match_phash",
+                    "dam_item_id": best.get("item_id"),
+                    "dam_preview_url": best.get("preview_url"),
+                    "dam_file_name": best.get("file_name"),
+                    "phash_distance": best_dist,
+                    "url_contains_asset_id": bool(asset_id_from_url),
+                    "match_method": "phash_similar",
+                })
+            else:
+                unmatched_writer.write({
+                    **row,
+                    "match_status": "unmatched",
+                    "match_reason": "no_dam_match",
+                    "best_phash_distance": best_dist,
+                    "url_contains_asset_id": bool(asset_id_from_url),
+                })
         
-        # Emit progress every 100 images
-        if idx % 100 == 0:
-            emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
+            # Emit progress every 100 images
+            if idx % 100 == 0:
+                emit_progress(idx, total_citizens, f"Matching images {idx:,}/{total_citizens:,}")
     
-    # Final progress
-    emit_progress(total_citizens, total_citizens, "Asset matching complete")
+        # Final progress
+        emit_progress(total_citizens, total_citizens, "Asset matching complete")
+    profile_checkpoint("matched")
+
+    if store is not None:
+        dam_by_sha = dict(store.duplicate_groups("dam_fingerprints", "sha256", status="ok"))
+        citizens_dupes_by_phash = dict(store.duplicate_groups("match_results", "phash"))
 
     # DAM duplicates: exact matches (SHA256)
     dam_dupes_by_sha = [
@@ -246,12 +309,6 @@ def main() -> None:
             processed_phashes.update(group_phashes)
     
     # Detect Citizens duplicates (same image served from multiple URLs)
-    citizens_dupes_by_phash: dict[str, list[dict]] = defaultdict(list)
-    for row in matches:
-        phash = row.get("phash")
-        if phash:
-            citizens_dupes_by_phash[phash].append(row)
-    
     citizens_duplicates = [
         {
             "phash": phash,
@@ -267,8 +324,8 @@ def main() -> None:
     ]
     
     # Calculate governance metrics
-    total_matched = len(matches)
-    direct_dam_urls = sum(1 for m in matches if m.get("url_contains_asset_id"))
+    total_matched = matches_writer.count
+    direct_dam_urls = match_counts["direct_dam_url"]
     local_copies = total_matched - direct_dam_urls
     
     governance_metrics = {
@@ -280,33 +337,41 @@ def main() -> None:
         "total_duplicate_urls": sum(d["count"] for d in citizens_duplicates) - len(citizens_duplicates),
     }
 
-    write_json(AUDIT_DIR / "match_results.json", matches)
-    write_json(AUDIT_DIR / "unmatched_results.json", unmatched)
-    write_json(AUDIT_DIR / "dam_internal_dupes.json", dam_dupes_by_sha)
-    write_json(AUDIT_DIR / "dam_phash_dupes.json", dam_phash_dupes)
-    write_json(AUDIT_DIR / "citizens_duplicates.json", citizens_duplicates)
-    write_json(AUDIT_DIR / "governance_metrics.json", governance_metrics)
+    with trace_span("write", "summaries"):
+        data.put(AUDIT_DIR / "dam_internal_dupes.json", dam_dupes_by_sha)
+        data.put(AUDIT_DIR / "dam_phash_dupes.json", dam_phash_dupes)
+        data.put(AUDIT_DIR / "citizens_duplicates.json", citizens_duplicates)
+        data.put(AUDIT_DIR / "governance_metrics.json", governance_metrics)
 
     print(json.dumps({
-        "citizens_rows": len(citizens_rows),
-        "matches": len(matches),
-        "match_url_direct": sum(1 for m in matches if m.get("match_status") == "match_url_direct"),
-        "match_exact": sum(1 for m in matches if m.get("match_status") == "match_exact"),
-        "match_phash": sum(1 for m in matches if m.get("match_status") == "match_phash"),
-        "unmatched": len(unmatched),
+        "citizens_rows": total_citizens,
+        "matches": matches_writer.count,
+        "match_url_direct": match_counts["match_url_direct"],
+        "match_exact": match_counts["match_exact"],
+        "match_phash": match_counts["match_phash"],
+        "unmatched": unmatched_writer.count,
         "dam_internal_dupe_groups": len(dam_dupes_by_sha),
         "dam_phash_dupe_groups": len(dam_phash_dupes),
         "citizens_duplicate_groups": len(citizens_duplicates),
         "governance": governance_metrics,
         "outputs": {
-            "matches": str(AUDIT_DIR / "match_results.json"),
-            "unmatched": str(AUDIT_DIR / "unmatched_results.json"),
+            "matches": str(matches_writer.path),
+            "unmatched": str(unmatched_writer.path),
             "dam_dupes": str(AUDIT_DIR / "dam_internal_dupes.json"),
             "dam_phash_dupes": str(AUDIT_DIR / "dam_phash_dupes.json"),
             "citizens_dupes": str(AUDIT_DIR / "citizens_duplicates.json"),
             "governance": str(AUDIT_DIR / "governance_metrics.json"),
         },
     }, indent=2))
+    metrics.emit()
+    finish_trace(Path(__file__).name)
+    return data
+
+
+def main() -> None:
+    # AUDIT_PROFILE=cpu|mem (set by the orchestrators' --profile) profiles the run
+    with profile_stage(Path(__file__).name):
+        run()
 
 
 if __name__ == "__main__":
@@ -2,14 +2,23 @@ from __future__ import annotations
 
 import argparse
 import json
+from collections import Counter
 from pathlib import Path
+from typing import Iterable
 
-from openpyxl import Workbook
-from openpyxl.styles import Font
+from audit_common import AUDIT_DIR, REPORTS_DIR, ensure_dirs, write_csv
+from stage_data import StageData
+from stage_metrics import StageMetrics
+from stage_profiling import profile_checkpoint, profile_stage
+from stage_progress import ProgressTracker
 
-from audit_common import AUDIT_DIR, REPORTS_DIR, ensure_dirs, load_json, write_csv, write_json
+_progress = ProgressTracker("05_build_reports.py")
 
-PROGRESS_PREFIX = "AUDIT_PROGRESS "
+ROWS_PLACEHOLDER = "__AUDIT_MASTER_ROWS__"
+MASTER_CSV_FIELDS = [
+    "image_url", "match_status", "match_method", "url_contains_asset_id", "dam_item_id",
+    "dam_file_name", "phash_distance", "page_count", "page_urls", "needs_dam_upload",
+]
 
 
 def emit_progress(current: int, total: int, message: str) -> None:
@@ -22,18 +31,34 @@ def emit_progress(current: int, total: int, message: str) -> None:
         "percent": percent,
         "message": message,
     }
-    print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _progress.emit(payload)
 
 
-def write_xlsx(summary: dict, master_rows: list[dict], unmatched_rows: list[dict], 
+def bold_row(ws, values: list) -> list:
+    """Header row for a write-only worksheet."""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = Font(bold=True)
+        cells.append(cell)
+    return cells
+
+
+def write_xlsx(summary: dict, master_rows: Iterable[dict],
                dam_dupes: list[dict], dam_phash_dupes: list[dict], 
                citizens_dupes: list[dict], governance: dict, output: Path) -> None:
-    wb = Workbook()
+    # openpyxl is imported here, not at module load: only the xlsx report needs it
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to disk instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
 
     # Summary sheet
-    ws_summary = wb.active
-    ws_summary.title = "Summary"
-    ws_summary.append(["Metric", "Value"])
+    ws_summary = wb.create_sheet("Summary")
+    ws_summary.append(bold_row(ws_summary, ["Metric", "Value"]))
     for key, value in summary.items():
         ws_summary.append([key, value])
     
@@ -41,9 +66,6 @@ def write_xlsx(summary: dict, master_rows: list[dict], unmatched_rows: list[dict
     ws_summary.append(["--- Governance Metrics ---", ""])
     for key, value in governance.items():
         ws_summary.append([key, value])
-    
-    ws_summary["A1"].font = Font(bold=True)
-    ws_summary["B1"].font = Font(bold=True)
 
     # Citizens Images sheet
     ws_master = wb.create_sheet("Citizens Images")
@@ -59,24 +81,19 @@ def write_xlsx(summary: dict, master_rows: list[dict], unmatched_rows: list[dict
         "page_urls",
         "needs_dam_upload",
     ]
-    ws_master.append(headers)
-    for cell in ws_master[1]:
-        cell.font = Font(bold=True)
-    for row in master_rows:
-        ws_master.append([row.get(h) for h in headers])
+    ws_master.append(bold_row(ws_master, headers))
 
     ws_unmatched = wb.create_sheet("Needs DAM Upload")
-    ws_unmatched.append(headers)
-    for cell in ws_unmatched[1]:
-        cell.font = Font(bold=True)
-    for row in unmatched_rows:
-        ws_unmatched.append([row.get(h) for h in headers])
+    ws_unmatched.append(bold_row(ws_unmatched, headers))
+    for row in master_rows:
+        values = [row.get(h) for h in headers]
+        ws_master.append(values)
+        if row.get("needs_dam_upload"):
+            ws_unmatched.append(values)
 
     ws_dupes = wb.create_sheet("DAM Duplicates (Exact)")
     dup_headers = ["sha256", "count", "item_ids", "file_names"]
-    ws_dupes.append(dup_headers)
-    for cell in ws_dupes[1]:
-        cell.font = Font(bold=True)
+    ws_dupes.append(bold_row(ws_dupes, dup_headers))
     for row in dam_dupes:
         ws_dupes.append([
             row.get("sha256"),
@@ -88,9 +105,7 @@ def write_xlsx(summary: dict, master_rows: list[dict], unmatched_rows: list[dict
     # DAM Phash Duplicates (visually similar)
     ws_phash_dupes = wb.create_sheet("DAM Duplicates (Similar)")
     phash_dup_headers = ["phash_group", "count", "item_ids", "file_names"]
-    ws_phash_dupes.append(phash_dup_headers)
-    for cell in ws_phash_dupes[1]:
-        cell.font = Font(bold=True)
+    ws_phash_dupes.append(bold_row(ws_phash_dupes, phash_dup_headers))
     for row in dam_phash_dupes:
         ws_phash_dupes.append([
             " | ".join(row.get("phash_group", [])),
@@ -103,9 +118,7 @@ def write_xlsx(summary: dict, master_rows: list[dict], unmatched_rows: list[dict
     ws_citizens_dupes = wb.create_sheet("Citizens Duplicates")
     citizens_dup_headers = ["phash", "count", "image_urls", "dam_item_id", 
                            "total_page_count", "has_direct_dam_url", "has_local_copy"]
-    ws_citizens_dupes.append(citizens_dup_headers)
-    for cell in ws_citizens_dupes[1]:
-        cell.font = Font(bold=True)
+    ws_citizens_dupes.append(bold_row(ws_citizens_dupes, citizens_dup_headers))
     for row in citizens_dupes:
         ws_citizens_dupes.append([
             row.get("phash"),
@@ -120,8 +133,7 @@ def write_xlsx(summary: dict, master_rows: list[dict], unmatched_rows: list[dict
     wb.save(output)
 
 
-def write_html(master_rows: list[dict], summary: dict, governance: dict, output: Path) -> None:
-    payload = json.dumps(master_rows, ensure_ascii=False)
+def write_html(master_rows: Iterable[dict], summary: dict, governance: dict, output: Path) -> None:
     summary_payload = json.dumps(summary, ensure_ascii=False)
     
     # Format governance metrics
@@ -298,14 +310,24 @@ def write_html(master_rows: list[dict], summary: dict, governance: dict, output:
   <script src=\"report.js\"></script>
   <script>
     // Initialize report with data
-    initializeReport({payload}, {summary_payload});
+    initializeReport({ROWS_PLACEHOLDER}, {summary_payload});
   </script>
 </body>
 </html>"""
-    output.write_text(html, encoding="utf-8")
+    # Stream the row payload between the template halves (same bytes as json.dumps(list))
+    head, tail = html.split(ROWS_PLACEHOLDER, 1)
+    with output.open("w", encoding="utf-8") as f:
+        f.write(head)
+        f.write("[")
+        for i, row in enumerate(master_rows):
+            if i:
+                f.write(", ")
+            f.write(json.dumps(row, ensure_ascii=False))
+        f.write("]")
+        f.write(tail)
 
 
-def main() -> None:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Build final CSV/XLSX/HTML audit reports")
     parser.add_argument("--matches", type=Path, default=AUDIT_DIR / "match_results.json")
     parser.add_argument("--unmatched", type=Path, default=AUDIT_DIR / "unmatched_results.json")
@@ -313,7 +335,16 @@ def main() -> None:
     parser.add_argument("--dam-phash-dupes", type=Path, default=AUDIT_DIR / "dam_phash_dupes.json")
     parser.add_argument("--citizens-dupes", type=Path, default=AUDIT_DIR / "citizens_duplicates.json")
     parser.add_argument("--governance", type=Path, default=AUDIT_DIR / "governance_metrics.json")
-    args = parser.parse_args()
+    return parser
+
+
+def run(argv: list[str] | None = None, data: StageData | None = None) -> StageData:
+    """Run stage 05; match results may come from stage 04 in data."""
+    args = build_parser().parse_args(argv)
+    data = data if data is not None else StageData()
+    _progress.reset()
+    # Reported as the AUDIT_METRICS line when the stage finishes
+    metrics = StageMetrics(Path(__file__).name)
 
     ensure_dirs()
     
@@ -321,69 +352,79 @@ def main() -> None:
     total_steps = 6
     
     emit_progress(0, total_steps, "Loading match results...")
-    matches = load_json(args.matches)
-    unmatched = load_json(args.unmatched)
-    dam_dupes = load_json(args.dam_dupes)
+    dam_dupes = data.load(args.dam_dupes)
     
     # Load new governance data (may not exist in older runs)
     try:
-        dam_phash_dupes = load_json(args.dam_phash_dupes)
+        dam_phash_dupes = data.load(args.dam_phash_dupes)
     except FileNotFoundError:
         dam_phash_dupes = []
     
     try:
-        citizens_dupes = load_json(args.citizens_dupes)
+        citizens_dupes = data.load(args.citizens_dupes)
     except FileNotFoundError:
         citizens_dupes = []
     
     try:
-        governance = load_json(args.governance)
+        governance = data.load(args.governance)
     except FileNotFoundError:
         governance = {}
 
+    profile_checkpoint("inputs_loaded")
     emit_progress(1, total_steps, "Preparing report data...")
-    master_rows: list[dict] = []
-    for row in matches:
-        out = dict(row)
-        out["needs_dam_upload"] = False
-        out["page_urls"] = "|".join(out.get("page_urls", []))
-        master_rows.append(out)
-    for row in unmatched:
-        out = dict(row)
-        out["needs_dam_upload"] = out.get("match_status") in {"unmatched", "unmatched_error"}
-        out["page_urls"] = "|".join(out.get("page_urls", []))
-        master_rows.append(out)
+
+    def iter_master_rows():
+        for row in data.iter_rows(args.matches):
+            out = dict(row)
+            out["needs_dam_upload"] = False
+            out["page_urls"] = "|".join(out.get("page_urls", []))
+            yield out
+        for row in data.iter_rows(args.unmatched):
+            out = dict(row)
+            out["needs_dam_upload"] = out.get("match_status") in {"unmatched", "unmatched_error"}
+            out["page_urls"] = "|".join(out.get("page_urls", []))
+            yield out
+
+    emit_progress(2, total_steps, "Generating CSV reports...")
+    # Single streaming pass: CSV + audit_master rows, counting as they go
+    status_counts: Counter[str] = Counter()
+    master_csv = AUDIT_DIR / "audit_master.csv"
+    master_json = AUDIT_DIR / "audit_master.json"
+
+    # The master table and summary are deliverables: written even without artifacts
+    with data.writer(master_json, final=True) as master_writer:
+
+        def written_rows():
+            for row in iter_master_rows():
+                master_writer.write(row)
+                status_counts[row.get("match_status")] += 1
+                status_counts["needs_dam_upload"] += bool(row.get("needs_dam_upload"))
+                yield row
+
+        write_csv(master_csv, written_rows(), MASTER_CSV_FIELDS)
+    master_out = master_writer.path
 
     summary = {
-        "citizens_images_total": len(master_rows),
-        "matched_url_direct": sum(1 for r in master_rows if r.get("match_status") == "match_url_direct"),
-        "matched_exact": sum(1 for r in master_rows if r.get("match_status") == "match_exact"),
-        "matched_phash": sum(1 for r in master_rows if r.get("match_status") == "match_phash"),
-        "unmatched": sum(1 for r in master_rows if r.get("match_status") in {"unmatched", "unmatched_error"}),
-        "needs_dam_upload": sum(1 for r in master_rows if r.get("needs_dam_upload")),
+        "citizens_images_total": master_writer.count,
+        "matched_url_direct": status_counts["match_url_direct"],
+        "matched_exact": status_counts["match_exact"],
+        "matched_phash": status_counts["match_phash"],
+        "unmatched": status_counts["unmatched"] + status_counts["unmatched_error"],
+        "needs_dam_upload": status_counts["needs_dam_upload"],
         "dam_internal_dupe_groups": len(dam_dupes),
         "dam_phash_dupe_groups": len(dam_phash_dupes),
         "citizens_duplicate_groups": len(citizens_dupes),
     }
-
-    emit_progress(2, total_steps, "Generating CSV reports...")
-    master_csv = AUDIT_DIR / "audit_master.csv"
-    write_csv(
-        master_csv,
-        master_rows,
-        ["image_url", "match_status", "match_method", "url_contains_asset_id", "dam_item_id", "dam_file_name", "phash_distance", "page_count", "page_urls", "needs_dam_upload"],
-    )
-    write_json(AUDIT_DIR / "audit_master.json", master_rows)
-    write_json(AUDIT_DIR / "audit_summary.json", summary)
+    data.put(AUDIT_DIR / "audit_summary.json", summary, final=True)
 
     emit_progress(3, total_steps, "Generating Excel report...")
     xlsx_out = REPORTS_DIR / "citizens_dam_audit.xlsx"
-    unmatched_rows = [r for r in master_rows if r.get("needs_dam_upload")]
-    write_xlsx(summary, master_rows, unmatched_rows, dam_dupes, dam_phash_dupes, citizens_dupes, governance, xlsx_out)
+    write_xlsx(summary, data.iter_rows(master_json), dam_dupes, dam_phash_dupes, citizens_dupes, governance, xlsx_out)
     
+    profile_checkpoint("xlsx_written")
     emit_progress(4, total_steps, "Generating HTML dashboard...")
     html_out = REPORTS_DIR / "audit_report.html"
-    write_html(master_rows, summary, governance, html_out)
+    write_html(data.iter_rows(master_json), summary, governance, html_out)
     
     emit_progress(5, total_steps, "Finalizing reports...")
     emit_progress(6, total_steps, "Report generation complete")
@@ -393,12 +434,20 @@ def main() -> None:
         "governance": governance,
         "outputs": {
             "master_csv": str(master_csv),
-            "master_json": str(AUDIT_DIR / "audit_master.json"),
+            "master_json": str(master_out),
             "summary_json": str(AUDIT_DIR / "audit_summary.json"),
             "xlsx": str(xlsx_out),
             "html": str(html_out),
         },
     }, indent=2))
+    metrics.emit()
+    return data
+
+
+def main() -> None:
+    # AUDIT_PROFILE=cpu|mem (set by the orchestrators' --profile) profiles the run
+    with profile_stage(Path(__file__).name):
+        run()
 
 
 if __name__ == "__main__":
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import csv
+import gzip
 import hashlib
+import io
+import itertools
 import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator
 from urllib.parse import urljoin, urlparse, urlunparse
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -96,6 +106,35 @@ def normalize_url(url: str) -> str:
     return urlunparse(cleaned)
 
 
+class DomainMatcher:
+    """Precompiled domain whitelist supporting exact and wildcard (*.domain.com) rules.
+
+    Wildcard rules are stored as a set of base domains, so a lookup walks the
+    host's label suffixes (``a.b.aprimo.com`` -> ``b.aprimo.com`` -> ``aprimo.com``
+    -> ``com``) instead of scanning every rule.
+    """
+
+    def __init__(self, domains: Iterable[str]):
+        self.exact = frozenset(d.lower() for d in domains if not d.startswith("*."))
+        self.wildcard_bases = frozenset(d[2:].lower() for d in domains if d.startswith("*."))
+
+    def matches(self, host: str) -> bool:
+        if not host:
+            return False
+        if host in self.exact:
+            return True
+        # *.aprimo.com matches dam.aprimo.com and also the base domain aprimo.com
+        labels = host.split(".")
+        for i in range(len(labels)):
+            if ".".join(labels[i:]) in self.wildcard_bases:
+                return True
+        return False
+
+
+# ALLOWED_DOMAINS is treated as a constant; rebuild this if it is changed at runtime.
+_ALLOWED_DOMAIN_MATCHER = DomainMatcher(ALLOWED_DOMAINS)
+
+
 def validate_url_domain(url: str) -> bool:
     """Validate that URL is from an allowed domain.
     
@@ -117,22 +156,7 @@ def validate_url_domain(url: str) -> bool:
     if ':' in domain:
         domain = domain.split(':')[0]
     
-    # Check exact match first (faster)
-    if domain in ALLOWED_DOMAINS:
-        return True
-    
-    # Check wildcard patterns (*.domain.com)
-    for allowed in ALLOWED_DOMAINS:
-        if allowed.startswith('*.'):
-            # Wildcard pattern: *.aprimo.com matches dam.aprimo.com
-            suffix = allowed[1:]  # Remove '*' to get '.aprimo.com'
-            if domain.endswith(suffix):
-                return True
-            # Also match the base domain (aprimo.com matches *.aprimo.com)
-            if domain == suffix[1:]:  # Remove leading '.'
-                return True
-    
-    return False
+    return _ALLOWED_DOMAIN_MATCHER.matches(domain)
 
 
 def is_dam_url(url: str) -> bool:
@@ -218,67 +242,185 @@ def get_dam_url_pattern(url: str) -> str | None:
 
 
 def load_json(path: Path) -> Any:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    with open_text(path) as f:
+        return json_loads(f.read())
 
 
-def fetch_from_source(source_key: str) -> str:
-    """Fetch data from configured source (local file or remote URL).
+# Remote sources are streamed into a local cache keyed by source URL and
+# revalidated with ETag / Last-Modified.  Within AUDIT_SOURCE_CACHE_TTL
+# seconds (default 1 hour) a cached copy is used without any request, so
+# the stages of one pipeline run hit the network at most once per source.
+SOURCE_CACHE_DIR = AUDIT_DIR / "source_cache"
+SOURCE_CACHE_TTL_ENV = "AUDIT_SOURCE_CACHE_TTL"
+DEFAULT_SOURCE_CACHE_TTL = 3600
+SOURCE_FETCH_CHUNK_BYTES = 1 << 20
+# Counted by source_path() per thread: in-process stages share the cache, but
+# each runs on its own thread, so a stage's StageMetrics sees only its fetches
+_source_cache_local = threading.local()
+
+
+def _source_config(source_key: str) -> dict:
+    config = DATA_SOURCE_CONFIG.get(source_key)
+    if not config or not config.get("enabled"):
+        raise ValueError(f"Data source '{source_key}' is not configured or disabled")
+    if not config.get("source"):
+        raise ValueError(f"Data source '{source_key}' has no source path/URL configured")
+    return config
+
+
+def source_cache_ttl() -> float:
+    try:
+        return float(os.environ.get(SOURCE_CACHE_TTL_ENV, DEFAULT_SOURCE_CACHE_TTL))
+    except ValueError:
+        return DEFAULT_SOURCE_CACHE_TTL
+
+
+def _source_cache_paths(url: str) -> tuple[Path, Path]:
+    """(data, metadata) cache files for a source URL."""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+    suffix = Path(urlparse(url).path).suffix.lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,8}", suffix):
+        suffix = ".data"
+    return SOURCE_CACHE_DIR / f"{key}{suffix}", SOURCE_CACHE_DIR / f"{key}.meta.json"
+
+
+def _fetch_remote_source(source_key: str, config: dict) -> Path:
+    import urllib.error
+    import urllib.request
+
+    url = config["source"]
+    data_path, meta_path = _source_cache_paths(url)
+    counts = _source_cache_counter()
+    meta: dict = {}
+    if data_path.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+    if meta.get("url") != url:
+        meta = {}
+
+    now = time.time()
+    if meta and now - meta.get("validated_at", 0) < source_cache_ttl():
+        counts["hits"] += 1
+        return data_path
+
+    headers = {}
+    # Add authentication for SharePoint
+    if config.get("type") == "sharepoint" and config.get("auth_token"):
+        headers["Authorization"] = f"Bearer {config['auth_token']}"
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    sys.stderr.write(f"[Data Source] Fetching {source_key} from: {url}\n")
+    req = urllib.request.Request(url, headers=headers)
+    counts["requests"] += 1
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            SOURCE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = data_path.with_name(f"{data_path.name}.{os.getpid()}.tmp")
+            size = 0
+            try:
+                with tmp_path.open("wb") as f:
+                    while True:
+                        chunk = response.read(SOURCE_FETCH_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        size += len(chunk)
+                os.replace(tmp_path, data_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            counts["misses"] += 1
+            counts["bytes"] += size
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "bytes": size,
+                "fetched_at": now,
+            }
+    except urllib.error.HTTPError as e:
+        if not meta:
+            raise Exception(f"Failed to fetch {source_key} from {url}: {e}")
+        counts["hits"] += 1
+        if e.code != 304:
+            # Server error, throttling (429), ...: serve the cached copy and revalidate next time
+            sys.stderr.write(f"[Warning] Could not revalidate {source_key} ({e}) - using cached copy\n")
+            return data_path
+        sys.stderr.write(f"[Data Source] {source_key} not modified - using cached copy\n")
+    except urllib.error.URLError as e:
+        if not meta:
+            raise Exception(f"Failed to fetch {source_key} from {url}: {e}")
+        sys.stderr.write(f"[Warning] Could not revalidate {source_key} ({e}) - using cached copy\n")
+        counts["hits"] += 1
+        return data_path
+
+    meta["validated_at"] = now
+    write_json(meta_path, meta)
+    return data_path
+
+
+def _source_cache_counter() -> Counter[str]:
+    counts = getattr(_source_cache_local, "counts", None)
+    if counts is None:
+        counts = _source_cache_local.counts = Counter()
+    return counts
+
+
+def source_cache_counts() -> Counter[str]:
+    """Source cache requests, bytes, hits and misses of the calling thread so far (a copy)."""
+    return Counter(_source_cache_counter())
+
+
+def source_path(source_key: str) -> Path:
+    """Local file holding the configured source (remote sources are cached).
     
     Args:
         source_key: Key in DATA_SOURCE_CONFIG (e.g., 'citizens_urls', 'dam_assets')
         
-    Returns:
-        Text content from the source
-        
     Raises:
         ValueError: If source is not configured or disabled
         FileNotFoundError: If local file doesn't exist
-        Exception: If remote fetch fails
+        Exception: If remote fetch fails and nothing is cached
     """
-    import sys
-    
-    config = DATA_SOURCE_CONFIG.get(source_key)
-    if not config or not config.get("enabled"):
-        raise ValueError(f"Data source '{source_key}' is not configured or disabled")
-    
+    config = _source_config(source_key)
     source_type = config.get("type", "local")
-    source = config.get("source")
-    
-    if not source:
-        raise ValueError(f"Data source '{source_key}' has no source path/URL configured")
     
     # Local file
     if source_type == "local":
-        path = Path(source)
+        path = Path(config["source"])
         if not path.exists():
             raise FileNotFoundError(f"Local file not found: {path}")
-        return path.read_text(encoding="utf-8")
+        return path
     
     # Remote URL (including SharePoint)
-    elif source_type in ("url", "sharepoint"):
-        try:
-            import urllib.request
-            import urllib.error
-            
-            headers = {}
-            
-            # Add authentication for SharePoint
-            if source_type == "sharepoint" and config.get("auth_token"):
-                headers["Authorization"] = f"Bearer {config['auth_token']}"
-            
-            req = urllib.request.Request(source, headers=headers)
-            
-            sys.stderr.write(f"[Data Source] Fetching {source_key} from: {source}\n")
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return response.read().decode("utf-8")
-                
-        except urllib.error.URLError as e:
-            raise Exception(f"Failed to fetch {source_key} from {source}: {e}")
+    if source_type in ("url", "sharepoint"):
+        return _fetch_remote_source(source_key, config)
     
-    else:
-        raise ValueError(f"Unknown source type '{source_type}' for {source_key}")
+    raise ValueError(f"Unknown source type '{source_type}' for {source_key}")
+
+
+def open_source(source_key: str):
+    """Open the configured source as a UTF-8 text stream."""
+    return open_text(source_path(source_key))
+
+
+def fetch_from_source(source_key: str) -> str:
+    """Fetch data from configured source (local file or remote URL).
+    
+    Prefer source_path()/open_source() for large sources.
+    
+    Args:
+        source_key: Key in DATA_SOURCE_CONFIG (e.g., 'citizens_urls', 'dam_assets')
+        
+    Returns:
+        Text content from the source
+    """
+    with open_source(source_key) as f:
+        return f.read()
 
 
 def load_json_from_source(source_key: str) -> Any:
@@ -290,29 +432,796 @@ def load_json_from_source(source_key: str) -> Any:
     Returns:
         Parsed JSON data
     """
-    text = fetch_from_source(source_key)
-    return json.loads(text)
+    return load_json(source_path(source_key))
 
 
-def write_json(path: Path, data: Any) -> None:
-    """Write data to JSON file, handling numpy int64 types."""
-    def convert_types(obj):
-        """Convert numpy types to Python native types for JSON serialization."""
-        # Handle numpy types if numpy is available
+# ============================================================================
+# JSON Serialization & Compressed Files
+# ============================================================================
+# Stage files are encoded with orjson when installed (NumPy scalars/arrays
+# serialize natively), then msgspec, then the stdlib json module.  Force one
+# with AUDIT_JSON_BACKEND=orjson|msgspec|stdlib.  Files ending in .gz or .zst
+# are (de)compressed transparently by every reader/writer below; zstd needs
+# the zstandard package.  AUDIT_COMPRESSION=gzip|zstd makes stages write
+# compressed outputs.
+# ============================================================================
+
+JSON_BACKEND_ENV = "AUDIT_JSON_BACKEND"
+JSON_BACKENDS = ("orjson", "msgspec", "stdlib")
+COMPRESSION_ENV = "AUDIT_COMPRESSION"
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _json_default(obj):
+    """Convert numpy types to Python native types for JSON serialization."""
+    # A numpy value can only exist once numpy is loaded; never import it here
+    np = sys.modules.get("numpy")
+    if np is not None:
+        if isinstance(obj, np.integer):
+            return int(obj)
+        elif isinstance(obj, np.floating):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@lru_cache(maxsize=1)
+def json_backend() -> str:
+    """Name of the JSON library in use: 'orjson', 'msgspec' or 'stdlib'."""
+    requested = os.environ.get(JSON_BACKEND_ENV, "").strip().lower()
+    if requested and requested not in JSON_BACKENDS:
+        sys.stderr.write(f"[Warning] Unknown {JSON_BACKEND_ENV}={requested!r} - auto-detecting\n")
+        requested = ""
+    for name in (requested,) if requested else JSON_BACKENDS:
+        if name == "stdlib":
+            return name
         try:
-            import numpy as np
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
+            __import__(name)
+            return name
         except ImportError:
-            pass
-        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+            if requested:
+                sys.stderr.write(f"[Warning] {name} not installed - using stdlib json\n")
+    return "stdlib"
+
+
+def json_dumps(data: Any, indent: int | None = None) -> str:
+    """Serialize data to JSON text (compact unless indent is given)."""
+    backend = json_backend()
+    try:
+        if backend == "orjson":
+            import orjson
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(data, default=_json_default, option=option).decode("utf-8")
+        if backend == "msgspec":
+            import msgspec
+            encoded = msgspec.json.encode(data, enc_hook=_json_default)
+            if indent:
+                encoded = msgspec.json.format(encoded, indent=indent)
+            return encoded.decode("utf-8")
+    except (TypeError, ValueError, OverflowError):
+        pass  # e.g. integers beyond 64 bits: the stdlib encoder handles them
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        indent=indent,
+        separators=None if indent is not None else (",", ":"),
+        default=_json_default,
+    )
+
+
+def json_loads(text: str | bytes) -> Any:
+    """Parse JSON text with the fastest available backend."""
+    backend = json_backend()
+    try:
+        if backend == "orjson":
+            import orjson
+            return orjson.loads(text)
+        if backend == "msgspec":
+            import msgspec
+            return msgspec.json.decode(text)
+    except ValueError:
+        pass  # NaN/Infinity and other stdlib-only extensions
+    return json.loads(text)
+
+
+@lru_cache(maxsize=1)
+def _zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        sys.stderr.write("[Warning] zstandard not installed - .zst files unavailable\n")
+        return None
+
+
+def compression() -> str:
+    """Configured stage output compression: '', 'gzip' or 'zstd'."""
+    value = os.environ.get(COMPRESSION_ENV, "").strip().lower()
+    if value in ("", "none", "0"):
+        return ""
+    if value not in COMPRESSION_SUFFIXES:
+        sys.stderr.write(f"[Warning] Unknown {COMPRESSION_ENV}={value!r} - writing uncompressed\n")
+        return ""
+    if value == "zstd" and _zstandard() is None:
+        return "gzip"
+    return value
+
+
+def logical_suffix(path: Path) -> str:
+    """File suffix ignoring a trailing compression suffix (data.json.gz -> .json)."""
+    suffix = path.suffix.lower()
+    if suffix in COMPRESSION_SUFFIXES.values():
+        return Path(path.stem).suffix.lower()
+    return suffix
+
+
+def open_text(path: Path, mode: str = "r"):
+    """Open a UTF-8 text file, (de)compressing .gz/.zst files by suffix."""
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=GZIP_LEVEL)
+    if suffix == ".zst":
+        zstd = _zstandard()
+        if zstd is None:
+            raise RuntimeError(f"zstandard is required to open {path.name}")
+        if "r" in mode:
+            raw = zstd.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+        else:
+            raw = zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(path.open("wb"), closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def write_json(path: Path, data: Any, indent: int | None = 2) -> None:
+    """Write data to JSON file, handling numpy int64 types.
+
+    Pass indent=None for compact output (e.g. large integer columns).
+    """
+    with open_text(path, "w") as f:
+        f.write(json_dumps(data, indent=indent))
+
+
+# ============================================================================
+# Stage Output Storage (JSON / Parquet / Arrow IPC)
+# ============================================================================
+# Row-oriented stage outputs (fingerprints, match results, audit master) can
+# be handed between stages as columnar files.  Set AUDIT_STORAGE_FORMAT to
+# "parquet" or "arrow" (requires pyarrow); the default stays "json".  Stage
+# paths keep their canonical .json names; the columnar file sits next to it
+# and readers pick whichever is newer.  A .json export is still written for
+# the extension unless AUDIT_JSON_EXPORT=0.  The same applies to compressed
+# JSON outputs (data.json.gz / data.json.zst) under AUDIT_COMPRESSION.
+# ============================================================================
+
+STORAGE_FORMAT_ENV = "AUDIT_STORAGE_FORMAT"
+JSON_EXPORT_ENV = "AUDIT_JSON_EXPORT"
+STORAGE_SUFFIXES = {"json": ".json", "parquet": ".parquet", "arrow": ".arrow"}
+COLUMNAR_SUFFIXES = (".parquet", ".arrow")
+
+# Schema metadata keys written alongside columnar tables
+_JSON_COLUMNS_KEY = b"audit_json_columns"  # columns stored as JSON text (mixed types)
+_SPARSE_COLUMNS_KEY = b"audit_sparse_columns"  # columns absent from some rows
+# Rows converted and written at a time; peak memory holds one batch, not the table
+COLUMNAR_BATCH_ROWS = 10_000
+
+
+@lru_cache(maxsize=1)
+def _pyarrow():
+    """Import pyarrow once; None (with a warning) when it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return pyarrow
+    except ImportError:
+        sys.stderr.write("[Warning] pyarrow not installed - columnar storage disabled, using JSON\n")
+        return None
+
+
+def storage_format() -> str:
+    """Configured stage storage format: 'json', 'parquet' or 'arrow'."""
+    fmt = os.environ.get(STORAGE_FORMAT_ENV, "json").strip().lower() or "json"
+    if fmt not in STORAGE_SUFFIXES:
+        sys.stderr.write(f"[Warning] Unknown {STORAGE_FORMAT_ENV}={fmt!r} - using json\n")
+        return "json"
+    if fmt != "json" and _pyarrow() is None:
+        return "json"
+    return fmt
+
+
+def _row_batches(rows: Iterable[dict]) -> Iterator[list[dict]]:
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, COLUMNAR_BATCH_ROWS))
+        if not batch:
+            return
+        yield batch
+
+
+def _columnar_schema(batches: Iterable[list[dict]]):
+    """
+    Schema for rows arriving in batches: columns in order of first appearance.
+
+    A column's type is widened across batches (int64 -> double, list<null>
+    -> list<int64>, ...); columns whose values cannot share one type are
+    stored as JSON text.  The metadata records those and the sparse columns.
+    """
+    pa = _pyarrow()
+    types: dict[str, Any] = {}
+    json_columns: set[str] = set()
+    sparse_columns: set[str] = set()
+    seen = 0
+    for rows in batches:
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        sparse_columns.update(key for key in types if key not in keys)
+        for key in keys:
+            if key not in types:
+                types[key] = pa.null()
+                if seen:
+                    sparse_columns.add(key)
+            if any(key not in row for row in rows):
+                sparse_columns.add(key)
+            if key in json_columns:
+                continue
+            try:
+                batch_type = pa.array([row.get(key) for row in rows]).type
+                unified = pa.unify_schemas(
+                    [pa.schema([(key, types[key])]), pa.schema([(key, batch_type)])], promote_options="permissive"
+                )
+                types[key] = unified.field(key).type
+            except (pa.ArrowException, TypeError, OverflowError):
+                # Mixed types in one column: keep the values as JSON text
+                json_columns.add(key)
+        seen += len(rows)
+    return pa.schema(
+        [pa.field(key, pa.string() if key in json_columns else type_) for key, type_ in types.items()],
+        metadata={
+            _JSON_COLUMNS_KEY: json.dumps([key for key in types if key in json_columns]),
+            _SPARSE_COLUMNS_KEY: json.dumps([key for key in types if key in sparse_columns]),
+        },
+    )
+
+
+def _rows_to_batch(rows: list[dict], schema):
+    pa = _pyarrow()
+    json_columns = set(json.loads(schema.metadata[_JSON_COLUMNS_KEY]))
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if field.name in json_columns:
+            values = [None if v is None else json.dumps(v, ensure_ascii=False, default=str) for v in values]
+        arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_columnar(path: Path, rows: Callable[[], Iterable[dict]]) -> None:
+    """Write a .parquet/.arrow file batch by batch; rows() is called once per pass."""
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError(f"pyarrow is required to write {path.name}")
+    # The first pass settles the schema, the second converts and writes one batch at a time
+    schema = _columnar_schema(_row_batches(rows()))
+    codec = compression()
+    if path.suffix.lower() == ".parquet":
+        writer = pa.parquet.ParquetWriter(str(path), schema, compression=codec or "snappy")
+        with writer:
+            for batch in _row_batches(rows()):
+                writer.write_batch(_rows_to_batch(batch, schema))
+        return
+    # Arrow IPC only supports lz4/zstd buffer compression
+    options = pa.ipc.IpcWriteOptions(compression="zstd" if codec else None)
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for batch in _row_batches(rows()):
+            writer.write_batch(_rows_to_batch(batch, schema))
+
+
+def _table_to_rows(table) -> list[dict]:
+    metadata = table.schema.metadata or {}
+    json_columns = [c for c in json.loads(metadata.get(_JSON_COLUMNS_KEY, b"[]")) if c in table.column_names]
+    sparse_columns = [c for c in json.loads(metadata.get(_SPARSE_COLUMNS_KEY, b"[]")) if c in table.column_names]
+    rows = table.to_pylist()
+    if json_columns or sparse_columns:
+        for row in rows:
+            for key in json_columns:
+                if row[key] is not None:
+                    row[key] = json.loads(row[key])
+            for key in sparse_columns:
+                if row[key] is None:
+                    del row[key]
+    return rows
+
+
+def write_records(path: Path, rows: list[dict]) -> None:
+    """Write a list of row dicts in the format implied by path's suffix."""
+    suffix = path.suffix.lower()
+    if suffix not in COLUMNAR_SUFFIXES:
+        write_json(path, rows)
+        return
+    _write_columnar(path, lambda: rows)
+
+
+def stage_input_candidates(path: Path) -> list[Path]:
+    """Files that may hold the data for a canonical .json stage path."""
+    if path.suffix.lower() != ".json":
+        return [path]
+    compressed = [path.with_name(path.name + suffix) for suffix in COMPRESSION_SUFFIXES.values()]
+    return [path, *compressed, *(path.with_suffix(suffix) for suffix in COLUMNAR_SUFFIXES)]
+
+
+def resolve_stage_input(path: Path) -> Path:
+    """Return the newest of a .json stage path and its compressed/columnar siblings."""
+    candidates = stage_input_candidates(path)
+    best = path
+    best_mtime = path.stat().st_mtime if path.exists() else -1.0
+    for candidate in candidates[1:]:
+        if not candidate.exists() or candidate.stat().st_mtime < best_mtime:
+            continue
+        if candidate.suffix.lower() in COLUMNAR_SUFFIXES and _pyarrow() is None:
+            continue
+        if candidate.suffix.lower() == ".zst" and _zstandard() is None:
+            continue
+        best, best_mtime = candidate, candidate.stat().st_mtime
+    return best
+
+
+def read_records(path: Path, columns: Iterable[str] | None = None) -> list[dict]:
+    """Read a row-oriented stage output, optionally projecting to columns.
+
+    path may be the canonical .json name; a newer .json.gz/.json.zst or
+    .parquet/.arrow sibling is read instead.  Parquet reads only the
+    requested columns from disk.
+    """
+    path = resolve_stage_input(path)
+    columns = list(columns) if columns is not None else None
+    suffix = logical_suffix(path)
+
+    if suffix not in COLUMNAR_SUFFIXES:
+        rows = load_json(path)
+        if columns is None:
+            return rows
+        return [{c: row[c] for c in columns if c in row} for row in rows]
+
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError(f"pyarrow is required to read {path.name}")
+    if suffix == ".parquet":
+        if columns is not None:
+            available = set(pa.parquet.read_schema(str(path)).names)
+            columns = [c for c in columns if c in available]
+        table = pa.parquet.read_table(str(path), columns=columns)
+    else:
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+    return _table_to_rows(table)
+
+
+def write_stage_records(json_path: Path, rows: Iterable[dict]) -> Path:
+    """Write a stage output in the configured storage format.
+
+    Returns the path written for downstream stages.
+    """
+    with open_stage_writer(json_path) as writer:
+        writer.write_many(rows)
+    return writer.path
+
+
+# ============================================================================
+# Record Streaming (iter_records / RecordWriter)
+# ============================================================================
+# Stages consume and produce rows one at a time so peak memory is bounded by
+# the batch in flight rather than the dataset.  RecordWriter writes .json
+# outputs as an array with one compact record per line (still plain JSON for
+# the extension) and .jsonl as JSON Lines; iter_records streams both, plus
+# older indent=2 files and the columnar formats above.
+# ============================================================================
+
+STREAM_CHUNK_CHARS = 1 << 16
+_JSON_SEPARATORS_RE = re.compile(r"[\s,]*")
+
+
+class _JsonTextStream:
+    """Incremental JSON tokenizer over a text stream (ijson-style, stdlib only).
+
+    Values are decoded one at a time with json.JSONDecoder.raw_decode over a
+    growing buffer, so memory is bounded by the largest single value.
+    """
+
+    def __init__(self, f, chunk_size: int = STREAM_CHUNK_CHARS, prefix: str = ""):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf, self.pos, self.eof = prefix, 0, False
+        self.chars_read = len(prefix)
+        self.key_found = False
+
+    def fill(self) -> None:
+        # Read at least as much as is buffered so a huge value costs O(n log n)
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        self.chars_read += len(chunk)
+
+    def peek(self) -> str:
+        """Skip whitespace/commas; return the next character ("" at EOF)."""
+        while True:
+            self.pos = _JSON_SEPARATORS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self.fill()
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON stream")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.fill()
+                continue
+            if not self.eof and type(value) in (int, float) and len(self.buf) - end < 64:
+                self.fill()  # a number cut at the chunk edge ("3." -> 3) may continue
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """Yield the elements of the array starting at the current position."""
+        if self.peek() != "[":
+            raise ValueError("expected a JSON array")
+        self.pos += 1
+        while True:
+            char = self.peek()
+            if not char:
+                raise ValueError("unterminated JSON array")
+            if char == "]":
+                self.pos += 1
+                return
+            yield self.value()
+
+    def iter_object_array(self, key: str) -> Iterator[Any]:
+        """Yield the elements of the array stored under key in the current object.
+
+        Other members are decoded and discarded; a missing key yields nothing.
+        """
+        self.expect("{")
+        while True:
+            char = self.peek()
+            if char == "}":
+                return
+            if char != '"':
+                raise ValueError("expected an object key in JSON stream")
+            name = self.value()
+            self.expect(":")
+            if name == key and self.peek() == "[":
+                self.key_found = True
+                yield from self.iter_array()
+                return
+            self.value()
+
+
+def _iter_json_array(f, chunk_size: int = STREAM_CHUNK_CHARS, prefix: str = "") -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array from a text stream.
+
+    prefix is text already consumed from f.
+    """
+    yield from _JsonTextStream(f, chunk_size, prefix).iter_array()
+
+
+class JsonItemReader:
+    """
+    Stream the items of a JSON array file, bare or wrapped as {key: [...]}.
+
+    Used for the Aprimo DAM catalog (a bare array, or {"assets": [...]} as
+    saved by the extension), which can be tens of MB.  Items are yielded as
+    they are parsed; estimated_total() extrapolates the item count from the
+    share of the file read so far (uncompressed files only).
+    
+    Usage:
+        reader = JsonItemReader(AUDIT_DIR / "dam_assets.json")
+        for asset in reader:
+            ...
+    """
     
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=convert_types)
+    def __init__(self, path: Path, key: str = "assets"):
+        self.path = path
+        self.key = key
+        self.layout: str | None = None  # "array" or "object" once reading starts
+        self.key_found = False  # for "object": whether it held a key array
+        self.count = 0
+        self._stream: _JsonTextStream | None = None
+        compressed = path.suffix.lower() in COMPRESSION_SUFFIXES.values()
+        self._size_hint = None if compressed else path.stat().st_size
+    
+    def __iter__(self) -> Iterator[Any]:
+        with open_text(self.path) as f:
+            self._stream = _JsonTextStream(f)
+            first = self._stream.peek()
+            if first == "[":
+                self.layout = "array"
+                items = self._stream.iter_array()
+            elif first == "{":
+                self.layout = "object"
+                items = self._stream.iter_object_array(self.key)
+            else:
+                raise ValueError(f"{self.path.name} must be a JSON array or an object with an {self.key!r} array")
+            for item in items:
+                self.count += 1
+                yield item
+            self.key_found = self._stream.key_found
+    
+    def estimated_total(self) -> int:
+        """Best guess at the total item count (exact once iteration finishes)."""
+        stream = self._stream
+        if stream is None or not self._size_hint or not stream.chars_read:
+            return self.count
+        if stream.eof:
+            return self.count
+        # Items parsed so far occupy the consumed part of the buffer
+        consumed = stream.chars_read - (len(stream.buf) - stream.pos)
+        return max(self.count, round(self.count * self._size_hint / max(consumed, 1)))
+
+
+def iter_json_items(path: Path, key: str = "assets") -> Iterator[Any]:
+    """Yield the items of a bare JSON array file or of its {key: [...]} wrapper."""
+    yield from JsonItemReader(path, key)
+
+
+def _iter_record_lines(f) -> Iterator[Any]:
+    """Yield array elements, using the fast codec on RecordWriter's layout.
+
+    RecordWriter puts "[" and each record on their own lines, so rows can be
+    parsed line by line; any other formatting falls back to _iter_json_array.
+    """
+    first = f.readline()
+    second = f.readline() if first.strip() == "[" else ""
+    record_line = second.rstrip("\r\n").rstrip(",")
+    if not record_line.startswith("{"):
+        if first.strip() == "[" and second.strip() == "]":
+            return
+        yield from _iter_json_array(f, prefix=first + second)
+        return
+    yield json_loads(record_line)
+    for line in f:
+        line = line.rstrip("\r\n")
+        if line.endswith(","):
+            line = line[:-1]
+        if line == "]":
+            return
+        if line:
+            yield json_loads(line)
+    raise ValueError("unterminated JSON array")
+
+
+def _iter_table_batches(path: Path, columns: list[str] | None) -> Iterator[dict]:
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError(f"pyarrow is required to read {path.name}")
+    if path.suffix.lower() == ".parquet":
+        parquet_file = pa.parquet.ParquetFile(str(path))
+        schema = parquet_file.schema_arrow
+        if columns is not None:
+            columns = [c for c in columns if c in schema.names]
+            schema = pa.schema([schema.field(c) for c in columns], metadata=schema.metadata)
+        for batch in parquet_file.iter_batches(columns=columns):
+            yield from _table_to_rows(pa.Table.from_batches([batch], schema=schema))
+        return
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            table = pa.Table.from_batches([reader.get_batch(i)], schema=reader.schema)
+            if columns is not None:
+                table = table.select([c for c in columns if c in table.column_names])
+            yield from _table_to_rows(table)
+
+
+def iter_records(path: Path, columns: Iterable[str] | None = None) -> Iterator[dict]:
+    """Lazily yield the rows of a stage output, optionally projected to columns.
+
+    Accepts .json (any formatting), .jsonl, .parquet and .arrow, each JSON
+    flavour optionally .gz/.zst compressed; a .json path resolves to a newer
+    sibling like read_records().
+    """
+    path = resolve_stage_input(path)
+    columns = list(columns) if columns is not None else None
+    suffix = logical_suffix(path)
+
+    if suffix in COLUMNAR_SUFFIXES:
+        yield from _iter_table_batches(path, columns)
+        return
+
+    with open_text(path) as f:
+        if suffix == ".jsonl":
+            rows = (json_loads(line) for line in f if line.strip())
+        else:
+            rows = _iter_record_lines(f)
+        for row in rows:
+            yield row if columns is None else {c: row[c] for c in columns if c in row}
+
+
+def count_records(path: Path) -> int:
+    """Number of rows in a stage output (metadata only for columnar files)."""
+    path = resolve_stage_input(path)
+    suffix = logical_suffix(path)
+    pa = _pyarrow() if suffix in COLUMNAR_SUFFIXES else None
+    if suffix == ".parquet" and pa is not None:
+        return pa.parquet.ParquetFile(str(path)).metadata.num_rows
+    if suffix == ".arrow" and pa is not None:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    if suffix == ".jsonl":
+        with open_text(path) as f:
+            return sum(1 for line in f if line.strip())
+    return sum(1 for _ in iter_records(path))
+
+
+class RecordWriter:
+    """
+    Write records one at a time to .json, .jsonl, .parquet or .arrow.
+
+    Output goes to a temporary file that replaces path on close(), so readers
+    never see a partial file.  .json files are written as an array with one
+    record per line; a .gz/.zst suffix compresses the JSON flavours.
+    Columnar formats spool to JSON Lines and are converted on close, one
+    record batch at a time.  json_export
+    additionally writes a plain .json copy, finalized before path so path is
+    the newer sibling.  mirror (e.g. an audit_store.TableWriter) receives
+    every record too and is closed or aborted with the writer; validator
+    (a RowValidator) checks each record as it is written.
+    
+    Usage:
+        with RecordWriter(AUDIT_DIR / "rows.json") as writer:
+            for row in rows:
+                writer.write(row)
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        json_export: Path | None = None,
+        mirror: Any = None,
+        validator: "RowValidator | None" = None,
+    ):
+        self.path = path
+        self.json_export = json_export
+        self.mirror = mirror
+        self.validator = validator
+        self.count = 0
+        self._columnar = logical_suffix(path) in COLUMNAR_SUFFIXES
+        # Each sink: [tmp_path, final_path (None for the spool), file, json_array]
+        self._sinks: list[list] = []
+        if self._columnar:
+            self._spool = path.with_name(path.name + ".spool.jsonl")
+            self._open_sink(self._spool, None)
+        else:
+            self._open_sink(self._tmp_name(path), path)
+        if json_export is not None:
+            self._open_sink(self._tmp_name(json_export), json_export)
+    
+    @staticmethod
+    def _tmp_name(path: Path) -> Path:
+        # Keep the final suffix so open_text() still sees .gz/.zst
+        return path.with_name(f"{path.stem}.tmp{path.suffix}")
+    
+    def _open_sink(self, tmp_path: Path, final_path: Path | None) -> None:
+        json_array = final_path is not None and logical_suffix(final_path) != ".jsonl"
+        f = open_text(tmp_path, "w")
+        if json_array:
+            f.write("[")
+        self._sinks.append([tmp_path, final_path, f, json_array])
+    
+    def write(self, record: dict) -> None:
+        line = json_dumps(record)
+        for _, _, f, json_array in self._sinks:
+            if json_array:
+                f.write(",\n" if self.count else "\n")
+                f.write(line)
+            else:
+                f.write(line)
+                f.write("\n")
+        if self.mirror is not None:
+            self.mirror.write(record)
+        if self.validator is not None:
+            self.validator.check(record)
+        self.count += 1
+    
+    def write_many(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.write(record)
+    
+    def close(self) -> None:
+        if all(f.closed for _, _, f, _ in self._sinks):
+            return
+        for _, _, f, json_array in self._sinks:
+            if json_array:
+                f.write("\n]\n" if self.count else "]\n")
+            f.close()
+        try:
+            for tmp_path, final_path, _, _ in reversed(self._sinks):
+                if final_path is not None:
+                    os.replace(tmp_path, final_path)
+            if self._columnar:
+                table_tmp = self._tmp_name(self.path)
+                _write_columnar(table_tmp, lambda: iter_records(self._spool))
+                os.replace(table_tmp, self.path)
+            if self.mirror is not None:
+                self.mirror.close()
+        finally:
+            if self._columnar:
+                self._spool.unlink(missing_ok=True)
+    
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        for tmp_path, _, f, _ in self._sinks:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+        if self.mirror is not None:
+            self.mirror.abort()
+    
+    def __enter__(self) -> "RecordWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def stage_output_path(json_path: Path) -> Path:
+    """Path a stage writes for a canonical .json output under the current config."""
+    fmt = storage_format()
+    if fmt != "json":
+        return json_path.with_suffix(STORAGE_SUFFIXES[fmt])
+    codec = compression()
+    if codec:
+        return json_path.with_name(json_path.name + COMPRESSION_SUFFIXES[codec])
+    return json_path
+
+
+def open_stage_writer(json_path: Path, schema: dict | None = None) -> RecordWriter:
+    """RecordWriter for a stage output in the configured storage format.
+
+    With a schema, rows are validated as they are written (see RowValidator);
+    call writer.validator.report() once the writer is closed.
+
+    With a columnar format or compression the plain .json export is kept
+    for the extension unless AUDIT_JSON_EXPORT=0.  When the SQLite audit
+    store is enabled (AUDIT_SQLITE_STORE) rows are mirrored into its table.
+    """
+    path = stage_output_path(json_path)
+    export = None
+    if path != json_path and os.environ.get(JSON_EXPORT_ENV, "1") != "0":
+        export = json_path
+    mirror, validator = stage_row_hooks(json_path, schema)
+    return RecordWriter(path, json_export=export, mirror=mirror, validator=validator)
+
+
+def stage_row_hooks(json_path: Path, schema: dict | None) -> tuple[Any, "RowValidator | None"]:
+    """Audit-store mirror and row validator for a stage output (either may be None)."""
+    from audit_store import STORE_TABLES, open_audit_store
+
+    store = open_audit_store()
+    mirror = store.writer(json_path.stem) if store is not None and json_path.stem in STORE_TABLES else None
+    validator = RowValidator(schema, json_path.stem) if schema is not None else None
+    return mirror, validator
 
 
 def read_url_list(path: Path) -> list[str]:
@@ -359,31 +1268,28 @@ def read_url_list_from_source(source_key: str = "citizens_urls") -> list[str]:
     Returns:
         List of validated, normalized URLs
     """
-    import sys
-    
-    text = fetch_from_source(source_key)
-    
     urls: list[str] = []
     seen = set()
     rejected_count = 0
     
-    for line in text.splitlines():
-        url = line.strip()
-        if not url or url.startswith("#"):
-            continue
-        normalized = normalize_url(url)
-        if normalized in seen:
-            continue
+    with open_source(source_key) as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith("#"):
+                continue
+            normalized = normalize_url(url)
+            if normalized in seen:
+                continue
         
-        # Validate domain against whitelist
-        if not validate_url_domain(normalized):
-            rejected_count += 1
-            if rejected_count <= 5:
-                sys.stderr.write(f"[Security] Rejected non-whitelisted URL: {normalized}\n")
-            continue
+            # Validate domain against whitelist
+            if not validate_url_domain(normalized):
+                rejected_count += 1
+                if rejected_count <= 5:
+                    sys.stderr.write(f"[Security] Rejected non-whitelisted URL: {normalized}\n")
+                continue
         
-        seen.add(normalized)
-        urls.append(normalized)
+            seen.add(normalized)
+            urls.append(normalized)
     
     if rejected_count > 0:
         sys.stderr.write(f"[Security] Rejected {rejected_count} URLs from non-whitelisted domains\n")
@@ -409,10 +1315,37 @@ def safe_join(base_url: str, maybe_relative: str) -> str:
     return normalize_url(urljoin(base_url, maybe_relative.strip()))
 
 
+# Image URL filtering rules used by stage 01
+DISALLOWED_IMAGE_EXTENSIONS = (".svg", ".eps")
+
+# Known tracking and analytics domains (substring match against the hostname).
+# These are not actual images, just tracking pixels.
+TRACKING_HOST_PATTERNS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.com',
+    'facebook.net',
+    'pinterest.com',
+    'ct.pinterest.com',
+    'linkedin.com',
+    'twitter.com',
+    'analytics.',  # Generic analytics subdomains
+    'tracking.',   # Generic tracking subdomains
+    'pixel.',      # Generic pixel subdomains
+)
+_TRACKING_HOST_RE = re.compile("|".join(re.escape(p) for p in TRACKING_HOST_PATTERNS))
+
+# Only images from these hostnames are included in the audit
+AUDIT_IMAGE_HOSTNAMES = frozenset({
+    'www.citizensbank.com',
+    'p1.aprimocdn.net',
+})
+
+
 def allowed_image_extension(url: str) -> bool:
     path = urlparse(url).path.lower()
-    disallowed = (".svg", ".eps")
-    if path.endswith(disallowed):
+    if path.endswith(DISALLOWED_IMAGE_EXTENSIONS):
         return False
     return True
 
@@ -426,31 +1359,7 @@ def is_tracking_or_analytics_url(url: str) -> bool:
         hostname = urlparse(url).hostname
         if not hostname:
             return False
-        
-        # Normalize to lowercase for comparison
-        hostname = hostname.lower()
-        
-        # Known tracking and analytics domains
-        tracking_domains = [
-            'google-analytics.com',
-            'googletagmanager.com',
-            'doubleclick.net',
-            'facebook.com',
-            'facebook.net',
-            'pinterest.com',
-            'ct.pinterest.com',
-            'linkedin.com',
-            'twitter.com',
-            'analytics.',  # Generic analytics subdomains
-            'tracking.',   # Generic tracking subdomains
-            'pixel.',      # Generic pixel subdomains
-        ]
-        
-        for domain in tracking_domains:
-            if domain in hostname:
-                return True
-        
-        return False
+        return _TRACKING_HOST_RE.search(hostname.lower()) is not None
     except Exception:
         return False
 
@@ -464,21 +1373,110 @@ def is_allowed_audit_hostname(url: str) -> bool:
         hostname = urlparse(url).hostname
         if not hostname:
             return False
-        
-        # Normalize to lowercase for comparison
-        hostname = hostname.lower()
-        
-        # Allowed hostnames for audit
-        allowed_hostnames = [
-            'www.citizensbank.com',
-            'p1.aprimocdn.net',
-        ]
-        
-        return hostname in allowed_hostnames
+        return hostname.lower() in AUDIT_IMAGE_HOSTNAMES
     except Exception:
         return False
 
 
+class UrlClassifier:
+    """
+    Resolve and classify image URL candidates found on a page in one pass.
+
+    Equivalent to ``safe_join`` followed by ``is_tracking_or_analytics_url``,
+    ``is_allowed_audit_hostname`` and ``allowed_image_extension``, but each
+    resolved URL is parsed once and its verdict is memoised in an LRU cache, so
+    the hero/logo/footer images repeated on every page are classified once per
+    crawl.
+
+    Verdicts:
+        accepted  - resolved URL should be audited
+        empty     - candidate was blank
+        data_uri  - inline data: URI
+        invalid   - URL could not be parsed
+        tracking  - tracking/analytics pixel
+        hostname  - hostname not in AUDIT_IMAGE_HOSTNAMES
+        extension - disallowed file extension (svg/eps)
+    """
+
+    ACCEPTED = "accepted"
+
+    def __init__(self, cache_size: int = 65536):
+        self._verdict = lru_cache(maxsize=cache_size)(self._compute_verdict)
+        self._join = lru_cache(maxsize=cache_size)(self._join_uncached)
+        self._origin = lru_cache(maxsize=1024)(self._origin_uncached)
+
+    @staticmethod
+    def _join_uncached(base: str, candidate: str) -> str:
+        return normalize_url(urljoin(base, candidate))
+
+    @staticmethod
+    def _origin_uncached(base_url: str) -> tuple[str, str]:
+        parsed = urlparse(base_url)
+        return f"{parsed.scheme}:", f"{parsed.scheme}://{parsed.netloc}/"
+
+    @staticmethod
+    def _compute_verdict(resolved: str) -> str:
+        try:
+            parsed = urlparse(resolved)
+            hostname = parsed.hostname
+        except ValueError:
+            return "invalid"
+        if hostname and _TRACKING_HOST_RE.search(hostname) is not None:
+            return "tracking"
+        if not hostname or hostname not in AUDIT_IMAGE_HOSTNAMES:
+            return "hostname"
+        if parsed.path.lower().endswith(DISALLOWED_IMAGE_EXTENSIONS):
+            return "extension"
+        return UrlClassifier.ACCEPTED
+
+    def resolve(self, base_url: str, candidate: str) -> str:
+        """Same result as safe_join(), cached where the result does not depend on the page path.
+
+        Absolute URLs ignore the base; protocol-relative (//host/x) URLs depend
+        only on its scheme and root-relative (/x) URLs only on its origin.
+        """
+        candidate = candidate.strip()
+        if not candidate:
+            return ""
+        if candidate.startswith(("https://", "http://")):
+            return self._join("", candidate)
+        if candidate.startswith("/"):
+            scheme, origin = self._origin(base_url)
+            return self._join(scheme if candidate.startswith("//") else origin, candidate)
+        return normalize_url(urljoin(base_url, candidate))
+
+    def classify(self, base_url: str, candidate: str | None) -> tuple[str, str]:
+        """Return (resolved_url, verdict) for one candidate."""
+        if not candidate:
+            return "", "empty"
+        if candidate.startswith("data:"):
+            return "", "data_uri"
+        try:
+            resolved = self.resolve(base_url, candidate)
+        except ValueError:
+            return "", "invalid"
+        if not resolved:
+            return "", "empty"
+        return resolved, self._verdict(resolved)
+
+    def classify_many(self, base_url: str, candidates: Iterable[str]) -> list[tuple[str, str, str]]:
+        """Batch API for a whole page: returns (candidate, resolved_url, verdict) per candidate."""
+        return [(c, *self.classify(base_url, c)) for c in candidates]
+
+    def accept_many(self, base_url: str, candidates: Iterable[str]) -> set[str]:
+        """Return the set of accepted, resolved URLs among a page's candidates."""
+        accepted: set[str] = set()
+        for candidate in candidates:
+            resolved, verdict = self.classify(base_url, candidate)
+            if verdict == self.ACCEPTED:
+                accepted.add(resolved)
+        return accepted
+
+    def cache_info(self) -> dict[str, Any]:
+        info = self._verdict.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+
 # JSON Schema definitions for validation
 CITIZENS_IMAGES_SCHEMA = {
     "type": "array",
@@ -556,38 +1554,154 @@ def validate_json_schema(data: Any, schema: dict, schema_name: str = "data") ->
         return False
 
 
-def validate_stage_output(file_path: Path, schema: dict, schema_name: str) -> bool:
-    """Validate a stage output file against its schema.
+# Streaming validation: stage writers check each row as it is written with a
+# validator compiled once per schema (fastjsonschema if installed, else
+# jsonschema).  AUDIT_VALIDATION=sample checks every Nth row (fraction set by
+# AUDIT_VALIDATION_SAMPLE, default 1%); AUDIT_VALIDATION=off skips it.
+VALIDATION_ENV = "AUDIT_VALIDATION"
+VALIDATION_SAMPLE_ENV = "AUDIT_VALIDATION_SAMPLE"
+DEFAULT_VALIDATION_SAMPLE = 0.01
+MAX_REPORTED_ERRORS = 5
+
+
+@lru_cache(maxsize=None)
+def _compile_row_check(item_schema_json: str):
+    """Compile an item schema to check(row) -> error message or None."""
+    item_schema = json.loads(item_schema_json)
+    try:
+        import fastjsonschema
+        validate = fastjsonschema.compile(item_schema)
+
+        def check(row: Any) -> str | None:
+            try:
+                validate(row)
+            except fastjsonschema.JsonSchemaValueException as e:
+                return e.message
+            return None
+        return check
+    except ImportError:
+        pass
+    try:
+        import jsonschema
+    except ImportError:
+        sys.stderr.write("[Warning] jsonschema not installed - skipping stage output validation\n")
+        return lambda row: None
+    validator = jsonschema.validators.validator_for(item_schema)(item_schema)
+
+    def check(row: Any) -> str | None:
+        error = jsonschema.exceptions.best_match(validator.iter_errors(row))
+        if error is None:
+            return None
+        path = " -> ".join(str(p) for p in error.path)
+        return f"{path}: {error.message}" if path else error.message
+    return check
+
+
+def validation_sample_every() -> int:
+    """Rows per validated row under AUDIT_VALIDATION (1 = every row, 0 = off)."""
+    mode = os.environ.get(VALIDATION_ENV, "full").strip().lower() or "full"
+    if mode == "off":
+        return 0
+    if mode != "sample":
+        return 1
+    try:
+        rate = float(os.environ.get(VALIDATION_SAMPLE_ENV, DEFAULT_VALIDATION_SAMPLE))
+    except ValueError:
+        rate = DEFAULT_VALIDATION_SAMPLE
+    return max(1, round(1 / rate)) if rate > 0 else 0
+
+
+class RowValidator:
+    """
+    Validate rows one at a time against an array schema's item schema.
+    
+    Usage:
+        validator = RowValidator(DAM_FINGERPRINTS_SCHEMA, "dam_fingerprints")
+        for row in rows:
+            validator.check(row)
+        validator.report("dam_fingerprints.json")
+    """
+    
+    def __init__(self, schema: dict, schema_name: str, sample_every: int | None = None):
+        self.schema_name = schema_name
+        item_schema = schema.get("items", schema) if schema.get("type") == "array" else schema
+        self._check = _compile_row_check(json.dumps(item_schema, sort_keys=True))
+        self.sample_every = validation_sample_every() if sample_every is None else sample_every
+        self.rows = 0
+        self.checked = 0
+        self.error_count = 0
+        self.errors: list[tuple[int, str]] = []
+    
+    def check(self, row: Any) -> None:
+        index = self.rows
+        self.rows += 1
+        if not self.sample_every or index % self.sample_every:
+            return
+        self.checked += 1
+        message = self._check(row)
+        if message is not None:
+            self.error_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append((index, message))
+    
+    @property
+    def ok(self) -> bool:
+        return self.error_count == 0
+    
+    def report(self, file_name: str) -> bool:
+        """Print the validation outcome; returns True if no checked row failed."""
+        if self.ok:
+            if not self.sample_every:
+                print(f"- {file_name} validation skipped ({self.rows} items)")
+            elif self.sample_every > 1:
+                print(f"✓ {file_name} validated successfully ({self.checked} of {self.rows} items sampled)")
+            else:
+                print(f"✓ {file_name} validated successfully ({self.rows} items)")
+            return True
+        sys.stderr.write(f"[ValidationError] {self.schema_name} validation failed ({self.error_count} of {self.checked} checked rows):\n")
+        for index, message in self.errors:
+            sys.stderr.write(f"  Row {index}: {message}\n")
+        return False
+
+
+def validate_stage_output(file_path: Path, schema: dict, schema_name: str, sample_every: int | None = None) -> bool:
+    """Validate a stage output file against its schema, streaming its rows.
     
     Args:
-        file_path: Path to JSON file
+        file_path: Path to JSON file (a newer compressed/columnar sibling is checked instead)
         schema: JSON schema dict
         schema_name: Name for error messages
+        sample_every: Check every Nth row (default from AUDIT_VALIDATION)
     
     Returns:
         True if valid, False otherwise
     """
+    file_path = resolve_stage_input(file_path)
     if not file_path.exists():
-        import sys
         sys.stderr.write(f"[Error] File not found: {file_path}\n")
         return False
     
+    validator = RowValidator(schema, schema_name, sample_every)
     try:
-        data = load_json(file_path)
-        result = validate_json_schema(data, schema, schema_name)
-        if result:
-            print(f"✓ {file_path.name} validated successfully ({len(data)} items)")
-        return result
+        for row in iter_records(file_path):
+            validator.check(row)
     except json.JSONDecodeError as e:
-        import sys
         sys.stderr.write(f"[Error] Invalid JSON in {file_path.name}: {e}\n")
         return False
+    except (OSError, ValueError, RuntimeError) as e:
+        sys.stderr.write(f"[Error] Could not read {file_path.name}: {e}\n")
+        return False
+    return validator.report(file_path.name)
 
 
 # ============================================================================
 # URL Compression for Space Efficiency
 # ============================================================================
 
+INDEX_FORMAT_VERSION = "2.0.0"
+LEGACY_INDEX_FORMAT_VERSION = "1.0.0"
+
+
 class URLCompressor:
     """
     Compress URLs by deduplicating common domains and path prefixes.
@@ -596,16 +1710,73 @@ class URLCompressor:
     
     Example:
         Before: "https://www.citizensbank.com/content/dam/images/hero.jpg"
-        After:  {"d": 0, "p": 0, "f": "hero.jpg"}
+        After:  {"d": 0, "p": 0, "f": "images/hero.jpg"}
         
         Where metadata stores:
           domains[0] = "https://www.citizensbank.com"
-          path_prefixes[0][0] = "/content/dam/images/"
+          path_prefixes[0][0] = "/content/dam/"
+    
+    Domains are interned through a dict and each domain's prefixes live in a
+    path-segment trie, so compressing a URL costs O(path depth) regardless
+    of how many domains and prefixes have been seen.  The longest known
+    prefix wins; when none matches, the first prefix_depth directory
+    segments are registered as a new prefix.
     """
     
-    def __init__(self):
-        self.domains = []  # List of unique domains
-        self.path_prefixes = {}  # {domain_idx: [prefix1, prefix2, ...]}
+    _PREFIX_ID = "\0"  # Trie node key holding the prefix index (never a path segment)
+    
+    def __init__(self, prefix_depth: int = 2):
+        self.prefix_depth = prefix_depth
+        self.domains: list[str] = []  # List of unique domains
+        self.path_prefixes: dict[int, list[str]] = {}  # {domain_idx: [prefix1, prefix2, ...]}
+        self._domain_ids: dict[str, int] = {}
+        self._tries: dict[int, dict] = {}  # {domain_idx: segment trie}
+    
+    def _domain_id(self, domain: str) -> int:
+        domain_idx = self._domain_ids.get(domain)
+        if domain_idx is None:
+            domain_idx = len(self.domains)
+            self.domains.append(domain)
+            self._domain_ids[domain] = domain_idx
+        return domain_idx
+    
+    def _add_prefix(self, domain_idx: int, prefix: str) -> int:
+        node = self._tries.setdefault(domain_idx, {})
+        for segment in prefix.strip("/").split("/"):
+            node = node.setdefault(segment, {})
+        if self._PREFIX_ID not in node:
+            prefixes = self.path_prefixes.setdefault(domain_idx, [])
+            node[self._PREFIX_ID] = len(prefixes)
+            prefixes.append(prefix)
+        return node[self._PREFIX_ID]
+    
+    def _match_prefix(self, domain_idx: int, path: str) -> int:
+        """Index of the longest stored prefix of path, or -1 (new prefix registered if possible)."""
+        # Directory segments only: "/a/b/c.jpg" -> ["a", "b"]
+        segments = path[1:].split("/")[:-1] if path.startswith("/") else []
+        node = self._tries.get(domain_idx)
+        best = -1
+        if node is not None:
+            for segment in segments:
+                node = node.get(segment)
+                if node is None:
+                    break
+                best = node.get(self._PREFIX_ID, best)
+        if best == -1 and len(segments) >= self.prefix_depth and all(segments[:self.prefix_depth]):
+            # Use first N segments as common prefix (e.g., /content/dam/)
+            best = self._add_prefix(domain_idx, "/" + "/".join(segments[:self.prefix_depth]) + "/")
+        return best
+    
+    def split_url(self, url: str) -> tuple[str, str, str, str]:
+        """Split url into (domain, prefix, remainder, query); "" where absent."""
+        if not url:
+            return "", "", "", ""
+        parsed = urlparse(url)
+        domain_idx = self._domain_id(f"{parsed.scheme}://{parsed.netloc}")
+        path = parsed.path
+        prefix_idx = self._match_prefix(domain_idx, path) if path and path != "/" else -1
+        prefix = self.path_prefixes[domain_idx][prefix_idx] if prefix_idx >= 0 else ""
+        return self.domains[domain_idx], prefix, path[len(prefix):], parsed.query
     
     def compress_url(self, url: str) -> dict:
         """Convert full URL to compressed format"""
@@ -613,50 +1784,14 @@ class URLCompressor:
             return {"d": -1, "p": -1, "f": ""}
         
         parsed = urlparse(url)
-        domain = f"{parsed.scheme}://{parsed.netloc}"
-        
-        # Find or add domain
-        if domain not in self.domains:
-            self.domains.append(domain)
-        domain_idx = self.domains.index(domain)
-        
-        # Extract path
+        domain_idx = self._domain_id(f"{parsed.scheme}://{parsed.netloc}")
         path = parsed.path
-        if not path or path == "/":
-            return {
-                "d": domain_idx,
-                "p": -1,
-                "f": "",
-                "q": parsed.query if parsed.query else None
-            }
-        
-        # Find or create path prefix
-        if domain_idx not in self.path_prefixes:
-            self.path_prefixes[domain_idx] = []
-        
-        # Look for matching prefix
-        prefix_idx = -1
-        for idx, prefix in enumerate(self.path_prefixes[domain_idx]):
-            if path.startswith(prefix):
-                prefix_idx = idx
-                break
-        
-        # If no match and path has multiple segments, create new prefix
-        if prefix_idx == -1:
-            path_parts = [p for p in path.split('/') if p]
-            # Use first 2-3 segments as common prefix (e.g., /content/dam/)
-            if len(path_parts) >= 2:
-                prefix = '/' + '/'.join(path_parts[:2]) + '/'
-                if path.startswith(prefix):
-                    self.path_prefixes[domain_idx].append(prefix)
-                    prefix_idx = len(self.path_prefixes[domain_idx]) - 1
+        prefix_idx = self._match_prefix(domain_idx, path) if path and path != "/" else -1
         
         # Get final path (remove prefix)
         final_path = path
         if prefix_idx >= 0:
-            prefix = self.path_prefixes[domain_idx][prefix_idx]
-            if path.startswith(prefix):
-                final_path = path[len(prefix):]
+            final_path = path[len(self.path_prefixes[domain_idx][prefix_idx]):]
         
         return {
             "d": domain_idx,
@@ -696,72 +1831,228 @@ class URLCompressor:
     
     def set_metadata(self, metadata: dict) -> None:
         """Load domain/path lookup tables from storage"""
-        self.domains = metadata.get("domains", [])
-        self.path_prefixes = {
-            int(k): v for k, v in metadata.get("path_prefixes", {}).items()
-        }
+        self.domains = []
+        self.path_prefixes = {}
+        self._domain_ids = {}
+        self._tries = {}
+        for domain in metadata.get("domains", []):
+            self._domain_id(domain)
+        for k, prefixes in metadata.get("path_prefixes", {}).items():
+            for prefix in prefixes:
+                self._add_prefix(int(k), prefix)
+
 
+class StringTable:
+    """Intern strings into a list, returning stable integer ids."""
+    
+    def __init__(self):
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+    
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._ids[value] = string_id
+        return string_id
 
-def compress_citizens_images(images: list[dict]) -> dict:
+
+def compress_citizens_images(images: Iterable[dict], version: str = INDEX_FORMAT_VERSION) -> dict:
     """
     Compress citizens image index for storage efficiency.
     
     Reduces file size by 50-70% by deduplicating URLs.
     
+    The default 2.0.0 format is columnar: every distinct URL is stored once
+    in a "urls" table of integer columns pointing into a shared string
+    table, and images reference URLs by row number.  Page lists are
+    flattened into "pages" with "page_offsets" (image i owns
+    pages[page_offsets[i]:page_offsets[i + 1]]).  Pass version="1.0.0" for
+    the legacy per-URL dict format.
+    
     Args:
-        images: List of image dicts with 'image_url' and 'page_urls'
+        images: Image dicts with 'image_url' and 'page_urls' (any iterable)
+        version: Output format version
     
     Returns:
         Compressed format with metadata and compressed image list
     """
     compressor = URLCompressor()
     
-    compressed_images = []
+    if version == LEGACY_INDEX_FORMAT_VERSION:
+        compressed_images = []
+        for img in images:
+            compressed_images.append({
+                "u": compressor.compress_url(img.get("image_url", "")),
+                "p": [compressor.compress_url(page) for page in img.get("page_urls", [])],
+                "c": img.get("page_count", len(img.get("page_urls", [])))
+            })
+        
+        return {
+            "version": LEGACY_INDEX_FORMAT_VERSION,
+            "compressed": True,
+            "metadata": compressor.get_metadata(),
+            "images": compressed_images
+        }
+    
+    strings = StringTable()
+    strings.intern("")  # id 0: absent component
+    url_ids: dict[str, int] = {}
+    urls: dict[str, list[int]] = {"domain": [], "prefix": [], "path": [], "query": []}
+    
+    def url_id(url: str) -> int:
+        row = url_ids.get(url)
+        if row is None:
+            row = url_ids[url] = len(url_ids)
+            for column, part in zip(("domain", "prefix", "path", "query"), compressor.split_url(url)):
+                urls[column].append(strings.intern(part))
+        return row
+    
+    columns: dict[str, list[int]] = {"url": [], "page_count": [], "page_offsets": [0], "pages": []}
     for img in images:
-        compressed_images.append({
-            "u": compressor.compress_url(img.get("image_url", "")),
-            "p": [compressor.compress_url(page) for page in img.get("page_urls", [])],
-            "c": img.get("page_count", len(img.get("page_urls", [])))
-        })
+        page_urls = img.get("page_urls", [])
+        columns["url"].append(url_id(img.get("image_url", "")))
+        columns["page_count"].append(img.get("page_count", len(page_urls)))
+        columns["pages"].extend(url_id(page) for page in page_urls)
+        columns["page_offsets"].append(len(columns["pages"]))
     
     return {
-        "version": "1.0.0",
+        "version": version,
         "compressed": True,
-        "metadata": compressor.get_metadata(),
-        "images": compressed_images
+        "layout": "columnar",
+        "metadata": {
+            "domains": len(compressor.domains),
+            "path_prefixes": sum(len(v) for v in compressor.path_prefixes.values()),
+            "urls": len(url_ids),
+            "strings": len(strings.strings),
+        },
+        "strings": strings.strings,
+        "urls": urls,
+        "images": columns,
     }
 
 
-def decompress_citizens_images(compressed_data: dict | list) -> list[dict]:
+def _iter_columnar(compressed_data: dict) -> Iterator[dict]:
+    strings = compressed_data["strings"]
+    columns = compressed_data["urls"]
+    urls = [
+        strings[d] + strings[p] + strings[f] + (f"?{strings[q]}" if q else "") if d else ""
+        for d, p, f, q in zip(columns["domain"], columns["prefix"], columns["path"], columns["query"])
+    ]
+    
+    table = compressed_data["images"]
+    offsets = table["page_offsets"]
+    pages = table["pages"]
+    for i, (url_row, page_count) in enumerate(zip(table["url"], table["page_count"])):
+        yield {
+            "image_url": urls[url_row],
+            "page_urls": [urls[page_row] for page_row in pages[offsets[i]:offsets[i + 1]]],
+            "page_count": page_count,
+        }
+
+
+def citizens_image_count(compressed_data: dict | list) -> int:
+    """Number of images in a citizens image index (any format)."""
+    if isinstance(compressed_data, list):
+        return len(compressed_data)
+    if compressed_data.get("layout") == "columnar":
+        return len(compressed_data["images"]["url"])
+    return len(compressed_data.get("images", []))
+
+
+def iter_citizens_images(compressed_data: dict | list) -> Iterator[dict]:
     """
-    Decompress citizens image index.
-    
-    Handles both compressed and uncompressed formats for backward compatibility.
+    Lazily decompress citizens image index entries.
     
-    Args:
-        compressed_data: Either compressed dict or uncompressed list
-    
-    Returns:
-        Uncompressed list of image dicts
+    Handles the columnar 2.x format, the 1.0.0 per-URL format and
+    uncompressed lists for backward compatibility.
     """
     # Handle uncompressed format (backward compatibility)
     if isinstance(compressed_data, list):
-        return compressed_data
+        yield from compressed_data
+        return
     
     # Handle compressed format
     if not compressed_data.get("compressed"):
         # Old format with version but not compressed
-        return compressed_data.get("images", [])
+        yield from compressed_data.get("images", [])
+        return
+    
+    if compressed_data.get("layout") == "columnar":
+        yield from _iter_columnar(compressed_data)
+        return
     
     compressor = URLCompressor()
     compressor.set_metadata(compressed_data["metadata"])
     
-    images = []
     for compressed_img in compressed_data.get("images", []):
-        images.append({
+        yield {
             "image_url": compressor.decompress_url(compressed_img["u"]),
             "page_urls": [compressor.decompress_url(p) for p in compressed_img.get("p", [])],
             "page_count": compressed_img.get("c", 0)
-        })
+        }
+
+
+def decompress_citizens_images(compressed_data: dict | list) -> list[dict]:
+    """
+    Decompress citizens image index.
     
-    return images
+    Handles the columnar 2.x format, the 1.0.0 per-URL format and
+    uncompressed lists for backward compatibility.
+    
+    Args:
+        compressed_data: Either compressed dict or uncompressed list
+    
+    Returns:
+        Uncompressed list of image dicts
+    """
+    return list(iter_citizens_images(compressed_data))
+
+
+# ============================================================================
+# Helpers Moved to Their Own Modules
+# ============================================================================
+# Stage profiling and progress rates live in stage_profiling.py and
+# stage_progress.py.  stage_profiling imports audit_common, so it cannot be
+# re-exported with a plain import here; `from audit_common import
+# profile_stage` (or ProgressTracker) keeps working through this lazy module
+# __getattr__ instead (PEP 562), which also leaves both off the import path
+# of modules that do not use them.
+# ============================================================================
+
+_MOVED_NAMES = {
+    "stage_profiling": (
+        "DEFAULT_PROFILE_TOP",
+        "PROFILE_CHECKPOINTS_ENV",
+        "PROFILE_DIR",
+        "PROFILE_DIR_ENV",
+        "PROFILE_ENV",
+        "PROFILE_MODES",
+        "PROFILE_SAMPLE_INTERVAL",
+        "PROFILE_TOP_ENV",
+        "StageProfiler",
+        "profile_checkpoint",
+        "profile_dir",
+        "profile_mode",
+        "profile_settings",
+        "profile_stage",
+    ),
+    "stage_progress": (
+        "PROGRESS_HALF_LIFE",
+        "PROGRESS_MAX_OVERHEAD",
+        "PROGRESS_PREFIX",
+        "PROGRESS_TOP_HOSTS",
+        "ProgressTracker",
+        "format_eta",
+    ),
+}
+
+
+def __getattr__(name: str) -> Any:
+    for module_name, names in _MOVED_NAMES.items():
+        if name in names:
+            import importlib
+
+            return getattr(importlib.import_module(module_name), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,340 @@
+"""
+Optional SQLite audit store for cross-stage lookups.
+
+Row-oriented stage outputs (DAM/Citizens fingerprints, match results,
+unmatched results, audit master) are mirrored into one table per output as
+they are written.  Each table indexes the join keys -- sha256, item_id,
+image_url and four 16-bit pHash bands -- so stages and the native host can
+look rows up without loading whole JSON files.
+
+Enable with AUDIT_SQLITE_STORE=1 (store at assets/audit/audit_store.sqlite)
+or AUDIT_SQLITE_STORE=<path>.  The store lives on local disk, so it uses WAL
+mode: readers (e.g. native host lookups) never block a stage that is writing.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from audit_common import AUDIT_DIR, json_dumps, json_loads
+
+STORE_ENV = "AUDIT_SQLITE_STORE"
+DEFAULT_STORE_NAME = "audit_store.sqlite"
+DEFAULT_BATCH_SIZE = 1000
+
+# One table per stage output, named after the output's .json stem
+STORE_TABLES = (
+    "dam_fingerprints",
+    "citizens_fingerprints",
+    "match_results",
+    "unmatched_results",
+    "audit_master",
+)
+
+# A 64-bit pHash split into 4 bands: hashes within Hamming distance 3 always
+# share at least one band exactly (pigeonhole), larger distances usually do.
+PHASH_BANDS = 4
+_BAND_HEX = 16 // PHASH_BANDS
+_BAND_COLUMNS = tuple(f"phash_band{i}" for i in range(PHASH_BANDS))
+
+LOOKUP_COLUMNS = ("sha256", "item_id", "image_url", "phash", "status")
+# Keeps native-messaging replies well under Chrome's 1 MB host message limit
+MAX_LOOKUP_ROWS = 500
+
+_TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    seq INTEGER PRIMARY KEY,
+    item_id TEXT,
+    image_url TEXT,
+    sha256 TEXT,
+    phash TEXT,
+    {bands},
+    status TEXT,
+    row TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_{table}_sha256 ON {table} (sha256);
+CREATE INDEX IF NOT EXISTS idx_{table}_item_id ON {table} (item_id);
+CREATE INDEX IF NOT EXISTS idx_{table}_image_url ON {table} (image_url);
+{band_indexes}
+"""
+
+
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS table_meta (
+    name TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def phash_bands(phash: str | None) -> tuple[int | None, ...]:
+    """Split a 16-hex-digit pHash into PHASH_BANDS integer bands."""
+    if not phash or len(phash) != 16:
+        return (None,) * PHASH_BANDS
+    try:
+        return tuple(int(phash[i:i + _BAND_HEX], 16) for i in range(0, 16, _BAND_HEX))
+    except ValueError:
+        return (None,) * PHASH_BANDS
+
+
+def hamming_distance(a: str, b: str) -> int | None:
+    """Bit distance between two hex pHashes (same as imagehash subtraction)."""
+    try:
+        return bin(int(a, 16) ^ int(b, 16)).count("1")
+    except (TypeError, ValueError):
+        return None
+
+
+def _key_columns(row: dict) -> tuple:
+    phash = row.get("phash")
+    item_id = row.get("item_id") or row.get("dam_item_id")
+    return (
+        None if item_id is None else str(item_id),
+        row.get("image_url") or row.get("preview_url"),
+        row.get("sha256"),
+        phash,
+        *phash_bands(phash),
+        row.get("match_status") or row.get("fingerprint_status"),
+    )
+
+
+def store_path() -> Path | None:
+    """Configured store path, or None when the store is disabled."""
+    value = os.environ.get(STORE_ENV, "").strip()
+    if value in ("", "0"):
+        return None
+    if value == "1":
+        return AUDIT_DIR / DEFAULT_STORE_NAME
+    return Path(value)
+
+
+@lru_cache(maxsize=1)
+def open_audit_store() -> "AuditStore | None":
+    """Process-wide AuditStore when AUDIT_SQLITE_STORE is set, else None."""
+    path = store_path()
+    return AuditStore(path) if path is not None else None
+
+
+class AuditStore:
+    """SQLite mirror of the row-oriented stage outputs, indexed on join keys."""
+
+    def __init__(self, path: Path, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: every batch is an explicit BEGIN/COMMIT so
+        # several TableWriters can share this connection.
+        self.conn = sqlite3.connect(str(path), timeout=60, isolation_level=None, check_same_thread=False)
+        # Concurrent stages (pipeline_dag) share this connection; one transaction at a time
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA busy_timeout = 60000")
+        self.conn.executescript(_META_SCHEMA)
+        for table in STORE_TABLES:
+            self.conn.executescript(_TABLE_SCHEMA.format(
+                table=table,
+                bands=",\n    ".join(f"{c} INTEGER" for c in _BAND_COLUMNS),
+                band_indexes="\n".join(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{c} ON {table} ({c});" for c in _BAND_COLUMNS
+                ),
+            ))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "AuditStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _table(table: str) -> str:
+        if table not in STORE_TABLES:
+            raise ValueError(f"Unknown audit store table: {table}")
+        return table
+
+    def upsert_rows(self, table: str, rows: Iterable[tuple[int, dict]]) -> int:
+        """Insert or replace (seq, row) pairs in a single transaction."""
+        table = self._table(table)
+        params = [(seq, *_key_columns(row), json_dumps(row)) for seq, row in rows]
+        if not params:
+            return 0
+        placeholders = ", ".join("?" * (len(params[0])))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} (seq, item_id, image_url, sha256, phash, "
+                    f"{', '.join(_BAND_COLUMNS)}, status, row) VALUES ({placeholders})",
+                    params,
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(params)
+
+    def clear(self, table: str) -> None:
+        with self._lock:
+            self.conn.execute(f"DELETE FROM {self._table(table)}")
+            self.conn.execute("DELETE FROM table_meta WHERE name = ?", (table,))
+
+    def mark_complete(self, table: str, row_count: int) -> None:
+        """Record that table holds a complete stage output."""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO table_meta (name, row_count, updated_at) VALUES (?, ?, ?)",
+                (self._table(table), row_count, time.time()),
+            )
+
+    def is_current(self, table: str, source: Path) -> bool:
+        """True when table was completely written after source was last modified."""
+        row = self.conn.execute("SELECT updated_at FROM table_meta WHERE name = ?", (table,)).fetchone()
+        return row is not None and source.exists() and row[0] >= source.stat().st_mtime
+
+    def replace_table(self, table: str, rows: Iterable[dict]) -> int:
+        """Clear table and load rows in order (batched)."""
+        with self.writer(table) as writer:
+            for row in rows:
+                writer.write(row)
+        return writer.count
+
+    def writer(self, table: str) -> "TableWriter":
+        return TableWriter(self, table)
+
+    def count(self, table: str, **filters: Any) -> int:
+        where, params = self._where(filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self._table(table)}{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _where(filters: dict[str, Any]) -> tuple[str, list]:
+        unknown = set(filters) - set(LOOKUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported lookup column(s): {', '.join(sorted(unknown))}")
+        if not filters:
+            return "", []
+        clauses = [f"{column} = ?" for column in filters]
+        params = [None if v is None else (str(v) if column == "item_id" else v) for column, v in filters.items()]
+        return " WHERE " + " AND ".join(clauses), params
+
+    def find(self, table: str, limit: int | None = None, **filters: Any) -> list[dict]:
+        """Rows matching every column=value filter, in stage output order."""
+        where, params = self._where(filters)
+        sql = f"SELECT row FROM {self._table(table)}{where} ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json_loads(r[0]) for r in self.conn.execute(sql, params)]
+
+    def by_sha256(self, table: str, sha256: str, **filters: Any) -> list[dict]:
+        return self.find(table, sha256=sha256, **filters)
+
+    def by_item_id(self, table: str, item_id: str, **filters: Any) -> list[dict]:
+        return self.find(table, item_id=item_id, **filters)
+
+    def by_image_url(self, table: str, image_url: str, **filters: Any) -> list[dict]:
+        return self.find(table, image_url=image_url, **filters)
+
+    def phash_candidates(self, table: str, phash: str, max_distance: int | None = None) -> list[dict]:
+        """Rows sharing at least one pHash band, nearest first.
+
+        Banding finds every row within distance PHASH_BANDS - 1; rows further
+        away are only found if a band happens to match.  Each row gets a
+        "phash_distance" key.
+        """
+        bands = phash_bands(phash)
+        if bands[0] is None:
+            return []
+        clauses = " OR ".join(f"{c} = ?" for c in _BAND_COLUMNS)
+        rows = []
+        for stored_phash, raw in self.conn.execute(
+            f"SELECT phash, row FROM {self._table(table)} WHERE {clauses} ORDER BY seq", bands
+        ):
+            dist = hamming_distance(phash, stored_phash)
+            if dist is None or (max_distance is not None and dist > max_distance):
+                continue
+            row = json_loads(raw)
+            row["phash_distance"] = dist
+            rows.append(row)
+        rows.sort(key=lambda r: r["phash_distance"])
+        return rows
+
+    def duplicate_groups(self, table: str, column: str, **filters: Any) -> Iterator[tuple[str, list[dict]]]:
+        """Yield (value, rows) for values of column shared by 2+ rows, in first-seen order."""
+        if column not in LOOKUP_COLUMNS:
+            raise ValueError(f"Unsupported group column: {column}")
+        where, params = self._where(filters)
+        where += (" AND " if where else " WHERE ") + f"{column} IS NOT NULL AND {column} != ''"
+        keys = self.conn.execute(
+            f"SELECT {column} FROM {self._table(table)}{where} GROUP BY {column} "
+            f"HAVING COUNT(*) > 1 ORDER BY MIN(seq)",
+            params,
+        ).fetchall()
+        for (value,) in keys:
+            yield value, self.find(table, **{**filters, column: value})
+
+    def lookup(self, query: dict[str, Any]) -> list[dict]:
+        """Ad-hoc lookup for the native host: {"table": ..., <column>: value, "limit": n}."""
+        query = dict(query)
+        table = query.pop("table", "match_results")
+        limit = min(int(query.pop("limit", 100)), MAX_LOOKUP_ROWS)
+        if "phash" in query and query.get("max_distance") is not None:
+            max_distance = int(query.pop("max_distance"))
+            return self.phash_candidates(table, query["phash"], max_distance)[:limit]
+        query.pop("max_distance", None)
+        if not query:
+            raise ValueError("lookup needs at least one of: " + ", ".join(LOOKUP_COLUMNS))
+        return self.find(table, limit=limit, **query)
+
+
+class TableWriter:
+    """
+    Mirror rows into one store table in executemany batches.
+
+    The table is cleared when the writer opens, so it always reflects the
+    latest stage run; each batch commits on its own.
+    """
+
+    def __init__(self, store: AuditStore, table: str):
+        self.store = store
+        self.table = store._table(table)
+        self.count = 0
+        self._batch: list[tuple[int, dict]] = []
+        store.clear(table)
+
+    def write(self, row: dict) -> None:
+        self._batch.append((self.count, row))
+        self.count += 1
+        if len(self._batch) >= self.store.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._batch:
+            self.store.upsert_rows(self.table, self._batch)
+            self._batch = []
+
+    def close(self) -> None:
+        self.flush()
+        self.store.mark_complete(self.table, self.count)
+
+    def abort(self) -> None:
+        self._batch = []
+        self.store.clear(self.table)
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
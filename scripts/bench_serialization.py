@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: stage-file serialization paths in audit_common.
+
+Builds a synthetic fingerprint table (NumPy integer columns, URLs, hex
+hashes) and times the original path -- stdlib json.dump(indent=2) with the
+NumPy default hook, then json.load -- against RecordWriter/iter_records on
+each available JSON backend, optionally gzip/zstd compressed.
+
+Usage:
+    python scripts/bench_serialization.py [--rows 100000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audit_common
+from audit_common import RecordWriter, _json_default, iter_records
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def build_rows(count: int) -> list[dict]:
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        width = rng.randint(100, 4000)
+        height = rng.randint(100, 4000)
+        rows.append({
+            "image_url": f"https://www.citizensbank.com/assets/CB_media/images/content/{i}-{rng.getrandbits(32):08x}.jpg",
+            "sha256": f"{rng.getrandbits(256):064x}",
+            "phash": f"{rng.getrandbits(64):016x}",
+            "width": np.int64(width) if np is not None else width,
+            "height": np.int64(height) if np is not None else height,
+            "bytes": np.int64(width * height // 7) if np is not None else width * height // 7,
+            "status": "ok" if rng.random() < 0.95 else "error",
+            "error": None,
+            "page_count": rng.randint(1, 40),
+        })
+    return rows
+
+
+def baseline_write(path: Path, rows: list[dict]) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2, default=_json_default)
+
+
+def baseline_read(path: Path) -> int:
+    with path.open("r", encoding="utf-8") as f:
+        return len(json.load(f))
+
+
+def record_write(path: Path, rows: list[dict]) -> None:
+    with RecordWriter(path) as writer:
+        writer.write_many(rows)
+
+
+def record_read(path: Path) -> int:
+    return sum(1 for _ in iter_records(path))
+
+
+def best_of(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def available_backends() -> list[str]:
+    backends = []
+    for name in audit_common.JSON_BACKENDS:
+        try:
+            if name != "stdlib":
+                __import__(name)
+            backends.append(name)
+        except ImportError:
+            pass
+    return backends
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stage-file serialization")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    workdir = Path(tempfile.mkdtemp(prefix="audit-bench-"))
+    suffixes = [".json", ".json.gz"]
+    if audit_common._zstandard() is not None:
+        suffixes.append(".json.zst")
+
+    base_path = workdir / "baseline.json"
+    write_s, _ = best_of(lambda: baseline_write(base_path, rows), args.repeat)
+    read_s, count = best_of(lambda: baseline_read(base_path), args.repeat)
+    base_total = write_s + read_s
+    print(f"Rows: {args.rows:,}")
+    print(f"  {'path':<32} {'write ms':>9} {'read ms':>9} {'size KB':>9} {'speedup':>8}")
+    print(f"  {'stdlib json indent=2':<32} {write_s * 1000:9.1f} {read_s * 1000:9.1f} "
+          f"{base_path.stat().st_size / 1024:9.0f} {1.0:7.1f}x")
+
+    for backend in available_backends():
+        os.environ[audit_common.JSON_BACKEND_ENV] = backend
+        audit_common.json_backend.cache_clear()
+        for suffix in suffixes:
+            path = workdir / f"{backend}{suffix}"
+            write_s, _ = best_of(lambda: record_write(path, rows), args.repeat)
+            read_s, read_count = best_of(lambda: record_read(path), args.repeat)
+            if read_count != count:
+                raise SystemExit(f"Row count mismatch for {path.name}: {read_count} != {count}")
+            label = f"{backend} RecordWriter {suffix}"
+            print(f"  {label:<32} {write_s * 1000:9.1f} {read_s * 1000:9.1f} "
+                  f"{path.stat().st_size / 1024:9.0f} {base_total / (write_s + read_s):7.1f}x")
+
+    for path in workdir.iterdir():
+        path.unlink()
+    workdir.rmdir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: cold-start time of every stage script.
+
+Runs each stage's `--help` in a fresh interpreter with `-X importtime`
+(best of --repeat runs) and reports wall time, total import time and the
+slowest top-level imports.  Results are compared with a saved baseline:
+a stage slower than the baseline by more than --tolerance, or one that
+imports a heavy library (imagehash, PIL, NumPy, bs4, openpyxl, jsonschema)
+before parsing its arguments, is flagged and the script exits with 1.
+
+Usage:
+    python scripts/bench_startup.py [--repeat 5] [--stage 04_match_assets.py]
+    python scripts/bench_startup.py --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import AUDIT_DIR, ROOT, write_json
+from pipeline_dag import PIPELINE_STAGES
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = AUDIT_DIR / "startup_baseline.json"
+# Stages import these at first use; loading one for --help is a regression
+HEAVY_MODULES = ("imagehash", "PIL", "numpy", "scipy", "bs4", "openpyxl", "jsonschema")
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are noise on any machine
+MIN_REGRESSION_MS = 15.0
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """Top-level modules imported (from `-X importtime` output) -> cumulative ms."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, self_us, cumulative_us, name = (part for part in line.replace("|", ":").split(":"))
+        if not cumulative_us.strip().isdigit():
+            continue  # header line
+        # Nested imports are indented by two spaces per level
+        if name.startswith("  ", 1):
+            continue
+        imports[name.strip()] = imports.get(name.strip(), 0.0) + int(cumulative_us) / 1000
+    return imports
+
+
+def all_imported(stderr: str) -> set[str]:
+    """Top-level package names of every module imported, nested ones included."""
+    return {
+        line.rsplit("|", 1)[1].strip().split(".")[0]
+        for line in stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    }
+
+
+def measure_stage(script: str, repeat: int = 1) -> dict:
+    """Best-of-repeat cold start of `python -X importtime <script> --help`."""
+    best: dict | None = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", str(SCRIPTS_DIR / script), "--help"],
+            cwd=str(ROOT),
+            capture_output=True,
+            text=True,
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"{script} --help exited with {proc.returncode}: {proc.stderr[-500:]}")
+        imports = parse_importtime(proc.stderr)
+        if best is None or wall_ms < best["wall_ms"]:
+            best = {
+                "wall_ms": round(wall_ms, 1),
+                "import_ms": round(sum(imports.values()), 1),
+                "top_imports": sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5],
+                "heavy_imports": sorted(all_imported(proc.stderr) & set(HEAVY_MODULES)),
+            }
+    assert best is not None
+    return best
+
+
+def regressions(script: str, result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Reasons this stage's start-up counts as a regression (empty when it does not)."""
+    problems = []
+    if result["heavy_imports"]:
+        problems.append(f"imports {', '.join(result['heavy_imports'])} at start-up")
+    before = baseline.get(script)
+    if before:
+        limit = max(before["wall_ms"] * (1 + tolerance), before["wall_ms"] + MIN_REGRESSION_MS)
+        if result["wall_ms"] > limit:
+            problems.append(f"{result['wall_ms']:.0f} ms vs baseline {before['wall_ms']:.0f} ms")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stage script cold start (-X importtime)")
+    parser.add_argument("--stage", action="append", choices=PIPELINE_STAGES, help="Stage to measure (repeatable; default all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage; the fastest counts")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    results = {}
+    failed = False
+    print(f"{'Stage':<36} {'wall ms':>8} {'import ms':>10} {'baseline':>9}  slowest imports")
+    for script in args.stage or PIPELINE_STAGES:
+        result = results[script] = measure_stage(script, args.repeat)
+        before = baseline.get(script, {}).get("wall_ms")
+        top = ", ".join(f"{name} {ms:.0f}" for name, ms in result["top_imports"][:3])
+        print(f"{script:<36} {result['wall_ms']:>8.1f} {result['import_ms']:>10.1f} {before or '-':>9}  {top}")
+        for problem in regressions(script, result, baseline, args.tolerance):
+            failed = True
+            print(f"  ⚠️  REGRESSION: {problem}")
+
+    if args.save_baseline:
+        write_json(args.baseline, {**baseline, **results})
+        print(f"\nBaseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: UrlClassifier vs. the per-function URL checks in stage 01.
+
+Builds a synthetic crawl (pages sharing header/footer images plus unique
+content images, tracking pixels and SVG icons) and times both paths.
+
+Usage:
+    python scripts/bench_url_classifier.py [--pages 2000] [--per-page 60] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import (
+    UrlClassifier,
+    allowed_image_extension,
+    is_allowed_audit_hostname,
+    is_tracking_or_analytics_url,
+    safe_join,
+)
+
+SHARED = [
+    "/assets/CB_media/images/header/logo.png",
+    "/assets/CB_media/images/footer/fdic.svg",
+    "https://p1.aprimocdn.net/citizensbank/1f2e3d/hero-banner.jpg",
+    "https://www.google-analytics.com/collect?v=1",
+    "https://px.ads.linkedin.com/collect/?pid=1",
+    "//www.citizensbank.com/assets/CB_media/images/icons/arrow.svg",
+]
+
+
+def build_pages(pages: int, per_page: int) -> list[tuple[str, list[str]]]:
+    rng = random.Random(42)
+    out = []
+    for p in range(pages):
+        base = f"https://www.citizensbank.com/section-{p % 40}/page-{p}.aspx"
+        candidates = list(SHARED)
+        for i in range(per_page - len(SHARED)):
+            kind = rng.random()
+            if kind < 0.6:
+                candidates.append(f"/assets/CB_media/images/content/{rng.randint(0, 5000)}.jpg")
+            elif kind < 0.8:
+                candidates.append(f"images/local-{p}-{i}.png")
+            elif kind < 0.9:
+                candidates.append(f"https://p1.aprimocdn.net/citizensbank/{rng.randint(0, 3000)}/asset.jpg")
+            else:
+                candidates.append(f"https://cdn.example.com/{i}.gif")
+        out.append((base, candidates))
+    return out
+
+
+def legacy_path(pages: list[tuple[str, list[str]]]) -> int:
+    total = 0
+    for base, candidates in pages:
+        images = set()
+        for candidate in candidates:
+            resolved = safe_join(base, candidate)
+            if (
+                resolved
+                and not is_tracking_or_analytics_url(resolved)
+                and is_allowed_audit_hostname(resolved)
+                and allowed_image_extension(resolved)
+            ):
+                images.add(resolved)
+        total += len(images)
+    return total
+
+
+def classifier_path(pages: list[tuple[str, list[str]]]) -> int:
+    classifier = UrlClassifier()
+    return sum(len(classifier.accept_many(base, candidates)) for base, candidates in pages)
+
+
+def best_of(fn, pages, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    result = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(pages)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stage-01 URL classification")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--per-page", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = build_pages(args.pages, args.per_page)
+    total = args.pages * args.per_page
+    legacy_s, legacy_n = best_of(legacy_path, pages, args.repeat)
+    fast_s, fast_n = best_of(classifier_path, pages, args.repeat)
+
+    if legacy_n != fast_n:
+        raise SystemExit(f"Result mismatch: legacy={legacy_n} classifier={fast_n}")
+
+    print(f"Candidates: {total:,} across {args.pages:,} pages ({legacy_n:,} accepted)")
+    print(f"  legacy checks : {legacy_s * 1000:8.1f} ms  ({total / legacy_s:,.0f} URLs/s)")
+    print(f"  UrlClassifier : {fast_s * 1000:8.1f} ms  ({total / fast_s:,.0f} URLs/s)")
+    print(f"  speedup       : {legacy_s / fast_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Content-hash build manifest for the audit pipeline.
+
+After a stage succeeds, assets/audit/build_manifest.json records what it was
+built from and what it wrote:
+
+- the SHA-256 of every input file (stage outputs it reads, as declared in
+  pipeline_dag, plus data sources such as citizensbank_urls.txt),
+- its command-line arguments (e.g. --phash-threshold) and the storage
+  settings that change what it writes (AUDIT_STORAGE_FORMAT, ...),
+- a script version: the digest of the stage script and the local modules
+  it runs (SHARED_MODULES such as audit_common.py for every stage, plus
+  STAGE_MODULES such as crawl_queue.py for stage 01),
+- the SHA-256 of every output file it wrote.
+
+A stage is up to date only when all of these still match.  Anything else
+(edited URL list, new DAM export, different threshold, changed script,
+deleted or modified output) makes it stale, and every stage downstream of a
+stale stage is rebuilt too.  Digests are reused while a file's size and
+mtime are unchanged, so checking an unchanged tree reads no file contents.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+from audit_common import AUDIT_DIR, ROOT, source_path, stage_input_candidates
+from pipeline_dag import PIPELINE, Stage, downstream_stages
+
+MANIFEST_PATH = AUDIT_DIR / "build_manifest.json"
+MANIFEST_VERSION = 1
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# Shared code every stage runs; a change here rebuilds everything
+SHARED_MODULES = (
+    "audit_common.py",
+    "audit_store.py",
+    "stage_data.py",
+    "stage_metrics.py",
+    "stage_profiling.py",
+    "stage_progress.py",
+    "stage_tracing.py",
+)
+# Local modules only some stages import; a change rebuilds those stages
+STAGE_MODULES = {
+    "01_crawl_citizens_images.py": ("crawl_queue.py",),
+}
+# Environment settings that change which files a stage writes
+SETTINGS_ENV = ("AUDIT_STORAGE_FORMAT", "AUDIT_COMPRESSION", "AUDIT_JSON_EXPORT")
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_file(source_key: str) -> Path | None:
+    """Local file behind a data source, or None if it cannot be resolved."""
+    try:
+        return source_path(source_key)
+    except Exception:
+        return None
+
+
+class BuildManifest:
+    """
+    Per-stage record of input, argument, version and output digests.
+
+    Usage:
+        manifest = BuildManifest()
+        to_run = manifest.plan(PIPELINE_STAGES, args_for)   # stale stages + dependents
+        ...
+        manifest.invalidate(script)        # before a stage starts
+        manifest.record(script, argv)      # after it succeeded
+    """
+
+    def __init__(
+        self,
+        path: Path = MANIFEST_PATH,
+        stages: Iterable[Stage] = PIPELINE,
+        scripts_dir: Path = SCRIPTS_DIR,
+        resolve_source: Callable[[str], Path | None] = _source_file,
+    ):
+        self.path = path
+        self.stages = {stage.script: stage for stage in stages}
+        self.scripts_dir = scripts_dir
+        self.resolve_source = resolve_source
+        self.records: dict[str, dict] = {}
+        # path -> (size, mtime_ns, sha256) from earlier records, so unchanged files are not re-read
+        self._digests: dict[str, tuple[int, int, str]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(state, dict) or state.get("version") != MANIFEST_VERSION:
+            return
+        self.records = state.get("stages") or {}
+        for record in self.records.values():
+            for group in ("scripts", "inputs", "sources", "outputs"):
+                for entry in (record.get(group) or {}).values():
+                    if entry and entry.get("path"):
+                        self._digests[entry["path"]] = (entry["size"], entry["mtime_ns"], entry["sha256"])
+
+    def save(self) -> None:
+        """Write the manifest atomically (a crash never leaves half a file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        state = {"version": MANIFEST_VERSION, "stages": self.records}
+        try:
+            tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _rel(self, path: Path) -> str:
+        try:
+            return path.resolve().relative_to(ROOT).as_posix()
+        except ValueError:
+            return str(path)
+
+    def file_entry(self, path: Path) -> dict | None:
+        """{path, size, mtime_ns, sha256} for an existing file, else None."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        rel = self._rel(path)
+        known = self._digests.get(rel)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            sha256 = known[2]
+        else:
+            sha256 = _sha256_file(path)
+            self._digests[rel] = (stat.st_size, stat.st_mtime_ns, sha256)
+        return {"path": rel, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+    def _stage_files(self, paths: Iterable[Path]) -> dict[str, dict | None]:
+        """Entries for a stage's .json paths, including compressed/columnar siblings that exist."""
+        entries: dict[str, dict | None] = {}
+        for path in paths:
+            found = [entry for entry in map(self.file_entry, stage_input_candidates(path)) if entry]
+            if not found:
+                entries[self._rel(path)] = None
+            for entry in found:
+                entries[entry["path"]] = entry
+        return entries
+
+    def script_files(self, script: str) -> dict[str, dict | None]:
+        """Entries for the stage script and the local modules it runs."""
+        names = (script, *SHARED_MODULES, *STAGE_MODULES.get(script, ()))
+        return {name: self.file_entry(self.scripts_dir / name) for name in names}
+
+    @staticmethod
+    def script_version(script_files: dict[str, dict | None]) -> str:
+        digest = hashlib.sha256()
+        for name, entry in script_files.items():
+            digest.update(f"{name}:{entry['sha256'] if entry else 'missing'}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def fingerprint(self, script: str, argv: list[str] | None = None) -> dict:
+        """What a stage would be built from right now (everything except outputs)."""
+        stage = self.stages[script]
+        sources = {}
+        for key in stage.sources:
+            path = self.resolve_source(key)
+            sources[key] = self.file_entry(path) if path else None
+        scripts = self.script_files(script)
+        return {
+            "script_version": self.script_version(scripts),
+            "scripts": scripts,
+            "args": list(argv or []),
+            "settings": {name: os.environ.get(name, "") for name in SETTINGS_ENV},
+            "inputs": self._stage_files(stage.inputs),
+            "sources": sources,
+        }
+
+    def stale_reason(self, script: str, argv: list[str] | None = None) -> str | None:
+        """Why a stage must run, or None if its record still matches."""
+        record = self.records.get(script)
+        if not record:
+            return "no build record"
+        current = self.fingerprint(script, argv)
+        if record.get("script_version") != current["script_version"]:
+            return "script changed"
+        if record.get("args") != current["args"]:
+            return f"arguments changed ({' '.join(current['args']) or 'none'})"
+        if record.get("settings") != current["settings"]:
+            return "storage settings changed"
+        for group in ("inputs", "sources"):
+            old = {k: v and v["sha256"] for k, v in (record.get(group) or {}).items()}
+            new = {k: v and v["sha256"] for k, v in current[group].items()}
+            changed = sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k) or new.get(k) is None)
+            if changed:
+                return f"{group} changed: {', '.join(Path(k).name for k in changed)}"
+        outputs = record.get("outputs") or {}
+        if not outputs:
+            return "no outputs recorded"
+        for rel, entry in outputs.items():
+            now = self.file_entry(ROOT / rel)
+            if now is None:
+                return f"output missing: {Path(rel).name}"
+            if now["sha256"] != entry["sha256"]:
+                return f"output modified: {Path(rel).name}"
+        return None
+
+    def plan(self, selected: Iterable[str], args_for: Callable[[str], list[str]]) -> dict[str, str]:
+        """
+        Stages in selected that must run, mapped to the reason, in pipeline order.
+
+        A stage runs if its own record is stale or any stage it depends on
+        (directly or transitively) runs.
+        """
+        selected = [s for s in self.stages if s in set(selected)]
+        to_run: dict[str, str] = {}
+        for script in selected:
+            if script in to_run:
+                continue
+            reason = self.stale_reason(script, args_for(script))
+            if reason is None:
+                continue
+            to_run[script] = reason
+            for dependent in downstream_stages(script, self.stages.values()):
+                if dependent in selected:
+                    to_run.setdefault(dependent, f"depends on {script}")
+        return {s: to_run[s] for s in selected if s in to_run}
+
+    def invalidate(self, script: str) -> None:
+        """Drop the records of a stage about to run and of everything downstream."""
+        dropped = [s for s in (script, *downstream_stages(script, self.stages.values())) if s in self.records]
+        for name in dropped:
+            del self.records[name]
+        if dropped:
+            self.save()
+
+    def record(self, script: str, argv: list[str] | None = None) -> None:
+        """Record a stage that just succeeded, from the files now on disk."""
+        record = self.fingerprint(script, argv)
+        record["outputs"] = {
+            rel: entry for rel, entry in self._stage_files(self.stages[script].outputs).items() if entry
+        }
+        record["completed_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.records[script] = record
+        self.save()
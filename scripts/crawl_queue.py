@@ -0,0 +1,203 @@
+"""
+Lease-based SQLite work queue for distributed stage-01 crawls.
+
+URLs are enqueued once, then any number of worker processes (on this machine
+or on other machines sharing the queue directory) claim small batches under a
+time-limited lease, crawl them and commit their results back.  A worker that
+crashes simply stops renewing its leases; once they expire the URLs become
+claimable again.  A final merge step reads every committed result in the
+original URL order so stage 01 can write its standard outputs.
+
+The database uses SQLite's default rollback journal (not WAL) because WAL
+relies on shared memory and is unsafe on network shares.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_urls_status ON urls (status, seq);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT PRIMARY KEY,
+    page_row TEXT NOT NULL,
+    images TEXT NOT NULL,
+    worker_id TEXT,
+    completed_at REAL
+);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CrawlQueue:
+    """SQLite-backed URL queue with lease/expiry semantics."""
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transactions are managed explicitly so that
+        # claims can take the write lock up front with BEGIN IMMEDIATE.
+        self.conn = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA busy_timeout = 60000")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "CrawlQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Add URLs in order. Already-queued URLs keep their state and results."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT COALESCE(MAX(seq), -1) FROM urls").fetchone()
+            next_seq = row[0] + 1
+            added = 0
+            for url in urls:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO urls (url, seq) VALUES (?, ?)",
+                    (url, next_seq),
+                )
+                if cur.rowcount:
+                    next_seq += 1
+                    added += 1
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker_id: str, batch_size: int) -> list[str]:
+        """Lease up to batch_size pending (or lease-expired) URLs for worker_id."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                """
+                SELECT url FROM urls
+                WHERE attempts < ?
+                  AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY seq
+                LIMIT ?
+                """,
+                (self.max_attempts, now, batch_size),
+            ).fetchall()
+            urls = [r[0] for r in rows]
+            self.conn.executemany(
+                """
+                UPDATE urls
+                SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE url = ?
+                """,
+                [(worker_id, now + self.lease_seconds, url) for url in urls],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return urls
+
+    def renew(self, worker_id: str) -> None:
+        """Extend every lease currently held by worker_id."""
+        self.conn.execute(
+            "UPDATE urls SET lease_expires = ? WHERE status = 'leased' AND worker_id = ?",
+            (time.time() + self.lease_seconds, worker_id),
+        )
+
+    def complete(self, worker_id: str, url: str, page_row: dict, images: list[str]) -> None:
+        """Commit a crawled page. Late results from an expired lease are still accepted."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (url, page_row, images, worker_id, completed_at) VALUES (?, ?, ?, ?, ?)",
+                (url, json.dumps(page_row, ensure_ascii=False), json.dumps(images), worker_id, time.time()),
+            )
+            self.conn.execute(
+                "UPDATE urls SET status = 'done', worker_id = ?, lease_expires = NULL WHERE url = ?",
+                (worker_id, url),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def release(self, worker_id: str) -> None:
+        """Return unfinished leases to the pending pool (graceful shutdown)."""
+        self.conn.execute(
+            """
+            UPDATE urls SET status = 'pending', worker_id = NULL, lease_expires = NULL,
+                attempts = MAX(attempts - 1, 0)
+            WHERE status = 'leased' AND worker_id = ?
+            """,
+            (worker_id,),
+        )
+
+    def counts(self) -> dict[str, int]:
+        counts = {"pending": 0, "leased": 0, "done": 0, "total": 0}
+        for status, count in self.conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status"):
+            counts[status] = count
+            counts["total"] += count
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM urls WHERE status != 'done' AND attempts >= ?",
+            (self.max_attempts,),
+        ).fetchone()
+        counts["exhausted"] = row[0]
+        return counts
+
+    def is_drained(self) -> bool:
+        """True when no URL can be claimed now or later (done or out of attempts)."""
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM urls WHERE status != 'done' AND attempts < ?",
+            (self.max_attempts,),
+        ).fetchone()
+        return row[0] == 0
+
+    def image_count(self) -> int:
+        row = self.conn.execute("SELECT COALESCE(SUM(json_array_length(images)), 0) FROM results").fetchone()
+        return row[0]
+
+    def iter_results(self) -> Iterator[tuple[str, dict | None, list[str]]]:
+        """Yield (url, page_row, images) in enqueue order; page_row is None if never completed."""
+        cursor = self.conn.execute(
+            """
+            SELECT u.url, r.page_row, r.images
+            FROM urls u LEFT JOIN results r ON r.url = u.url
+            ORDER BY u.seq
+            """
+        )
+        for url, page_row, images in cursor:
+            if page_row is None:
+                yield url, None, []
+            else:
+                yield url, json.loads(page_row), json.loads(images)
@@ -1,22 +1,19 @@
 #!/usr/bin/env python3
-"""Extract assets array from wrapped JSON"""
-import json
+"""Extract assets array from wrapped JSON (streamed, never fully in memory)"""
 from pathlib import Path
 
+from audit_common import JsonItemReader, RecordWriter
+
 input_file = Path(__file__).parent.parent / "assets" / "audit" / "dam_assets.json"
 output_file = Path(__file__).parent.parent / "assets" / "audit" / "dam_assets_array.json"
 
 print(f"Reading: {input_file}")
-with open(input_file, 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-# Extract assets array
-assets = data.get('assets', [])
-print(f"Found {len(assets)} assets")
-
 print(f"Writing: {output_file}")
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(assets, f, indent=2, ensure_ascii=False)
+reader = JsonItemReader(input_file)
+with RecordWriter(output_file) as writer:
+    for asset in reader:
+        writer.write(asset)
+print(f"Found {writer.count} assets")
 
 print("✓ Done! Now renaming files...")
 
@@ -29,4 +26,4 @@ print(f"  ✓ Backed up original to: {backup_file.name}")
 output_file.rename(input_file)
 print(f"  ✓ Renamed extracted file to: {input_file.name}")
 
-print(f"\n✓ Complete! dam_assets.json now contains {len(assets):,} assets as array")
+print(f"\n✓ Complete! dam_assets.json now contains {writer.count:,} assets as array")
@@ -14,21 +14,27 @@ import uuid
 from pathlib import Path
 from typing import Any
 
+from pipeline_dag import DEFAULT_PHASH_THRESHOLD, PIPELINE_STAGES, DagScheduler, stage_args
+from run_history import append_run
+from stage_metrics import merge_stage_metrics, parse_metrics_line, total_stage_metrics, wait_stage_process
+from stage_profiling import PROFILE_DIR, PROFILE_MODES, profile_settings
+
 ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS_DIR = ROOT / "scripts"
+AUDIT_STORE_PATH = ROOT / "assets" / "audit" / "audit_store.sqlite"
 
 HOST_NAME = "com.datastrux.dam_audit_host"
 
-PIPELINE_STAGES = [
-    "01_crawl_citizens_images.py",
-    "02_build_dam_fingerprints.py",
-    "03_build_citizens_fingerprints.py",
-    "04_match_assets.py",
-    "05_build_reports.py",
-]
-
 PROGRESS_PREFIX = "AUDIT_PROGRESS "
 
+# Stage output forwarding (see StageOutputForwarder); tune via environment, Chrome passes no host arguments
+DEBUG = os.environ.get("AUDIT_HOST_DEBUG", "").strip().lower() in ("1", "true", "yes")
+PROGRESS_INTERVAL = float(os.environ.get("AUDIT_HOST_PROGRESS_INTERVAL", "0.25"))
+LOG_BATCH_INTERVAL = float(os.environ.get("AUDIT_HOST_LOG_INTERVAL", "0.5"))
+LOG_BATCH_MAX_LINES = 200
+# Keep a pre-imported stage worker alive from host start-up (see stage_worker.py)
+WARM_WORKER = os.environ.get("AUDIT_HOST_WARM_WORKER", "").strip().lower() in ("1", "true", "yes")
+
 # Load shared secret for HMAC verification
 # Secret should be set during native host registration
 SECRET_KEY_FILE = ROOT / ".audit_secret"
@@ -78,24 +84,168 @@ def sanitize_error_message(error_msg: str) -> str:
     return sanitized
 
 
+def debug(message: str) -> None:
+    """Per-line diagnostics on stderr, only with AUDIT_HOST_DEBUG=1."""
+    if DEBUG:
+        sys.stderr.write(f"[NativeHost DEBUG] {message}\n")
+        sys.stderr.flush()
+
+
+class StageOutputForwarder:
+    """
+    Coalesces stage output before it is sent to Chrome.
+
+    Progress is rate-limited per stage: at most one message per
+    progress_interval, carrying the latest payload (a final 100% payload is
+    sent at once).  Plain log lines are collected into one "log_batch"
+    message ({"messages": [...]}) sent every log_interval or once
+    max_lines accumulate.  A background thread flushes whatever is still
+    pending when a stage goes quiet; flush() sends everything now (call it
+    before stage_complete/error so those arrive after the stage's output).
+    """
+
+    def __init__(
+        self,
+        send: Any,
+        progress_interval: float = PROGRESS_INTERVAL,
+        log_interval: float = LOG_BATCH_INTERVAL,
+        max_lines: int = LOG_BATCH_MAX_LINES,
+    ):
+        self.send = send
+        self.progress_interval = progress_interval
+        self.log_interval = log_interval
+        self.max_lines = max_lines
+        self.run_id: str | None = None
+        self._lock = threading.Lock()
+        self._progress_sent_at: dict[str, float] = {}
+        self._pending_progress: dict[str, dict[str, Any]] = {}
+        self._lines: list[str] = []
+        self._lines_since = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.counts = {"progress_in": 0, "progress_sent": 0, "lines_in": 0, "batches_sent": 0}
+
+    def start(self, run_id: str | None) -> None:
+        self.run_id = run_id
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="output-forwarder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush and stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def progress(self, payload: dict[str, Any]) -> None:
+        stage = str(payload.get("stage") or "")
+        now = time.monotonic()
+        final = float(payload.get("percent") or 0) >= 100
+        with self._lock:
+            self.counts["progress_in"] += 1
+            if final or now - self._progress_sent_at.get(stage, 0.0) >= self.progress_interval:
+                self._pending_progress.pop(stage, None)
+                self._progress_sent_at[stage] = now
+                due = payload
+            else:
+                self._pending_progress[stage] = payload
+                due = None
+        if due is not None:
+            self._send_progress(due)
+
+    def log(self, line: str) -> None:
+        with self._lock:
+            self.counts["lines_in"] += 1
+            if not self._lines:
+                self._lines_since = time.monotonic()
+            self._lines.append(line)
+            full = len(self._lines) >= self.max_lines
+        if full:
+            self._flush_logs()
+
+    def flush(self) -> None:
+        """Send all pending progress and log lines now."""
+        self._flush_logs()
+        with self._lock:
+            pending = list(self._pending_progress.values())
+            self._pending_progress.clear()
+            now = time.monotonic()
+            for payload in pending:
+                self._progress_sent_at[str(payload.get("stage") or "")] = now
+        for payload in pending:
+            self._send_progress(payload)
+
+    def _send_progress(self, payload: dict[str, Any]) -> None:
+        self.counts["progress_sent"] += 1
+        self.send(payload)
+
+    def _flush_logs(self) -> None:
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if not lines:
+            return
+        message: dict[str, Any] = {"type": "log_batch", "messages": lines, "ts": time.time()}
+        if self.run_id:
+            message["runId"] = self.run_id
+        self.counts["batches_sent"] += 1
+        self.send(message)
+
+    def _flush_loop(self) -> None:
+        tick = max(0.05, min(self.progress_interval, self.log_interval) / 2)
+        while not self._stop.wait(tick):
+            now = time.monotonic()
+            with self._lock:
+                logs_due = bool(self._lines) and now - self._lines_since >= self.log_interval
+                due = [
+                    payload
+                    for stage, payload in self._pending_progress.items()
+                    if now - self._progress_sent_at.get(stage, 0.0) >= self.progress_interval
+                ]
+                for payload in due:
+                    stage = str(payload.get("stage") or "")
+                    del self._pending_progress[stage]
+                    self._progress_sent_at[stage] = now
+            if logs_due:
+                self._flush_logs()
+            for payload in due:
+                self._send_progress(payload)
+
+
 class NativeHost:
     def __init__(self) -> None:
         self._write_lock = threading.Lock()
         self._runner_thread: threading.Thread | None = None
         self._stop_event = threading.Event()
-        self._current_proc: subprocess.Popen[str] | None = None
+        # Stage subprocesses by script; independent stages run concurrently (pipeline_dag)
+        self._procs: dict[str, subprocess.Popen[str]] = {}
         self._running = False
         self._run_id: str | None = None
         self._current_stage: str | None = None
+        self._running_stages: list[str] = []
         self._last_progress: dict[str, Any] | None = None
         self._started_at: str | None = None
+        # AUDIT_METRICS reports of this run by stage, sent with stage_complete
+        self._stage_metrics: dict[str, dict] = {}
+        # Last progress payload of this run by stage, for the run history
+        self._stage_progress: dict[str, dict] = {}
+        # AUDIT_PROFILE settings of a run started with "profile": "cpu" | "mem"
+        self._profile_env: dict[str, str] = {}
+        # In-process stages redirect sys.stdout; messages always go to the real pipe
+        self._stdout = sys.stdout.buffer
+        self._forwarder = StageOutputForwarder(self._write_message)
+        # Warm stage worker shared by all runs; started on demand or at start-up with AUDIT_HOST_WARM_WORKER=1
+        self._warm_worker: Any = None
+        if WARM_WORKER:
+            self._ensure_warm_worker()
 
     def _write_message(self, payload: dict[str, Any]) -> None:
         encoded = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         with self._write_lock:
-            sys.stdout.buffer.write(struct.pack("<I", len(encoded)))
-            sys.stdout.buffer.write(encoded)
-            sys.stdout.buffer.flush()
+            self._stdout.write(struct.pack("<I", len(encoded)))
+            self._stdout.write(encoded)
+            self._stdout.flush()
 
     def _read_message(self) -> dict[str, Any] | None:
         raw_len = sys.stdin.buffer.read(4)
@@ -120,6 +270,8 @@ class NativeHost:
             payload["message"] = message
         if stage:
             payload["stage"] = stage
+        if self._running_stages:
+            payload["runningStages"] = list(self._running_stages)
         self._write_message(payload)
 
     def _run_script(self, script_name: str, extra_args: list[str] | None = None) -> tuple[int, str]:
@@ -133,7 +285,7 @@ class NativeHost:
         command = [sys.executable, "-u", str(script_path)]
         if extra_args:
             command.extend(extra_args)
-        self._current_proc = subprocess.Popen(
+        proc = subprocess.Popen(
             command,
             cwd=str(ROOT),
             stdout=subprocess.PIPE,
@@ -144,61 +296,162 @@ class NativeHost:
         )
 
         combined_lines: list[str] = []
-        assert self._current_proc.stdout is not None
+        self._procs[script_name] = proc
+        assert proc.stdout is not None
         
         # Use iter() for truly line-by-line reading with immediate processing
-        for line in iter(self._current_proc.stdout.readline, ''):
-            if self._stop_event.is_set() and self._current_proc.poll() is None:
-                self._current_proc.terminate()
+        for line in iter(proc.stdout.readline, ''):
+            if self._stop_event.is_set() and proc.poll() is None:
+                proc.terminate()
                 break
             
             if not line:
-                if self._current_proc.poll() is not None:
+                if proc.poll() is not None:
                     break
                 continue
             
-            msg = line.rstrip()
-            sys.stderr.write(f"[NativeHost DEBUG] Line received: {msg[:100]}\n")
-            sys.stderr.flush()
-            
-            if msg.startswith(PROGRESS_PREFIX):
-                sys.stderr.write(f"[NativeHost DEBUG] Progress prefix detected!\n")
-                sys.stderr.flush()
-                progress_raw = msg[len(PROGRESS_PREFIX):].strip()
-                try:
-                    progress_payload = json.loads(progress_raw)
-                    if isinstance(progress_payload, dict):
-                        progress_payload["type"] = "progress"
-                        progress_payload["ts"] = time.time()
-                        if self._run_id:
-                            progress_payload["runId"] = self._run_id
-                        self._last_progress = progress_payload.copy()
-                        sys.stderr.write(f"[NativeHost DEBUG] Sending progress to extension\n")
-                        sys.stderr.flush()
-                        self._write_message(progress_payload)
-                    continue
-                except json.JSONDecodeError as e:
-                    sys.stderr.write(f"[NativeHost DEBUG] JSON parse error: {e}\n")
-                    sys.stderr.flush()
-                    combined_lines.append(msg)
-                    self._write_message({"type": "log", "message": msg})
-                    continue
-            
-            combined_lines.append(msg)
-            self._write_message({"type": "log", "message": msg})
+            self._handle_stage_line(line.rstrip(), combined_lines)
         
-        # Ensure process has finished
-        rc = self._current_proc.wait() if self._current_proc.poll() is None else self._current_proc.returncode
-        self._current_proc = None
+        # Ensure process has finished; the child's own rusage also covers its start-up
+        if proc.poll() is None:
+            rc, usage = wait_stage_process(proc)
+            if usage:
+                self._record_metrics(script_name, usage)
+        else:
+            rc = proc.returncode
+        self._procs.pop(script_name, None)
         return rc or 0, "\n".join(combined_lines)
 
-    def _run_pipeline(self, mode: str, stage: str | None, phash_threshold: int = 8) -> None:
+    def _run_script_in_process(
+        self, script_name: str, extra_args: list[str] | None, data: Any
+    ) -> tuple[int, str]:
+        """Run a stage in this process (stage_runner), forwarding its output like _run_script."""
+        from stage_runner import StageCancelled, run_stage
+
+        combined_lines: list[str] = []
+
+        def on_line(line: str) -> None:
+            # The stage cannot be terminated from outside; stop at its next output line
+            if self._stop_event.is_set():
+                raise StageCancelled()
+            self._handle_stage_line(line.rstrip(), combined_lines)
+
+        try:
+            rc = run_stage(script_name, extra_args, data, on_line=on_line)
+        except StageCancelled:
+            rc = 1
+        return rc, "\n".join(combined_lines)
+
+    def _ensure_warm_worker(self) -> Any:
+        """Start the warm stage worker (its imports run in the background) if it is not running."""
+        if self._warm_worker is None:
+            from stage_worker import WarmWorker
+
+            self._warm_worker = WarmWorker()
+        self._warm_worker.start()
+        return self._warm_worker
+
+    def _run_script_warm(self, script_name: str, extra_args: list[str] | None) -> tuple[int, str]:
+        """Run a stage in the warm worker, forwarding its output like _run_script."""
+        combined_lines: list[str] = []
+        worker = self._ensure_warm_worker()
+        try:
+            rc = worker.run(
+                script_name,
+                extra_args,
+                lambda line: self._handle_stage_line(line, combined_lines),
+                should_stop=self._stop_event.is_set,
+                env=self._profile_env,
+            )
+        except (OSError, RuntimeError) as err:
+            # Never fail a run because the worker is unavailable; start the stage the usual way
+            self._forwarder.log(f"[NativeHost] Warm worker unavailable ({err}); starting {script_name} as a subprocess")
+            return self._run_script(script_name, extra_args)
+        return rc, "\n".join(combined_lines)
+
+    def _record_metrics(self, script_name: str, metrics: dict) -> None:
+        report = {key: value for key, value in metrics.items() if key != "stage"}
+        self._stage_metrics[script_name] = merge_stage_metrics(self._stage_metrics.get(script_name), report)
+
+    def _record_history(self, scheduler: DagScheduler, started_at: float) -> None:
+        """Append the finished run to the run history (see run_history.py)."""
+        if scheduler.succeeded:
+            status = "completed"
+        else:
+            status = "stopped" if self._stop_event.is_set() else "error"
+        stages = {
+            stage_name: {
+                "status": "completed" if rc == 0 else "error",
+                "exit_code": rc,
+                "duration_seconds": duration,
+                "last_progress": self._stage_progress.get(stage_name),
+                "resources": self._stage_metrics.get(stage_name),
+            }
+            for stage_name, rc, duration in scheduler.results
+        }
+        append_run("native_host", stages, status, started_at, self._run_id)
+
+    def _handle_stage_line(self, msg: str, combined_lines: list[str]) -> None:
+        """Forward one line of stage output as (coalesced) progress or a batched log line."""
+        debug(f"Line received: {msg[:100]}")
+        
+        metrics = parse_metrics_line(msg)
+        if metrics is not None and metrics.get("stage"):
+            self._record_metrics(metrics["stage"], metrics)
+            return
+
+        if msg.startswith(PROGRESS_PREFIX):
+            progress_raw = msg[len(PROGRESS_PREFIX):].strip()
+            try:
+                progress_payload = json.loads(progress_raw)
+            except json.JSONDecodeError as e:
+                debug(f"JSON parse error: {e}")
+                progress_payload = None
+            if isinstance(progress_payload, dict):
+                progress_payload["type"] = "progress"
+                progress_payload["ts"] = time.time()
+                if self._run_id:
+                    progress_payload["runId"] = self._run_id
+                # status always reports the latest progress, even if it was not forwarded
+                self._last_progress = progress_payload.copy()
+                if progress_payload.get("stage"):
+                    self._stage_progress[progress_payload["stage"]] = self._last_progress
+                self._forwarder.progress(progress_payload)
+                return
+            if progress_payload is not None:
+                return
+        
+        combined_lines.append(msg)
+        self._forwarder.log(msg)
+
+    def _run_pipeline(
+        self,
+        mode: str,
+        stage: str | None,
+        phash_threshold: int = DEFAULT_PHASH_THRESHOLD,
+        in_process: bool = False,
+        warm: bool = False,
+        profile: str | None = None,
+    ) -> None:
         try:
             self._running = True
             self._stop_event.clear()
             self._run_id = str(uuid.uuid4())
             self._started_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
             self._last_progress = None
+            self._stage_metrics = {}
+            self._stage_progress = {}
+            if profile:
+                # Stage subprocesses and in-process stages read these from the environment
+                self._profile_env = profile_settings(profile, PROFILE_DIR / self._run_id)
+                os.environ.update(self._profile_env)
+            self._forwarder.start(self._run_id)
+            # In-process runs hand stage outputs over in memory (files are still written)
+            stage_data = None
+            if in_process:
+                from stage_data import StageData
+
+                stage_data = StageData(handoff=True)
 
             if mode == "stage":
                 if not stage:
@@ -228,32 +481,78 @@ class NativeHost:
 
             self._send_status("running", message="Audit run started")
 
-            for stage_name in stages:
-                if self._stop_event.is_set():
-                    self._write_message({"type": "error", "error": "Audit run stopped by user", "ts": time.time(), "runId": self._run_id})
-                    return
+            # Keep the build manifest current so `run_audit_pipeline.py --resume` can skip these stages
+            from build_manifest import BuildManifest
+
+            manifest = BuildManifest()
+            outputs: dict[str, str] = {}
+
+            def run_one(stage_name: str) -> int:
+                extra_args = stage_args(stage_name, phash_threshold)
+                if stage_data is not None:
+                    rc, outputs[stage_name] = self._run_script_in_process(stage_name, extra_args, stage_data)
+                elif warm:
+                    rc, outputs[stage_name] = self._run_script_warm(stage_name, extra_args)
+                else:
+                    rc, outputs[stage_name] = self._run_script(stage_name, extra_args)
+                return rc
 
+            def on_start(stage_name: str) -> None:
                 self._current_stage = stage_name
+                self._running_stages.append(stage_name)
+                manifest.invalidate(stage_name)
                 self._send_status("running", message=f"Running {stage_name}", stage=stage_name)
-                self._write_message({"type": "stage_start", "stage": stage_name, "ts": time.time(), "runId": self._run_id})
-                
-                # Pass phash threshold to 04_match_assets.py
-                extra_args = None
-                if stage_name == "04_match_assets.py":
-                    extra_args = ["--phash-threshold", str(phash_threshold)]
-                
-                rc, output = self._run_script(stage_name, extra_args)
+                self._write_message({
+                    "type": "stage_start",
+                    "stage": stage_name,
+                    "runningStages": list(self._running_stages),
+                    "ts": time.time(),
+                    "runId": self._run_id,
+                })
+
+            def on_finish(stage_name: str, rc: int, duration: float) -> None:
+                self._running_stages.remove(stage_name)
+                # The stage's last progress and log lines go out before its completion/error
+                self._forwarder.flush()
                 if rc != 0:
                     self._write_message({
                         "type": "error",
                         "error": f"Stage failed: {stage_name}",
                         "stage": stage_name,
-                        "output": output,
+                        "output": outputs.get(stage_name, ""),
                         "ts": time.time(),
                         "runId": self._run_id,
                     })
                     return
-                self._write_message({"type": "stage_complete", "stage": stage_name, "ts": time.time(), "runId": self._run_id})
+                manifest.record(stage_name, stage_args(stage_name, phash_threshold))
+                self._write_message({
+                    "type": "stage_complete",
+                    "stage": stage_name,
+                    "metrics": self._stage_metrics.get(stage_name),
+                    "runningStages": list(self._running_stages),
+                    "ts": time.time(),
+                    "runId": self._run_id,
+                })
+
+            # Stages start once the stages producing their inputs complete (02 runs alongside 01/03)
+            # A cpu profile hooks every thread of the process: in-process stages then run one at a time
+            max_parallel = 1 if in_process and profile == "cpu" else 2
+            scheduler = DagScheduler(
+                stages,
+                run_one,
+                max_parallel=max_parallel,
+                on_start=on_start,
+                on_finish=on_finish,
+                should_stop=self._stop_event.is_set,
+            )
+            started_at = time.time()
+            scheduler.run()
+            self._forwarder.stop()
+            self._record_history(scheduler, started_at)
+            if not scheduler.succeeded:
+                if self._stop_event.is_set():
+                    self._write_message({"type": "error", "error": "Audit run stopped by user", "ts": time.time(), "runId": self._run_id})
+                return
 
             self._write_message({
                 "type": "complete",
@@ -267,25 +566,49 @@ class NativeHost:
                         "xlsx": str(ROOT / "reports" / "citizens_dam_audit.xlsx"),
                         "html": str(ROOT / "reports" / "audit_report.html"),
                     },
+                    "resources": {
+                        "stages": self._stage_metrics,
+                        "total": total_stage_metrics(self._stage_metrics.values()),
+                    },
+                    "profileDir": self._profile_env.get("AUDIT_PROFILE_DIR"),
                 },
             })
         except Exception as err:  # pragma: no cover
+            self._forwarder.stop()
             sanitized_msg = sanitize_error_message(str(err))
             self._write_message({"type": "error", "error": sanitized_msg, "ts": time.time(), "runId": self._run_id})
         finally:
+            self._forwarder.stop()
+            for key in self._profile_env:
+                os.environ.pop(key, None)
+            self._profile_env = {}
             self._running = False
             self._run_id = None
             self._current_stage = None
+            self._running_stages = []
             self._last_progress = None
             self._started_at = None
             self._stop_event.clear()
-            self._current_proc = None
-
-    def _handle_run(self, mode: str, stage: str | None, phash_threshold: int = 8) -> None:
+            self._procs = {}
+
+    def _handle_run(
+        self,
+        mode: str,
+        stage: str | None,
+        phash_threshold: int = DEFAULT_PHASH_THRESHOLD,
+        in_process: bool = False,
+        warm: bool = False,
+        profile: str | None = None,
+    ) -> None:
         if self._running:
             self._write_message({"type": "error", "error": "Audit already running", "ts": time.time()})
             return
-        self._runner_thread = threading.Thread(target=self._run_pipeline, args=(mode, stage, phash_threshold), daemon=True)
+        if profile is not None and profile not in PROFILE_MODES:
+            self._write_message({"type": "error", "error": f"Unknown profile mode: {profile}", "ts": time.time()})
+            return
+        self._runner_thread = threading.Thread(
+            target=self._run_pipeline, args=(mode, stage, phash_threshold, in_process, warm, profile), daemon=True
+        )
         self._runner_thread.start()
 
     def _handle_stop(self) -> None:
@@ -295,6 +618,27 @@ class NativeHost:
         self._stop_event.set()
         self._write_message({"type": "status", "status": "stopping", "message": "Stop requested", "ts": time.time(), "runId": self._run_id})
 
+    def _handle_lookup(self, message: dict[str, Any]) -> None:
+        """Answer an ad-hoc query from the SQLite audit store (see audit_store.AuditStore.lookup)."""
+        query = message.get("query") or {}
+        payload: dict[str, Any] = {"type": "lookup_result", "ts": time.time()}
+        if message.get("requestId"):
+            payload["requestId"] = message["requestId"]
+        from audit_store import AuditStore, store_path
+
+        path = store_path() or AUDIT_STORE_PATH
+        if not path.exists():
+            self._write_message({**payload, "type": "error", "error": "Audit store not found (run the pipeline with AUDIT_SQLITE_STORE=1)"})
+            return
+        try:
+            with AuditStore(path) as store:
+                rows = store.lookup(query)
+        except (ValueError, TypeError) as err:
+            self._write_message({**payload, "type": "error", "error": sanitize_error_message(str(err))})
+            return
+        payload.update({"table": query.get("table", "match_results"), "count": len(rows), "rows": rows})
+        self._write_message(payload)
+
     def serve(self) -> None:
         while True:
             message = self._read_message()
@@ -314,14 +658,22 @@ class NativeHost:
             if command == "run":
                 mode = message.get("mode") or "pipeline"
                 stage = message.get("stage")
-                phash_threshold = message.get("phash_threshold", 8)
-                self._handle_run(mode, stage, phash_threshold)
+                phash_threshold = message.get("phash_threshold", DEFAULT_PHASH_THRESHOLD)
+                in_process = bool(message.get("inProcess"))
+                # The warm worker is used once started (AUDIT_HOST_WARM_WORKER=1) or when asked for
+                warm = bool(message.get("warmWorker", self._warm_worker is not None))
+                # "profile": "cpu" | "mem" profiles every stage (see stage_profiling.StageProfiler)
+                self._handle_run(mode, stage, phash_threshold, in_process, warm, message.get("profile") or None)
                 continue
 
             if command == "stop":
                 self._handle_stop()
                 continue
 
+            if command == "lookup":
+                self._handle_lookup(message)
+                continue
+
             if command == "status":
                 payload: dict[str, Any] = {
                     "type": "status",
@@ -331,6 +683,7 @@ class NativeHost:
                 if self._running and self._run_id:
                     payload["runId"] = self._run_id
                     payload["stage"] = self._current_stage
+                    payload["runningStages"] = list(self._running_stages)
                     payload["startedAt"] = self._started_at
                     if self._last_progress:
                         payload["progress"] = self._last_progress
@@ -342,7 +695,11 @@ class NativeHost:
 
 def main() -> None:
     host = NativeHost()
-    host.serve()
+    try:
+        host.serve()
+    finally:
+        if host._warm_worker is not None:
+            host._warm_worker.close()
 
 
 if __name__ == "__main__":
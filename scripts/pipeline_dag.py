@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Stage graph and scheduler for the audit pipeline.
+
+Each stage declares the files it reads and writes; a stage depends on the
+stages that produce its inputs.  Stage 02 only needs the DAM export, so it
+runs alongside the Citizens branch:
+
+    01 crawl ──> 03 Citizens fingerprints ──┐
+    02 DAM fingerprints ────────────────────┴──> 04 match ──> 05 reports
+
+DagScheduler starts every stage as soon as its dependencies have finished
+(up to max_parallel at once).  It needs only the stdlib and audit_common
+(itself stdlib only), so the orchestrators can import it before any stage
+dependency is installed.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from audit_common import AUDIT_DIR, REPORTS_DIR
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline stage: its script, the files it reads and the files it writes."""
+
+    script: str
+    inputs: tuple[Path, ...]
+    outputs: tuple[Path, ...]
+    # Data sources read through audit_common's DATA_SOURCE_CONFIG, not produced by a stage
+    sources: tuple[str, ...] = ()
+
+
+PIPELINE = (
+    Stage(
+        "01_crawl_citizens_images.py",
+        inputs=(),
+        outputs=(
+            AUDIT_DIR / "citizens_images.json",
+            AUDIT_DIR / "citizens_pages.json",
+            AUDIT_DIR / "citizens_images_index.json",
+        ),
+        sources=("citizens_urls",),
+    ),
+    Stage(
+        "02_build_dam_fingerprints.py",
+        inputs=(),
+        outputs=(AUDIT_DIR / "dam_fingerprints.json",),
+        sources=("dam_assets",),
+    ),
+    Stage(
+        "03_build_citizens_fingerprints.py",
+        inputs=(AUDIT_DIR / "citizens_images_index.json",),
+        outputs=(AUDIT_DIR / "citizens_fingerprints.json",),
+    ),
+    Stage(
+        "04_match_assets.py",
+        inputs=(AUDIT_DIR / "citizens_fingerprints.json", AUDIT_DIR / "dam_fingerprints.json"),
+        outputs=(
+            AUDIT_DIR / "match_results.json",
+            AUDIT_DIR / "unmatched_results.json",
+            AUDIT_DIR / "dam_internal_dupes.json",
+            AUDIT_DIR / "dam_phash_dupes.json",
+            AUDIT_DIR / "citizens_duplicates.json",
+            AUDIT_DIR / "governance_metrics.json",
+        ),
+    ),
+    Stage(
+        "05_build_reports.py",
+        inputs=(
+            AUDIT_DIR / "match_results.json",
+            AUDIT_DIR / "unmatched_results.json",
+            AUDIT_DIR / "dam_internal_dupes.json",
+            AUDIT_DIR / "dam_phash_dupes.json",
+            AUDIT_DIR / "citizens_duplicates.json",
+            AUDIT_DIR / "governance_metrics.json",
+        ),
+        outputs=(
+            REPORTS_DIR / "audit_report.html",
+            REPORTS_DIR / "citizens_dam_audit.xlsx",
+            AUDIT_DIR / "audit_master.json",
+            AUDIT_DIR / "audit_summary.json",
+        ),
+    ),
+)
+
+# Script names in declaration (and legacy sequential) order
+PIPELINE_STAGES = [stage.script for stage in PIPELINE]
+STAGES_BY_SCRIPT = {stage.script: stage for stage in PIPELINE}
+DEFAULT_PHASH_THRESHOLD = 8
+
+
+def stage_args(script: str, phash_threshold: int = DEFAULT_PHASH_THRESHOLD) -> list[str]:
+    """
+    Command-line arguments the orchestrators pass to a stage.
+
+    The build manifest compares recorded arguments exactly, so every
+    orchestrator runs and records a stage with these same arguments.
+    """
+    if script == "04_match_assets.py":
+        return ["--phash-threshold", str(phash_threshold)]
+    return []
+
+
+def stage_dependencies(stages: Iterable[Stage] = PIPELINE) -> dict[str, tuple[str, ...]]:
+    """Map each stage script to the scripts producing its inputs."""
+    stages = list(stages)
+    producers = {output: stage.script for stage in stages for output in stage.outputs}
+    return {
+        stage.script: tuple(dict.fromkeys(producers[p] for p in stage.inputs if p in producers))
+        for stage in stages
+    }
+
+
+def downstream_stages(script: str, stages: Iterable[Stage] = PIPELINE) -> list[str]:
+    """Scripts that depend on script, directly or transitively, in pipeline order."""
+    deps = stage_dependencies(stages)
+    affected = {script}
+    for name in deps:  # declaration order is a topological order
+        if any(d in affected for d in deps[name]):
+            affected.add(name)
+    return [name for name in deps if name in affected and name != script]
+
+
+class DagScheduler:
+    """
+    Run the selected stages as soon as their dependencies have finished.
+
+    run_stage(script) -> exit code is called on a worker thread;
+    on_start(script) and on_finish(script, exit_code, duration) are called
+    on the thread that called run().  Dependencies outside selected (e.g.
+    stages skipped by --resume) count as done.  After a failure no new
+    stage starts; stages already running finish, and the ones never
+    started are listed in skipped.  should_stop() is checked the same way.
+
+    Usage:
+        scheduler = DagScheduler(PIPELINE_STAGES, lambda s: run_script(s))
+        results = scheduler.run()   # [(script, exit_code, duration), ...]
+    """
+
+    def __init__(
+        self,
+        selected: Iterable[str],
+        run_stage: Callable[[str], int],
+        max_parallel: int = 2,
+        on_start: Callable[[str], None] | None = None,
+        on_finish: Callable[[str, int, float], None] | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ):
+        chosen = set(selected)
+        self.selected = [s for s in PIPELINE_STAGES if s in chosen]
+        self.run_stage = run_stage
+        self.max_parallel = max(1, max_parallel)
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.should_stop = should_stop
+        all_deps = stage_dependencies()
+        self.deps = {s: tuple(d for d in all_deps[s] if d in self.selected) for s in self.selected}
+        self.results: list[tuple[str, int, float]] = []
+        self.skipped: list[str] = []
+
+    def _timed(self, script: str) -> tuple[int, float]:
+        started = time.time()
+        return self.run_stage(script), time.time() - started
+
+    def run(self) -> list[tuple[str, int, float]]:
+        """Run until every stage finished or one failed; results in completion order."""
+        pending = list(self.selected)
+        done: set[str] = set()
+        failed = False
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            running = {}
+            while pending or running:
+                stopping = failed or (self.should_stop is not None and self.should_stop())
+                if not stopping:
+                    for script in list(pending):
+                        if len(running) >= self.max_parallel:
+                            break
+                        if all(d in done for d in self.deps[script]):
+                            pending.remove(script)
+                            if self.on_start is not None:
+                                self.on_start(script)
+                            running[pool.submit(self._timed, script)] = script
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    script = running.pop(future)
+                    try:
+                        exit_code, duration = future.result()
+                    except Exception:
+                        # A crashed run_stage fails its stage like a non-zero exit, but not silently
+                        print(f"Stage {script} raised instead of returning an exit code:", file=sys.stderr, flush=True)
+                        traceback.print_exc()
+                        exit_code, duration = 1, 0.0
+                    self.results.append((script, exit_code, duration))
+                    if exit_code == 0:
+                        done.add(script)
+                    else:
+                        failed = True
+                    if self.on_finish is not None:
+                        self.on_finish(script, exit_code, duration)
+        self.skipped = pending
+        return self.results
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.skipped and all(code == 0 for _, code, _ in self.results)
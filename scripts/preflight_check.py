@@ -11,11 +11,14 @@ import argparse
 from pathlib import Path
 from datetime import datetime
 
+from audit_common import JsonItemReader
+
 # Track issues and warnings
 issues = []
 warnings = []
 checks_passed = 0
 checks_total = 10
+dam_asset_count = None  # set by check_dam_json()
 
 # Global flags
 auto_fix = False
@@ -124,7 +127,7 @@ def check_directory_structure():
 
 def check_dam_json():
     """Check for DAM assets JSON file"""
-    global checks_passed
+    global checks_passed, dam_asset_count
     print("[4/10] Checking DAM assets JSON...")
     
     # Check if standard name exists
@@ -132,30 +135,29 @@ def check_dam_json():
         size_mb = dam_json.stat().st_size / (1024 * 1024)
         print(f"  ✓ Found: dam_assets.json ({size_mb:.1f} MB)")
         
-        # Validate JSON format
+        # Validate JSON format (streamed: the catalog is never held in memory)
         try:
-            with open(dam_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            reader = JsonItemReader(dam_json)
+            first_asset = None
+            for asset in reader:
+                if first_asset is None:
+                    first_asset = asset
             
-            if isinstance(data, list):
-                assets = data
-            elif isinstance(data, dict) and isinstance(data.get('assets'), list):
-                assets = data.get('assets', [])
+            if reader.layout == "object" and not reader.key_found:
+                issues.append("dam_assets.json must be a JSON array or object with an 'assets' array")
+                print("  ✗ Invalid format (expected array or dict.assets array, got object without 'assets')")
+                return False
+            if reader.layout == "object":
                 warning_msg = "dam_assets.json uses wrapped format {'assets': [...]} (supported)"
                 warnings.append(warning_msg)
                 print("  ⚠ Wrapped JSON format detected ({'assets': [...]})")
-            else:
-                issues.append("dam_assets.json must be a JSON array or object with an 'assets' array")
-                print(f"  ✗ Invalid format (expected array or dict.assets array, got {type(data).__name__})")
-                return False
             
-            asset_count = len(assets)
+            asset_count = dam_asset_count = reader.count
             print(f"  ✓ Valid JSON format")
             print(f"  ✓ Contains {asset_count:,} assets")
             
             # Validate first asset has expected fields
             if asset_count > 0:
-                first_asset = assets[0]
                 has_id = any(k in first_asset for k in ['id', 'item_id', 'asset_id'])
                 if has_id:
                     print(f"  ✓ Asset schema valid")
@@ -167,8 +169,12 @@ def check_dam_json():
             return True
             
         except json.JSONDecodeError as e:
-            issues.append(f"dam_assets.json is not valid JSON: {e}")
-            print(f"  ✗ Invalid JSON format (syntax error at line {e.lineno})")
+            issues.append(f"dam_assets.json is not valid JSON: {e.msg}")
+            print(f"  ✗ Invalid JSON format (syntax error: {e.msg})")
+            return False
+        except ValueError as e:
+            issues.append("dam_assets.json must be a JSON array or object with an 'assets' array")
+            print(f"  ✗ Invalid format ({e})")
             return False
     
     # Look for aprimo_dam_assets_master_*.json files
@@ -518,17 +524,9 @@ def print_summary():
     
     if dam_json.exists():
         size_mb = dam_json.stat().st_size / (1024 * 1024)
-        try:
-            with open(dam_json, 'r', encoding='utf-8') as f:
-                payload = json.load(f)
-                if isinstance(payload, list):
-                    asset_count = len(payload)
-                elif isinstance(payload, dict) and isinstance(payload.get('assets'), list):
-                    asset_count = len(payload.get('assets', []))
-                else:
-                    asset_count = 0
-            print(f"DAM Dataset: {asset_count:,} assets ({size_mb:.1f} MB)")
-        except:
+        if dam_asset_count is not None:
+            print(f"DAM Dataset: {dam_asset_count:,} assets ({size_mb:.1f} MB)")
+        else:
             print(f"DAM Dataset: {size_mb:.1f} MB")
     
     if urls_file.exists():
@@ -1,52 +1,40 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
 import subprocess
 import sys
+import time
 from pathlib import Path
 
+from build_manifest import MANIFEST_PATH, BuildManifest
+from pipeline_dag import DEFAULT_PHASH_THRESHOLD, PIPELINE_STAGES, DagScheduler, stage_args
+from run_history import append_run
+from stage_metrics import (
+    format_stage_metrics,
+    merge_stage_metrics,
+    parse_metrics_line,
+    total_stage_metrics,
+    wait_stage_process,
+)
+from stage_profiling import PROFILE_DIR, PROFILE_MODES, profile_settings
+from stage_tracing import TRACE_DIR, TRACE_ENV, merge_trace_files
+
 ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS_DIR = ROOT / "scripts"
 AUDIT_DIR = ROOT / "assets" / "audit"
 REPORTS_DIR = ROOT / "reports"
 
-STAGES = [
-    "01_crawl_citizens_images.py",
-    "02_build_dam_fingerprints.py",
-    "03_build_citizens_fingerprints.py",
-    "04_match_assets.py",
-    "05_build_reports.py",
-]
-
-# Output files that indicate stage completion
-STAGE_OUTPUTS = {
-    "01_crawl_citizens_images.py": AUDIT_DIR / "citizens_images.json",
-    "02_build_dam_fingerprints.py": AUDIT_DIR / "dam_fingerprints.json",
-    "03_build_citizens_fingerprints.py": AUDIT_DIR / "citizens_fingerprints.json",
-    "04_match_assets.py": AUDIT_DIR / "match_results.json",
-    "05_build_reports.py": REPORTS_DIR / "audit_report.html",
-}
-
-
-def detect_completed_stages() -> int:
-    """Detect which stages have completed by checking for output files.
-    
-    Returns:
-        Index of first incomplete stage (0-based), or len(STAGES) if all complete
-    """
-    for i, stage in enumerate(STAGES):
-        output_file = STAGE_OUTPUTS.get(stage)
-        if not output_file or not output_file.exists():
-            return i
-    return len(STAGES)
-
+# Declaration order; pipeline_dag decides which stages may run concurrently
+STAGES = PIPELINE_STAGES
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run the complete audit pipeline")
     parser.add_argument(
         "--resume",
         action="store_true",
-        help="Resume from where the pipeline failed (skip completed stages)"
+        help="Only run stages whose inputs, arguments or script changed since they last succeeded, plus the stages after them"
     )
     parser.add_argument(
         "--start-from",
@@ -55,32 +43,207 @@ def main() -> None:
         metavar="STAGE",
         help=f"Start from stage number (1-{len(STAGES)})"
     )
+    parser.add_argument(
+        "--phash-threshold",
+        type=int,
+        default=DEFAULT_PHASH_THRESHOLD,
+        help=f"Max pHash Hamming distance for a visual match in stage 4 (default: {DEFAULT_PHASH_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--storage-format",
+        choices=["json", "parquet", "arrow"],
+        default=None,
+        help="Hand stage outputs between stages as JSON (default) or columnar Parquet/Arrow files (needs pyarrow)"
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        default=None,
+        help="Compress stage outputs (.json.gz / .json.zst, or the Parquet/Arrow codec); zstd needs zstandard"
+    )
+    parser.add_argument(
+        "--sqlite-store",
+        action="store_true",
+        help="Mirror stage outputs into assets/audit/audit_store.sqlite for indexed cross-stage lookups"
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run all stages in this interpreter and hand their outputs over in memory (default: one subprocess per stage)"
+    )
+    parser.add_argument(
+        "--no-artifacts",
+        dest="artifacts",
+        action="store_false",
+        help="With --in-process, skip intermediate stage files; only audit_master, audit_summary and the reports are written"
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Run up to N independent stages at once, e.g. 02 alongside 01/03 (1 = one stage at a time, in order)"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record fetch/decode/hash/parse/write spans in stages 01-04 and write a Chrome trace (Perfetto, chrome://tracing)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile every stage: cpu = cProfile .pstats + collapsed stacks, mem = tracemalloc top allocation sites"
+    )
     args = parser.parse_args()
+    if not args.artifacts and not args.in_process:
+        parser.error("--no-artifacts requires --in-process")
+    if args.profile == "cpu" and args.in_process and args.max_parallel > 1:
+        # A cpu profile hooks every thread of the process, so concurrent stages would share it
+        parser.error("--profile cpu with --in-process requires --max-parallel 1")
 
-    # Determine starting stage
-    start_idx = 0
+    # Inherited by every stage subprocess
+    if args.storage_format:
+        os.environ["AUDIT_STORAGE_FORMAT"] = args.storage_format
+    if args.compression:
+        os.environ["AUDIT_COMPRESSION"] = args.compression
+    if args.sqlite_store:
+        os.environ["AUDIT_SQLITE_STORE"] = "1"
+    trace_dir = None
+    if args.trace:
+        # Each stage process writes its own trace here; they are merged after the run
+        trace_dir = TRACE_DIR / time.strftime("%Y%m%d-%H%M%S")
+        os.environ[TRACE_ENV] = str(trace_dir)
+    profile_dir = None
+    if args.profile:
+        profile_dir = PROFILE_DIR / time.strftime("%Y%m%d-%H%M%S")
+        os.environ.update(profile_settings(args.profile, profile_dir))
+
+    # Records what each successful stage was built from (see build_manifest)
+    manifest = BuildManifest()
+
+    # Determine which stages to run
+    selected = STAGES
     if args.start_from:
-        start_idx = args.start_from - 1
-        print(f"\n=== Starting from stage {args.start_from}: {STAGES[start_idx]} ===")
+        selected = STAGES[args.start_from - 1:]
+        print(f"\n=== Starting from stage {args.start_from}: {selected[0]} ===")
     elif args.resume:
-        start_idx = detect_completed_stages()
-        if start_idx >= len(STAGES):
-            print("\nAll stages already complete. Use --start-from to re-run specific stages.")
+        plan = manifest.plan(STAGES, lambda stage: stage_args(stage, args.phash_threshold))
+        if not plan:
+            print(f"\nAll stages are up to date ({MANIFEST_PATH.name}). Use --start-from to re-run specific stages.")
             print("Open reports/audit_report.html and reports/citizens_dam_audit.xlsx")
             return
-        print(f"\n=== Resuming from stage {start_idx + 1}: {STAGES[start_idx]} ===")
-        print(f"Skipped {start_idx} completed stage(s)\n")
+        print(f"\n=== Resuming: {len(plan)} of {len(STAGES)} stage(s) to run ===")
+        for stage in STAGES:
+            print(f"  {stage}: {plan.get(stage, 'up to date, skipped')}")
+        selected = list(plan)
 
     python = sys.executable
-    for idx in range(start_idx, len(STAGES)):
-        stage = STAGES[idx]
-        script_path = SCRIPTS_DIR / stage
-        print(f"\n=== Running stage {idx + 1}/{len(STAGES)}: {stage} ===")
-        completed = subprocess.run([python, str(script_path)], cwd=str(ROOT))
-        if completed.returncode != 0:
-            print(f"\n❌ Stage {idx + 1} failed: {stage}")
-            print(f"To resume from this stage, run: python scripts/run_audit_pipeline.py --start-from {idx + 1}")
-            raise SystemExit(f"Stage failed: {stage}")
+    stage_data = None
+    if args.in_process:
+        from stage_data import StageData
+        from stage_runner import run_stage
+
+        # Stages read what earlier stages left in memory; resumed stages fall back to files
+        stage_data = StageData(write_artifacts=args.artifacts, handoff=True)
+
+    # AUDIT_METRICS reports (CPU, peak RSS, requests, bytes, cache hits) per stage, for the summary
+    resources: dict[str, dict] = {}
+    # Last AUDIT_PROGRESS payload per stage (items and errors for the run history)
+    last_progress: dict[str, dict] = {}
+    # In-process stages' stdout is routed to handle_line; echo to the real console
+    console = sys.stdout
+
+    def handle_line(stage: str, line: str) -> None:
+        metrics = parse_metrics_line(line)
+        if metrics is None:
+            if line.startswith("AUDIT_PROGRESS "):
+                try:
+                    last_progress[stage] = json.loads(line[len("AUDIT_PROGRESS "):])
+                except json.JSONDecodeError:
+                    pass
+            print(line, flush=True, file=console)
+        else:
+            metrics.pop("stage", None)
+            resources[stage] = merge_stage_metrics(resources.get(stage), metrics)
+
+    def run_one(stage: str) -> int:
+        if stage_data is not None:
+            return run_stage(
+                stage, stage_args(stage, args.phash_threshold), data=stage_data, on_line=lambda line: handle_line(stage, line)
+            )
+        process = subprocess.Popen(
+            [python, "-u", str(SCRIPTS_DIR / stage), *stage_args(stage, args.phash_threshold)],
+            cwd=str(ROOT),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        assert process.stdout is not None
+        for line in process.stdout:
+            handle_line(stage, line.rstrip("\n"))
+        # The child's own rusage also covers its start-up and imports
+        returncode, usage = wait_stage_process(process)
+        if usage:
+            resources[stage] = merge_stage_metrics(resources.get(stage), usage)
+        return returncode
+
+    def on_start(stage: str) -> None:
+        manifest.invalidate(stage)
+        print(f"\n=== Running stage {STAGES.index(stage) + 1}/{len(STAGES)}: {stage} ===", flush=True)
+
+    def on_finish(stage: str, returncode: int, duration: float) -> None:
+        if returncode == 0:
+            # Without intermediate files on disk there is nothing to record
+            if args.artifacts:
+                manifest.record(stage, stage_args(stage, args.phash_threshold))
+            print(f"\n=== Stage {STAGES.index(stage) + 1} finished in {duration:.1f}s: {stage} ===", flush=True)
+
+    # Stages start as soon as the stages producing their inputs are done
+    scheduler = DagScheduler(
+        selected, run_one, max_parallel=args.max_parallel, on_start=on_start, on_finish=on_finish
+    )
+    started_at = time.time()
+    scheduler.run()
+
+    failed = [stage for stage, returncode, _ in scheduler.results if returncode != 0]
+    append_run(
+        "pipeline",
+        {
+            stage: {
+                "status": "completed" if returncode == 0 else "error",
+                "exit_code": returncode,
+                "duration_seconds": duration,
+                "last_progress": last_progress.get(stage),
+                "resources": resources.get(stage),
+            }
+            for stage, returncode, duration in scheduler.results
+        },
+        "error" if failed else "completed",
+        started_at,
+    )
+
+    if trace_dir is not None and trace_dir.exists():
+        trace = merge_trace_files(trace_dir.glob("*.trace.json"), trace_dir / "pipeline.trace.json")
+        print(f"\n=== Trace: {trace} (open in https://ui.perfetto.dev or chrome://tracing) ===")
+    if profile_dir is not None and profile_dir.exists():
+        print(f"\n=== Profiles ({args.profile}): {profile_dir} ===")
+
+    if resources:
+        print("\n=== Stage resources ===")
+        for stage in STAGES:
+            if stage in resources:
+                print(f"  {stage:<36} {format_stage_metrics(resources[stage])}")
+        print(f"  {'Total':<36} {format_stage_metrics(total_stage_metrics(resources.values()))}")
+
+    if failed:
+        for stage in failed:
+            print(f"\n❌ Stage {STAGES.index(stage) + 1} failed: {stage}")
+        first = min(STAGES.index(stage) for stage in failed) + 1
+        print(f"To resume from this stage, run: python scripts/run_audit_pipeline.py --start-from {first}")
+        raise SystemExit(f"Stage failed: {', '.join(failed)}")
 
     print("\n✅ Pipeline completed successfully.")
     print("Open reports/audit_report.html and reports/citizens_dam_audit.xlsx")
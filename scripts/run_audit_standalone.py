@@ -2,11 +2,19 @@
 """
 Standalone orchestrator for the Aprimo DAM audit pipeline.
 
-Runs all audit stages in sequence without requiring the Chrome extension.
+Runs all audit stages without requiring the Chrome extension.  Stages start
+as soon as the stages producing their inputs finish (pipeline_dag), so DAM
+fingerprinting (02) runs alongside the Citizens crawl (01 -> 03).
 Progress is printed to stdout and optionally written to a log file.
+pipeline_status.json is rewritten at most every --status-interval seconds;
+--metrics-port serves the same status, plus Prometheus counters, over HTTP
+on localhost.  Each stage's CPU time, peak RSS, HTTP requests, bytes and
+cache hit ratios (its AUDIT_METRICS line) are kept under "resources" in the
+status file and listed in the final summary.
 
 Usage:
-    python scripts/run_audit_standalone.py [--log-file PATH]
+    python scripts/run_audit_standalone.py [--log-file PATH] [--max-parallel N] [--in-process [--no-artifacts]]
+                                           [--status-interval SECONDS] [--metrics-port PORT]
 
 Stages:
     01_crawl_citizens_images.py      - Crawl citizensbank.com for images
@@ -21,37 +29,66 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import os
 import re
 import subprocess
 import sys
+import threading
 import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
+from pipeline_dag import PIPELINE_STAGES, DagScheduler, stage_args
+from run_history import append_run
+from stage_metrics import (
+    format_stage_metrics,
+    merge_stage_metrics,
+    parse_metrics_line,
+    total_stage_metrics,
+    wait_stage_process,
+)
+from stage_profiling import PROFILE_DIR, PROFILE_MODES, profile_settings
+from stage_progress import format_eta
+from stage_tracing import TRACE_DIR, TRACE_ENV, merge_trace_files
+
 # Root directory is one level up from scripts/
 ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS_DIR = ROOT / "scripts"
 OUTPUT_DIR = ROOT / "assets" / "audit"
 STATUS_FILE = OUTPUT_DIR / "pipeline_status.json"
-
-PIPELINE_STAGES = [
-    "01_crawl_citizens_images.py",
-    "02_build_dam_fingerprints.py",
-    "03_build_citizens_fingerprints.py",
-    "04_match_assets.py",
-    "05_build_reports.py",
-]
+# Minimum seconds between progress-driven status file writes (state changes write at once)
+DEFAULT_STATUS_INTERVAL = 1.0
 
 
 class PipelineStatus:
-    """Manages persistent status file for external monitoring."""
+    """Manages persistent status file for external monitoring.
+    
+    Stages may run concurrently: each keeps its own entry under "stages",
+    "running_stages" lists the ones in flight and "current_stage" is the
+    most recently started.  Updates arrive from several threads.
+
+    Stage and pipeline transitions are written at once.  Progress updates
+    are coalesced: the file is rewritten at most every write_interval
+    seconds, and the latest progress is flushed by a timer if no further
+    update arrives.  Every write goes to a temp file that is renamed over
+    the status file, so readers never see half a file.
+    """
     
-    def __init__(self, status_file: Path):
+    def __init__(self, status_file: Path, write_interval: float = DEFAULT_STATUS_INTERVAL):
         self.status_file = status_file
         self.status_file.parent.mkdir(parents=True, exist_ok=True)
+        self.write_interval = max(0.0, write_interval)
+        self._lock = threading.RLock()
+        self._last_write = 0.0
+        self._flush_timer: threading.Timer | None = None
+        # (time, items) of each stage's first progress update, for items/sec
+        self._rate_base: dict[str, tuple[float, int]] = {}
+        self.counters = {"progress_updates": 0, "status_writes": 0}
         
         self.state = {
             "current_stage": None,
             "current_stage_num": 0,
+            "running_stages": [],
             "total_stages": len(PIPELINE_STAGES),
             "pipeline_percent": 0.0,
             "started_at": None,
@@ -67,68 +104,268 @@ class PipelineStatus:
         self.write()
     
     def write(self) -> None:
-        """Write current state to JSON file."""
-        self.state["updated_at"] = time.time()
-        try:
-            self.status_file.write_text(json.dumps(self.state, indent=2, ensure_ascii=False))
-        except Exception as err:
-            # Don't crash pipeline if status file write fails
-            print(f"WARNING: Failed to write status file: {err}", file=sys.stderr)
+        """Write current state to the JSON file now (atomically)."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self.state["updated_at"] = time.time()
+            tmp_path = self.status_file.with_name(f"{self.status_file.name}.{os.getpid()}.tmp")
+            try:
+                tmp_path.write_text(json.dumps(self.state, indent=2, ensure_ascii=False), encoding="utf-8")
+                for attempt in range(3):
+                    try:
+                        os.replace(tmp_path, self.status_file)
+                        break
+                    except PermissionError:
+                        # Windows refuses to replace a file a reader has open; retry briefly
+                        if attempt == 2:
+                            raise
+                        time.sleep(0.05)
+                self._last_write = time.monotonic()
+                self.counters["status_writes"] += 1
+            except Exception as err:
+                # Don't crash pipeline if status file write fails
+                print(f"WARNING: Failed to write status file: {err}", file=sys.stderr)
+                tmp_path.unlink(missing_ok=True)
+
+    def _write_throttled(self) -> None:
+        """Write now if write_interval has passed since the last write, else once it has."""
+        with self._lock:
+            wait = self._last_write + self.write_interval - time.monotonic()
+            if wait <= 0:
+                self.write()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(wait, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush(self) -> None:
+        with self._lock:
+            # A direct write() since the timer fired has already flushed
+            if self._flush_timer is not None:
+                self._flush_timer = None
+                self.write()
+
+    def snapshot(self) -> dict:
+        """Deep copy of the current state (for the status endpoint)."""
+        with self._lock:
+            return json.loads(json.dumps(self.state))
+
+    def prometheus_metrics(self) -> str:
+        """Current counters in the Prometheus text exposition format."""
+        state = self.snapshot()
+        with self._lock:
+            counters = dict(self.counters)
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        stages = state["stages"]
+        per_stage = lambda value: [(f'{{stage="{name}"}}', value(stage)) for name, stage in stages.items()]
+        progress = lambda stage, key: (stage.get("last_progress") or {}).get(key) or 0
+
+        metric("audit_pipeline_percent", "gauge", "Pipeline completion percent.",
+               [("", state["pipeline_percent"])])
+        metric("audit_pipeline_running_stages", "gauge", "Stages currently running.",
+               [("", len(state["running_stages"]))])
+        metric("audit_stage_running", "gauge", "1 while the stage is running.",
+               per_stage(lambda stage: int(stage["status"] == "running")))
+        metric("audit_stage_items_total", "counter", "Items (pages, assets, images) processed by the stage.",
+               per_stage(lambda stage: progress(stage, "current")))
+        metric("audit_stage_items_per_second", "gauge", "Stage throughput since its first progress update.",
+               per_stage(lambda stage: stage.get("items_per_sec") or 0))
+        metric("audit_stage_eta_seconds", "gauge", "Estimated seconds left in running stages, at their recent throughput.",
+               per_stage(lambda stage: progress(stage, "eta_seconds") if stage["status"] == "running" else 0))
+        metric("audit_stage_errors_total", "counter", "Items the stage failed to fetch or fingerprint.",
+               per_stage(lambda stage: progress(stage, "errors")))
+        metric("audit_stage_bytes_downloaded_total", "counter", "Bytes the stage downloaded.",
+               per_stage(lambda stage: progress(stage, "bytes_downloaded")))
+        metric("audit_stage_duration_seconds", "gauge", "Duration of finished stages.",
+               per_stage(lambda stage: stage.get("duration_seconds") or 0))
+        resources = lambda stage, key: (stage.get("resources") or {}).get(key) or 0
+        metric("audit_stage_cpu_seconds", "gauge", "CPU time (user + system) of finished stages.",
+               per_stage(lambda stage: round(resources(stage, "cpu_user_sec") + resources(stage, "cpu_sys_sec"), 3)))
+        metric("audit_stage_peak_rss_bytes", "gauge", "Peak resident set size of finished stages.",
+               per_stage(lambda stage: int(resources(stage, "peak_rss_mb") * 2**20)))
+        metric("audit_stage_http_requests_total", "counter", "HTTP requests made by finished stages.",
+               per_stage(lambda stage: resources(stage, "http_requests")))
+        metric("audit_progress_updates_total", "counter", "AUDIT_PROGRESS lines received.",
+               [("", counters["progress_updates"])])
+        metric("audit_status_writes_total", "counter", "Status file writes.",
+               [("", counters["status_writes"])])
+        return "\n".join(lines) + "\n"
+    
+    def _update_percent(self) -> None:
+        """Completed stages plus the progress of running ones, as a pipeline percentage."""
+        done = 0.0
+        for stage in self.state["stages"].values():
+            if stage["status"] == "completed":
+                done += 1
+            elif stage["status"] == "running" and stage.get("last_progress"):
+                done += min(float(stage["last_progress"].get("percent") or 0), 100.0) / 100
+        self.state["pipeline_percent"] = round(done / self.state["total_stages"] * 100, 2)
     
     def start_pipeline(self) -> None:
         """Mark pipeline as started."""
-        self.state["status"] = "running"
-        self.state["started_at"] = time.time()
-        self.write()
+        with self._lock:
+            self.state["status"] = "running"
+            self.state["started_at"] = time.time()
+            self.write()
     
     def start_stage(self, stage_name: str, stage_num: int) -> None:
         """Mark stage as started."""
-        self.state["current_stage"] = stage_name
-        self.state["current_stage_num"] = stage_num
-        self.state["pipeline_percent"] = ((stage_num - 1) / self.state["total_stages"]) * 100
-        self.state["stages"][stage_name] = {
-            "status": "running",
-            "started_at": time.time(),
-            "last_progress": None
-        }
-        self.write()
+        with self._lock:
+            self.state["current_stage"] = stage_name
+            self.state["current_stage_num"] = stage_num
+            self.state["running_stages"].append(stage_name)
+            self.state["stages"][stage_name] = {
+                "status": "running",
+                "started_at": time.time(),
+                "last_progress": None
+            }
+            self._update_percent()
+            self.write()
     
     def update_stage_progress(self, stage_name: str, progress: dict) -> None:
-        """Update progress for current stage."""
-        if stage_name in self.state["stages"]:
-            self.state["stages"][stage_name]["last_progress"] = progress
-            self.write()
+        """Update progress for a running stage."""
+        with self._lock:
+            if stage_name in self.state["stages"]:
+                stage = self.state["stages"][stage_name]
+                stage["last_progress"] = progress
+                now = time.time()
+                items = int(progress.get("current") or 0)
+                base_time, base_items = self._rate_base.setdefault(stage_name, (now, items))
+                if now > base_time:
+                    stage["items_per_sec"] = round((items - base_items) / (now - base_time), 3)
+                self.counters["progress_updates"] += 1
+                self._update_percent()
+                self._write_throttled()
     
+    def record_stage_metrics(self, stage_name: str, metrics: dict) -> None:
+        """Add an AUDIT_METRICS report, or a stage subprocess's own rusage, to the stage's resources."""
+        with self._lock:
+            if stage_name in self.state["stages"]:
+                stage = self.state["stages"][stage_name]
+                report = {key: value for key, value in metrics.items() if key != "stage"}
+                stage["resources"] = merge_stage_metrics(stage.get("resources"), report)
+                self._write_throttled()
+
     def complete_stage(self, stage_name: str, return_code: int, duration: float) -> None:
         """Mark stage as completed or failed."""
-        if stage_name in self.state["stages"]:
-            stage_data = self.state["stages"][stage_name]
-            stage_data["status"] = "completed" if return_code == 0 else "error"
-            stage_data["completed_at"] = time.time()
-            stage_data["duration_seconds"] = duration
-            stage_data["exit_code"] = return_code
-            
-            # Update pipeline percent
-            completed_count = sum(1 for s in self.state["stages"].values() if s["status"] == "completed")
-            self.state["pipeline_percent"] = (completed_count / self.state["total_stages"]) * 100
-            
-            self.write()
+        with self._lock:
+            if stage_name in self.state["stages"]:
+                stage_data = self.state["stages"][stage_name]
+                stage_data["status"] = "completed" if return_code == 0 else "error"
+                stage_data["completed_at"] = time.time()
+                stage_data["duration_seconds"] = duration
+                stage_data["exit_code"] = return_code
+                if stage_name in self.state["running_stages"]:
+                    self.state["running_stages"].remove(stage_name)
+                
+                self._update_percent()
+                self.write()
+    
+    def skip_stage(self, stage_name: str) -> None:
+        """Mark a stage that never started because an earlier stage failed."""
+        with self._lock:
+            if stage_name in self.state["stages"]:
+                self.state["stages"][stage_name]["status"] = "skipped"
+                self.write()
     
     def complete_pipeline(self, success: bool) -> None:
         """Mark pipeline as completed or failed."""
-        self.state["status"] = "completed" if success else "error"
-        self.state["completed_at"] = time.time()
-        self.state["pipeline_percent"] = 100.0 if success else self.state["pipeline_percent"]
-        self.write()
+        with self._lock:
+            self.state["status"] = "completed" if success else "error"
+            self.state["completed_at"] = time.time()
+            self.state["resources"] = total_stage_metrics(
+                stage["resources"] for stage in self.state["stages"].values() if stage.get("resources")
+            )
+            self.state["pipeline_percent"] = 100.0 if success else self.state["pipeline_percent"]
+            self.write()
+
+
+class StatusServer:
+    """Optional localhost HTTP endpoint for monitoring a run.
+
+    GET /status serves the pipeline status as JSON and GET /metrics serves
+    Prometheus counters, both from memory, so monitors need not poll
+    pipeline_status.json.  Port 0 picks a free port.
+    """
+
+    def __init__(self, status: PipelineStatus, port: int, host: str = "127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = self.path.split("?", 1)[0]
+                if path in ("/", "/status"):
+                    body = json.dumps(status.snapshot(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                elif path == "/metrics":
+                    body = status.prometheus_metrics().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # keep request logs off the pipeline console
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="status-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
 
 
 class AuditOrchestrator:
-    def __init__(self, log_file: Path | None = None, status_file: Path = STATUS_FILE):
+    def __init__(
+        self,
+        log_file: Path | None = None,
+        status_file: Path = STATUS_FILE,
+        in_process: bool = False,
+        write_artifacts: bool = True,
+        max_parallel: int = 2,
+        status_interval: float = DEFAULT_STATUS_INTERVAL,
+        metrics_port: int | None = None,
+    ):
         self.log_file = log_file
+        self.max_parallel = max_parallel
         self.status_file = status_file
+        self.metrics_port = metrics_port
         self.logger = self._setup_logger()
         self.start_time = time.time()
-        self.pipeline_status = PipelineStatus(status_file)
+        self.pipeline_status = PipelineStatus(status_file, write_interval=status_interval)
+        # In-process mode runs stages via stage_runner and keeps their outputs in memory
+        self.in_process = in_process
+        self.stage_data = None
+        if in_process:
+            from stage_data import StageData
+
+            self.stage_data = StageData(write_artifacts=write_artifacts, handoff=True)
+        # Last progress per stage; concurrent stages share one console line
+        self._last_progress: dict[str, dict] = {}
+        self._last_progress_line: str | None = None
+        self._console_lock = threading.Lock()
+        # In-process stages redirect sys.stdout; stage output is echoed to the real console
+        self._console = sys.stdout
 
     def _setup_logger(self) -> logging.Logger:
         """Configure logger for stdout and optional file output."""
@@ -184,10 +421,89 @@ class AuditOrchestrator:
         if "images_remaining" in progress and progress["images_remaining"] > 0:
             status_parts.append(f"{progress['images_remaining']} pending")
         
+        # Throughput and ETA come from the stage's ProgressTracker (moving averages)
+        if progress.get("rate_per_sec"):
+            status_parts.append(f"{progress['rate_per_sec']:,.1f}/s")
+        if current < total and progress.get("eta_seconds") is not None:
+            status_parts.append(f"ETA {format_eta(progress['eta_seconds'])}")
+        
         status_text = " | ".join(status_parts)
         
         return f"  └─ [{bar}] {percent:>5.1f}% | {status_text}"
 
+    def _handle_output_line(self, script_name: str, line: str) -> None:
+        """Render one line of stage output (progress bar or plain log line)."""
+        metrics = parse_metrics_line(line)
+        if metrics is not None:
+            self.pipeline_status.record_stage_metrics(script_name, metrics)
+            return
+
+        # Parse AUDIT_PROGRESS lines
+        progress = self._parse_audit_progress(line)
+        if progress:
+            self._last_progress[script_name] = progress
+            self.pipeline_status.update_stage_progress(script_name, progress)
+            
+            # Render progress bar on same line
+            progress_line = self._render_progress_bar(progress)
+            if progress_line and len(self.pipeline_status.state["running_stages"]) > 1:
+                # Concurrent stages take turns on the line; tag whose bar it is
+                progress_line = progress_line.replace("└─", f"└─ {script_name[:2]}", 1)
+            with self._console_lock:
+                if progress_line:
+                    # Clear previous progress line if exists
+                    if self._last_progress_line:
+                        print("\r" + " " * len(self._last_progress_line) + "\r", end="", flush=True, file=self._console)
+                    print(progress_line, end="", flush=True, file=self._console)
+                    self._last_progress_line = progress_line
+            return
+        
+        with self._console_lock:
+            # Print other output normally
+            # If we had a progress bar, move to new line first
+            if self._last_progress_line:
+                print(file=self._console)  # New line after progress bar
+                self._last_progress_line = None
+            
+            print(line, end="", flush=True, file=self._console)
+
+    def _run_stage_process(self, script_name: str) -> int:
+        """Run a stage as a subprocess, streaming its output; returns the exit code."""
+        process = subprocess.Popen(
+            [sys.executable, "-u", str(SCRIPTS_DIR / script_name), *stage_args(script_name)],
+            cwd=str(ROOT),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            encoding="utf-8",
+            errors="replace"
+        )
+        
+        # Read output line by line
+        assert process.stdout is not None
+        for line in iter(process.stdout.readline, ""):
+            if not line:
+                break
+            self._handle_output_line(script_name, line)
+        
+        # The child's own rusage beats the stage's report: it also covers start-up and imports
+        return_code, usage = wait_stage_process(process)
+        if usage:
+            self.pipeline_status.record_stage_metrics(script_name, usage)
+        return return_code
+
+    def _run_stage_in_process(self, script_name: str) -> int:
+        """Run a stage in this interpreter with the shared StageData; returns the exit code."""
+        from stage_runner import run_stage
+
+        return run_stage(
+            script_name,
+            stage_args(script_name),
+            data=self.stage_data,
+            on_line=lambda line: self._handle_output_line(script_name, line + "\n"),
+        )
+
     def run_stage(self, script_name: str, stage_num: int) -> tuple[int, float]:
         """
         Run a single audit stage script with live progress monitoring.
@@ -209,57 +525,20 @@ class AuditOrchestrator:
         
         self.pipeline_status.start_stage(script_name, stage_num)
         stage_start = time.time()
-        last_progress = None
-        last_progress_line = None
+        self._last_progress.pop(script_name, None)
         
         try:
-            process = subprocess.Popen(
-                [sys.executable, "-u", str(script_path)],
-                cwd=str(ROOT),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                encoding="utf-8",
-                errors="replace"
-            )
-            
-            # Read output line by line
-            assert process.stdout is not None
-            for line in iter(process.stdout.readline, ""):
-                if not line:
-                    break
-                
-                # Parse AUDIT_PROGRESS lines
-                progress = self._parse_audit_progress(line)
-                if progress:
-                    last_progress = progress
-                    self.pipeline_status.update_stage_progress(script_name, progress)
-                    
-                    # Render progress bar on same line
-                    progress_line = self._render_progress_bar(progress)
-                    if progress_line:
-                        # Clear previous progress line if exists
-                        if last_progress_line:
-                            print("\r" + " " * len(last_progress_line) + "\r", end="", flush=True)
-                        print(progress_line, end="", flush=True)
-                        last_progress_line = progress_line
-                    continue
-                
-                # Print other output normally
-                # If we had a progress bar, move to new line first
-                if last_progress_line:
-                    print()  # New line after progress bar
-                    last_progress_line = None
-                
-                print(line, end="", flush=True)
+            if self.in_process:
+                return_code = self._run_stage_in_process(script_name)
+            else:
+                return_code = self._run_stage_process(script_name)
             
             # Final newline after progress bar if it was last thing shown
-            if last_progress_line:
-                print()
+            with self._console_lock:
+                if self._last_progress_line:
+                    print(file=self._console)
+                    self._last_progress_line = None
             
-            process.wait()
-            return_code = process.returncode
             duration = time.time() - stage_start
             
             self.pipeline_status.complete_stage(script_name, return_code, duration)
@@ -274,6 +553,7 @@ class AuditOrchestrator:
             self.logger.info(f"✅ {script_name} completed successfully (duration: {duration:.1f}s)")
             
             # Show final progress if available
+            last_progress = self._last_progress.get(script_name)
             if last_progress:
                 self.logger.info(f"   Final: {last_progress.get('current', 0)}/{last_progress.get('total', 0)} items processed")
             
@@ -287,7 +567,7 @@ class AuditOrchestrator:
 
     def run_pipeline(self) -> int:
         """
-        Run all pipeline stages in sequence.
+        Run all pipeline stages, independent ones concurrently (see pipeline_dag).
         
         Returns:
             Exit code (0 = success, non-zero = failure)
@@ -298,27 +578,68 @@ class AuditOrchestrator:
         if self.log_file:
             self.logger.info(f"Log file: {self.log_file}")
         self.logger.info(f"Status file: {self.status_file}")
+        server = None
+        if self.metrics_port is not None:
+            try:
+                server = StatusServer(self.pipeline_status, self.metrics_port)
+                server.start()
+                self.logger.info(f"Status endpoint: {server.url}/status  Metrics: {server.url}/metrics")
+            except OSError as err:
+                self.logger.warning(f"Status endpoint disabled (port {self.metrics_port}): {err}")
         self.logger.info("")
-        
+        try:
+            return self._run_scheduled()
+        finally:
+            if server is not None:
+                server.stop()
+
+    def _run_scheduled(self) -> int:
+        """Run the stages through the DAG scheduler and print the summary."""
         self.pipeline_status.start_pipeline()
+        # run_stage records its own duration; the scheduler only needs the exit code
         stage_results: list[tuple[str, int, float]] = []
-        
-        for idx, stage_name in enumerate(PIPELINE_STAGES, start=1):
-            return_code, duration = self.run_stage(stage_name, idx)
+
+        def run_one(stage_name: str) -> int:
+            return_code, duration = self.run_stage(stage_name, PIPELINE_STAGES.index(stage_name) + 1)
             stage_results.append((stage_name, return_code, duration))
-            
-            if return_code != 0:
-                self.logger.error(f"\n⛔ Pipeline aborted at stage {idx}/{len(PIPELINE_STAGES)}")
-                self.pipeline_status.complete_pipeline(success=False)
-                self._print_summary(stage_results, success=False)
-                return return_code
-            
-            self.logger.info("")
+            return return_code
+
+        # Record each successful stage so `run_audit_pipeline.py --resume` can skip it later
+        from build_manifest import BuildManifest
+
+        manifest = BuildManifest()
+        write_artifacts = self.stage_data is None or self.stage_data.write_artifacts
+
+        def on_finish(stage_name: str, return_code: int, duration: float) -> None:
+            if return_code == 0 and write_artifacts:
+                manifest.record(stage_name, stage_args(stage_name))
+
+        scheduler = DagScheduler(
+            PIPELINE_STAGES, run_one, max_parallel=self.max_parallel, on_start=manifest.invalidate, on_finish=on_finish
+        )
+        scheduler.run()
+        
+        failed = [(name, rc) for name, rc, _ in stage_results if rc != 0]
+        if failed:
+            for stage_name in scheduler.skipped:
+                self.pipeline_status.skip_stage(stage_name)
+            names = ", ".join(name for name, _ in failed)
+            self.logger.error(f"\n⛔ Pipeline aborted: {names} failed; {len(scheduler.skipped)} stage(s) not run")
+            self.pipeline_status.complete_pipeline(success=False)
+            self._record_history()
+            self._print_summary(stage_results, success=False)
+            return failed[0][1]
         
         self.pipeline_status.complete_pipeline(success=True)
+        self._record_history()
         self._print_summary(stage_results, success=True)
         return 0
 
+    def _record_history(self) -> None:
+        """Append the finished run to the run history (see run_history.py)."""
+        state = self.pipeline_status.snapshot()
+        append_run("standalone", state["stages"], state["status"], state["started_at"])
+
     def _print_summary(self, stage_results: list[tuple[str, int, float]], success: bool) -> None:
         """Print final pipeline summary."""
         total_duration = time.time() - self.start_time
@@ -327,12 +648,18 @@ class AuditOrchestrator:
         self.logger.info("PIPELINE SUMMARY")
         self.logger.info("=" * 80)
         
+        stages = self.pipeline_status.state["stages"]
         for stage_name, return_code, duration in stage_results:
             status = "✅ SUCCESS" if return_code == 0 else f"❌ FAILED (code {return_code})"
             self.logger.info(f"  {stage_name:<40} {status:<20} {duration:>6.1f}s")
+            resources = stages.get(stage_name, {}).get("resources")
+            if resources:
+                self.logger.info(f"      {format_stage_metrics(resources)}")
         
         self.logger.info("-" * 80)
         self.logger.info(f"Total pipeline duration: {total_duration:.1f}s")
+        if self.pipeline_status.state.get("resources"):
+            self.logger.info(f"Total resources: {format_stage_metrics(self.pipeline_status.state['resources'])}")
         
         if success:
             self.logger.info("🎉 AUDIT PIPELINE COMPLETED SUCCESSFULLY")
@@ -364,13 +691,85 @@ def parse_args() -> argparse.Namespace:
         default=STATUS_FILE,
         help=f"Path to persistent status JSON file for external monitoring. Default: {STATUS_FILE}",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Run up to N independent stages at once, e.g. 02 alongside 01/03 (1 = one stage at a time, in order). Default: 2",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run stages in this interpreter, handing outputs between them in memory (default: one subprocess per stage).",
+    )
+    parser.add_argument(
+        "--no-artifacts",
+        dest="artifacts",
+        action="store_false",
+        help="With --in-process, skip intermediate stage files; only audit_master, audit_summary and the reports are written.",
+    )
+    parser.add_argument(
+        "--status-interval",
+        type=float,
+        default=DEFAULT_STATUS_INTERVAL,
+        metavar="SECONDS",
+        help=f"Rewrite the status file at most this often for progress updates (0 = every update). Default: {DEFAULT_STATUS_INTERVAL}",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Serve /status (JSON) and /metrics (Prometheus) on 127.0.0.1:PORT while the pipeline runs (0 = any free port). Default: off",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record fetch/decode/hash/parse/write spans in stages 01-04 and write a Chrome trace (Perfetto, chrome://tracing).",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile every stage: cpu = cProfile .pstats + collapsed stacks, mem = tracemalloc top allocation sites.",
+    )
+    args = parser.parse_args()
+    if not args.artifacts and not args.in_process:
+        parser.error("--no-artifacts requires --in-process")
+    if args.profile == "cpu" and args.in_process and args.max_parallel > 1:
+        # A cpu profile hooks every thread of the process, so concurrent stages would share it
+        parser.error("--profile cpu with --in-process requires --max-parallel 1")
+    return args
 
 
 def main() -> int:
     args = parse_args()
-    orchestrator = AuditOrchestrator(log_file=args.log_file, status_file=args.status_file)
-    return orchestrator.run_pipeline()
+    orchestrator = AuditOrchestrator(
+        log_file=args.log_file,
+        status_file=args.status_file,
+        in_process=args.in_process,
+        write_artifacts=args.artifacts,
+        max_parallel=args.max_parallel,
+        status_interval=args.status_interval,
+        metrics_port=args.metrics_port,
+    )
+    trace_dir = None
+    if args.trace:
+        # Inherited by the stage processes; each writes its own trace there
+        trace_dir = TRACE_DIR / time.strftime("%Y%m%d-%H%M%S")
+        os.environ[TRACE_ENV] = str(trace_dir)
+    profile_dir = None
+    if args.profile:
+        profile_dir = PROFILE_DIR / time.strftime("%Y%m%d-%H%M%S")
+        os.environ.update(profile_settings(args.profile, profile_dir))
+    return_code = orchestrator.run_pipeline()
+    if trace_dir is not None and trace_dir.exists():
+        trace = merge_trace_files(trace_dir.glob("*.trace.json"), trace_dir / "pipeline.trace.json")
+        orchestrator.logger.info(f"Trace: {trace} (open in https://ui.perfetto.dev or chrome://tracing)")
+    if profile_dir is not None and profile_dir.exists():
+        orchestrator.logger.info(f"Profiles ({args.profile}): {profile_dir}")
+    return return_code
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Append-only history of pipeline runs, with performance regression checks.
+
+pipeline_status.json only describes the current run.  Every orchestrator
+(run_audit_standalone.py, run_audit_pipeline.py and the native host) also
+appends each finished run to assets/audit/run_history.sqlite: one row per
+run and one per stage with its duration, items, throughput, error rate and
+resources (see stage_metrics.StageMetrics).  Rows are only ever inserted.
+
+    python scripts/run_history.py                 compare the latest run with its baseline
+    python scripts/run_history.py --list 20       show recent runs
+
+The baseline of a stage is the median of its last --baseline-runs successful
+runs before the latest one.  A stage is flagged when its throughput (or, for
+stages without item counts, its duration) is worse than the baseline by more
+than --slower, or its error rate is more than --error-rate-delta above the
+baseline.  Flags make the command exit with 1, so it can gate a scheduled run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import socket
+import sqlite3
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import AUDIT_DIR
+
+HISTORY_PATH = AUDIT_DIR / "run_history.sqlite"
+DEFAULT_BASELINE_RUNS = 10
+DEFAULT_SLOWER = 1.5
+DEFAULT_ERROR_RATE_DELTA = 0.05
+# Runs shorter than this differ by scheduling noise, not by performance
+MIN_COMPARABLE_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    orchestrator TEXT NOT NULL,
+    host TEXT,
+    status TEXT NOT NULL,
+    started_at REAL,
+    completed_at REAL NOT NULL,
+    duration_seconds REAL
+);
+CREATE TABLE IF NOT EXISTS stage_runs (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    exit_code INTEGER,
+    duration_seconds REAL,
+    items INTEGER,
+    errors INTEGER,
+    error_rate REAL,
+    items_per_sec REAL,
+    bytes_downloaded INTEGER,
+    cpu_seconds REAL,
+    peak_rss_mb REAL,
+    http_requests INTEGER,
+    resources TEXT,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_completed ON runs (completed_at);
+"""
+
+
+def stage_row(entry: dict) -> dict:
+    """History columns for one stage, from a pipeline_status.json stage entry.
+
+    The entry needs "status" and "duration_seconds"; "exit_code",
+    "last_progress" (AUDIT_PROGRESS payload) and "resources" (AUDIT_METRICS)
+    are used when present.
+    """
+    progress = entry.get("last_progress") or {}
+    resources = entry.get("resources") or {}
+    duration = entry.get("duration_seconds")
+    items = progress.get("current")
+    errors = progress.get("errors")
+    cpu = [resources[key] for key in ("cpu_user_sec", "cpu_sys_sec") if resources.get(key) is not None]
+    return {
+        "status": entry.get("status") or "unknown",
+        "exit_code": entry.get("exit_code"),
+        "duration_seconds": duration,
+        "items": items,
+        "errors": errors,
+        "error_rate": round(errors / items, 4) if items and errors is not None else None,
+        "items_per_sec": round(items / duration, 3) if items and duration else None,
+        "bytes_downloaded": resources.get("bytes_downloaded") or progress.get("bytes_downloaded"),
+        "cpu_seconds": round(sum(cpu), 3) if cpu else None,
+        "peak_rss_mb": resources.get("peak_rss_mb"),
+        "http_requests": resources.get("http_requests"),
+        "resources": json.dumps(resources) if resources else None,
+    }
+
+
+class RunHistory:
+    """The run-history database.  Runs are appended, never updated."""
+
+    def __init__(self, path: Path = HISTORY_PATH):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record_run(
+        self,
+        orchestrator: str,
+        stages: dict[str, dict],
+        status: str,
+        started_at: float | None = None,
+        run_id: str | None = None,
+    ) -> str:
+        """Append a finished run; stages maps stage name -> pipeline_status.json stage entry."""
+        run_id = run_id or uuid.uuid4().hex
+        completed_at = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, orchestrator, host, status, started_at, completed_at, duration_seconds)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, orchestrator, socket.gethostname(), status, started_at, completed_at,
+                 round(completed_at - started_at, 3) if started_at else None),
+            )
+            for stage, entry in stages.items():
+                row = stage_row(entry)
+                self.conn.execute(
+                    f"INSERT INTO stage_runs (run_id, stage, {', '.join(row)}) VALUES (?, ?, {', '.join('?' * len(row))})",
+                    (run_id, stage, *row.values()),
+                )
+        return run_id
+
+    def recent_runs(self, limit: int = 10) -> list[dict]:
+        rows = self.conn.execute("SELECT * FROM runs ORDER BY completed_at DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+    def stage_runs(self, run_id: str) -> dict[str, dict]:
+        rows = self.conn.execute("SELECT * FROM stage_runs WHERE run_id = ? ORDER BY stage", (run_id,))
+        return {row["stage"]: dict(row) for row in rows}
+
+    def baseline(self, stage: str, before: float, runs: int = DEFAULT_BASELINE_RUNS) -> dict | None:
+        """Median figures of the stage's last `runs` successful runs completed before `before`."""
+        rows = self.conn.execute(
+            """
+            SELECT s.* FROM stage_runs s JOIN runs r ON r.run_id = s.run_id
+            WHERE s.stage = ? AND s.status = 'completed' AND r.completed_at < ?
+            ORDER BY r.completed_at DESC LIMIT ?
+            """,
+            (stage, before, runs),
+        ).fetchall()
+        if not rows:
+            return None
+
+        def median(key: str) -> float | None:
+            values = [row[key] for row in rows if row[key] is not None]
+            return statistics.median(values) if values else None
+
+        return {
+            "runs": len(rows),
+            **{key: median(key) for key in ("duration_seconds", "items_per_sec", "error_rate", "cpu_seconds", "peak_rss_mb")},
+        }
+
+
+def append_run(
+    orchestrator: str,
+    stages: dict[str, dict],
+    status: str,
+    started_at: float | None = None,
+    run_id: str | None = None,
+    path: Path | None = None,
+) -> str | None:
+    """Record a finished run in the history; a history that cannot be written never fails the run."""
+    try:
+        with RunHistory(path or HISTORY_PATH) as history:
+            return history.record_run(orchestrator, stages, status, started_at, run_id)
+    except (sqlite3.Error, OSError) as err:
+        print(f"⚠️  Run history not updated: {err}", file=sys.stderr)
+        return None
+
+
+def compare_stage(latest: dict, baseline: dict | None, slower: float, error_rate_delta: float) -> list[str]:
+    """Reasons the latest run of a stage counts as a regression against its baseline."""
+    if not baseline or latest["status"] != "completed":
+        return []
+    problems = []
+    rate, base_rate = latest["items_per_sec"], baseline["items_per_sec"]
+    duration, base_duration = latest["duration_seconds"], baseline["duration_seconds"]
+    if rate and base_rate and (duration or 0) >= MIN_COMPARABLE_SECONDS:
+        if rate * slower < base_rate:
+            problems.append(f"throughput {rate:.2f}/s vs baseline {base_rate:.2f}/s")
+    elif duration and base_duration and duration >= MIN_COMPARABLE_SECONDS and duration > base_duration * slower:
+        problems.append(f"duration {duration:.1f}s vs baseline {base_duration:.1f}s")
+    error_rate, base_error_rate = latest["error_rate"], baseline["error_rate"]
+    if error_rate is not None and error_rate > (base_error_rate or 0) + error_rate_delta:
+        problems.append(f"error rate {error_rate:.1%} vs baseline {base_error_rate or 0:.1%}")
+    return problems
+
+
+def _fmt(value: float | None, spec: str, width: int) -> str:
+    return format("-" if value is None else format(value, spec), f">{width}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the latest pipeline run with its rolling baseline")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH)
+    parser.add_argument("--baseline-runs", type=int, default=DEFAULT_BASELINE_RUNS, help="Earlier successful runs in the baseline")
+    parser.add_argument("--slower", type=float, default=DEFAULT_SLOWER, help="Flag stages this many times slower than baseline")
+    parser.add_argument("--error-rate-delta", type=float, default=DEFAULT_ERROR_RATE_DELTA, help="Flag error rates this far above baseline (0.05 = 5 points)")
+    parser.add_argument("--list", type=int, metavar="N", help="List the last N runs instead")
+    args = parser.parse_args()
+
+    if not args.history.exists():
+        raise SystemExit(f"No run history at {args.history}; it is written when a pipeline run finishes")
+    with RunHistory(args.history) as history:
+        if args.list:
+            for run in history.recent_runs(args.list):
+                finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["completed_at"]))
+                print(f"{finished}  {run['status']:<10} {_fmt(run['duration_seconds'], '.1f', 8)}s  {run['orchestrator']:<12} {run['run_id']}")
+            return
+
+        runs = history.recent_runs(1)
+        if not runs:
+            raise SystemExit("Run history is empty")
+        latest = runs[0]
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(latest["completed_at"]))
+        print(f"Latest run {latest['run_id']} ({latest['orchestrator']}, {latest['status']}, {finished})\n")
+        print(f"{'Stage':<36} {'duration':>9} {'baseline':>9} {'items/s':>9} {'baseline':>9} {'errors':>7} {'baseline':>8}")
+        flagged = False
+        for stage, row in history.stage_runs(latest["run_id"]).items():
+            base = history.baseline(stage, latest["completed_at"], args.baseline_runs) or {}
+            print(
+                f"{stage:<36} {_fmt(row['duration_seconds'], '.1f', 8)}s {_fmt(base.get('duration_seconds'), '.1f', 8)}s"
+                f" {_fmt(row['items_per_sec'], '.2f', 9)} {_fmt(base.get('items_per_sec'), '.2f', 9)}"
+                f" {_fmt(row['error_rate'], '.1%', 7)} {_fmt(base.get('error_rate'), '.1%', 8)}"
+            )
+            for problem in compare_stage(row, base or None, args.slower, args.error_rate_delta):
+                flagged = True
+                print(f"  ⚠️  REGRESSION: {problem}")
+    if flagged:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
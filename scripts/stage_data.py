@@ -0,0 +1,169 @@
+"""
+In-process stage handoff (StageData / StageWriter).
+
+Each stage script exposes run(argv, data).  Run as a script, data is an
+empty StageData and every input and output is a file.  The in-process
+runner (stage_runner.py) passes one StageData through all stages, so a
+stage reads what the previous stage produced from memory instead of
+parsing it back from disk.  Intermediate files are still written unless
+the runner was started with write_artifacts=False; final outputs
+(audit_master, audit_summary, the reports) are always written.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from audit_common import (
+    RecordWriter,
+    RowValidator,
+    count_records,
+    iter_records,
+    load_json,
+    open_stage_writer,
+    read_records,
+    resolve_stage_input,
+    stage_row_hooks,
+    write_json,
+)
+
+
+class StageData:
+    """
+    Stage outputs kept in memory between stages, keyed by canonical path.
+
+    Row outputs are lists of dicts, other outputs plain JSON-style objects.
+    Outputs are only held with handoff=True, which in-process runners pass
+    so the next stage can read them; without it (a stage subprocess) rows
+    stream straight to the output file.  Readers fall back to the file when
+    a path is not held (e.g. a stage that ran in an earlier process, or a
+    non-default --input path).
+    
+    Usage:
+        data = StageData(handoff=True)
+        with data.writer(AUDIT_DIR / "rows.json") as writer:
+            writer.write_many(rows)
+        for row in data.iter_rows(AUDIT_DIR / "rows.json"):
+            ...
+    """
+    
+    def __init__(self, write_artifacts: bool = True, handoff: bool = False):
+        self.write_artifacts = write_artifacts
+        self.handoff = handoff
+        self.tables: dict[Path, Any] = {}
+    
+    def __contains__(self, path: Path) -> bool:
+        return path in self.tables
+    
+    def iter_rows(self, path: Path, columns: Iterable[str] | None = None) -> Iterator[dict]:
+        """Rows of a row output (see iter_records)."""
+        if path not in self.tables:
+            yield from iter_records(path, columns)
+            return
+        columns = list(columns) if columns is not None else None
+        for row in self.tables[path]:
+            yield row if columns is None else {c: row[c] for c in columns if c in row}
+    
+    def read_rows(self, path: Path, columns: Iterable[str] | None = None) -> list[dict]:
+        """All rows of a row output as a list (see read_records)."""
+        if path not in self.tables:
+            return read_records(path, columns)
+        return list(self.iter_rows(path, columns))
+    
+    def count(self, path: Path) -> int:
+        """Number of rows in a row output (see count_records)."""
+        if path in self.tables:
+            return len(self.tables[path])
+        return count_records(path)
+    
+    def load(self, path: Path) -> Any:
+        """A non-row output (see load_json); FileNotFoundError if absent."""
+        if path in self.tables:
+            return self.tables[path]
+        return load_json(resolve_stage_input(path))
+    
+    def put(self, path: Path, value: Any, indent: int | None = 2, final: bool = False) -> None:
+        """Hold a non-row output (with handoff), writing it when artifacts are on or final."""
+        if self.handoff:
+            self.tables[path] = value
+        if self.write_artifacts or final or not self.handoff:
+            write_json(path, value, indent=indent)
+    
+    def writer(self, path: Path, schema: dict | None = None, final: bool = False) -> "StageWriter":
+        """Writer that holds the rows (with handoff) and, with artifacts on or final, writes the stage output."""
+        rows: list[dict] | None = [] if self.handoff else None
+        self.tables.pop(path, None)
+        # Without handoff the file is the only copy, so it is always written
+        if self.write_artifacts or final or not self.handoff:
+            return StageWriter(self, path, rows, open_stage_writer(path, schema))
+        mirror, validator = stage_row_hooks(path, schema)
+        return StageWriter(self, path, rows, None, mirror, validator)
+
+
+class StageWriter:
+    """
+    RecordWriter-compatible writer returned by StageData.writer().
+
+    With handoff, rows are appended to a list that is published in StageData
+    on close() (never on abort); they are forwarded to the file writer when
+    there is one.
+    Without a file, the audit-store mirror and validator run here instead.
+    """
+    
+    def __init__(
+        self,
+        data: StageData,
+        json_path: Path,
+        rows: list[dict] | None,
+        file_writer: RecordWriter | None,
+        mirror: Any = None,
+        validator: "RowValidator | None" = None,
+    ):
+        self.data = data
+        self.json_path = json_path
+        self.rows = rows
+        self.file_writer = file_writer
+        self.path = file_writer.path if file_writer is not None else json_path
+        self.mirror = mirror
+        self.validator = file_writer.validator if file_writer is not None else validator
+        self.count = 0
+    
+    def write(self, record: dict) -> None:
+        self.count += 1
+        if self.rows is not None:
+            self.rows.append(record)
+        if self.file_writer is not None:
+            self.file_writer.write(record)
+            return
+        if self.mirror is not None:
+            self.mirror.write(record)
+        if self.validator is not None:
+            self.validator.check(record)
+    
+    def write_many(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.write(record)
+    
+    def close(self) -> None:
+        if self.file_writer is not None:
+            self.file_writer.close()
+        elif self.mirror is not None:
+            self.mirror.close()
+        if self.rows is not None:
+            self.data.tables[self.json_path] = self.rows
+    
+    def abort(self) -> None:
+        if self.file_writer is not None:
+            self.file_writer.abort()
+        elif self.mirror is not None:
+            self.mirror.abort()
+    
+    def __enter__(self) -> "StageWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
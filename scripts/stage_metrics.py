@@ -0,0 +1,182 @@
+"""
+Per-stage resource accounting.
+
+Each stage prints one AUDIT_METRICS line when it finishes: CPU time, peak
+RSS, HTTP requests, bytes downloaded and cache hits/misses.  The
+orchestrators store it per stage in pipeline_status.json and their
+summaries.  For subprocess runs they replace the CPU/RSS figures with the
+child's own rusage (wait_stage_process), which also covers start-up.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from typing import Any, Iterable
+
+from audit_common import source_cache_counts
+
+METRICS_PREFIX = "AUDIT_METRICS "
+
+
+def resource_usage(usage: Any = None) -> dict:
+    """CPU seconds and peak RSS (MB) of this process and its finished children, or of one rusage."""
+    try:
+        import resource
+    except ImportError:  # Windows: CPU time only
+        times = os.times()
+        return {"cpu_user_sec": round(times.user + times.children_user, 3),
+                "cpu_sys_sec": round(times.system + times.children_system, 3)}
+    usages = [usage] if usage is not None else [
+        resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    ]
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "cpu_user_sec": round(sum(u.ru_utime for u in usages), 3),
+        "cpu_sys_sec": round(sum(u.ru_stime for u in usages), 3),
+        "peak_rss_mb": round(max(u.ru_maxrss for u in usages) * rss_unit / 2**20, 1),
+    }
+
+
+def wait_stage_process(process: Any) -> tuple[int, dict]:
+    """Wait for a stage subprocess; returns (exit code, its resource_usage() where the OS reports it)."""
+    if not hasattr(os, "wait4"):
+        return process.wait(), {}
+    _, status, usage = os.wait4(process.pid, 0)
+    # Like Popen.returncode: -N for a signal (os.waitstatus_to_exitcode is 3.9+)
+    process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    return process.returncode, resource_usage(usage)
+
+
+def parse_metrics_line(line: str) -> dict | None:
+    """The metrics dict of an AUDIT_METRICS line, else None."""
+    if not line.startswith(METRICS_PREFIX):
+        return None
+    try:
+        metrics = json.loads(line[len(METRICS_PREFIX):])
+    except ValueError:
+        return None
+    return metrics if isinstance(metrics, dict) else None
+
+
+class StageMetrics:
+    """
+    HTTP, byte and cache counters for one stage run (thread-safe).
+
+    Usage:
+        metrics = StageMetrics("03_build_citizens_fingerprints.py")
+        metrics.request(len(resp.content))
+        metrics.cache("stylesheets", hit=True)
+        metrics.emit()                       # prints the AUDIT_METRICS line
+
+    CPU time is counted from creation.  In-process runs (stage_runner) share
+    one interpreter, so their CPU and RSS figures are process-wide.  Source
+    cache counts are those of the thread that creates and emits the metrics
+    (the stage's own), so concurrent stages do not mix them.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.http_requests = 0
+        self.bytes_downloaded = 0
+        self.caches: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+        self._start = resource_usage()
+        self._source_start = source_cache_counts()
+
+    def request(self, nbytes: int = 0, count: int = 1) -> None:
+        """Count one HTTP request (or count attempts of one) and the bytes it downloaded."""
+        with self._lock:
+            self.http_requests += count
+            self.bytes_downloaded += nbytes
+
+    def add_bytes(self, nbytes: int) -> None:
+        """Count bytes of a response that was counted (or streamed) separately."""
+        with self._lock:
+            self.bytes_downloaded += nbytes
+
+    def cache(self, name: str, hit: bool, count: int = 1) -> None:
+        with self._lock:
+            counts = self.caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += count
+
+    def as_dict(self) -> dict:
+        usage = resource_usage()
+        source = source_cache_counts()
+        source.subtract(self._source_start)
+        with self._lock:
+            caches = {name: list(counts) for name, counts in self.caches.items()}
+            http_requests = self.http_requests + source["requests"]
+            bytes_downloaded = self.bytes_downloaded + source["bytes"]
+        if source["hits"] or source["misses"]:
+            caches["source"] = [source["hits"], source["misses"]]
+        return {
+            "stage": self.stage,
+            "cpu_user_sec": round(usage["cpu_user_sec"] - self._start["cpu_user_sec"], 3),
+            "cpu_sys_sec": round(usage["cpu_sys_sec"] - self._start["cpu_sys_sec"], 3),
+            **({"peak_rss_mb": usage["peak_rss_mb"]} if "peak_rss_mb" in usage else {}),
+            "http_requests": http_requests,
+            "bytes_downloaded": bytes_downloaded,
+            "cache": {
+                name: {"hits": hits, "misses": misses, "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None}
+                for name, (hits, misses) in caches.items()
+            },
+        }
+
+    def emit(self) -> None:
+        print(f"{METRICS_PREFIX}{json.dumps(self.as_dict(), ensure_ascii=False)}", flush=True)
+
+
+def merge_stage_metrics(previous: dict | None, metrics: dict) -> dict:
+    """
+    Combine two AUDIT_METRICS lines of one stage run.
+
+    Stage 01's queue workers share its output, so one run can report several
+    lines: request, byte and cache counts add up; CPU and RSS come from the
+    later line (the parent's, which includes its finished workers).
+    """
+    if not previous:
+        return metrics
+    merged = {**previous, **metrics}
+    for key in ("http_requests", "bytes_downloaded"):
+        merged[key] = (previous.get(key) or 0) + (metrics.get(key) or 0)
+    caches = {name: dict(counts) for name, counts in (previous.get("cache") or {}).items()}
+    for name, counts in (metrics.get("cache") or {}).items():
+        total = caches.setdefault(name, {"hits": 0, "misses": 0})
+        total["hits"] += counts.get("hits", 0)
+        total["misses"] += counts.get("misses", 0)
+        lookups = total["hits"] + total["misses"]
+        total["hit_ratio"] = round(total["hits"] / lookups, 4) if lookups else None
+    merged["cache"] = caches
+    return merged
+
+
+def total_stage_metrics(per_stage: Iterable[dict]) -> dict:
+    """Pipeline totals: CPU, requests and bytes summed over stages, the highest peak RSS."""
+    summed = ("cpu_user_sec", "cpu_sys_sec", "http_requests", "bytes_downloaded")
+    totals: dict = dict.fromkeys(summed, 0)
+    for metrics in per_stage:
+        for key in summed:
+            totals[key] += metrics.get(key) or 0
+        if metrics.get("peak_rss_mb") is not None:
+            totals["peak_rss_mb"] = max(totals.get("peak_rss_mb", 0.0), metrics["peak_rss_mb"])
+    totals["cpu_user_sec"] = round(totals["cpu_user_sec"], 3)
+    totals["cpu_sys_sec"] = round(totals["cpu_sys_sec"], 3)
+    return totals
+
+
+def format_stage_metrics(metrics: dict) -> str:
+    """One summary line, e.g. 'cpu 12.4s (sys 1.1s) | rss 412 MB | 3,210 req | 96.2 MB | stylesheets 94% hit'."""
+    parts = [f"cpu {metrics.get('cpu_user_sec', 0) + metrics.get('cpu_sys_sec', 0):.1f}s (sys {metrics.get('cpu_sys_sec', 0):.1f}s)"]
+    if metrics.get("peak_rss_mb") is not None:
+        parts.append(f"rss {metrics['peak_rss_mb']:.0f} MB")
+    if metrics.get("http_requests"):
+        parts.append(f"{metrics['http_requests']:,} req")
+        parts.append(f"{(metrics.get('bytes_downloaded') or 0) / 2**20:.1f} MB")
+    for name, counts in (metrics.get("cache") or {}).items():
+        if counts.get("hit_ratio") is not None:
+            parts.append(f"{name} {counts['hit_ratio']:.0%} hit")
+    return " | ".join(parts)
@@ -0,0 +1,236 @@
+"""
+CPU and memory profiling of stage runs (AUDIT_PROFILE).
+
+AUDIT_PROFILE=cpu|mem profiles every stage run; the orchestrators'
+--profile option and the native host's "profile" run option set it.  Files
+go to AUDIT_PROFILE_DIR (default assets/audit/profiles/<timestamp>):
+  cpu  <stage>-<pid>.pstats     cProfile of the stage thread and its worker threads
+                                (every thread of the process from Python 3.12)
+       <stage>-<pid>.cpu.txt    top functions by cumulative time
+       <stage>-<pid>.collapsed  sampled stacks of every thread (flamegraph.pl, speedscope)
+  mem  <stage>-<pid>.mem.txt    tracemalloc top allocation sites at each checkpoint
+Stages mark memory checkpoints with profile_checkpoint(name); snapshots are
+taken at start, end and at the checkpoints named in AUDIT_PROFILE_CHECKPOINTS
+(comma-separated; default all).  cpu profiles hook the whole process, so
+only one stage at a time can be cpu-profiled; the orchestrators refuse
+--profile cpu with concurrent --in-process stages.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from audit_common import AUDIT_DIR
+
+PROFILE_ENV = "AUDIT_PROFILE"
+PROFILE_DIR_ENV = "AUDIT_PROFILE_DIR"
+PROFILE_CHECKPOINTS_ENV = "AUDIT_PROFILE_CHECKPOINTS"
+PROFILE_TOP_ENV = "AUDIT_PROFILE_TOP"
+PROFILE_MODES = ("cpu", "mem")
+PROFILE_DIR = AUDIT_DIR / "profiles"
+DEFAULT_PROFILE_TOP = 15
+# Stack sampling period for the collapsed-stack file
+PROFILE_SAMPLE_INTERVAL = 0.005
+# From 3.12 cProfile is built on sys.monitoring: one enabled profiler sees
+# every thread, and enabling a second one raises "Another profiling tool is
+# already active", so worker threads must not get their own
+_PROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def profile_mode() -> str | None:
+    """Configured profiling mode: 'cpu', 'mem' or None."""
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in ("", "none", "0"):
+        return None
+    if value not in PROFILE_MODES:
+        sys.stderr.write(f"[Warning] Unknown {PROFILE_ENV}={value!r} - not profiling\n")
+        return None
+    return value
+
+
+def profile_dir() -> Path:
+    """Directory for this run's profiles (AUDIT_PROFILE_DIR, else a new timestamped one)."""
+    value = os.environ.get(PROFILE_DIR_ENV, "").strip()
+    if not value:
+        # Later stages of this process (in-process runs) share the directory
+        value = os.environ[PROFILE_DIR_ENV] = str(PROFILE_DIR / time.strftime("%Y%m%d-%H%M%S"))
+    return Path(value)
+
+
+def profile_settings(mode: str, directory: Path) -> dict[str, str]:
+    """Environment that makes stages started with it write `mode` profiles to directory."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode {mode!r} (expected {' or '.join(PROFILE_MODES)})")
+    return {PROFILE_ENV: mode, PROFILE_DIR_ENV: str(directory)}
+
+
+def _collapsed_frame(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno or code.co_firstlineno})"
+
+
+class StageProfiler:
+    """
+    cProfile + stack sampling ("cpu") or tracemalloc snapshots ("mem") for one stage run.
+
+    Usage:
+        profiler = StageProfiler("04_match_assets.py", "cpu", directory)
+        profiler.start()
+        ...
+        profiler.stop()   # writes the profile files, returns their paths
+    """
+
+    def __init__(self, stage: str, mode: str, directory: Path):
+        self.stage = stage
+        self.mode = mode
+        self.base = directory / f"{Path(stage).stem}-{os.getpid()}"
+        self._profiles: list[Any] = []
+        self._stacks: Counter[str] = Counter()
+        self._sampling = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._started_tracemalloc = False
+        self._previous = None
+        self._report: list[str] = []
+        self._top = int(os.environ.get(PROFILE_TOP_ENV) or DEFAULT_PROFILE_TOP)
+        names = os.environ.get(PROFILE_CHECKPOINTS_ENV, "").strip()
+        self._checkpoints = {name.strip() for name in names.split(",") if name.strip()} if names else None
+
+    def start(self) -> None:
+        if self.mode == "cpu":
+            import cProfile
+
+            # Threads the stage starts from now on get their own profile
+            def profile_thread(*_args):
+                profile = cProfile.Profile()
+                self._profiles.append(profile)
+                profile.enable()
+
+            # The sampler starts first, so it is not profiled itself (before 3.12)
+            self._sampler = threading.Thread(target=self._sample, name="stage-profiler", daemon=True)
+            self._sampler.start()
+            main = cProfile.Profile()
+            self._profiles.append(main)
+            if not _PROFILE_ALL_THREADS:
+                threading.setprofile(profile_thread)
+            main.enable()
+        else:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self.checkpoint("start")
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._sampling.wait(PROFILE_SAMPLE_INTERVAL):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_collapsed_frame(frame))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def checkpoint(self, name: str) -> None:
+        """Snapshot allocations ("mem" mode) and add the top sites and growth to the report."""
+        if self.mode != "mem" or (self._checkpoints is not None and name not in self._checkpoints | {"start", "end"}):
+            return
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        self._report.append(f"== {name}: traced {current / 2**20:.1f} MB, peak {peak / 2**20:.1f} MB")
+        self._report.append(f"-- top {self._top} allocation sites")
+        self._report.extend(f"  {stat}" for stat in snapshot.statistics("lineno")[: self._top])
+        if self._previous is not None:
+            self._report.append("-- growth since previous checkpoint")
+            self._report.extend(f"  {stat}" for stat in snapshot.compare_to(self._previous, "lineno")[: self._top])
+        self._report.append("")
+        self._previous = snapshot
+
+    def stop(self) -> list[Path]:
+        self.base.parent.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cpu":
+            self._profiles[0].disable()
+            if not _PROFILE_ALL_THREADS:
+                threading.setprofile(None)
+            self._sampling.set()
+            if self._sampler is not None:
+                self._sampler.join()
+            import pstats
+
+            stats = pstats.Stats(*self._profiles)
+            paths = [self.base.with_suffix(".pstats"), self.base.with_suffix(".cpu.txt"), self.base.with_suffix(".collapsed")]
+            stats.dump_stats(paths[0])
+            with open(paths[1], "w", encoding="utf-8") as f:
+                pstats.Stats(str(paths[0]), stream=f).sort_stats("cumulative").print_stats(self._top * 2)
+            paths[2].write_text("".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items())), encoding="utf-8")
+        else:
+            import tracemalloc
+
+            self.checkpoint("end")
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            paths = [self.base.with_suffix(".mem.txt")]
+            paths[0].write_text("\n".join([f"# {self.stage} (pid {os.getpid()})", ""] + self._report), encoding="utf-8")
+        for path in paths:
+            print(f"[Profile] {path}")
+        return paths
+
+
+# The profiler of the stage running in this thread (concurrent in-process
+# stages each run in their own thread)
+_profiling = threading.local()
+# Held while a cpu profile runs: it hooks every thread of the process
+_cpu_profile_lock = threading.Lock()
+
+
+def profile_checkpoint(name: str) -> None:
+    """Mark a memory checkpoint in the running stage (no-op unless AUDIT_PROFILE=mem)."""
+    profiler = getattr(_profiling, "profiler", None)
+    if profiler is not None:
+        profiler.checkpoint(name)
+
+
+@contextlib.contextmanager
+def profile_stage(stage: str):
+    """
+    Profile the with-block as one stage run when AUDIT_PROFILE is set.
+
+    Raises RuntimeError for a cpu profile while another stage of this
+    process is being cpu-profiled.
+    """
+    mode = profile_mode()
+    if mode is None:
+        yield
+        return
+    if mode == "cpu" and not _cpu_profile_lock.acquire(blocking=False):
+        raise RuntimeError(f"Cannot cpu-profile {stage}: another stage in this process is being cpu-profiled")
+    profiler = StageProfiler(stage, mode, profile_dir())
+    _profiling.profiler = profiler
+    try:
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+    finally:
+        _profiling.profiler = None
+        if mode == "cpu":
+            _cpu_profile_lock.release()
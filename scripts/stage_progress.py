@@ -0,0 +1,165 @@
+"""
+Progress rates for the stages' AUDIT_PROGRESS lines.
+
+Stages print their AUDIT_PROGRESS lines through a ProgressTracker, which
+adds an exponentially weighted throughput to each payload: items and bytes
+per second, the ETA at that rate, the error rate and, for stages that
+fetch, the same figures for the busiest hosts.  Progress is skipped (never
+the first or final line) while printing it has already used more than
+PROGRESS_MAX_OVERHEAD of the stage's time since its first line.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any
+from urllib.parse import urlparse
+
+PROGRESS_PREFIX = "AUDIT_PROGRESS "
+# Half-life of the moving averages: a rate change is half reflected after this long
+PROGRESS_HALF_LIFE = 20.0
+PROGRESS_MAX_OVERHEAD = 0.01
+PROGRESS_TOP_HOSTS = 5
+
+
+def _ewma(previous: float | None, value: float, elapsed: float, half_life: float) -> float:
+    if previous is None:
+        return value
+    weight = 0.5 ** (elapsed / half_life)
+    return weight * previous + (1 - weight) * value
+
+
+class _HostRate:
+    __slots__ = ("items", "errors", "bytes", "sampled_items", "rate")
+
+    def __init__(self):
+        self.items = self.errors = self.bytes = self.sampled_items = 0
+        self.rate: float | None = None
+
+
+class ProgressTracker:
+    """
+    Rate, ETA and throttling for one stage's AUDIT_PROGRESS lines.
+
+    Usage:
+        progress = ProgressTracker("03_build_citizens_fingerprints.py")
+        progress.record(image_url, error=False, nbytes=len(content))   # any thread
+        progress.emit({"stage": ..., "current": 50, "total": 900, ...})
+
+    emit() reads "current", "total" and, when present, the running totals
+    "errors" and "bytes_downloaded" (else those of record()).  Rates start
+    from the first emit(), so items resumed from a checkpoint do not count.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        half_life: float = PROGRESS_HALF_LIFE,
+        max_overhead: float = PROGRESS_MAX_OVERHEAD,
+        clock: Any = time.perf_counter,
+    ):
+        self.stage = stage
+        self.half_life = half_life
+        self.max_overhead = max_overhead
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget earlier runs: a stage module (and its tracker) outlives in-process runs."""
+        with self._lock:
+            self._hosts: dict[str, _HostRate] = {}
+            self._recorded_errors = 0
+            self._recorded_bytes = 0
+            self._started: float | None = None
+            self._spent = 0.0
+            self._sample: tuple[float, int, int] | None = None  # time, current, bytes at the last line
+            self.rate: float | None = None
+            self.bytes_rate: float | None = None
+            self.skipped = 0
+
+    def record(self, url: str, error: bool = False, nbytes: int = 0) -> None:
+        """Count one finished fetch against its host."""
+        host = (urlparse(url).hostname or "") if "://" in url else url
+        with self._lock:
+            counts = self._hosts.get(host)
+            if counts is None:
+                counts = self._hosts[host] = _HostRate()
+            counts.items += 1
+            counts.errors += error
+            counts.bytes += nbytes
+            self._recorded_errors += error
+            self._recorded_bytes += nbytes
+
+    def emit(self, payload: dict, force: bool = False) -> bool:
+        """Add the rate fields to payload and print it, unless throttled; returns whether it was printed."""
+        now = self._clock()
+        current = payload.get("current") or 0
+        total = payload.get("total") or 0
+        with self._lock:
+            if self._started is None:
+                self._started = now
+            elif not force and current < total and self._spent > self.max_overhead * (now - self._started):
+                self.skipped += 1
+                return False
+            payload.update(self._rates(now, current, total, payload))
+        print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+        with self._lock:
+            self._spent += self._clock() - now
+        return True
+
+    def _rates(self, now: float, current: int, total: int, payload: dict) -> dict:
+        errors = payload.get("errors", self._recorded_errors if self._hosts else None)
+        nbytes = payload.get("bytes_downloaded", self._recorded_bytes if self._hosts else None)
+        last = self._sample
+        if last is None or now > last[0]:
+            if last is not None:
+                elapsed = now - last[0]
+                self.rate = _ewma(self.rate, max(0, current - last[1]) / elapsed, elapsed, self.half_life)
+                if nbytes is not None:
+                    self.bytes_rate = _ewma(self.bytes_rate, max(0, nbytes - last[2]) / elapsed, elapsed, self.half_life)
+                for counts in self._hosts.values():
+                    counts.rate = _ewma(counts.rate, (counts.items - counts.sampled_items) / elapsed, elapsed, self.half_life)
+            for counts in self._hosts.values():
+                counts.sampled_items = counts.items
+            self._sample = (now, current, nbytes or 0)
+
+        if current >= total:
+            eta = 0
+        elif self.rate:
+            eta = round((total - current) / self.rate)
+        else:
+            eta = None
+        rates = {
+            "elapsed_seconds": round(now - self._started, 1),
+            "rate_per_sec": round(self.rate, 3) if self.rate is not None else None,
+            "eta_seconds": eta,
+            "bytes_per_sec": round(self.bytes_rate) if self.bytes_rate is not None else None,
+            "error_rate": round(errors / current, 4) if errors is not None and current else None,
+        }
+        if self._hosts:
+            busiest = sorted(self._hosts.items(), key=lambda item: item[1].items, reverse=True)[:PROGRESS_TOP_HOSTS]
+            rates["hosts"] = {
+                host: {
+                    "items": counts.items,
+                    "rate_per_sec": round(counts.rate, 3) if counts.rate is not None else None,
+                    "bytes": counts.bytes,
+                    "error_rate": round(counts.errors / counts.items, 4),
+                }
+                for host, counts in busiest
+            }
+        return rates
+
+
+def format_eta(seconds: float | None) -> str:
+    """'1h02m', '4m05s' or '37s'; '' when unknown."""
+    if seconds is None:
+        return ""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+In-process runner for the audit stages.
+
+Each stage script is imported once and its run(argv, data) called in this
+interpreter, so PIL/imagehash/bs4/openpyxl are imported once per pipeline
+instead of once per stage, and one StageData hands each stage's outputs to
+the next in memory.  The orchestrators use run_stage() in place of spawning
+`python scripts/<stage>` when asked to (--in-process / "inProcess"); one
+subprocess per stage stays the default for isolation.
+
+Stage stdout (AUDIT_PROGRESS and log lines) can be passed line by line to a
+callback, so callers handle it exactly like subprocess output.  Output is
+routed per thread, so stages running concurrently (pipeline_dag) each reach
+their own callback.  stderr is left alone.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import sys
+import threading
+import traceback
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from stage_data import StageData
+from stage_profiling import profile_stage
+
+
+class StageCancelled(BaseException):
+    """Raised from a stage's output callback to stop the stage.
+
+    A BaseException, so the stages' own `except Exception` handlers let it
+    through; run_stage() does not catch it either.
+    """
+
+
+@lru_cache(maxsize=None)
+def load_stage(script_name: str) -> ModuleType:
+    """Import a stage script once (digit-prefixed names need importlib)."""
+    path = SCRIPTS_DIR / script_name
+    if not path.exists():
+        raise FileNotFoundError(f"Script not found: {script_name}")
+    spec = importlib.util.spec_from_file_location(f"audit_stage_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _LineWriter(io.TextIOBase):
+    """Text stream that passes each complete line (without newline) to a callback."""
+
+    encoding = "utf-8"
+
+    def __init__(self, on_line: Callable[[str], None]):
+        self.on_line = on_line
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+        for line in lines:
+            self.on_line(line)
+        return len(text)
+
+    def flush_partial(self) -> None:
+        """Emit a trailing line that never got its newline."""
+        with self._lock:
+            line, self._partial = self._partial, ""
+        if line:
+            self.on_line(line)
+
+
+class _ThreadRoutedStdout(io.TextIOBase):
+    """sys.stdout stand-in sending each stage thread's output to its own writer.
+
+    Threads without a writer (the orchestrator itself, or helper threads a
+    stage starts) write to the original stdout.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def writable(self) -> bool:
+        return True
+
+    def _target(self):
+        return getattr(self.local, "writer", None) or self.default
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+
+_router: _ThreadRoutedStdout | None = None
+_router_users = 0
+_router_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _route_stdout(writer: _LineWriter):
+    """Send this thread's sys.stdout writes to writer while the block runs."""
+    global _router, _router_users
+    with _router_lock:
+        if _router_users == 0:
+            _router = _ThreadRoutedStdout(sys.stdout)
+            sys.stdout = _router
+        _router_users += 1
+        router = _router
+    router.local.writer = writer
+    try:
+        yield
+    finally:
+        router.local.writer = None
+        with _router_lock:
+            _router_users -= 1
+            if _router_users == 0:
+                sys.stdout = router.default
+                _router = None
+
+
+def _exit_code(exc: SystemExit, out) -> int:
+    """Exit status a subprocess would have had for SystemExit(code)."""
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=out)
+    return 1
+
+
+def run_stage(
+    script_name: str,
+    argv: list[str] | None = None,
+    data: StageData | None = None,
+    on_line: Callable[[str], None] | None = None,
+) -> int:
+    """
+    Run one stage in this process and return its exit code.
+
+    argv are the stage's command-line arguments (sys.argv is never read).
+    With on_line, the stage's stdout goes to it line by line.  SystemExit
+    maps to its exit code; any other exception prints a traceback (to the
+    stage output) and returns 1, like a crashed subprocess.
+    """
+    module = load_stage(script_name)
+    data = data if data is not None else StageData()
+    out = _LineWriter(on_line) if on_line is not None else None
+    redirect = _route_stdout(out) if out is not None else contextlib.nullcontext()
+    with redirect:
+        err_out = sys.stdout if out is not None else sys.stderr
+        try:
+            # Profiled like a stage subprocess when AUDIT_PROFILE is set
+            with profile_stage(script_name):
+                module.run(list(argv or []), data)
+            return 0
+        except SystemExit as exc:
+            return _exit_code(exc, err_out)
+        except Exception:
+            traceback.print_exc(file=err_out)
+            return 1
+        finally:
+            if out is not None:
+                out.flush_partial()
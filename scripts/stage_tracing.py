@@ -0,0 +1,181 @@
+"""
+Span tracing for the audit stages (AUDIT_TRACE).
+
+With AUDIT_TRACE set, stages 01-04 time their fetch, decode, hash, parse
+and write operations as spans in a fixed-size ring buffer (the oldest
+spans are dropped first) and write them as Chrome trace_event JSON when
+the stage finishes: one file per stage process, openable in Perfetto or
+chrome://tracing, with one track per worker thread.  Timestamps are wall
+clock microseconds, so merge_trace_files() lines up the stages of a run.
+Without AUDIT_TRACE, trace_span() returns a shared no-op context.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterable
+
+from audit_common import AUDIT_DIR
+
+TRACE_ENV = "AUDIT_TRACE"  # "1" = assets/audit/traces, or a directory
+TRACE_BUFFER_ENV = "AUDIT_TRACE_BUFFER"
+TRACE_DIR = AUDIT_DIR / "traces"
+DEFAULT_TRACE_BUFFER = 200_000
+
+
+def trace_dir() -> Path | None:
+    """Directory stage traces go to, or None when tracing is off."""
+    value = os.environ.get(TRACE_ENV, "").strip()
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    return TRACE_DIR if value.lower() in ("1", "true", "yes") else Path(value)
+
+
+class _Span:
+    __slots__ = ("tracer", "cat", "name", "args", "start_ns")
+
+    def __init__(self, tracer: "SpanTracer", cat: str, name: str, args: dict):
+        self.tracer = tracer
+        self.cat = cat
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.tracer.record(self.cat, self.name, self.start_ns, time.perf_counter_ns(), self.args)
+
+
+class SpanTracer:
+    """
+    Ring buffer of finished spans, exported as Chrome trace_event JSON.
+
+    Usage:
+        tracer = SpanTracer()
+        with tracer.span("fetch", url=url):
+            resp = session.get(url)
+        tracer.export(path, "03_build_citizens_fingerprints.py")
+
+    Recording is a deque append, safe from any thread.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_BUFFER):
+        self._spans: deque[tuple] = deque(maxlen=capacity)
+        self._recorded = itertools.count()
+        self._thread_names: dict[int, str] = {}
+        # perf_counter_ns() + offset = wall clock, comparable across stage processes
+        self._offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def span(self, cat: str, name: str | None = None, **args) -> _Span:
+        """Time the with-block as one span; cat is the operation (fetch, decode, hash, parse, write)."""
+        return _Span(self, cat, name or cat, args)
+
+    def record(self, cat: str, name: str, start_ns: int, end_ns: int, args: dict | None = None) -> None:
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._spans.append((cat, name, start_ns, end_ns, tid, args))
+        next(self._recorded)
+
+    def drain(self) -> tuple[list[tuple], int]:
+        """Remove the buffered spans; returns (spans, spans dropped by the ring buffer since the last drain)."""
+        recorded, self._recorded = next(self._recorded), itertools.count()
+        spans = []
+        while self._spans:
+            spans.append(self._spans.popleft())
+        return spans, max(0, recorded - len(spans))
+
+    def trace_events(self, process_name: str) -> dict:
+        """Drain the buffer into a Chrome trace (JSON object format)."""
+        spans, dropped = self.drain()
+        pid = os.getpid()
+        events: list[dict] = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": process_name}}]
+        events.extend(
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._thread_names.items()
+        )
+        for cat, name, start_ns, end_ns, tid, args in spans:
+            event = {
+                "ph": "X", "cat": cat, "name": name, "pid": pid, "tid": tid,
+                "ts": (start_ns + self._offset_ns) / 1000, "dur": (end_ns - start_ns) / 1000,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"stage": process_name, "dropped_spans": dropped}}
+
+    def export(self, path: Path, process_name: str) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.trace_events(process_name), default=str), encoding="utf-8")
+        return path
+
+
+_tracer: SpanTracer | None = None
+_trace_starts: dict[str, int] = {}
+_NO_SPAN = contextlib.nullcontext()
+
+
+def trace_span(cat: str, name: str | None = None, **args):
+    """Context manager timing one operation when tracing is on (see SpanTracer.span)."""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(cat, name, **args)
+
+
+def start_trace(stage: str) -> None:
+    """Start tracing this stage if AUDIT_TRACE is set (one buffer per process)."""
+    global _tracer
+    if trace_dir() is None:
+        return
+    if _tracer is None:
+        _tracer = SpanTracer(int(os.environ.get(TRACE_BUFFER_ENV) or DEFAULT_TRACE_BUFFER))
+    _trace_starts[stage] = time.perf_counter_ns()
+
+
+def finish_trace(stage: str) -> Path | None:
+    """Write the spans buffered since the last export to <trace dir>/<stage>-<pid>.trace.json.
+
+    In-process runs share one buffer, so a file holds every span recorded
+    while the stage ran; merge_trace_files() puts the run back together.
+    """
+    directory = trace_dir()
+    start = _trace_starts.pop(stage, None)
+    if _tracer is None or directory is None or start is None:
+        return None
+    _tracer.record("stage", stage, start, time.perf_counter_ns())
+    path = _tracer.export(directory / f"{Path(stage).stem}-{os.getpid()}.trace.json", stage)
+    print(f"[Trace] {path}")
+    return path
+
+
+def merge_trace_files(paths: Iterable[Path], output: Path) -> Path:
+    """Combine stage traces into one trace_event file covering the whole run."""
+    events: list[dict] = []
+    seen_metadata: set[tuple] = set()
+    dropped = 0
+    for path in sorted(paths):
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        dropped += (trace.get("otherData") or {}).get("dropped_spans", 0)
+        for event in trace.get("traceEvents", []):
+            if event.get("ph") == "M":
+                key = (event["name"], event["pid"], event["tid"])
+                if key in seen_metadata:
+                    continue
+                seen_metadata.add(key)
+            events.append(event)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_spans": dropped}}),
+        encoding="utf-8",
+    )
+    return output
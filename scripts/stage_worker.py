@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Warm stage worker for the native host.
+
+Starting a stage as `python scripts/<stage>` pays for interpreter start-up
+and for importing PIL, imagehash (NumPy/SciPy), bs4, requests and openpyxl
+every time.  This module keeps one worker process alive with all of that
+already imported:
+
+    python scripts/stage_worker.py          (started by WarmWorker)
+
+The worker listens on 127.0.0.1 (ephemeral port, announced on its stdout as
+"AUDIT_WORKER_READY <port>").  Each stage run is one connection:
+
+    -> {"token": ..., "script": "04_match_assets.py", "args": [...], "env": {...}}\n
+       ("env": optional AUDIT_* variables for this run, e.g. AUDIT_PROFILE;
+        applied to forked runs only, threaded runs share the worker's)
+    <- AUDIT_WORKER_PID <pid>        (forked runs only)
+    <- stage stdout/stderr lines, exactly as a subprocess prints them
+       (AUDIT_PROGRESS lines included)
+    <- AUDIT_WORKER_EXIT <exit code>
+
+On POSIX the worker forks a child per run, so each run starts from the
+warm parent with fresh module state, and stopping a run kills only that
+child.  Windows has no fork: there the worker runs each stage on a thread
+in its own interpreter (stage_runner), and a stopped run ends at its next
+output line.  Either way, concurrent runs have separate connections, so
+their output never interleaves.
+
+WarmWorker is the native host's side: it starts the worker, dispatches runs
+to it and passes every stage line to a callback.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hmac
+import importlib
+import json
+import os
+import secrets
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPTS_DIR.parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+TOKEN_ENV = "AUDIT_WORKER_TOKEN"
+READY_PREFIX = "AUDIT_WORKER_READY "
+PID_PREFIX = "AUDIT_WORKER_PID "
+EXIT_PREFIX = "AUDIT_WORKER_EXIT "
+# Imported once in the worker; stages import them lazily, so load them explicitly
+PRELOAD_MODULES = ("requests", "bs4", "PIL.Image", "imagehash", "numpy", "openpyxl", "jsonschema")
+READY_TIMEOUT = 120.0
+CAN_FORK = hasattr(os, "fork")
+
+
+# ============================================================================
+# Worker process
+# ============================================================================
+
+def preload(scripts_dir: Path) -> None:
+    """Import the heavy libraries and every stage script."""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    import stage_runner
+    from pipeline_dag import PIPELINE_STAGES
+
+    stage_runner.SCRIPTS_DIR = scripts_dir
+    for script in PIPELINE_STAGES:
+        if (scripts_dir / script).exists():
+            try:
+                stage_runner.load_stage(script)
+            except Exception as err:  # a broken stage must not take the worker down
+                sys.stderr.write(f"[StageWorker] Warning: could not preload {script}: {err}\n")
+
+
+def _read_request(conn: socket.socket, token: str) -> dict | None:
+    conn.settimeout(10)
+    try:
+        with conn.makefile("rb") as f:
+            request = json.loads(f.readline(65536))
+    except (OSError, ValueError):
+        return None
+    conn.settimeout(None)
+    if not isinstance(request, dict) or not hmac.compare_digest(str(request.get("token", "")), token):
+        return None
+    if not isinstance(request.get("script"), str) or not isinstance(request.get("args", []), list):
+        return None
+    env = request.get("env") or {}
+    if not isinstance(env, dict) or not all(
+        isinstance(key, str) and key.startswith("AUDIT_") and isinstance(value, str) for key, value in env.items()
+    ):
+        return None
+    return request
+
+
+def _run_forked(conn: socket.socket, server: socket.socket, request: dict) -> None:
+    """Child process: stage stdout/stderr go straight to the connection."""
+    server.close()
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)  # stages wait on their own subprocesses
+    os.dup2(conn.fileno(), 1)
+    os.dup2(conn.fileno(), 2)
+    conn.close()
+    rc = 1
+    try:
+        sys.stdout = open(1, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+        print(f"{PID_PREFIX}{os.getpid()}", flush=True)
+        from stage_runner import run_stage
+
+        os.environ.update(request.get("env") or {})
+        sys.argv = [request["script"], *request.get("args", [])]
+        rc = run_stage(request["script"], request.get("args", []))
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.write(1, f"\n{EXIT_PREFIX}{rc}\n".encode("utf-8"))
+        finally:
+            os._exit(0)
+
+
+def _run_threaded(conn: socket.socket, request: dict) -> None:
+    """Windows fallback: run the stage on this thread, its output routed to the connection."""
+    from stage_runner import StageCancelled, run_stage
+
+    lock = threading.Lock()
+
+    def send(line: str) -> None:
+        try:
+            with lock:
+                conn.sendall((line + "\n").encode("utf-8", errors="replace"))
+        except OSError:
+            raise StageCancelled()  # the host closed the connection: stop the stage
+
+    # No PID line: the only process to signal is the worker itself
+    rc = 1
+    try:
+        rc = run_stage(request["script"], request.get("args", []), on_line=send)
+    except StageCancelled:
+        pass
+    finally:
+        try:
+            send(f"{EXIT_PREFIX}{rc}")
+        except StageCancelled:
+            pass
+        conn.close()
+
+
+def serve(scripts_dir: Path = SCRIPTS_DIR, preload_modules: bool = True) -> None:
+    """Preload, announce the port, then run one stage per connection until stdin closes."""
+    token = os.environ.get(TOKEN_ENV, "")
+    if not token:
+        raise SystemExit(f"{TOKEN_ENV} is not set")
+    os.chdir(ROOT)
+    if preload_modules:
+        preload(scripts_dir)
+    else:
+        import stage_runner
+
+        stage_runner.SCRIPTS_DIR = scripts_dir
+
+    server = socket.create_server(("127.0.0.1", 0))
+    print(f"{READY_PREFIX}{server.getsockname()[1]}", flush=True)
+
+    if CAN_FORK:
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # children are reaped automatically
+        while True:
+            readable, _, _ = select.select([server, sys.stdin], [], [])
+            if sys.stdin in readable and not sys.stdin.buffer.read1(4096):
+                return  # the host went away
+            if server not in readable:
+                continue
+            conn, _ = server.accept()
+            request = _read_request(conn, token)
+            if request is None:
+                conn.close()
+                continue
+            if os.fork() == 0:
+                _run_forked(conn, server, request)
+            conn.close()
+
+    # No fork: watch stdin on a thread and serve each run on its own thread
+    def watch_host() -> None:
+        while sys.stdin.buffer.read(4096):
+            pass
+        os._exit(0)
+
+    threading.Thread(target=watch_host, daemon=True).start()
+    while True:
+        conn, _ = server.accept()
+        request = _read_request(conn, token)
+        if request is None:
+            conn.close()
+            continue
+        threading.Thread(target=_run_threaded, args=(conn, request), daemon=True).start()
+
+
+# ============================================================================
+# Native host side
+# ============================================================================
+
+class WarmWorker:
+    """
+    Handle on a warm worker process, shared by all runs of a native host.
+
+    Usage:
+        worker = WarmWorker()
+        worker.start()                      # returns at once; imports happen in the worker
+        rc = worker.run("04_match_assets.py", ["--phash-threshold", "8"], on_line, should_stop)
+        worker.close()
+    """
+
+    def __init__(self, scripts_dir: Path = SCRIPTS_DIR, preload_modules: bool = True):
+        self.scripts_dir = scripts_dir
+        self.preload_modules = preload_modules
+        self._token = secrets.token_hex(16)
+        self._proc: subprocess.Popen | None = None
+        self._port: int | None = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker process if it is not running."""
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return
+            self._ready.clear()
+            self._port = None
+            command = [sys.executable, "-u", str(Path(__file__).resolve()), "--scripts-dir", str(self.scripts_dir)]
+            if not self.preload_modules:
+                command.append("--no-preload")
+            env = {**os.environ, TOKEN_ENV: self._token, "PYTHONIOENCODING": "utf-8"}
+            self._proc = subprocess.Popen(
+                command, cwd=str(ROOT), stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env
+            )
+            threading.Thread(target=self._wait_ready, args=(self._proc,), daemon=True).start()
+
+    def _wait_ready(self, proc: subprocess.Popen) -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            if line.startswith(READY_PREFIX):
+                self._port = int(line[len(READY_PREFIX):])
+                self._ready.set()
+            else:
+                sys.stderr.write(f"[StageWorker] {line}")
+        self._ready.set()  # exited: wake waiters, run() sees no port
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT) -> bool:
+        self.start()
+        return self._ready.wait(timeout) and self._port is not None
+
+    def run(
+        self,
+        script_name: str,
+        args: list[str] | None,
+        on_line: Callable[[str], None],
+        should_stop: Callable[[], bool] | None = None,
+        env: dict[str, str] | None = None,
+    ) -> int:
+        """Run a stage in the worker; stage output lines go to on_line.  Returns its exit code.
+
+        env holds extra AUDIT_* environment variables for this run only.
+        """
+        if not self.wait_ready():
+            raise RuntimeError("Warm stage worker did not start")
+        request = {"token": self._token, "script": script_name, "args": list(args or [])}
+        if env:
+            request["env"] = env
+        with socket.create_connection(("127.0.0.1", self._port)) as conn:
+            conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            pid = None
+            rc = None
+            # Blank lines are held back: the exit line may be preceded by one the stage never printed
+            blanks = 0
+            with conn.makefile("r", encoding="utf-8", errors="replace", newline="\n") as reader:
+                for raw in reader:
+                    line = raw.rstrip("\r\n")
+                    if line.startswith(PID_PREFIX):
+                        pid = int(line[len(PID_PREFIX):])
+                        continue
+                    if line.startswith(EXIT_PREFIX):
+                        rc = int(line[len(EXIT_PREFIX):])
+                        blanks = max(0, blanks - 1)
+                        break
+                    if not line:
+                        blanks += 1
+                        continue
+                    if should_stop is not None and should_stop():
+                        self._cancel(pid, conn)
+                        return 1
+                    for _ in range(blanks):
+                        on_line("")
+                    blanks = 0
+                    on_line(line)
+            for _ in range(blanks):
+                on_line("")
+        # No exit line: the run died without reporting (e.g. killed)
+        return 1 if rc is None else rc
+
+    @staticmethod
+    def _cancel(pid: int | None, conn: socket.socket) -> None:
+        if CAN_FORK and pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        conn.close()  # threaded runs stop at their next output line
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.stdin.close()  # the worker exits when the host's end closes
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Warm stage worker for the native host (see module docstring)")
+    parser.add_argument("--scripts-dir", type=Path, default=SCRIPTS_DIR)
+    parser.add_argument("--no-preload", dest="preload", action="store_false", help="Skip importing libraries up front")
+    args = parser.parse_args()
+    serve(args.scripts_dir.resolve(), args.preload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Test the optional SQLite audit store and its stage-writer mirroring."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audit_store
+from audit_common import iter_records, open_stage_writer
+from audit_store import AuditStore, hamming_distance, phash_bands
+
+DAM_ROWS = [
+    {"item_id": "101", "preview_url": "https://r1.previews.aprimo.com/101", "sha256": "aa", "phash": "ffff000000000000", "fingerprint_status": "ok"},
+    {"item_id": "102", "preview_url": "https://r1.previews.aprimo.com/102", "sha256": "aa", "phash": "ffff000000000001", "fingerprint_status": "ok"},
+    {"item_id": "103", "preview_url": "https://r1.previews.aprimo.com/103", "sha256": "bb", "phash": "0000ffff0000ffff", "fingerprint_status": "ok"},
+    {"item_id": 104, "preview_url": None, "sha256": None, "phash": None, "fingerprint_status": "error"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with AuditStore(tmp_path / "store.sqlite", batch_size=2) as store:
+        yield store
+
+
+def test_indexed_lookups(store):
+    assert store.replace_table("dam_fingerprints", DAM_ROWS) == len(DAM_ROWS)
+    assert [r["item_id"] for r in store.by_sha256("dam_fingerprints", "aa")] == ["101", "102"]
+    assert store.by_item_id("dam_fingerprints", 104)[0]["fingerprint_status"] == "error"
+    assert store.count("dam_fingerprints", status="ok") == 3
+    assert store.by_image_url("dam_fingerprints", "https://r1.previews.aprimo.com/103")[0]["sha256"] == "bb"
+    plan = store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT row FROM dam_fingerprints WHERE sha256 = ?", ("aa",)
+    ).fetchall()
+    assert "idx_dam_fingerprints_sha256" in str(plan)
+
+
+def test_phash_bands_and_candidates(store):
+    assert phash_bands("ffff000000000001") == (0xFFFF, 0, 0, 1)
+    assert phash_bands("not-a-hash") == (None,) * audit_store.PHASH_BANDS
+    assert hamming_distance("ffff000000000000", "ffff000000000001") == 1
+    store.replace_table("dam_fingerprints", DAM_ROWS)
+    near = store.phash_candidates("dam_fingerprints", "ffff000000000003", max_distance=8)
+    assert [(r["item_id"], r["phash_distance"]) for r in near] == [("102", 1), ("101", 2)]
+
+
+def test_duplicate_groups_keep_first_seen_order(store):
+    store.replace_table("dam_fingerprints", DAM_ROWS)
+    groups = list(store.duplicate_groups("dam_fingerprints", "sha256", status="ok"))
+    assert [(sha, len(rows)) for sha, rows in groups] == [("aa", 2)]
+
+
+@pytest.mark.parametrize("bad", [{"table": "dam_fingerprints"}, {"table": "nope", "sha256": "aa"}, {"row": "x"}])
+def test_lookup_validates_query(store, bad):
+    store.replace_table("dam_fingerprints", DAM_ROWS)
+    assert len(store.lookup({"table": "dam_fingerprints", "sha256": "aa", "limit": 1})) == 1
+    with pytest.raises(ValueError):
+        store.lookup(bad)
+
+
+def test_stage_writer_mirrors_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv(audit_store.STORE_ENV, str(tmp_path / "store.sqlite"))
+    audit_store.open_audit_store.cache_clear()
+    try:
+        output = tmp_path / "dam_fingerprints.json"
+        with open_stage_writer(output) as writer:
+            writer.write_many(DAM_ROWS)
+        store = audit_store.open_audit_store()
+        assert store.count("dam_fingerprints") == len(DAM_ROWS)
+        assert store.is_current("dam_fingerprints", output)
+        assert list(iter_records(output)) == DAM_ROWS
+
+        # A failed rewrite leaves no partial table behind
+        with pytest.raises(RuntimeError):
+            with open_stage_writer(output) as writer:
+                writer.write(DAM_ROWS[0])
+                raise RuntimeError("stage crashed")
+        assert store.count("dam_fingerprints") == 0
+        assert not store.is_current("dam_fingerprints", output)
+        store.close()
+    finally:
+        audit_store.open_audit_store.cache_clear()
@@ -0,0 +1,157 @@
+"""Test the content-hash build manifest: which stages are up to date and what gets invalidated."""
+
+import ast
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import build_manifest
+import run_history
+from build_manifest import BuildManifest
+from pipeline_dag import PIPELINE_STAGES, Stage, stage_args
+from run_audit_standalone import AuditOrchestrator
+
+
+class Tree:
+    """Temp pipeline: a (reads source) -> b; x independent; b + x -> c."""
+
+    def __init__(self, directory: Path):
+        self.dir = directory
+        self.source = self.dir / "urls.txt"
+        self.source.write_text("https://www.citizensbank.com/\n", encoding="utf-8")
+        self.stages = (
+            Stage("a.py", inputs=(), outputs=(self.dir / "a.json",), sources=("urls",)),
+            Stage("x.py", inputs=(), outputs=(self.dir / "x.json",)),
+            Stage("b.py", inputs=(self.dir / "a.json",), outputs=(self.dir / "b.json",)),
+            Stage("c.py", inputs=(self.dir / "b.json", self.dir / "x.json"), outputs=(self.dir / "c.json",)),
+        )
+        for stage in self.stages:
+            (self.dir / stage.script).write_text(f"# {stage.script}\n", encoding="utf-8")
+        self.args = {"c.py": ["--phash-threshold", "8"]}
+
+    def manifest(self) -> BuildManifest:
+        return BuildManifest(
+            self.dir / "build_manifest.json",
+            stages=self.stages,
+            scripts_dir=self.dir,
+            resolve_source=lambda key: self.source,
+        )
+
+    def plan(self) -> list[str]:
+        return list(self.manifest().plan([s.script for s in self.stages], self.args_for))
+
+    def args_for(self, script):
+        return self.args.get(script, [])
+
+    def build_all(self):
+        """Run every stage (write its output) and record it."""
+        manifest = self.manifest()
+        for stage in self.stages:
+            manifest.invalidate(stage.script)
+            stage.outputs[0].write_text(f'[{{"stage": "{stage.script}"}}]', encoding="utf-8")
+            manifest.record(stage.script, self.args_for(stage.script))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    return Tree(tmp_path)
+
+
+def test_fresh_tree_runs_everything(tree):
+    plan = tree.manifest().plan(["a.py", "x.py", "b.py", "c.py"], tree.args_for)
+    assert plan == {"a.py": "no build record", "x.py": "no build record",
+                    "b.py": "depends on a.py", "c.py": "depends on a.py"}
+
+
+def test_unchanged_tree_is_up_to_date(tree):
+    tree.build_all()
+    assert tree.plan() == []
+
+
+def test_changed_source_rebuilds_downstream_only(tree):
+    tree.build_all()
+    tree.source.write_text("https://www.citizensbank.com/checking\n", encoding="utf-8")
+    plan = tree.manifest().plan(["a.py", "x.py", "b.py", "c.py"], tree.args_for)
+    assert list(plan) == ["a.py", "b.py", "c.py"]
+    assert plan["a.py"] == "sources changed: urls" and plan["b.py"] == "depends on a.py"
+
+
+def test_changed_arguments(tree):
+    tree.build_all()
+    tree.args["c.py"] = ["--phash-threshold", "10"]
+    assert tree.plan() == ["c.py"]
+
+
+def test_missing_or_modified_output(tree):
+    tree.build_all()
+    (tree.dir / "b.json").unlink()
+    assert tree.plan() == ["b.py", "c.py"]
+    tree.build_all()
+    (tree.dir / "x.json").write_text('[{"edited": true}]', encoding="utf-8")
+    assert tree.plan() == ["x.py", "c.py"]
+
+
+def test_changed_script_or_settings(tree, monkeypatch):
+    tree.build_all()
+    (tree.dir / "x.py").write_text("# x.py v2\n", encoding="utf-8")
+    assert tree.plan() == ["x.py", "c.py"]
+    tree.build_all()
+    monkeypatch.setenv("AUDIT_COMPRESSION", "gzip")
+    assert tree.plan() == ["a.py", "x.py", "b.py", "c.py"]
+
+
+def test_invalidate_drops_downstream_records(tree):
+    tree.build_all()
+    manifest = tree.manifest()
+    manifest.invalidate("a.py")
+    assert sorted(tree.manifest().records) == ["x.py"]
+
+
+def test_unchanged_files_are_not_rehashed(tree, monkeypatch):
+    tree.build_all()
+    calls = []
+    original = build_manifest._sha256_file
+    monkeypatch.setattr(build_manifest, "_sha256_file", lambda path: calls.append(path) or original(path))
+    assert tree.plan() == []
+    assert calls == [], f"re-read {calls}"
+
+
+def test_script_version_covers_local_imports():
+    # Every scripts/ module a stage imports (directly or through another local module) is hashed
+    scripts_dir = Path(build_manifest.__file__).parent
+
+    def local_imports(name: str) -> set[str]:
+        found = set()
+        for node in ast.walk(ast.parse((scripts_dir / name).read_text(encoding="utf-8"))):
+            modules = [a.name for a in node.names] if isinstance(node, ast.Import) else []
+            if isinstance(node, ast.ImportFrom) and node.level == 0:
+                modules = [node.module]
+            found.update(f"{m.split('.')[0]}.py" for m in modules if (scripts_dir / f"{m.split('.')[0]}.py").exists())
+        return found
+
+    for script in PIPELINE_STAGES:
+        seen, todo = set(), [script]
+        while todo:
+            name = todo.pop()
+            new = local_imports(name) - seen
+            seen |= new
+            todo.extend(new)
+        covered = {script, *build_manifest.SHARED_MODULES, *build_manifest.STAGE_MODULES.get(script, ())}
+        assert seen - {script} <= covered, (script, sorted(seen - covered))
+
+
+def test_orchestrators_record_the_same_arguments(tmp_path, monkeypatch):
+    # A standalone run must leave stage 04 up to date for `run_audit_pipeline.py --resume`
+    original = build_manifest.BuildManifest
+    monkeypatch.setattr(build_manifest, "BuildManifest", lambda: original(tmp_path / "build_manifest.json"))
+    monkeypatch.setattr(run_history, "HISTORY_PATH", tmp_path / "run_history.sqlite")
+    orchestrator = AuditOrchestrator(status_file=tmp_path / "status.json")
+    monkeypatch.setattr(orchestrator, "run_stage", lambda script, stage_num: (0, 0.0))
+    assert orchestrator._run_scheduled() == 0
+    records = original(tmp_path / "build_manifest.json").records
+    assert records["04_match_assets.py"]["args"] == stage_args("04_match_assets.py", 8) == ["--phash-threshold", "8"]
+    assert all(records[script]["args"] == stage_args(script) for script in PIPELINE_STAGES)
@@ -0,0 +1,118 @@
+"""Test lease/expiry semantics of the stage-01 SQLite work queue."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crawl_queue import CrawlQueue
+from stage_progress import PROGRESS_PREFIX
+from stage_runner import load_stage
+
+URLS = [f"https://www.citizensbank.com/page-{i}" for i in range(5)]
+
+
+def _new_queue(tmp_path: Path, **kwargs) -> CrawlQueue:
+    path = tmp_path / "queue.sqlite"
+    queue = CrawlQueue(path, **kwargs)
+    queue.enqueue(URLS)
+    return queue
+
+
+def test_claims_do_not_overlap(tmp_path):
+    with _new_queue(tmp_path) as queue:
+        first = queue.claim("worker-a", 3)
+        second = queue.claim("worker-b", 3)
+        assert first == URLS[:3]
+        assert second == URLS[3:]
+        assert queue.claim("worker-c", 3) == []
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    with _new_queue(tmp_path) as queue:
+        assert queue.enqueue(URLS) == 0
+        assert queue.counts()["total"] == len(URLS)
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    with _new_queue(tmp_path, lease_seconds=0) as queue:
+        crashed = queue.claim("crashed-worker", 2)
+        time.sleep(0.01)
+        reclaimed = queue.claim("healthy-worker", 5)
+        assert reclaimed[:2] == crashed
+        assert len(reclaimed) == len(URLS)
+
+
+def test_results_merge_in_enqueue_order(tmp_path):
+    with _new_queue(tmp_path) as queue:
+        batch = queue.claim("worker-a", 5)
+        for url in reversed(batch[1:]):
+            queue.complete("worker-a", url, {"url": url, "status": "ok"}, [url + "/hero.jpg"])
+        queue.release("worker-a")
+
+        results = list(queue.iter_results())
+        assert [url for url, _, _ in results] == URLS
+        assert results[0][1] is None  # released, never completed
+        assert results[1][2] == [URLS[1] + "/hero.jpg"]
+        assert queue.counts()["pending"] == 1
+        assert not queue.is_drained()
+
+
+def test_exhausted_urls_drain_the_queue(tmp_path):
+    with _new_queue(tmp_path, lease_seconds=0, max_attempts=1) as queue:
+        queue.claim("worker-a", 5)
+        time.sleep(0.01)
+        assert queue.claim("worker-b", 5) == []
+        assert queue.is_drained()
+        assert queue.counts()["exhausted"] == len(URLS)
+
+
+def test_worker_reads_queue_totals_periodically(tmp_path, monkeypatch, capsys):
+    stage = load_stage("01_crawl_citizens_images.py")
+    urls = [f"https://www.citizensbank.com/page-{i}" for i in range(120)]
+    with CrawlQueue(tmp_path / "queue.sqlite") as queue:
+        queue.enqueue(urls)
+
+    def fake_crawl_page(session, url, *args):
+        row = stage.new_page_row(url)
+        row["final_url"], row["body_bytes"] = url, 10
+        return row, [url + "/a.png", url + "/b.png"]
+
+    reads = []
+    counts = CrawlQueue.counts
+    monkeypatch.setattr(stage, "crawl_page", fake_crawl_page)
+    monkeypatch.setattr(CrawlQueue, "counts", lambda self: reads.append(1) or counts(self))
+    assert stage.run_queue_worker(tmp_path / "queue.sqlite", timeout=1, batch_size=25, lease_seconds=60) == 120
+    # Once on attach, then every QUEUE_TOTALS_EVERY_URLS pages - not once per page
+    assert len(reads) == 1 + 120 // stage.QUEUE_TOTALS_EVERY_URLS, len(reads)
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith(PROGRESS_PREFIX)]
+    last = json.loads(lines[-1][len(PROGRESS_PREFIX):])
+    assert last["current"] == last["total"] == 120
+    assert last["images_discovered"] == 240 and last["images_pending"] == 0
+
+
+def test_queue_mode_runs_twice_in_a_row(tmp_path, monkeypatch):
+    stage = load_stage("01_crawl_citizens_images.py")
+    queue_path = tmp_path / "queue.sqlite"
+    crawled, merged = [], []
+
+    def fake_crawl_page(session, url, *args):
+        crawled.append(url)
+        row = stage.new_page_row(url)
+        row["final_url"] = url
+        return row, [f"{url}/run-{len(merged)}.png"]
+
+    monkeypatch.setattr(stage, "crawl_page", fake_crawl_page)
+    monkeypatch.setattr(stage, "read_url_list_from_source", lambda name: URLS)
+    monkeypatch.setattr(stage, "spawn_queue_workers", lambda args: stage.run_queue_worker(args.queue_path, 1, 5, 60))
+    monkeypatch.setattr(stage, "write_crawl_outputs", lambda pages, images, **kwargs: merged.append(images))
+
+    for _ in range(2):
+        stage.run(["--queue-mode", "all", "--queue-path", str(queue_path)])
+        assert not queue_path.exists()
+    # The second run crawls again instead of re-merging the first run's results
+    assert crawled == URLS * 2
+    assert {row["image_url"] for row in merged[1]} == {f"{url}/run-1.png" for url in URLS}
@@ -0,0 +1,104 @@
+"""Test that JsonItemReader streams bare and wrapped DAM catalogs like json.load."""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import JsonItemReader, _JsonTextStream, iter_json_items
+
+ASSETS = [
+    {"id": f"a{i}", "title": f"Hero é {i}", "tags": ["x", {"n": i}], "size": i * 1.5, "ok": i % 2 == 0, "x": None}
+    for i in range(500)
+]
+
+
+def write(tmpdir: Path, name: str, payload, **dump_kwargs) -> Path:
+    path = tmpdir / name
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, **dump_kwargs)
+    return path
+
+
+def test_bare_array(tmp_path):
+    path = write(tmp_path, "dam_assets.json", ASSETS, indent=2)
+    reader = JsonItemReader(path)
+    assert list(reader) == ASSETS
+    assert reader.layout == "array"
+    assert reader.count == len(ASSETS)
+
+
+def test_wrapped_object_with_surrounding_keys(tmp_path):
+    payload = {"exported": "2026-01-01", "meta": {"assets": "not a list"}, "assets": ASSETS, "total": 500}
+    path = write(tmp_path, "dam_assets.json", payload)
+    reader = JsonItemReader(path)
+    assert list(reader) == ASSETS
+    assert reader.layout == "object"
+    assert reader.key_found
+
+
+def test_object_without_key(tmp_path):
+    path = write(tmp_path, "dam_assets.json", {"items": ASSETS[:3]})
+    reader = JsonItemReader(path)
+    assert list(reader) == []
+    assert reader.layout == "object"
+    assert not reader.key_found
+    assert list(iter_json_items(path, key="items")) == ASSETS[:3]
+
+
+def test_invalid_top_level(tmp_path):
+    path = write(tmp_path, "dam_assets.json", "just a string")
+    with pytest.raises(ValueError):
+        list(JsonItemReader(path))
+
+
+def test_truncated_catalog(tmp_path):
+    path = tmp_path / "dam_assets.json"
+    path.write_text(json.dumps(ASSETS)[:-200], encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(JsonItemReader(path))
+
+
+def test_estimated_total(tmp_path):
+    assets = ASSETS * 40  # large enough to need several chunks
+    path = write(tmp_path, "dam_assets.json", assets)
+    reader = JsonItemReader(path)
+    estimates = []
+    for i, _ in enumerate(reader, start=1):
+        if i % 2000 == 0:
+            estimates.append(reader.estimated_total())
+    assert estimates and all(abs(e - len(assets)) / len(assets) < 0.2 for e in estimates), estimates
+    assert reader.estimated_total() == len(assets)
+
+
+def test_gzip_catalog(tmp_path):
+    path = write(tmp_path, "dam_assets.json.gz", {"assets": ASSETS})
+    reader = JsonItemReader(path)
+    assert list(reader) == ASSETS
+    assert reader.estimated_total() == len(ASSETS)
+
+
+def test_small_chunks():
+    text = json.dumps({"a": [1.25, -3e5, "q\"\u00e9 ]"], "assets": ASSETS[:20]}, indent=1)
+    for chunk_size in (1, 7, 64):
+        stream = _JsonTextStream(ChunkedText(text, chunk_size), chunk_size=chunk_size)
+        assert list(stream.iter_object_array("assets")) == ASSETS[:20], chunk_size
+
+
+class ChunkedText:
+    """Minimal file object returning at most chunk_size characters per read."""
+
+    def __init__(self, text: str, chunk_size: int):
+        self.text, self.pos, self.chunk_size = text, 0, chunk_size
+
+    def read(self, size: int = -1) -> str:
+        size = self.chunk_size if size < 0 else min(size, self.chunk_size)
+        out = self.text[self.pos:self.pos + size]
+        self.pos += len(out)
+        return out
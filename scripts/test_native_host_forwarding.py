@@ -0,0 +1,113 @@
+"""Test native host output forwarding: coalesced progress, log_batch messages and quiet debug output."""
+
+import io
+import json
+import struct
+import sys
+import time
+from contextlib import redirect_stderr
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import build_manifest
+import native_host
+import run_history
+from native_host import StageOutputForwarder
+
+STAGE = "03_build_citizens_fingerprints.py"
+
+
+def _progress(current: int, total: int = 10_000) -> dict:
+    return {"stage": STAGE, "current": current, "total": total, "percent": round(current / total * 100, 2)}
+
+
+def _decode(raw: bytes) -> list[dict]:
+    messages = []
+    while raw:
+        (length,) = struct.unpack("<I", raw[:4])
+        messages.append(json.loads(raw[4:4 + length]))
+        raw = raw[4 + length:]
+    return messages
+
+
+def test_progress_is_rate_limited_to_latest():
+    sent = []
+    forwarder = StageOutputForwarder(sent.append, progress_interval=60, log_interval=60)
+    for current in range(1, 5_000):
+        forwarder.progress(_progress(current))
+    assert [m["current"] for m in sent] == [1]
+    forwarder.flush()
+    assert [m["current"] for m in sent] == [1, 4_999]
+    # A final payload is never held back
+    forwarder.progress(_progress(10_000))
+    assert sent[-1]["percent"] == 100
+
+
+def test_quiet_stage_progress_is_flushed_by_timer():
+    sent = []
+    forwarder = StageOutputForwarder(sent.append, progress_interval=0.1, log_interval=0.1)
+    forwarder.start("run-1")
+    try:
+        forwarder.progress(_progress(1))
+        forwarder.progress(_progress(2))
+        forwarder.log("fingerprinted batch")
+        time.sleep(0.35)
+        assert [m.get("current") for m in sent if "current" in m] == [1, 2]
+        batches = [m for m in sent if m.get("type") == "log_batch"]
+        assert batches == [{"type": "log_batch", "messages": ["fingerprinted batch"], "ts": batches[0]["ts"], "runId": "run-1"}]
+    finally:
+        forwarder.stop()
+
+
+def test_log_lines_are_batched():
+    sent = []
+    forwarder = StageOutputForwarder(sent.append, progress_interval=60, log_interval=60, max_lines=200)
+    for i in range(450):
+        forwarder.log(f"line {i}")
+    assert [len(m["messages"]) for m in sent] == [200, 200]
+    forwarder.flush()
+    assert [len(m["messages"]) for m in sent] == [200, 200, 50]
+    assert sent[-1]["messages"][-1] == "line 449"
+
+
+def test_ten_thousand_item_stage_stays_small(tmp_path, monkeypatch):
+    host = native_host.NativeHost()
+    host._stdout = io.BytesIO()
+
+    def fake_run_script(script_name, extra_args=None):
+        lines = []
+        for current in range(1, 10_001):
+            host._handle_stage_line("AUDIT_PROGRESS " + json.dumps(_progress(current)), lines)
+            if current % 10 == 0:
+                host._handle_stage_line(f"processed {current}", lines)
+        return 0, "\n".join(lines)
+
+    host._run_script = fake_run_script
+    stderr = io.StringIO()
+    # Keep the run's build record and history out of assets/audit
+    original = build_manifest.BuildManifest
+    monkeypatch.setattr(build_manifest, "BuildManifest", lambda: original(tmp_path / "build_manifest.json"))
+    monkeypatch.setattr(run_history, "HISTORY_PATH", tmp_path / "run_history.sqlite")
+    with redirect_stderr(stderr):
+        host._run_pipeline("stage", STAGE)
+    messages = _decode(host._stdout.getvalue())
+    types = [m["type"] for m in messages]
+    assert len(messages) < 100, f"{len(messages)} messages for 10k progress + 1k log lines"
+    assert sum(len(m["messages"]) for m in messages if m["type"] == "log_batch") == 1_000
+    # The final progress arrives, and before the stage completes
+    last_progress = max(i for i, t in enumerate(types) if t == "progress")
+    assert messages[last_progress]["current"] == 10_000
+    assert last_progress < types.index("stage_complete") < types.index("complete")
+    assert "[NativeHost DEBUG]" not in stderr.getvalue()
+
+
+def test_debug_flag_enables_line_diagnostics(monkeypatch):
+    host = native_host.NativeHost()
+    host._stdout = io.BytesIO()
+    monkeypatch.setattr(native_host, "DEBUG", True)
+    stderr = io.StringIO()
+    with redirect_stderr(stderr):
+        host._handle_stage_line("hello", [])
+    assert "[NativeHost DEBUG] Line received: hello" in stderr.getvalue()
@@ -0,0 +1,117 @@
+"""Test the stage graph and DagScheduler: 02 runs alongside 01 -> 03 and both join at 04."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipeline_dag import PIPELINE_STAGES, DagScheduler, downstream_stages, stage_dependencies
+from run_audit_standalone import PipelineStatus
+
+S01, S02, S03, S04, S05 = PIPELINE_STAGES
+
+
+class FakeStages:
+    """run_stage stand-in recording start/end times; durations in seconds."""
+
+    def __init__(self, durations: dict[str, float], failing: set[str] = frozenset()):
+        self.durations = durations
+        self.failing = failing
+        self.spans: dict[str, tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, script: str) -> int:
+        start = time.perf_counter()
+        time.sleep(self.durations.get(script, 0.01))
+        with self.lock:
+            self.spans[script] = (start, time.perf_counter())
+        return 1 if script in self.failing else 0
+
+
+def test_dependencies_from_inputs_and_outputs():
+    deps = stage_dependencies()
+    assert deps == {S01: (), S02: (), S03: (S01,), S04: (S03, S02), S05: (S04,)}
+    assert downstream_stages(S02) == [S04, S05]
+    assert downstream_stages(S01) == [S03, S04, S05]
+
+
+def test_dam_branch_runs_concurrently():
+    fake = FakeStages({S01: 0.15, S02: 0.3, S03: 0.15, S04: 0.02, S05: 0.02})
+    started = time.perf_counter()
+    scheduler = DagScheduler(PIPELINE_STAGES, fake)
+    scheduler.run()
+    wall = time.perf_counter() - started
+    assert scheduler.succeeded
+    # 02 overlaps the Citizens branch; 04 waits for both
+    assert fake.spans[S02][0] < fake.spans[S01][1]
+    assert fake.spans[S04][0] >= max(fake.spans[S02][1], fake.spans[S03][1])
+    assert wall < 0.55, f"expected ~0.34s with 02 in parallel, took {wall:.2f}s"
+
+
+def test_max_parallel_one_keeps_declaration_order():
+    fake = FakeStages({})
+    scheduler = DagScheduler(PIPELINE_STAGES, fake, max_parallel=1)
+    order = [script for script, _, _ in scheduler.run()]
+    assert order == PIPELINE_STAGES
+
+
+def test_failure_skips_dependents_only():
+    fake = FakeStages({S01: 0.05, S02: 0.1}, failing={S01})
+    finished = []
+    scheduler = DagScheduler(PIPELINE_STAGES, fake, on_finish=lambda s, rc, d: finished.append((s, rc)))
+    scheduler.run()
+    assert not scheduler.succeeded
+    assert finished == [(S01, 1), (S02, 0)]
+    assert scheduler.skipped == [S03, S04, S05]
+
+
+def test_raising_stage_is_reported_and_fails(capsys):
+    def run_stage(script: str) -> int:
+        if script == S02:
+            raise RuntimeError("stage runner crashed")
+        return 0
+
+    scheduler = DagScheduler([S01, S02], run_stage, max_parallel=1)
+    results = scheduler.run()
+    assert (S02, 1, 0.0) in results and not scheduler.succeeded
+    err = capsys.readouterr().err
+    assert f"Stage {S02} raised" in err and "RuntimeError: stage runner crashed" in err
+
+
+def test_resume_subset_ignores_unselected_dependencies():
+    fake = FakeStages({})
+    starts = []
+    scheduler = DagScheduler([S03, S04, S05], fake, on_start=starts.append)
+    scheduler.run()
+    assert scheduler.succeeded and starts == [S03, S04, S05]
+
+
+def test_stop_prevents_new_stages():
+    stop = threading.Event()
+
+    def run_and_stop(script):
+        stop.set()
+        return 0
+
+    scheduler = DagScheduler(PIPELINE_STAGES, run_and_stop, max_parallel=1, should_stop=stop.is_set)
+    scheduler.run()
+    assert [s for s, _, _ in scheduler.results] == [S01]
+    assert scheduler.skipped == [S02, S03, S04, S05]
+
+
+def test_pipeline_status_tracks_concurrent_stages(tmp_path):
+    status = PipelineStatus(tmp_path / "pipeline_status.json")
+    status.start_stage(S01, 1)
+    status.start_stage(S02, 2)
+    assert status.state["running_stages"] == [S01, S02]
+    status.update_stage_progress(S02, {"percent": 50})
+    assert status.state["pipeline_percent"] == 10.0
+    status.complete_stage(S01, 0, 1.0)
+    assert status.state["running_stages"] == [S02]
+    assert status.state["stages"][S01]["status"] == "completed"
+    assert status.state["stages"][S02]["status"] == "running"
+    status.skip_stage(S05)
+    assert status.state["stages"][S05]["status"] == "skipped"
@@ -0,0 +1,92 @@
+"""Test PipelineStatus write coalescing/atomic writes and the localhost status/metrics endpoint."""
+
+import json
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from run_audit_standalone import PipelineStatus, StatusServer
+
+STAGE = "02_build_dam_fingerprints.py"
+
+
+def _status(tmp_path: Path, interval: float) -> PipelineStatus:
+    return PipelineStatus(tmp_path / "pipeline_status.json", write_interval=interval)
+
+
+def _progress(current: int) -> dict:
+    return {"current": current, "total": 500, "percent": current / 5, "errors": current // 100, "bytes_downloaded": current * 1000}
+
+
+def test_progress_writes_are_coalesced(tmp_path):
+    status = _status(tmp_path, 0.2)
+    status.start_stage(STAGE, 2)
+    writes_before = status.counters["status_writes"]
+    for current in range(1, 301):
+        status.update_stage_progress(STAGE, _progress(current))
+    assert status.counters["progress_updates"] == 300
+    assert status.counters["status_writes"] - writes_before <= 1
+    # The trailing timer flushes the last update
+    time.sleep(0.35)
+    on_disk = json.loads(status.status_file.read_text(encoding="utf-8"))
+    assert on_disk["stages"][STAGE]["last_progress"]["current"] == 300
+
+
+def test_state_changes_write_immediately(tmp_path):
+    status = _status(tmp_path, 60)
+    status.start_stage(STAGE, 2)
+    status.update_stage_progress(STAGE, _progress(10))
+    status.complete_stage(STAGE, 0, 1.5)
+    on_disk = json.loads(status.status_file.read_text(encoding="utf-8"))
+    assert on_disk["stages"][STAGE]["status"] == "completed"
+    assert on_disk["stages"][STAGE]["last_progress"]["current"] == 10
+
+
+def test_zero_interval_writes_every_update_atomically(tmp_path):
+    status = _status(tmp_path, 0)
+    status.start_stage(STAGE, 2)
+    writes_before = status.counters["status_writes"]
+    for current in range(1, 11):
+        status.update_stage_progress(STAGE, _progress(current))
+    assert status.counters["status_writes"] - writes_before == 10
+    leftovers = [p.name for p in status.status_file.parent.iterdir() if p.name != status.status_file.name]
+    assert leftovers == [], f"temp files left behind: {leftovers}"
+
+
+def test_items_per_sec(tmp_path):
+    status = _status(tmp_path, 60)
+    status.start_stage(STAGE, 2)
+    status.update_stage_progress(STAGE, _progress(0))
+    time.sleep(0.1)
+    status.update_stage_progress(STAGE, _progress(50))
+    rate = status.state["stages"][STAGE]["items_per_sec"]
+    assert 100 < rate <= 500, rate
+
+
+def test_status_and_metrics_endpoint(tmp_path):
+    status = _status(tmp_path, 60)
+    status.start_pipeline()
+    status.start_stage(STAGE, 2)
+    status.update_stage_progress(STAGE, _progress(250))
+    server = StatusServer(status, 0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"{server.url}/status", timeout=5) as resp:
+            served = json.loads(resp.read())
+        assert served["running_stages"] == [STAGE]
+        assert served["stages"][STAGE]["last_progress"]["current"] == 250
+        with urllib.request.urlopen(f"{server.url}/metrics", timeout=5) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain")
+            metrics = resp.read().decode("utf-8")
+    finally:
+        server.stop()
+    assert "# TYPE audit_stage_items_total counter" in metrics
+    assert f'audit_stage_items_total{{stage="{STAGE}"}} 250' in metrics
+    assert f'audit_stage_errors_total{{stage="{STAGE}"}} 2' in metrics
+    assert f'audit_stage_bytes_downloaded_total{{stage="{STAGE}"}} 250000' in metrics
+    assert f'audit_stage_running{{stage="{STAGE}"}} 1' in metrics
+    assert "audit_progress_updates_total 1" in metrics
@@ -0,0 +1,146 @@
+"""Test progress rates: moving-average throughput, ETA, per-host figures and emit throttling."""
+
+import io
+import json
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from run_audit_standalone import AuditOrchestrator
+from stage_progress import PROGRESS_PREFIX, ProgressTracker, format_eta
+from stage_runner import load_stage
+
+STAGE = "03_build_citizens_fingerprints.py"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _emit(tracker: ProgressTracker, **payload) -> Optional[dict]:
+    out = io.StringIO()
+    with redirect_stdout(out):
+        printed = tracker.emit({"stage": STAGE, **payload})
+    if not printed:
+        return None
+    line = out.getvalue().strip()
+    assert line.startswith(PROGRESS_PREFIX), line
+    return json.loads(line[len(PROGRESS_PREFIX):])
+
+
+def test_rate_and_eta_follow_recent_throughput():
+    clock = FakeClock()
+    tracker = ProgressTracker(STAGE, half_life=20.0, max_overhead=1.0, clock=clock)
+    # Items resumed from a checkpoint do not count towards the rate
+    first = _emit(tracker, current=40, total=240, errors=0, bytes_downloaded=4_000)
+    assert first["rate_per_sec"] is None and first["eta_seconds"] is None and first["bytes_per_sec"] is None
+    clock.now = 10.0
+    steady = _emit(tracker, current=60, total=240, errors=3, bytes_downloaded=14_000)
+    assert steady["rate_per_sec"] == 2.0 and steady["eta_seconds"] == 90, steady
+    assert steady["bytes_per_sec"] == 1_000 and steady["error_rate"] == 0.05
+    assert steady["elapsed_seconds"] == 10.0 and "hosts" not in steady
+    clock.now = 20.0
+    faster = _emit(tracker, current=100, total=240, errors=3, bytes_downloaded=24_000)
+    assert 2.0 < faster["rate_per_sec"] < 4.0, faster
+    assert faster["eta_seconds"] == round(140 / faster["rate_per_sec"])
+    clock.now = 21.0
+    done = _emit(tracker, current=240, total=240, errors=3)
+    assert done["eta_seconds"] == 0
+
+
+def test_hosts_report_recorded_fetches():
+    clock = FakeClock()
+    tracker = ProgressTracker(STAGE, half_life=20.0, max_overhead=1.0, clock=clock)
+    _emit(tracker, current=0, total=60)
+
+    def fetch(host: str, count: int, failures: int):
+        for i in range(count):
+            tracker.record(f"https://{host}/img{i}.png", error=i < failures, nbytes=100)
+
+    threads = [
+        threading.Thread(target=fetch, args=("www.citizensbank.com", 40, 2)),
+        threading.Thread(target=fetch, args=("cdn.example.com", 20, 10)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    clock.now = 4.0
+    payload = _emit(tracker, current=60, total=60)
+    hosts = payload["hosts"]
+    assert list(hosts) == ["www.citizensbank.com", "cdn.example.com"], hosts
+    assert hosts["www.citizensbank.com"] == {"items": 40, "rate_per_sec": 10.0, "bytes": 4_000, "error_rate": 0.05}
+    assert hosts["cdn.example.com"]["error_rate"] == 0.5
+    # Without running totals in the payload, errors and bytes come from record()
+    assert payload["error_rate"] == 0.2 and payload["bytes_per_sec"] == 1_500
+
+
+def test_reset_starts_a_new_run():
+    # Stage modules stay loaded across in-process runs, and so does their tracker
+    clock = FakeClock()
+    tracker = ProgressTracker(STAGE, half_life=20.0, max_overhead=1.0, clock=clock)
+    _emit(tracker, current=0, total=10)
+    tracker.record("https://www.citizensbank.com/a.png", error=True, nbytes=100)
+    clock.now = 5.0
+    assert _emit(tracker, current=10, total=10)["rate_per_sec"] == 2.0
+    tracker.reset()
+    clock.now = 100.0
+    first = _emit(tracker, current=0, total=10)
+    assert first["rate_per_sec"] is None and first["elapsed_seconds"] == 0.0 and "hosts" not in first
+    assert first["error_rate"] is None
+
+
+def test_emit_throttles_to_overhead_budget():
+    tracker = ProgressTracker(STAGE, max_overhead=0.01)
+    out = io.StringIO()
+    calls = 0
+    started = time.perf_counter()
+    with redirect_stdout(out):
+        while time.perf_counter() - started < 0.3:
+            calls += 1
+            tracker.emit({"stage": STAGE, "current": calls, "total": 10**9, "message": "x" * 200})
+        tracker.emit({"stage": STAGE, "current": 10**9, "total": 10**9})
+    elapsed = time.perf_counter() - started
+    lines = out.getvalue().splitlines()
+    assert len(lines) - 1 + tracker.skipped == calls
+    assert tracker.skipped > 0 and len(lines) < calls / 10, (len(lines), calls)
+    # One line may overrun the budget before the next is skipped
+    assert tracker._spent <= 0.01 * elapsed + 0.005, (tracker._spent, elapsed)
+    # The final line is never skipped
+    assert json.loads(lines[-1][len(PROGRESS_PREFIX):])["eta_seconds"] == 0
+
+
+def test_stage_emit_progress_adds_rates():
+    out = io.StringIO()
+    with redirect_stdout(out):
+        stage = load_stage("04_match_assets.py")
+        stage.emit_progress(0, 10, "Starting asset matching")
+        stage.emit_progress(10, 10, "Asset matching complete")
+    payloads = [json.loads(line[len(PROGRESS_PREFIX):]) for line in out.getvalue().splitlines()]
+    assert [p["current"] for p in payloads] == [0, 10]
+    assert payloads[-1]["eta_seconds"] == 0 and payloads[-1]["rate_per_sec"] is not None
+    assert payloads[-1]["error_rate"] is None and payloads[-1]["bytes_per_sec"] is None
+
+
+def test_progress_bar_shows_rate_and_eta():
+    assert [format_eta(s) for s in (None, 37, 245, 3720)] == ["", "37s", "4m05s", "1h02m"]
+    bar = AuditOrchestrator._render_progress_bar(None, {"current": 50, "total": 200, "rate_per_sec": 2.5, "eta_seconds": 65})
+    assert bar.endswith("50/200 | 2.5/s | ETA 1m05s"), bar
+    bar = AuditOrchestrator._render_progress_bar(None, {"current": 50, "total": 200, "rate_per_sec": None, "eta_seconds": None})
+    assert bar.endswith("| 50/200"), bar
+
+
+def test_progress_still_imports_from_audit_common():
+    from audit_common import ProgressTracker as moved_tracker, format_eta as moved_eta
+
+    assert moved_tracker is ProgressTracker and moved_eta is format_eta
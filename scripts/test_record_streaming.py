@@ -0,0 +1,115 @@
+"""Test iter_records()/RecordWriter streaming across storage layouts."""
+
+import io
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audit_common
+from audit_common import (
+    RecordWriter,
+    _iter_json_array,
+    _pyarrow,
+    count_records,
+    iter_records,
+    write_json,
+)
+
+ROWS = [
+    {"image_url": f"https://www.citizensbank.com/{i}.jpg", "page_urls": ["a", "b"], "n": i, "x": None}
+    for i in range(50)
+]
+
+
+def _written(path: Path) -> Path:
+    with RecordWriter(path) as writer:
+        writer.write_many(ROWS)
+    return path
+
+
+def test_writer_layouts_round_trip(tmp_path):
+    suffixes = [".json", ".jsonl"] + ([".parquet", ".arrow"] if _pyarrow() else [])
+    for suffix in suffixes:
+        path = tmp_path / f"rows{suffix}"
+        with RecordWriter(path) as writer:
+            writer.write_many(iter(ROWS))
+        assert writer.count == len(ROWS)
+        assert list(iter_records(path)) == ROWS, suffix
+        assert list(iter_records(path, columns=["n"])) == [{"n": r["n"]} for r in ROWS], suffix
+        assert count_records(path) == len(ROWS), suffix
+    # .json output is plain JSON for the extension
+    assert json.loads(_written(tmp_path / "plain.json").read_text(encoding="utf-8")) == ROWS
+
+
+def test_columnar_writer_converts_in_batches(tmp_path, monkeypatch):
+    if _pyarrow() is None:
+        pytest.skip("pyarrow not installed")
+    monkeypatch.setattr(audit_common, "COLUMNAR_BATCH_ROWS", 3)
+    # Types and columns change between batches: int -> float, [] -> [int], late and mixed columns
+    rows = [{"n": i, "tags": []} for i in range(3)]
+    rows += [{"n": 3.5, "tags": [1]}, {"n": 4, "tags": [2], "late": "x"}, {"n": 5, "tags": [], "mixed": 1}]
+    rows += [{"n": 6, "tags": [3], "mixed": "one"}]
+    for suffix in (".parquet", ".arrow"):
+        path = tmp_path / f"rows{suffix}"
+        with RecordWriter(path) as writer:
+            writer.write_many(rows)
+        assert list(iter_records(path)) == rows, suffix
+        assert count_records(path) == len(rows), suffix
+    pa = _pyarrow()
+    assert pa.parquet.ParquetFile(str(tmp_path / "rows.parquet")).metadata.num_row_groups == 3
+
+
+def test_reads_indented_and_empty_json(tmp_path):
+    path = tmp_path / "legacy.json"
+    write_json(path, ROWS)  # indent=2, as written by older runs
+    assert list(iter_records(path)) == ROWS
+    empty = tmp_path / "empty.json"
+    with RecordWriter(empty):
+        pass
+    assert json.loads(empty.read_text(encoding="utf-8")) == []
+    assert list(iter_records(empty)) == []
+
+
+def test_array_parser_handles_chunk_boundaries():
+    text = json.dumps([12345, "a,]b", {"k": [1, 2, {"z": "]"}]}, 3.5e10, None, True] + ROWS)
+    expected = json.loads(text)
+    for chunk_size in (1, 2, 7, 64):
+        assert list(_iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == expected, chunk_size
+
+
+def test_failed_write_leaves_previous_output(tmp_path):
+    path = _written(tmp_path / "rows.json")
+    with pytest.raises(RuntimeError):
+        with RecordWriter(path) as writer:
+            writer.write({"partial": True})
+            raise RuntimeError("stage crashed")
+    assert list(iter_records(path)) == ROWS
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_streaming_memory_is_bounded(tmp_path):
+    path = tmp_path / "big.json"
+    big = [{"image_url": f"https://www.citizensbank.com/{i}.jpg", "page_urls": ["p"] * 5} for i in range(20000)]
+    with RecordWriter(path) as writer:
+        writer.write_many(big)
+    del big
+
+    tracemalloc.start()
+    count = sum(1 for _ in iter_records(path))
+    _, streamed_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    with path.open(encoding="utf-8") as f:
+        loaded = json.load(f)
+    _, loaded_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count == len(loaded) == 20000
+    assert streamed_peak * 10 < loaded_peak, (streamed_peak, loaded_peak)
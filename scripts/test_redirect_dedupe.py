@@ -0,0 +1,103 @@
+"""Test that stage 01 reuses parsed image sets for URLs redirecting to an already-crawled page."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+_spec = importlib.util.spec_from_file_location("crawl_stage", Path(__file__).parent / "01_crawl_citizens_images.py")
+crawl_stage = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(crawl_stage)
+
+SITE = "https://www.citizensbank.com"
+FINAL = f"{SITE}/checking"
+HTML = '<html><body><img src="/images/hero.jpg"><img src="/images/card.png"></body></html>'
+REDIRECTS = {f"{SITE}/old-checking": FINAL, f"{SITE}/checking-promo": FINAL}
+
+
+class FakeResponse:
+    def __init__(self, url, status_code=200, text="", history=(), headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = text
+        self.encoding = "utf-8"
+        self.history = list(history)
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size=1):
+        body = self.text.encode("utf-8")
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls: list[tuple[str, str]] = []
+
+    def _respond(self, method, url):
+        self.calls.append((method, url))
+        if url in REDIRECTS:
+            hop = FakeResponse(url, 301, headers={"Location": REDIRECTS[url]})
+            return FakeResponse(REDIRECTS[url], 200, HTML if method == "GET" else "", [hop])
+        return FakeResponse(url, 200, HTML if method == "GET" else "")
+
+    def get(self, url, **kwargs):
+        return self._respond("GET", url)
+
+    def head(self, url, **kwargs):
+        return self._respond("HEAD", url)
+
+
+def _redirect_map():
+    return {
+        url: {
+            "final_url": final,
+            "http_status": 200,
+            "redirect_hops": [{"status_code": 301, "from_url": url, "response_url": url, "location": final, "to_url": final}],
+        }
+        for url, final in REDIRECTS.items()
+    }
+
+
+def test_known_redirect_confirmed_with_head():
+    session = FakeSession()
+    redirects = crawl_stage.RedirectDeduper(_redirect_map())
+    first, first_images = crawl_stage.crawl_page(session, FINAL, 5, None, redirects)
+    row, images = crawl_stage.crawl_page(session, f"{SITE}/old-checking", 5, None, redirects)
+
+    assert images == first_images == [f"{SITE}/images/card.png", f"{SITE}/images/hero.jpg"]
+    assert row["dedupe"] == "head"
+    assert row["final_url"] == FINAL
+    assert row["redirect_count"] == 1
+    assert row["redirect_hops"][0]["to_url"] == FINAL
+    assert row["image_count"] == 2
+    assert session.calls == [("GET", FINAL), ("HEAD", f"{SITE}/old-checking")]
+
+
+def test_trusted_map_skips_requests():
+    session = FakeSession()
+    redirects = crawl_stage.RedirectDeduper(_redirect_map(), trust_map=True)
+    crawl_stage.crawl_page(session, FINAL, 5, None, redirects)
+    row, images = crawl_stage.crawl_page(session, f"{SITE}/checking-promo", 5, None, redirects)
+    assert row["dedupe"] == "redirect_map"
+    assert len(images) == 2
+    assert session.calls == [("GET", FINAL)]
+
+
+def test_unknown_redirect_skips_parse_only():
+    session = FakeSession()
+    redirects = crawl_stage.RedirectDeduper({})
+    crawl_stage.crawl_page(session, FINAL, 5, None, redirects)
+    row, images = crawl_stage.crawl_page(session, f"{SITE}/old-checking", 5, None, redirects)
+    assert row["dedupe"] == "final_url"
+    assert len(images) == 2
+    assert redirects.stats["final_url_reused"] == 1
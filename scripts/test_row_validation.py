@@ -0,0 +1,63 @@
+"""Test compiled, streaming row validation for stage outputs."""
+
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audit_common
+from audit_common import (
+    CITIZENS_FINGERPRINTS_SCHEMA,
+    DAM_FINGERPRINTS_SCHEMA,
+    RowValidator,
+    open_stage_writer,
+    validate_stage_output,
+)
+
+GOOD_ROW = {"image_url": "https://www.citizensbank.com/a.jpg", "sha256": None, "phash": "ffd8", "fingerprint_status": "ok"}
+BAD_ROW = {"image_url": "https://www.citizensbank.com/b.jpg", "sha256": 42}
+
+
+def test_detects_invalid_rows():
+    validator = RowValidator(CITIZENS_FINGERPRINTS_SCHEMA, "citizens_fingerprints", sample_every=1)
+    for row in (GOOD_ROW, BAD_ROW, GOOD_ROW):
+        validator.check(row)
+    assert validator.rows == 3 and validator.checked == 3
+    assert not validator.ok
+    assert [index for index, _ in validator.errors] == [1]
+    assert not validator.report("citizens_fingerprints.json")
+
+
+def test_sampled_mode_checks_every_nth_row():
+    validator = RowValidator(DAM_FINGERPRINTS_SCHEMA, "dam_fingerprints", sample_every=10)
+    for i in range(95):
+        validator.check({"item_id": str(i)} if i % 10 == 0 else {"item_id": i})
+    assert validator.checked == 10
+    assert validator.ok, "only every 10th row is checked"
+
+
+def test_env_selects_mode(monkeypatch):
+    monkeypatch.setenv(audit_common.VALIDATION_ENV, "sample")
+    monkeypatch.setenv(audit_common.VALIDATION_SAMPLE_ENV, "0.25")
+    assert audit_common.validation_sample_every() == 4
+    monkeypatch.setenv(audit_common.VALIDATION_ENV, "off")
+    assert audit_common.validation_sample_every() == 0
+    monkeypatch.setenv(audit_common.VALIDATION_ENV, "full")
+    assert audit_common.validation_sample_every() == 1
+
+
+def test_stage_writer_validates_while_writing(tmp_path):
+    output = tmp_path / "citizens_fingerprints.json"
+    with open_stage_writer(output, CITIZENS_FINGERPRINTS_SCHEMA) as writer:
+        writer.write_many([GOOD_ROW, BAD_ROW])
+    assert writer.validator.checked == 2
+    assert not writer.validator.ok
+    # The standalone check streams the file with the same compiled validator
+    assert not validate_stage_output(output, CITIZENS_FINGERPRINTS_SCHEMA, "citizens_fingerprints")
+
+
+def test_schema_compiled_once():
+    first = RowValidator(DAM_FINGERPRINTS_SCHEMA, "a")
+    second = RowValidator(DAM_FINGERPRINTS_SCHEMA, "b")
+    assert first._check is second._check
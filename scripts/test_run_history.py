@@ -0,0 +1,72 @@
+"""Test the run history: append-only recording, rolling baselines and regression flags."""
+
+import io
+import sqlite3
+import sys
+from contextlib import redirect_stderr
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from run_history import RunHistory, append_run, compare_stage, stage_row
+
+STAGE = "03_build_citizens_fingerprints.py"
+
+
+def _stage(duration: float, items: int = 1_000, errors: int = 0, status: str = "completed") -> dict:
+    return {
+        "status": status,
+        "exit_code": 0 if status == "completed" else 1,
+        "duration_seconds": duration,
+        "last_progress": {"stage": STAGE, "current": items, "total": items, "errors": errors},
+        "resources": {"cpu_user_sec": 4.0, "cpu_sys_sec": 1.0, "peak_rss_mb": 150.0, "http_requests": items},
+    }
+
+
+def test_stage_row_derives_rates():
+    row = stage_row(_stage(20.0, items=1_000, errors=50))
+    assert row["items_per_sec"] == 50.0 and row["error_rate"] == 0.05
+    assert row["cpu_seconds"] == 5.0 and row["http_requests"] == 1_000
+    # Stages that report no progress still record their duration
+    row = stage_row({"status": "completed", "duration_seconds": 3.0})
+    assert row["items_per_sec"] is None and row["error_rate"] is None and row["duration_seconds"] == 3.0
+
+
+def test_runs_are_appended_and_baseline_is_median(tmp_path):
+    with RunHistory(tmp_path / "run_history.sqlite") as history:
+        for duration in (10.0, 11.0, 30.0, 9.0):
+            history.record_run("standalone", {STAGE: _stage(duration)}, "completed", started_at=0.0)
+        # A failed run never becomes part of the baseline
+        history.record_run("standalone", {STAGE: _stage(99.0, status="error")}, "error")
+        latest = history.recent_runs(1)[0]
+        assert latest["status"] == "error" and len(history.recent_runs(10)) == 5
+        baseline = history.baseline(STAGE, latest["completed_at"] + 1, runs=3)
+        assert baseline["runs"] == 3 and baseline["duration_seconds"] == 11.0
+        with pytest.raises(sqlite3.IntegrityError):
+            history.record_run("standalone", {}, "completed", run_id=latest["run_id"])
+
+
+def test_compare_flags_slow_and_error_prone_stages():
+    baseline = {"duration_seconds": 10.0, "items_per_sec": 100.0, "error_rate": 0.01}
+    assert compare_stage(stage_row(_stage(12.0)), baseline, 1.5, 0.05) == []
+    slow = compare_stage(stage_row(_stage(20.0)), baseline, 1.5, 0.05)
+    assert slow == ["throughput 50.00/s vs baseline 100.00/s"], slow
+    errors = compare_stage(stage_row(_stage(10.0, errors=100)), baseline, 1.5, 0.05)
+    assert errors == ["error rate 10.0% vs baseline 1.0%"], errors
+    # Short stages are too noisy to compare; failed ones are reported elsewhere
+    assert compare_stage(stage_row(_stage(2.0, items=10)), baseline, 1.5, 0.05) == []
+    assert compare_stage(stage_row(_stage(60.0, status="error")), baseline, 1.5, 0.05) == []
+    no_items = {"status": "completed", "duration_seconds": 40.0}
+    assert compare_stage(stage_row(no_items), baseline, 1.5, 0.05) == ["duration 40.0s vs baseline 10.0s"]
+
+
+def test_append_run_never_raises(tmp_path):
+    target = tmp_path / "run_history.sqlite"
+    assert append_run("pipeline", {STAGE: _stage(5.0)}, "completed", run_id="abc", path=target) == "abc"
+    stderr = io.StringIO()
+    with redirect_stderr(stderr):
+        assert append_run("pipeline", {STAGE: _stage(5.0)}, "completed", run_id="abc", path=target) is None
+    assert "Run history not updated" in stderr.getvalue()
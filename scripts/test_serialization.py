@@ -0,0 +1,91 @@
+"""Test JSON backends and transparent .gz/.zst handling in audit_common."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audit_common
+from audit_common import (
+    RecordWriter,
+    count_records,
+    iter_records,
+    json_dumps,
+    json_loads,
+    load_json,
+    open_stage_writer,
+    resolve_stage_input,
+    write_json,
+)
+
+ROWS = [
+    {"image_url": "https://www.citizensbank.com/a.jpg", "width": 640, "phash": "ffd8", "note": "café"},
+    {"image_url": "https://www.citizensbank.com/b.jpg", "width": 320, "error": None},
+]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_backend():
+    # json_backend() caches the AUDIT_JSON_BACKEND choice
+    audit_common.json_backend.cache_clear()
+    yield
+    audit_common.json_backend.cache_clear()
+
+
+def _use_backend(monkeypatch, backend: str) -> None:
+    monkeypatch.setenv(audit_common.JSON_BACKEND_ENV, backend)
+    audit_common.json_backend.cache_clear()
+
+
+def test_backends_agree(monkeypatch):
+    for backend in audit_common.JSON_BACKENDS:
+        _use_backend(monkeypatch, backend)
+        assert json_loads(json_dumps(ROWS)) == ROWS, backend
+        assert json_loads(json_dumps(ROWS, indent=2)) == ROWS, backend
+        assert json_loads('{"score": NaN}')["score"] != 0, backend
+
+
+def test_numpy_values_serialize(monkeypatch):
+    np = pytest.importorskip("numpy")
+    row = {"width": np.int64(640), "ratio": np.float32(0.5), "bits": np.array([1, 0, 1])}
+    for backend in audit_common.JSON_BACKENDS:
+        _use_backend(monkeypatch, backend)
+        assert json_loads(json_dumps(row)) == {"width": 640, "ratio": 0.5, "bits": [1, 0, 1]}, backend
+
+
+def test_compressed_round_trip(tmp_path):
+    suffixes = [".json", ".json.gz", ".jsonl.gz"]
+    if audit_common._zstandard() is not None:
+        suffixes.append(".json.zst")
+    for suffix in suffixes:
+        path = tmp_path / f"rows{suffix}"
+        with RecordWriter(path) as writer:
+            writer.write_many(ROWS)
+        assert list(iter_records(path)) == ROWS, suffix
+        assert count_records(path) == len(ROWS), suffix
+    assert (tmp_path / "rows.json.gz").read_bytes()[:2] == b"\x1f\x8b"
+
+    write_json(tmp_path / "summary.json.gz", {"total": 2})
+    assert load_json(tmp_path / "summary.json.gz") == {"total": 2}
+
+
+def test_stage_writer_compression(tmp_path, monkeypatch):
+    json_path = tmp_path / "match_results.json"
+    monkeypatch.setenv(audit_common.COMPRESSION_ENV, "gzip")
+    with open_stage_writer(json_path) as writer:
+        writer.write_many(ROWS)
+    assert writer.path.name == "match_results.json.gz"
+    assert json_path.exists(), "plain .json export kept for the extension"
+    assert resolve_stage_input(json_path) == writer.path
+    assert list(iter_records(json_path)) == ROWS
+
+
+def test_reads_indented_files(tmp_path):
+    path = tmp_path / "legacy.json"
+    write_json(path, ROWS, indent=2)
+    assert list(iter_records(path)) == ROWS
+    (tmp_path / "empty.json").write_text("[]\n", encoding="utf-8")
+    assert list(iter_records(tmp_path / "empty.json")) == []
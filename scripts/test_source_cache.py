@@ -0,0 +1,129 @@
+"""Test the cached, revalidating remote data-source fetcher."""
+
+import http.server
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import audit_common
+from audit_common import DATA_SOURCE_CONFIG, load_json_from_source, read_url_list_from_source, source_path
+from stage_metrics import StageMetrics
+
+SOURCE_KEY = "test_remote_catalog"
+REQUESTS: list[tuple[str, str | None]] = []
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    # Set to answer every request with this error status
+    error_status: int | None = None
+
+    def do_GET(self):
+        REQUESTS.append((self.path, self.headers.get("If-Modified-Since")))
+        if self.error_status is not None:
+            self.send_error(self.error_status)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """A local HTTP server over tmp_path/site; the source cache lives in tmp_path/cache."""
+    directory = tmp_path / "site"
+    directory.mkdir()
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), lambda *a, **kw: Handler(*a, directory=str(directory), **kw)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(audit_common, "SOURCE_CACHE_DIR", tmp_path / "cache")
+    REQUESTS.clear()
+    yield directory, server
+    server.shutdown()
+    server.server_close()
+    DATA_SOURCE_CONFIG.pop(SOURCE_KEY, None)
+
+
+def _configure(monkeypatch, server, name: str, ttl: str) -> None:
+    monkeypatch.setenv(audit_common.SOURCE_CACHE_TTL_ENV, ttl)
+    url = f"http://127.0.0.1:{server.server_port}/{name}"
+    DATA_SOURCE_CONFIG[SOURCE_KEY] = {"enabled": True, "type": "url", "source": url}
+
+
+def test_ttl_avoids_repeat_requests(site, monkeypatch):
+    directory, server = site
+    (directory / "dam_assets.json").write_text('[{"item_id": "1"}]', encoding="utf-8")
+    _configure(monkeypatch, server, "dam_assets.json", "3600")
+    path = source_path(SOURCE_KEY)
+    assert path.read_text(encoding="utf-8") == '[{"item_id": "1"}]'
+    assert path.suffix == ".json"
+    assert load_json_from_source(SOURCE_KEY) == [{"item_id": "1"}]
+    assert len(REQUESTS) == 1, REQUESTS
+
+
+def test_expired_entry_revalidates(site, monkeypatch):
+    directory, server = site
+    (directory / "urls.txt").write_text("https://www.citizensbank.com/a\n# comment\n", encoding="utf-8")
+    _configure(monkeypatch, server, "urls.txt", "0")
+    assert read_url_list_from_source(SOURCE_KEY) == ["https://www.citizensbank.com/a"]
+    assert read_url_list_from_source(SOURCE_KEY) == ["https://www.citizensbank.com/a"]
+    assert len(REQUESTS) == 2
+    assert REQUESTS[0][1] is None
+    assert REQUESTS[1][1] is not None, "second request is conditional (304)"
+
+
+def test_stale_copy_used_when_offline(site, monkeypatch):
+    directory, server = site
+    (directory / "dam_assets.json").write_text("[]", encoding="utf-8")
+    _configure(monkeypatch, server, "dam_assets.json", "0")
+    first = source_path(SOURCE_KEY)
+    server.shutdown()
+    server.server_close()
+    assert source_path(SOURCE_KEY) == first
+    assert load_json_from_source(SOURCE_KEY) == []
+
+
+def test_stale_copy_used_on_server_error(site, monkeypatch):
+    directory, server = site
+    (directory / "dam_assets.json").write_text('[{"item_id": "1"}]', encoding="utf-8")
+    _configure(monkeypatch, server, "dam_assets.json", "0")
+    first = source_path(SOURCE_KEY)
+    for status in (503, 429):
+        monkeypatch.setattr(Handler, "error_status", status)
+        assert source_path(SOURCE_KEY) == first
+        assert load_json_from_source(SOURCE_KEY) == [{"item_id": "1"}]
+    # Without a cached copy the error is raised
+    _configure(monkeypatch, server, "other.json", "0")
+    with pytest.raises(Exception, match="Failed to fetch"):
+        source_path(SOURCE_KEY)
+
+
+def test_concurrent_stages_count_their_own_fetches(site, monkeypatch):
+    directory, server = site
+    (directory / "dam_assets.json").write_text('[{"item_id": "1"}]', encoding="utf-8")
+    _configure(monkeypatch, server, "dam_assets.json", "3600")
+    started = threading.Barrier(2)
+    reports = {}
+
+    def stage(name: str, fetch: bool) -> None:
+        metrics = StageMetrics(name)
+        started.wait(5)
+        if fetch:
+            source_path(SOURCE_KEY)
+        started.wait(5)
+        reports[name] = metrics.as_dict()
+
+    threads = [threading.Thread(target=stage, args=(name, name == "02")) for name in ("01", "02")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert reports["02"]["http_requests"] == 1 and reports["02"]["bytes_downloaded"] == 18
+    assert reports["02"]["cache"]["source"]["misses"] == 1
+    assert reports["01"]["http_requests"] == 0 and "source" not in reports["01"]["cache"]
@@ -0,0 +1,175 @@
+"""Test per-stage resource accounting: StageMetrics, AUDIT_METRICS merging, child rusage and status/summary persistence."""
+
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import native_host
+from run_audit_standalone import PipelineStatus
+from stage_metrics import (
+    METRICS_PREFIX,
+    StageMetrics,
+    format_stage_metrics,
+    merge_stage_metrics,
+    parse_metrics_line,
+    total_stage_metrics,
+    wait_stage_process,
+)
+from stage_runner import load_stage
+
+STAGE = "03_build_citizens_fingerprints.py"
+
+
+def test_stage_metrics_counts_across_threads():
+    metrics = StageMetrics(STAGE)
+
+    def fetch():
+        for _ in range(500):
+            metrics.request(100)
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.add_bytes(50)
+    metrics.cache("stylesheets", hit=True, count=3)
+    metrics.cache("stylesheets", hit=False)
+    report = metrics.as_dict()
+    assert report["stage"] == STAGE
+    assert report["http_requests"] == 2_000
+    assert report["bytes_downloaded"] == 200_050
+    assert report["cache"] == {"stylesheets": {"hits": 3, "misses": 1, "hit_ratio": 0.75}}
+    assert report["cpu_user_sec"] >= 0 and report["cpu_sys_sec"] >= 0
+
+
+def test_emit_prints_parsable_line():
+    out = io.StringIO()
+    with redirect_stdout(out):
+        StageMetrics(STAGE).emit()
+    line = out.getvalue().strip()
+    assert line.startswith(METRICS_PREFIX)
+    assert parse_metrics_line(line)["stage"] == STAGE
+    assert parse_metrics_line("AUDIT_PROGRESS {}") is None
+    assert parse_metrics_line(METRICS_PREFIX + "not json") is None
+
+
+def test_merge_adds_counts_and_keeps_later_usage():
+    worker = {"cpu_user_sec": 1.0, "cpu_sys_sec": 0.1, "http_requests": 10, "bytes_downloaded": 1000,
+              "cache": {"pages": {"hits": 1, "misses": 3, "hit_ratio": 0.25}}}
+    parent = {"cpu_user_sec": 5.0, "cpu_sys_sec": 0.5, "peak_rss_mb": 80.0, "http_requests": 2, "bytes_downloaded": 0,
+              "cache": {"pages": {"hits": 3, "misses": 1, "hit_ratio": 0.75}}}
+    merged = merge_stage_metrics(worker, parent)
+    assert merged["http_requests"] == 12 and merged["bytes_downloaded"] == 1000
+    assert merged["cpu_user_sec"] == 5.0 and merged["peak_rss_mb"] == 80.0
+    assert merged["cache"]["pages"] == {"hits": 4, "misses": 4, "hit_ratio": 0.5}
+    # A subprocess's rusage replaces the stage's own CPU figures and keeps its counts
+    merged = merge_stage_metrics(merged, {"cpu_user_sec": 6.0, "cpu_sys_sec": 0.7, "peak_rss_mb": 90.0})
+    assert merged["cpu_user_sec"] == 6.0 and merged["http_requests"] == 12
+    totals = total_stage_metrics([merged, {"cpu_user_sec": 1.0, "peak_rss_mb": 40.0, "http_requests": 3}])
+    assert totals["cpu_user_sec"] == 7.0 and totals["http_requests"] == 15 and totals["peak_rss_mb"] == 90.0
+    assert "15 req" in format_stage_metrics(totals) and "rss 90 MB" in format_stage_metrics(totals)
+
+
+def test_wait_stage_process_reports_child_usage():
+    code = "import sys; block = bytearray(64 * 2**20); sum(range(2_000_000)); sys.exit(3)"
+    process = subprocess.Popen([sys.executable, "-c", code])
+    return_code, usage = wait_stage_process(process)
+    assert return_code == 3 and process.returncode == 3
+    if not hasattr(os, "wait4"):
+        assert usage == {}
+        return
+    assert usage["peak_rss_mb"] >= 64, usage
+    assert usage["cpu_user_sec"] + usage["cpu_sys_sec"] > 0
+
+
+def test_wait_stage_process_reports_signals_like_popen():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    process.kill()
+    return_code, _ = wait_stage_process(process)
+    assert return_code == process.returncode
+    if hasattr(signal, "SIGKILL"):
+        assert return_code == -signal.SIGKILL
+
+
+def test_crawl_session_counts_redirect_hops():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/old":
+                self.send_response(301)
+                self.send_header("Location", "/new")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"<html></html>")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        metrics = StageMetrics("01_crawl_citizens_images.py")
+        session = load_stage("01_crawl_citizens_images.py").build_http_session(metrics)
+        session.get(f"http://127.0.0.1:{server.server_address[1]}/old", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert metrics.http_requests == 2
+
+
+def test_crawl_session_counts_retried_attempts():
+    attempts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            attempts.append(self.path)
+            self.send_response(503 if len(attempts) < 3 else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        metrics = StageMetrics("01_crawl_citizens_images.py")
+        session = load_stage("01_crawl_citizens_images.py").build_http_session(metrics)
+        assert session.get(f"http://127.0.0.1:{server.server_address[1]}/flaky", timeout=5).ok
+    finally:
+        server.shutdown()
+        server.server_close()
+    # urllib3 retried the two 503s inside the adapter; only the 200 reached the hook
+    assert len(attempts) == metrics.http_requests == 3
+
+
+def test_status_file_and_host_keep_stage_resources(tmp_path):
+    status = PipelineStatus(tmp_path / "pipeline_status.json", write_interval=0)
+    status.start_pipeline()
+    status.start_stage(STAGE, 3)
+    status.record_stage_metrics(STAGE, {"stage": STAGE, "cpu_user_sec": 1.0, "http_requests": 7, "bytes_downloaded": 700})
+    status.record_stage_metrics(STAGE, {"cpu_user_sec": 1.5, "cpu_sys_sec": 0.5, "peak_rss_mb": 120.0})
+    status.complete_stage(STAGE, 0, 2.0)
+    status.complete_pipeline(success=True)
+    on_disk = json.loads(status.status_file.read_text(encoding="utf-8"))
+    resources = on_disk["stages"][STAGE]["resources"]
+    assert resources["http_requests"] == 7 and resources["cpu_user_sec"] == 1.5 and resources["peak_rss_mb"] == 120.0
+    assert on_disk["resources"]["cpu_sys_sec"] == 0.5
+    assert f'audit_stage_peak_rss_bytes{{stage="{STAGE}"}} {120 * 2**20}' in status.prometheus_metrics()
+
+    host = native_host.NativeHost()
+    lines = []
+    host._handle_stage_line(METRICS_PREFIX + json.dumps({"stage": STAGE, "http_requests": 4}), lines)
+    assert lines == [] and host._stage_metrics[STAGE]["http_requests"] == 4
@@ -0,0 +1,189 @@
+"""Test stage profiling: cProfile/collapsed stacks, tracemalloc checkpoints and the --profile plumbing."""
+
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import native_host
+import stage_runner
+from stage_profiling import (
+    PROFILE_CHECKPOINTS_ENV,
+    PROFILE_DIR_ENV,
+    PROFILE_ENV,
+    profile_checkpoint,
+    profile_mode,
+    profile_settings,
+    profile_stage,
+)
+from stage_runner import run_stage
+from stage_worker import CAN_FORK, WarmWorker
+
+STAGE = "03_build_citizens_fingerprints.py"
+
+FAKE_STAGE = '''
+def run(argv, data):
+    print("ran " + " ".join(argv))
+    return data
+'''
+
+THREADED_STAGE = '''
+from concurrent.futures import ThreadPoolExecutor
+
+from stage_profiling import profile_checkpoint
+
+
+def hash_chunk(n):
+    return sum(i * i for i in range(n))
+
+
+def run(argv, data):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        print(sum(pool.map(hash_chunk, [200_000] * 16)))
+    profile_checkpoint("hashed")
+    return data
+'''
+
+
+@pytest.fixture
+def profile_env(monkeypatch):
+    """Set the AUDIT_PROFILE* variables for one test; stage output is swallowed."""
+    for key in (PROFILE_ENV, PROFILE_DIR_ENV, PROFILE_CHECKPOINTS_ENV):
+        monkeypatch.delenv(key, raising=False)
+
+    def apply(settings: dict) -> None:
+        for key, value in settings.items():
+            monkeypatch.setenv(key, value)
+
+    return apply
+
+
+def busy_worker_function():
+    total = 0
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:
+        total += sum(range(1_000))
+    return total
+
+
+def test_cpu_profile_covers_worker_threads(tmp_path, profile_env):
+    directory = tmp_path
+    profile_env(profile_settings("cpu", directory))
+    with redirect_stdout(io.StringIO()), profile_stage(STAGE):
+        thread = threading.Thread(target=busy_worker_function, name="fingerprint-worker")
+        thread.start()
+        thread.join()
+    base = f"03_build_citizens_fingerprints-{os.getpid()}"
+    stats = pstats.Stats(str(directory / f"{base}.pstats"))
+    assert any(func[2] == "busy_worker_function" for func in stats.stats), "worker thread missing from pstats"
+    assert "busy_worker_function" in (directory / f"{base}.cpu.txt").read_text(encoding="utf-8")
+    stacks = (directory / f"{base}.collapsed").read_text(encoding="utf-8").splitlines()
+    worker_stacks = [line for line in stacks if line.startswith("fingerprint-worker;")]
+    assert worker_stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert any("busy_worker_function (test_stage_profiling.py:" in line for line in worker_stacks)
+    assert not any(line.startswith("stage-profiler;") for line in stacks)
+
+
+def test_cpu_profile_of_threaded_stage(tmp_path, profile_env, monkeypatch):
+    # Like --in-process --profile cpu: a stage whose pool threads all do work
+    (tmp_path / "threaded_stage.py").write_text(THREADED_STAGE, encoding="utf-8")
+    monkeypatch.setattr(stage_runner, "SCRIPTS_DIR", tmp_path)
+    stage_runner.load_stage.cache_clear()
+    profile_env(profile_settings("cpu", tmp_path / "profiles"))
+    lines, result = [], []
+    runner = threading.Thread(target=lambda: result.append(run_stage("threaded_stage.py", [], on_line=lines.append)))
+    try:
+        runner.start()
+        runner.join(60)
+    finally:
+        stage_runner.load_stage.cache_clear()
+    assert not runner.is_alive(), "profiled stage hung"
+    assert result == [0], lines
+    stats = pstats.Stats(str(tmp_path / "profiles" / f"threaded_stage-{os.getpid()}.pstats"))
+    assert any(func[2] == "hash_chunk" for func in stats.stats), "pool threads missing from pstats"
+
+
+def test_cpu_profile_refuses_concurrent_stages(tmp_path, profile_env):
+    profile_env(profile_settings("cpu", tmp_path))
+    with redirect_stdout(io.StringIO()), profile_stage(STAGE):
+        with pytest.raises(RuntimeError, match="another stage"):
+            with profile_stage("04_match_assets.py"):
+                pass
+    # The lock is released: the next stage can be profiled
+    with redirect_stdout(io.StringIO()), profile_stage("04_match_assets.py"):
+        pass
+
+
+def test_mem_profile_reports_selected_checkpoints(tmp_path, profile_env):
+    directory = tmp_path
+    kept = []
+    profile_env({**profile_settings("mem", directory), PROFILE_CHECKPOINTS_ENV: "loaded"})
+    with redirect_stdout(io.StringIO()), profile_stage(STAGE):
+        kept.append([bytearray(1024) for _ in range(2_000)])
+        profile_checkpoint("loaded")
+        profile_checkpoint("skipped")
+    report = (directory / f"03_build_citizens_fingerprints-{os.getpid()}.mem.txt").read_text(encoding="utf-8")
+    headings = [line.split(":")[0] for line in report.splitlines() if line.startswith("== ")]
+    assert headings == ["== start", "== loaded", "== end"], headings
+    loaded = report.split("== loaded")[1].split("== end")[0]
+    assert "test_stage_profiling.py" in loaded.split("-- growth")[1], loaded
+
+
+def test_profile_mode_ignores_unknown_values(profile_env):
+    stderr = io.StringIO()
+    profile_env({PROFILE_ENV: "gpu"})
+    with redirect_stderr(stderr):
+        assert profile_mode() is None
+        with profile_stage(STAGE):
+            pass
+    assert "Unknown AUDIT_PROFILE='gpu'" in stderr.getvalue()
+    with pytest.raises(ValueError):
+        profile_settings("gpu", Path("."))
+
+
+def test_host_rejects_unknown_profile_mode():
+    host = native_host.NativeHost()
+    host._stdout = io.BytesIO()
+    host._handle_run("pipeline", None, profile="gpu")
+    raw = host._stdout.getvalue()
+    message = json.loads(raw[4:])
+    assert message["type"] == "error" and "Unknown profile mode" in message["error"]
+    assert host._runner_thread is None or not host._runner_thread.is_alive()
+
+
+@pytest.mark.skipif(not CAN_FORK, reason="the warm worker forks per request")
+def test_warm_worker_runs_profile_with_request_env(tmp_path):
+    tmpdir = tmp_path
+    (tmpdir / "fake_stage.py").write_text(FAKE_STAGE, encoding="utf-8")
+    worker = WarmWorker(scripts_dir=tmpdir, preload_modules=False)
+    try:
+        assert worker.wait_ready(30), "worker did not start"
+        lines = []
+        rc = worker.run("fake_stage.py", ["x"], lines.append, env=profile_settings("cpu", tmpdir / "profiles"))
+        assert rc == 0 and lines[0] == "ran x", lines
+        assert any(line.startswith("[Profile] ") and line.endswith(".pstats") for line in lines), lines
+        assert list((tmpdir / "profiles").glob("fake_stage-*.collapsed"))
+        # The next run is not profiled: the variables applied to that run only
+        lines.clear()
+        assert worker.run("fake_stage.py", ["y"], lines.append) == 0
+        assert lines == ["ran y"], lines
+    finally:
+        worker.close()
+
+
+def test_profiling_still_imports_from_audit_common():
+    from audit_common import profile_checkpoint as moved_checkpoint, profile_stage as moved_stage
+
+    assert moved_stage is profile_stage and moved_checkpoint is profile_checkpoint
+    with pytest.raises(ImportError):
+        from audit_common import not_a_helper  # noqa: F401
@@ -0,0 +1,144 @@
+"""Test in-process stage runs: StageData handoff, stage_runner and native host forwarding."""
+
+import io
+import json
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import stage_runner
+from audit_common import load_json
+from stage_data import StageData
+from stage_runner import StageCancelled, run_stage
+
+ROWS = [{"image_url": f"https://www.citizensbank.com/{i}.jpg", "sha256": f"{i:064x}"} for i in range(5)]
+
+FAKE_STAGE = '''
+import sys
+from pathlib import Path
+
+def run(argv, data):
+    out = Path(argv[0])
+    print("AUDIT_PROGRESS " + '{"current": 1, "total": 2}')
+    print("plain log line")
+    if "--exit" in argv:
+        raise SystemExit("No URLs found to crawl")
+    if "--crash" in argv:
+        raise RuntimeError("boom")
+    with data.writer(out) as writer:
+        writer.write({"n": 1})
+    sys.stdout.write("no trailing newline")
+    return data
+'''
+
+
+@pytest.fixture
+def fake_stage(tmp_path, monkeypatch):
+    """Point stage_runner at a temp scripts dir holding fake_stage.py."""
+    (tmp_path / "fake_stage.py").write_text(FAKE_STAGE, encoding="utf-8")
+    monkeypatch.setattr(stage_runner, "SCRIPTS_DIR", tmp_path)
+    stage_runner.load_stage.cache_clear()
+    yield tmp_path
+    stage_runner.load_stage.cache_clear()
+
+
+def test_stage_data_holds_outputs_in_memory(tmp_path):
+    path = tmp_path / "rows.json"
+    data = StageData(write_artifacts=False, handoff=True)
+    with data.writer(path) as writer:
+        writer.write_many(ROWS)
+    assert writer.count == len(ROWS) and not path.exists()
+    assert path in data and data.count(path) == len(ROWS)
+    assert list(data.iter_rows(path, columns=["sha256"])) == [{"sha256": r["sha256"]} for r in ROWS]
+    data.put(tmp_path / "summary.json", {"total": 5})
+    assert data.load(tmp_path / "summary.json") == {"total": 5}
+    assert not (tmp_path / "summary.json").exists()
+
+
+def test_stage_data_writes_artifacts_and_final_outputs(tmp_path):
+    data = StageData(write_artifacts=False, handoff=True)
+    with data.writer(tmp_path / "master.json", final=True) as writer:
+        writer.write_many(ROWS)
+    assert load_json(tmp_path / "master.json") == ROWS
+    data = StageData()
+    with data.writer(tmp_path / "rows.json") as writer:
+        writer.write_many(ROWS)
+    assert load_json(tmp_path / "rows.json") == ROWS
+    # Paths not held in memory are read from disk
+    assert StageData().read_rows(tmp_path / "rows.json") == ROWS
+
+
+def test_stage_data_without_handoff_streams_to_file(tmp_path):
+    # A stage subprocess: nothing reads the rows back from memory
+    data = StageData()
+    with data.writer(tmp_path / "rows.json") as writer:
+        writer.write_many(ROWS)
+    assert writer.rows is None and writer.count == len(ROWS)
+    assert tmp_path / "rows.json" not in data
+    assert load_json(tmp_path / "rows.json") == ROWS
+    # Without handoff the file is the only copy, whatever write_artifacts says
+    data = StageData(write_artifacts=False)
+    data.put(tmp_path / "summary.json", {"total": 5})
+    assert tmp_path / "summary.json" not in data and load_json(tmp_path / "summary.json") == {"total": 5}
+
+
+def test_aborted_writer_is_not_published(tmp_path):
+    path = tmp_path / "rows.json"
+    data = StageData(write_artifacts=False, handoff=True)
+    with pytest.raises(ValueError):
+        with data.writer(path) as writer:
+            writer.write(ROWS[0])
+            raise ValueError("stage failed")
+    assert path not in data
+
+
+def test_run_stage_forwards_lines(fake_stage):
+    lines = []
+    data = StageData(write_artifacts=False, handoff=True)
+    out = fake_stage / "out.json"
+    assert run_stage("fake_stage.py", [str(out)], data, on_line=lines.append) == 0
+    assert lines == ['AUDIT_PROGRESS {"current": 1, "total": 2}', "plain log line", "no trailing newline"]
+    assert data.read_rows(out) == [{"n": 1}]
+
+
+def test_run_stage_exit_codes(fake_stage):
+    lines = []
+    assert run_stage("fake_stage.py", ["x", "--exit"], on_line=lines.append) == 1
+    assert lines[-1] == "No URLs found to crawl"
+    lines.clear()
+    assert run_stage("fake_stage.py", ["x", "--crash"], on_line=lines.append) == 1
+    assert any("RuntimeError: boom" in line for line in lines)
+
+
+def test_cancel_propagates(fake_stage):
+    def on_line(line):
+        raise StageCancelled()
+
+    with pytest.raises(StageCancelled):
+        run_stage("fake_stage.py", [str(fake_stage / "out.json")], on_line=on_line)
+
+
+def test_native_host_in_process_messages(fake_stage):
+    import native_host
+
+    host = native_host.NativeHost()
+    host._stdout = io.BytesIO()
+    host._run_id = "run-1"
+    rc, output = host._run_script_in_process("fake_stage.py", [str(fake_stage / "out.json")], StageData(write_artifacts=False, handoff=True))
+    assert rc == 0
+    host._forwarder.flush()
+    raw = host._stdout.getvalue()
+    messages = []
+    while raw:
+        (length,) = struct.unpack("<I", raw[:4])
+        messages.append(json.loads(raw[4:4 + length]))
+        raw = raw[4 + length:]
+    assert [m["type"] for m in messages] == ["progress", "log_batch"]
+    assert messages[0]["current"] == 1 and messages[0]["runId"] == "run-1"
+    assert messages[1]["messages"] == ["plain log line", "no trailing newline"]
+    assert output == "plain log line\nno trailing newline"
@@ -0,0 +1,80 @@
+"""Test JSON/Parquet/Arrow stage storage, column projection and validation."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import (
+    CITIZENS_FINGERPRINTS_SCHEMA,
+    STORAGE_FORMAT_ENV,
+    _pyarrow,
+    read_records,
+    resolve_stage_input,
+    validate_stage_output,
+    write_records,
+    write_stage_records,
+)
+
+ROWS = [
+    {
+        "image_url": "https://www.citizensbank.com/a.jpg",
+        "page_count": 2,
+        "page_urls": ["https://www.citizensbank.com/p1", "https://www.citizensbank.com/p2"],
+        "sha256": "aa",
+        "phash": "ff00",
+        "fingerprint_status": "ok",
+        "fingerprint_error": None,
+    },
+    {
+        "image_url": "https://www.citizensbank.com/b.jpg",
+        "page_count": 0,
+        "page_urls": [],
+        "sha256": None,
+        "phash": None,
+        "fingerprint_status": "error",
+        "fingerprint_error": "HTTP_404",
+        "best_phash_distance": 12,  # only on some rows
+    },
+]
+MIXED = [{"value": 1}, {"value": "one"}, {"value": [1]}]
+
+
+def test_json_projection(tmp_path):
+    path = tmp_path / "rows.json"
+    write_records(path, ROWS)
+    assert read_records(path) == ROWS
+    assert read_records(path, columns=["image_url", "sha256"]) == [
+        {"image_url": r["image_url"], "sha256": r["sha256"]} for r in ROWS
+    ]
+
+
+def test_columnar_round_trip(tmp_path):
+    if _pyarrow() is None:
+        pytest.skip("pyarrow not installed")
+    for suffix in (".parquet", ".arrow"):
+        path = tmp_path / f"rows{suffix}"
+        write_records(path, ROWS)
+        assert read_records(path) == ROWS, suffix
+        projected = read_records(path, columns=["image_url", "phash", "not_a_column"])
+        assert projected == [{"image_url": r["image_url"], "phash": r["phash"]} for r in ROWS], suffix
+        write_records(path, MIXED)
+        assert read_records(path) == MIXED, suffix
+
+
+def test_stage_records_prefer_newer_columnar_file(tmp_path, monkeypatch):
+    if _pyarrow() is None:
+        pytest.skip("pyarrow not installed")
+    json_path = tmp_path / "citizens_fingerprints.json"
+    monkeypatch.setenv(STORAGE_FORMAT_ENV, "parquet")
+    written = write_stage_records(json_path, ROWS)
+    assert written.suffix == ".parquet"
+    assert json_path.exists()  # JSON export kept for the extension
+    assert resolve_stage_input(json_path) == written
+    assert validate_stage_output(json_path, CITIZENS_FINGERPRINTS_SCHEMA, "citizens_fingerprints")
+
+    write_records(written, [{"fingerprint_status": "ok"}])  # missing required image_url
+    assert not validate_stage_output(json_path, CITIZENS_FINGERPRINTS_SCHEMA, "citizens_fingerprints")
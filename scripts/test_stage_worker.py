@@ -0,0 +1,122 @@
+"""Test the warm stage worker: line forwarding, exit codes, crash isolation, concurrency and cancellation."""
+
+import io
+import json
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import native_host
+from stage_worker import WarmWorker
+
+FAKE_STAGE = '''
+import sys
+import time
+from pathlib import Path
+
+def run(argv, data):
+    out = Path(argv[0])
+    print("AUDIT_PROGRESS " + '{"current": 1, "total": 2}')
+    print("plain log line")
+    if "--exit" in argv:
+        raise SystemExit("No URLs found to crawl")
+    if "--crash" in argv:
+        raise RuntimeError("boom")
+    if "--sleep" in argv:
+        for i in range(200):
+            print(f"tick {i}", flush=True)
+            time.sleep(0.05)
+    with data.writer(out) as writer:
+        writer.write({"n": 1})
+    print(f"done {out.name}")
+    return data
+'''
+
+
+@pytest.fixture
+def worker(tmp_path):
+    """A worker serving a temp scripts dir holding fake_stage.py."""
+    (tmp_path / "fake_stage.py").write_text(FAKE_STAGE, encoding="utf-8")
+    worker = WarmWorker(scripts_dir=tmp_path, preload_modules=False)
+    try:
+        assert worker.wait_ready(30), "worker did not start"
+        yield worker
+    finally:
+        worker.close()
+
+
+def test_lines_and_exit_code_are_forwarded(worker, tmp_path):
+    lines = []
+    out = tmp_path / "out.json"
+    rc = worker.run("fake_stage.py", [str(out)], lines.append)
+    assert rc == 0
+    assert lines == ["AUDIT_PROGRESS " + '{"current": 1, "total": 2}', "plain log line", "done out.json"], lines
+    assert json.loads(out.read_text(encoding="utf-8")) == [{"n": 1}]
+
+
+def test_failures_report_exit_code_and_worker_survives(worker, tmp_path):
+    lines = []
+    assert worker.run("fake_stage.py", [str(tmp_path / "a.json"), "--exit"], lines.append) == 1
+    assert "No URLs found to crawl" in lines
+    lines.clear()
+    assert worker.run("fake_stage.py", [str(tmp_path / "b.json"), "--crash"], lines.append) == 1
+    assert any("RuntimeError: boom" in line for line in lines), lines
+    # The next run starts from the same warm worker
+    assert worker.run("fake_stage.py", [str(tmp_path / "c.json")], lambda line: None) == 0
+    assert (tmp_path / "c.json").exists()
+
+
+def test_concurrent_runs_keep_separate_output(worker, tmp_path):
+    outputs = {name: [] for name in ("left", "right")}
+    codes = {}
+
+    def run(name):
+        codes[name] = worker.run("fake_stage.py", [str(tmp_path / f"{name}.json")], outputs[name].append)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in outputs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert codes == {"left": 0, "right": 0}
+    assert outputs["left"][-1] == "done left.json" and outputs["right"][-1] == "done right.json"
+    assert not any("right" in line for line in outputs["left"])
+
+
+def test_should_stop_cancels_run(worker, tmp_path):
+    stop = threading.Event()
+    threading.Timer(0.3, stop.set).start()
+    started = time.monotonic()
+    rc = worker.run("fake_stage.py", [str(tmp_path / "slow.json"), "--sleep"], lambda line: None, stop.is_set)
+    assert rc == 1
+    assert time.monotonic() - started < 3
+    assert not (tmp_path / "slow.json").exists()
+    assert worker.run("fake_stage.py", [str(tmp_path / "after.json")], lambda line: None) == 0
+
+
+def test_requests_without_token_are_rejected(worker, tmp_path):
+    request = {"token": "not-the-token", "script": "fake_stage.py", "args": [str(tmp_path / "x.json")]}
+    with socket.create_connection(("127.0.0.1", worker._port), timeout=10) as conn:
+        conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        assert conn.recv(1024) == b""
+    assert not (tmp_path / "x.json").exists()
+
+
+def test_native_host_forwards_warm_stage_output(worker, tmp_path):
+    host = native_host.NativeHost()
+    host._stdout = io.BytesIO()
+    host._warm_worker = worker
+    sent = []
+    host._forwarder.send = sent.append
+    rc, output = host._run_script_warm("fake_stage.py", [str(tmp_path / "host.json")])
+    host._forwarder.flush()
+    assert rc == 0
+    assert output.splitlines() == ["plain log line", "done host.json"]
+    assert [m["type"] for m in sent] == ["progress", "log_batch"]
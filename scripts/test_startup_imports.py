@@ -0,0 +1,56 @@
+"""Test lazy heavy imports in the stage scripts and the start-up benchmark's regression checks."""
+
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_startup import measure_stage, parse_importtime, regressions
+from pipeline_dag import PIPELINE_STAGES
+from stage_runner import load_stage
+
+IMPORTTIME_SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       196 |        196 |   _io
+import time:       520 |       1520 | site
+import time:       300 |        300 |     urllib3.util
+import time:      1200 |       4500 |   requests.adapters
+import time:      2000 |      12000 | requests
+"""
+
+
+def test_parse_importtime_keeps_top_level_modules():
+    assert parse_importtime(IMPORTTIME_SAMPLE) == {"site": 1.52, "requests": 12.0}
+
+
+def test_stage_help_skips_heavy_imports():
+    for script in PIPELINE_STAGES:
+        result = measure_stage(script)
+        assert result["heavy_imports"] == [], f"{script} imports {result['heavy_imports']} for --help"
+
+
+def test_regressions_respect_tolerance_and_noise_floor():
+    baseline = {"04_match_assets.py": {"wall_ms": 100.0}}
+    fast = {"wall_ms": 110.0, "heavy_imports": []}
+    slow = {"wall_ms": 140.0, "heavy_imports": []}
+    assert regressions("04_match_assets.py", fast, baseline, 0.25) == []
+    assert regressions("04_match_assets.py", slow, baseline, 0.25) == ["140 ms vs baseline 100 ms"]
+    # Small stages get a fixed noise floor instead of a tiny percentage
+    assert regressions("x.py", {"wall_ms": 20.0, "heavy_imports": []}, {"x.py": {"wall_ms": 10.0}}, 0.25) == []
+    eager = {"wall_ms": 50.0, "heavy_imports": ["numpy"]}
+    assert regressions("04_match_assets.py", eager, {}, 0.25) == ["imports numpy at start-up"]
+
+
+def test_match_phash_distance_matches_imagehash():
+    phash_distance = load_stage("04_match_assets.py").phash_distance
+    assert phash_distance("ffffffffffffffff", "0000000000000000") == 64
+    assert phash_distance("c3c3a5a55a5a3c3c", "c3c3a5a55a5a3c3d") == 1
+    assert phash_distance("c3c3a5a55a5a3c3c", None) is None
+    assert phash_distance("c3c3", "c3c3a5a55a5a3c3c") is None
+    assert phash_distance("not-a-hash-value", "c3c3a5a55a5a3c3c") is None
+    try:
+        import imagehash
+    except ImportError:
+        return
+    a, b = "d1c4b2e8f0a39c57", "d1c5b2e8f0a19c17"
+    assert phash_distance(a, b) == int(imagehash.hex_to_hash(a) - imagehash.hex_to_hash(b))
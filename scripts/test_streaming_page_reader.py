@@ -0,0 +1,70 @@
+"""Test the streaming, size-capped page reader used by stage 01."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+_spec = importlib.util.spec_from_file_location(
+    "crawl_stage", Path(__file__).parent / "01_crawl_citizens_images.py"
+)
+crawl_stage = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(crawl_stage)
+
+PAGE_URL = "https://www.citizensbank.com/personal/page"
+
+HTML = "".join(
+    f'<img src="/img/{i}.jpg"><div style="background:url(\'/bg/{i}.png\')"></div>'
+    f'<style>@import url("/css/{i}.css");</style>'
+    for i in range(200)
+)
+
+
+class FakeStreamResponse:
+    def __init__(self, body: bytes, content_type: str = "text/html", chunk: int = 7):
+        self.body = body
+        self.chunk = chunk
+        self.headers = {"Content-Type": content_type}
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), self.chunk):
+            yield self.body[start:start + self.chunk]
+
+
+def _stream(body: bytes, max_bytes: int = 0, **kwargs):
+    parser = crawl_stage.ImageCandidateParser()
+    read, truncated = crawl_stage.stream_page_body(FakeStreamResponse(body, **kwargs), parser, max_bytes)
+    return parser, read, truncated
+
+
+def test_chunked_feed_matches_whole_document():
+    parser, read, truncated = _stream(HTML.encode("utf-8"))
+    assert read == len(HTML.encode("utf-8")) and not truncated
+    whole = crawl_stage.ImageCandidateParser()
+    whole.feed(HTML)
+    whole.close()
+    assert crawl_stage.images_from_parser(PAGE_URL, parser) == crawl_stage.parse_images_from_html(PAGE_URL, HTML)
+    assert parser.stylesheet_links(PAGE_URL) == whole.stylesheet_links(PAGE_URL)
+    assert len(parser.stylesheet_links(PAGE_URL)) == 200
+
+
+def test_body_is_capped_and_flagged():
+    parser, read, truncated = _stream(HTML.encode("utf-8"), max_bytes=1000)
+    assert read == 1000 and truncated
+    images = crawl_stage.images_from_parser(PAGE_URL, parser)
+    assert 0 < len(images) < 400
+
+
+def test_encoding_from_header_and_meta():
+    text = '<img src="/img/café.jpg">'
+    body = text.encode("latin-1")
+    parser, _, _ = _stream(body, content_type="text/html; charset=ISO-8859-1")
+    assert parser.candidates() == [("img", "/img/café.jpg")]
+
+    meta_body = b'<meta charset="windows-1252">' + body
+    assert crawl_stage.page_encoding(FakeStreamResponse(meta_body), meta_body) == "cp1252"
+    assert crawl_stage.page_encoding(FakeStreamResponse(b"<html>"), b"<html>") == "utf-8"
+    bogus = FakeStreamResponse(b"", content_type="text/html; charset=not-a-codec")
+    assert crawl_stage.page_encoding(bogus, b"") == "utf-8"
@@ -0,0 +1,119 @@
+"""Test that stage 01 fetches each stylesheet once and attaches its images to every linking page."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+_spec = importlib.util.spec_from_file_location("crawl_stage", Path(__file__).parent / "01_crawl_citizens_images.py")
+crawl_stage = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(crawl_stage)
+
+SITE = "https://www.citizensbank.com"
+STYLESHEETS = {
+    f"{SITE}/css/site.css": """
+        @import url("/css/components.css");
+        .hero { background-image: url('../images/hero.jpg'); }
+        @font-face { font-family: X; src: url('/fonts/x.woff2'); }
+    """,
+    f"{SITE}/css/components.css": """
+        @import "site.css";
+        .card { background: url(/images/card.png) no-repeat; }
+        .icon { background: url(/images/icon.svg); }
+    """,
+    "https://cdn.example.com/vendor.css": ".x { background: url(https://www.citizensbank.com/images/vendor.jpg); }",
+}
+
+
+class FakeResponse:
+    def __init__(self, text: str | None):
+        self.ok = text is not None
+        self.status_code = 200 if self.ok else 404
+        self.text = text or ""
+        self.encoding = "utf-8"
+        self.headers = {"Content-Type": "text/css"}
+
+    def iter_content(self, chunk_size=1):
+        body = self.text.encode("utf-8")
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeSession:
+    def __init__(self, failing: set[str] = frozenset()):
+        self.requested: list[str] = []
+        self.failing = set(failing)
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        if url in self.failing:
+            raise TimeoutError(f"timed out: {url}")
+        return FakeResponse(STYLESHEETS.get(url))
+
+
+PAGE = """
+<html><head>
+  <link rel="stylesheet" href="/css/site.css">
+  <link rel="stylesheet" href="https://cdn.example.com/vendor.css">
+  <style>@import url('/css/components.css');</style>
+</head><body><img src="/images/inline.jpg"></body></html>
+"""
+
+
+def test_stylesheet_images_attached_once_per_site():
+    session = FakeSession()
+    cache = crawl_stage.StylesheetCache(session, timeout=5)
+
+    first = crawl_stage.parse_images_from_html(f"{SITE}/page-1", PAGE, cache)
+    second = crawl_stage.parse_images_from_html(f"{SITE}/dir/page-2", PAGE, cache)
+
+    expected = {
+        f"{SITE}/images/inline.jpg",
+        f"{SITE}/images/hero.jpg",
+        f"{SITE}/images/card.png",
+    }
+    assert first == expected, first
+    assert second == expected, second
+    # Each whitelisted stylesheet fetched exactly once; third-party CSS never fetched
+    assert sorted(session.requested) == sorted([f"{SITE}/css/site.css", f"{SITE}/css/components.css"])
+    assert cache.stats["hits"] > 0
+    # Their bodies count towards the stage's downloaded bytes
+    fetched = (STYLESHEETS[f"{SITE}/css/site.css"], STYLESHEETS[f"{SITE}/css/components.css"])
+    assert cache.stats["bytes"] == sum(len(css.encode("utf-8")) for css in fetched)
+
+
+def test_failed_fetch_is_retried_after_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(crawl_stage.time, "monotonic", lambda: clock[0])
+    session = FakeSession(failing={f"{SITE}/css/components.css"})
+    cache = crawl_stage.StylesheetCache(session, timeout=5)
+
+    first = crawl_stage.parse_images_from_html(f"{SITE}/page-1", PAGE, cache)
+    assert f"{SITE}/images/card.png" not in first
+    # Within the retry window neither the failed import nor its parent is refetched
+    crawl_stage.parse_images_from_html(f"{SITE}/page-2", PAGE, cache)
+    assert session.requested.count(f"{SITE}/css/components.css") == 1
+    assert session.requested.count(f"{SITE}/css/site.css") == 1
+
+    session.failing.clear()
+    clock[0] += crawl_stage.STYLESHEET_RETRY_SECONDS
+    third = crawl_stage.parse_images_from_html(f"{SITE}/page-3", PAGE, cache)
+    assert {f"{SITE}/images/card.png", f"{SITE}/images/hero.jpg"} <= third
+    assert session.requested.count(f"{SITE}/css/components.css") == 2
+    # Loaded now, so cached for good
+    clock[0] += 10 * crawl_stage.STYLESHEET_RETRY_SECONDS
+    crawl_stage.parse_images_from_html(f"{SITE}/page-4", PAGE, cache)
+    assert session.requested.count(f"{SITE}/css/components.css") == 2
+
+
+def test_no_cache_keeps_inline_behaviour():
+    images = crawl_stage.parse_images_from_html(f"{SITE}/page-1", PAGE)
+    assert images == {f"{SITE}/images/inline.jpg"}
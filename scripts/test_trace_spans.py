@@ -0,0 +1,101 @@
+"""Test span tracing: the ring buffer, Chrome trace_event export, stage spans and trace merging."""
+
+import io
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import stage_tracing
+from stage_runner import load_stage
+from stage_tracing import TRACE_ENV, SpanTracer, finish_trace, merge_trace_files, start_trace, trace_span
+
+STAGE = "03_build_citizens_fingerprints.py"
+
+
+@pytest.fixture
+def trace_dir(tmp_path, monkeypatch):
+    """AUDIT_TRACE pointing at tmp_path; the process-wide tracer is reset afterwards."""
+    monkeypatch.setenv(TRACE_ENV, str(tmp_path))
+    yield tmp_path
+    stage_tracing._tracer = None
+    stage_tracing._trace_starts.clear()
+
+
+def test_ring_buffer_keeps_newest_spans():
+    tracer = SpanTracer(capacity=3)
+    for i in range(5):
+        with tracer.span("hash", f"span {i}", index=i):
+            pass
+    trace = tracer.trace_events(STAGE)
+    spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert [span["name"] for span in spans] == ["span 2", "span 3", "span 4"]
+    assert trace["otherData"]["dropped_spans"] == 2
+    assert spans[0]["args"] == {"index": 2} and spans[0]["dur"] >= 0
+    # Exporting drains the buffer
+    assert not [event for event in tracer.trace_events(STAGE)["traceEvents"] if event["ph"] == "X"]
+
+
+def test_spans_are_noops_without_audit_trace(monkeypatch):
+    monkeypatch.delenv(TRACE_ENV, raising=False)
+    start_trace(STAGE)
+    assert stage_tracing._tracer is None
+    assert trace_span("fetch", url="https://example.com") is trace_span("write")
+    assert finish_trace(STAGE) is None
+
+
+def test_stage_spans_per_worker_thread(trace_dir):
+    Image = pytest.importorskip("PIL.Image")
+
+    png = io.BytesIO()
+    Image.new("RGB", (64, 64), "navy").save(png, format="PNG")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(png.getvalue())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    process_single_image = load_stage(STAGE).process_single_image
+
+    try:
+        start_trace(STAGE)
+        url = f"http://127.0.0.1:{server.server_address[1]}/img"
+        threads = [
+            threading.Thread(target=process_single_image, args=({"image_url": f"{url}{i}.png"}, 5), name=f"worker-{i}")
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        path = finish_trace(STAGE)
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        events = trace["traceEvents"]
+        spans = [event for event in events if event["ph"] == "X"]
+        assert {span["cat"] for span in spans} == {"fetch", "hash", "decode", "stage"}, spans
+        assert sum(span["name"] == "phash" for span in spans) == 3
+        fetches = [span for span in spans if span["cat"] == "fetch"]
+        assert len(fetches) == 3 and len({span["tid"] for span in fetches}) == 3
+        thread_names = {event["args"]["name"] for event in events if event["name"] == "thread_name"}
+        assert {"worker-0", "worker-1", "worker-2"} <= thread_names
+        stage_span = next(span for span in spans if span["cat"] == "stage")
+        assert all(stage_span["ts"] <= span["ts"] for span in fetches)
+
+        merged = merge_trace_files([path, path], trace_dir / "pipeline.trace.json")
+        merged_events = json.loads(merged.read_text(encoding="utf-8"))["traceEvents"]
+        assert sum(event["name"] == "process_name" for event in merged_events) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
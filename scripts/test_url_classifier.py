@@ -0,0 +1,96 @@
+"""Test that UrlClassifier agrees with the individual stage-01 URL checks."""
+
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import (
+    ALLOWED_DOMAINS,
+    DomainMatcher,
+    UrlClassifier,
+    allowed_image_extension,
+    is_allowed_audit_hostname,
+    is_tracking_or_analytics_url,
+    safe_join,
+)
+
+BASES = [
+    "https://www.citizensbank.com/personal/checking/page.aspx",
+    "https://www.citizensbank.com/a;params?query=1",
+    "http://www.citizensbank.com/",
+]
+
+# Test cases: (candidate, expected_verdict, description) relative to BASES[0]
+test_cases = [
+    ("/assets/hero.jpg", "accepted", "Root-relative image"),
+    ("images/card.png", "accepted", "Path-relative image"),
+    ("../shared/../logo.jpg", "accepted", "Dot segments"),
+    ("//p1.aprimocdn.net/citizensbank/abc/hero.jpg", "accepted", "Protocol-relative DAM CDN"),
+    ("https://WWW.CITIZENSBANK.COM/x.jpg#frag", "accepted", "Uppercase host with fragment"),
+    ("/icons/arrow.svg", "extension", "SVG icon"),
+    ("/icons/arrow.SVG;v=2", "extension", "SVG with params"),
+    ("https://www.google-analytics.com/collect", "tracking", "Tracking pixel"),
+    ("https://pixel.citizensbank.com/p.gif", "tracking", "Generic pixel subdomain"),
+    ("https://cdn.example.com/a.jpg", "hostname", "Non-audit hostname"),
+    ("data:image/png;base64,AAAA", "data_uri", "Inline data URI"),
+    ("   ", "empty", "Whitespace only"),
+    ("http://[bad", "invalid", "Unparseable URL"),
+]
+
+
+def legacy_verdict(base: str, candidate: str) -> str | None:
+    """The accept decision made by the original per-function checks."""
+    resolved = safe_join(base, candidate)
+    if not resolved:
+        return None
+    ok = (
+        not is_tracking_or_analytics_url(resolved)
+        and is_allowed_audit_hostname(resolved)
+        and allowed_image_extension(resolved)
+    )
+    return resolved if ok else None
+
+
+def test_verdicts():
+    classifier = UrlClassifier()
+    for candidate, expected, description in test_cases:
+        _, verdict = classifier.classify(BASES[0], candidate)
+        assert verdict == expected, f"{description}: expected {expected}, got {verdict}"
+
+
+def test_matches_legacy_checks():
+    classifier = UrlClassifier()
+    for base in BASES:
+        for candidate, expected, _ in test_cases:
+            # Legacy checks resolved whitespace-only src to the page URL itself
+            if expected in ("data_uri", "invalid", "empty"):
+                continue
+            resolved, verdict = classifier.classify(base, candidate)
+            legacy = legacy_verdict(base, candidate)
+            if verdict == UrlClassifier.ACCEPTED:
+                assert resolved == legacy, f"{candidate} on {base}: {resolved} != {legacy}"
+            else:
+                assert legacy is None, f"{candidate} on {base}: legacy accepted {legacy}"
+
+
+def test_batch_api_and_cache():
+    classifier = UrlClassifier()
+    candidates = [c for c, _, _ in test_cases]
+    first = classifier.accept_many(BASES[0], candidates)
+    second = classifier.accept_many(BASES[0], candidates)
+    assert first == second
+    assert len(first) == sum(1 for _, v, _ in test_cases if v == "accepted")
+    assert classifier.cache_info()["hits"] > 0
+    rows = classifier.classify_many(BASES[0], candidates)
+    assert [r[0] for r in rows] == candidates
+
+
+def test_domain_matcher():
+    matcher = DomainMatcher(ALLOWED_DOMAINS)
+    assert matcher.matches("a.b.previews.aprimo.com")
+    assert matcher.matches("aprimocdn.net")
+    assert not matcher.matches("citizensbank.com.evil.com")
+    assert not matcher.matches("notaprimo.com")
+    assert not matcher.matches("")
@@ -0,0 +1,88 @@
+"""Test URLCompressor prefix matching and the columnar citizens image index."""
+
+import json
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audit_common import (
+    INDEX_FORMAT_VERSION,
+    LEGACY_INDEX_FORMAT_VERSION,
+    URLCompressor,
+    compress_citizens_images,
+    decompress_citizens_images,
+)
+
+IMAGES = [
+    {
+        "image_url": "https://www.citizensbank.com/content/dam/images/hero.jpg",
+        "page_urls": ["https://www.citizensbank.com/personal/checking/", "https://www.citizensbank.com/"],
+        "page_count": 2,
+    },
+    {
+        "image_url": "https://p1.aprimocdn.net/citizensbank/abc/card.png?v=2",
+        "page_urls": ["https://www.citizensbank.com/personal/checking/"],
+        "page_count": 1,
+    },
+    {"image_url": "https://www.citizensbank.com/logo.png", "page_urls": [], "page_count": 0},
+]
+
+# Hand-written 1.0.0 index as produced by earlier releases
+LEGACY_INDEX = {
+    "version": "1.0.0",
+    "compressed": True,
+    "metadata": {
+        "domains": ["https://www.citizensbank.com"],
+        "path_prefixes": {"0": ["/content/dam/"]},
+    },
+    "images": [
+        {
+            "u": {"d": 0, "p": 0, "f": "images/hero.jpg", "q": None},
+            "p": [{"d": 0, "p": -1, "f": "/personal", "q": "a=1"}],
+            "c": 1,
+        }
+    ],
+}
+
+
+def test_prefix_matching():
+    compressor = URLCompressor()
+    first = compressor.compress_url("https://www.citizensbank.com/content/dam/images/hero.jpg")
+    second = compressor.compress_url("https://www.citizensbank.com/content/dam/other.jpg")
+    assert first == {"d": 0, "p": 0, "f": "images/hero.jpg", "q": None}
+    assert second["p"] == 0 and second["f"] == "other.jpg"
+    assert compressor.compress_url("https://p1.aprimocdn.net/x.jpg")["d"] == 1
+    assert compressor.compress_url("https://www.citizensbank.com/content/x.jpg")["p"] == -1
+
+
+def test_longest_prefix_wins():
+    compressor = URLCompressor()
+    compressor.set_metadata({
+        "domains": ["https://www.citizensbank.com"],
+        "path_prefixes": {"0": ["/content/", "/content/dam/images/"]},
+    })
+    compressed = compressor.compress_url("https://www.citizensbank.com/content/dam/images/hero.jpg")
+    assert compressed["p"] == 1 and compressed["f"] == "hero.jpg"
+    assert compressor.decompress_url(compressed) == "https://www.citizensbank.com/content/dam/images/hero.jpg"
+
+
+def test_columnar_round_trip():
+    compressed = json.loads(json.dumps(compress_citizens_images(IMAGES)))
+    assert compressed["version"] == INDEX_FORMAT_VERSION
+    assert compressed["layout"] == "columnar"
+    assert compressed["metadata"]["urls"] == 5  # shared page URL stored once
+    assert decompress_citizens_images(compressed) == IMAGES
+
+
+def test_legacy_format_still_decompresses():
+    assert decompress_citizens_images(LEGACY_INDEX) == [{
+        "image_url": "https://www.citizensbank.com/content/dam/images/hero.jpg",
+        "page_urls": ["https://www.citizensbank.com/personal?a=1"],
+        "page_count": 1,
+    }]
+    legacy = json.loads(json.dumps(compress_citizens_images(IMAGES, version=LEGACY_INDEX_FORMAT_VERSION)))
+    assert legacy["version"] == LEGACY_INDEX_FORMAT_VERSION
+    assert decompress_citizens_images(legacy) == IMAGES
+    assert decompress_citizens_images(IMAGES) == IMAGES
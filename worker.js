@@ -230,14 +230,16 @@ function updateStage(stageName, patch) {
   Object.assign(target, patch);
 }
 
-function markRunningStage(stageName) {
+function markRunningStage(stageName, runningStages = null) {
+  // Independent stages run concurrently; the host lists the ones still in flight
+  const stillRunning = new Set(Array.isArray(runningStages) ? runningStages : []);
   for (const stage of auditRuntime.stages) {
     if (stage.name === stageName) {
       stage.status = 'running';
       stage.message = null;
       continue;
     }
-    if (stage.status === 'running') {
+    if (stage.status === 'running' && !stillRunning.has(stage.name)) {
       stage.status = 'pending';
       stage.message = null;
     }
@@ -246,7 +248,15 @@ function markRunningStage(stageName) {
 
 function pushAuditLog(message) {
   if (!message) return;
-  auditRuntime.logs.push({ at: new Date().toISOString(), message: String(message) });
+  pushAuditLogs([message]);
+}
+
+function pushAuditLogs(messages) {
+  // The host batches stage output (log_batch); keep only the newest 250 lines
+  const at = new Date().toISOString();
+  for (const message of messages) {
+    if (message) auditRuntime.logs.push({ at, message: String(message) });
+  }
   if (auditRuntime.logs.length > 250) {
     auditRuntime.logs = auditRuntime.logs.slice(auditRuntime.logs.length - 250);
   }
@@ -297,7 +307,7 @@ function handleAuditHostMessage(msg) {
     auditRuntime.stage = msg.stage || auditRuntime.stage;
     auditRuntime.message = msg.message || auditRuntime.message;
     if (msg.stage && msg.status === 'running') {
-      markRunningStage(msg.stage);
+      markRunningStage(msg.stage, msg.runningStages);
     }
     if (msg.message) pushAuditLog(msg.message);
     return;
@@ -306,12 +316,18 @@ function handleAuditHostMessage(msg) {
     if (msg.message) pushAuditLog(msg.message);
     return;
   }
+  if (type === 'log_batch') {
+    if (Array.isArray(msg.messages)) pushAuditLogs(msg.messages);
+    return;
+  }
   if (type === 'progress') {
     const current = Number(msg.current);
     const total = Number(msg.total);
     const explicitPercent = Number(msg.percent);
     const imagesDiscovered = Number(msg.images_discovered);
     const imagesPending = Number(msg.images_pending);
+    // Moving-average throughput from the stage's ProgressTracker; null until it has two samples
+    const finiteOrNull = (value) => (value == null || !Number.isFinite(Number(value)) ? null : Number(value));
     const percent = Number.isFinite(explicitPercent)
       ? explicitPercent
       : (Number.isFinite(current) && Number.isFinite(total) && total > 0 ? Math.round((current / total) * 10000) / 100 : 0);
@@ -324,7 +340,11 @@ function handleAuditHostMessage(msg) {
       message: msg.message || null,
       resumed: !!msg.resumed,
       images_discovered: Number.isFinite(imagesDiscovered) ? imagesDiscovered : 0,
-      images_pending: Number.isFinite(imagesPending) ? imagesPending : 0
+      images_pending: Number.isFinite(imagesPending) ? imagesPending : 0,
+      rate_per_sec: finiteOrNull(msg.rate_per_sec),
+      eta_seconds: finiteOrNull(msg.eta_seconds),
+      bytes_per_sec: finiteOrNull(msg.bytes_per_sec),
+      error_rate: finiteOrNull(msg.error_rate)
     };
     if (msg.message) {
       auditRuntime.message = msg.message;
@@ -333,11 +353,12 @@ function handleAuditHostMessage(msg) {
   }
   if (type === 'stage_start') {
     auditRuntime.stage = msg.stage || auditRuntime.stage;
-    markRunningStage(msg.stage);
+    markRunningStage(msg.stage, msg.runningStages);
     return;
   }
   if (type === 'stage_complete') {
-    updateStage(msg.stage, { status: 'completed', message: 'Completed' });
+    // metrics: CPU seconds, peak RSS, HTTP requests, bytes and cache hit ratios of the stage
+    updateStage(msg.stage, { status: 'completed', message: 'Completed', metrics: msg.metrics || null });
     return;
   }
   if (type === 'complete') {
@@ -446,7 +467,7 @@ function handleNativeDisconnect() {
   auditPort = null;
 }
 
-function startAuditNativeRun(mode, stage, phashThreshold = 8) {
+function startAuditNativeRun(mode, stage, phashThreshold = 8, profile = null) {
   if (auditRuntime.running) {
     return { ok: false, error: 'Audit already running' };
   }
@@ -457,21 +478,25 @@ function startAuditNativeRun(mode, stage, phashThreshold = 8) {
   auditRuntime.startedAt = new Date().toISOString();
   auditRuntime.reconnectAttempts = 0;
 
-  try {
-    auditPort = chrome.runtime.connectNative(AUDIT_NATIVE_HOST);
-  } catch (err) {
-    auditRuntime.running = false;
-    auditRuntime.state = 'error';
-    auditRuntime.error = String(err?.message || err);
-    persistRuntime();
-    return { ok: false, error: auditRuntime.error };
-  }
+  // Reuse a connected host: its warm stage worker keeps stage reruns near-instant
+  if (!auditPort) {
+    try {
+      auditPort = chrome.runtime.connectNative(AUDIT_NATIVE_HOST);
+    } catch (err) {
+      auditRuntime.running = false;
+      auditRuntime.state = 'error';
+      auditRuntime.error = String(err?.message || err);
+      persistRuntime();
+      return { ok: false, error: auditRuntime.error };
+    }
 
-  auditPort.onMessage.addListener(handleAuditHostMessage);
-  auditPort.onDisconnect.addListener(handleNativeDisconnect);
+    auditPort.onMessage.addListener(handleAuditHostMessage);
+    auditPort.onDisconnect.addListener(handleNativeDisconnect);
+  }
 
-  sendSignedCommand({ command: 'run', mode, stage, phash_threshold: phashThreshold });
-  pushAuditLog(`Started audit run mode=${mode}${stage ? ` stage=${stage}` : ''} threshold=${phashThreshold}`);
+  // profile: 'cpu' | 'mem' profiles every stage into assets/audit/profiles/<runId>
+  sendSignedCommand({ command: 'run', mode, stage, phash_threshold: phashThreshold, warmWorker: true, profile });
+  pushAuditLog(`Started audit run mode=${mode}${stage ? ` stage=${stage}` : ''} threshold=${phashThreshold}${profile ? ` profile=${profile}` : ''}`);
   
   startHeartbeat();
   persistRuntime();
@@ -520,7 +545,8 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
         const mode = msg?.mode || 'pipeline';
         const stage = msg?.stage || null;
         const phashThreshold = msg?.phashThreshold || 8;
-        sendResponse(startAuditNativeRun(mode, stage, phashThreshold));
+        const profile = msg?.profile || null;
+        sendResponse(startAuditNativeRun(mode, stage, phashThreshold, profile));
         return;
       }
 